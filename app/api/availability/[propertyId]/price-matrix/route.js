@@ -0,0 +1,108 @@
+import { NextResponse } from 'next/server';
+import { getAvailability, formatDateLocal } from '@/lib/uplisting';
+import { getCatalogueProperty } from '@/lib/property-catalogue';
+import { getPricingPlan } from '@/lib/pricing-calculator';
+import {
+  buildPriceMatrix,
+  matrixCalendarEnd,
+  MATRIX_DEFAULT_DAYS,
+  MATRIX_MAX_DAYS,
+  MATRIX_DEFAULT_NIGHTS,
+  MATRIX_MAX_NIGHTS,
+} from '@/lib/price-matrix';
+import { logger } from '@/lib/logger';
+import { conditionalJson, CACHE_POLICIES } from '@/lib/http-cache';
+import { applyHolds, getHeldNights } from '@/lib/booking-holds';
+
+function boundedInt(value, fallback, min, max) {
+  const parsed = parseInt(value, 10);
+  if (Number.isNaN(parsed)) return fallback;
+  return Math.min(max, Math.max(min, parsed));
+}
+
+/**
+ * Total prices for every check-in x nights combination in a window
+ * GET /api/availability/[propertyId]/price-matrix?from=&days=&maxNights=&guests=
+ * See lib/price-matrix.js for the layout; clients price selections with priceFromMatrix.
+ */
+export async function GET(request, { params }) {
+  try {
+    const { searchParams } = new URL(request.url);
+    const from = searchParams.get('from') || formatDateLocal(new Date());
+    const days = boundedInt(searchParams.get('days'), MATRIX_DEFAULT_DAYS, 1, MATRIX_MAX_DAYS);
+    const maxNights = boundedInt(searchParams.get('maxNights'), MATRIX_DEFAULT_NIGHTS, 1, MATRIX_MAX_NIGHTS);
+    const guests = boundedInt(searchParams.get('guests'), 2, 1, 50);
+
+    if (!/^\d{4}-\d{2}-\d{2}$/.test(from) || Number.isNaN(Date.parse(from))) {
+      return NextResponse.json(
+        { error: 'Invalid from date' },
+        { status: 400 }
+      );
+    }
+
+    const to = matrixCalendarEnd(from, days, maxNights);
+    const [property, uplistingCalendar, heldNights] = await Promise.all([
+      getCatalogueProperty(params.propertyId),
+      getAvailability(params.propertyId, from, to),
+      getHeldNights(params.propertyId, from, to),
+    ]);
+    // Nights held by checkouts in progress are priced but not available
+    const calendarData = applyHolds(uplistingCalendar, heldNights);
+
+    if (!property) {
+      return NextResponse.json(
+        { error: 'Property not found' },
+        { status: 404 }
+      );
+    }
+
+    const cleaningFee = property.fees?.find(fee =>
+      fee.attributes?.label === 'cleaning_fee' && fee.attributes?.enabled === true
+    )?.attributes?.amount || 0;
+
+    const startedAt = performance.now();
+    const matrix = buildPriceMatrix({
+      calendarData,
+      plan: getPricingPlan(property),
+      cleaningFee,
+      from,
+      days,
+      maxNights,
+      guests,
+    });
+
+    logger.info('Price matrix built', {
+      propertyId: params.propertyId,
+      days,
+      maxNights,
+      guests,
+      fallbackNights: matrix.fallbackNights.length,
+      unavailableNights: matrix.unavailableNights.length,
+      durationMs: Math.round(performance.now() - startedAt),
+    });
+
+    const stale = calendarData.stale || property.stale;
+    return conditionalJson(
+      request,
+      { propertyId: params.propertyId, ...matrix, ...(stale && { stale }) },
+      stale ? CACHE_POLICIES.stale : CACHE_POLICIES.availability
+    );
+  } catch (error) {
+    logger.error('Error building price matrix', {
+      propertyId: params.propertyId,
+      message: error.message,
+      statusCode: error.statusCode
+    });
+
+    const statusCode = error.statusCode || 500;
+    const errorMessage = error.userMessage || 'Failed to build price matrix';
+
+    return NextResponse.json(
+      {
+        error: errorMessage,
+        details: process.env.NODE_ENV === 'development' ? error.message : undefined
+      },
+      { status: statusCode }
+    );
+  }
+}
@@ -2,6 +2,9 @@ import { NextResponse } from 'next/server';
 import { getAvailability, calculatePricing, calculateAccommodationTotal } from '@/lib/uplisting';
 import { sendMissingRatesAlert, sendNoRatesAlert } from '@/lib/email-alerts';
 import { logger } from '@/lib/logger';
+import { conditionalJson, CACHE_POLICIES } from '@/lib/http-cache';
+import { encodeCalendar, COMPACT_FORMAT } from '@/lib/calendar-format';
+import { applyHolds, getHeldNights } from '@/lib/booking-holds';
 
 export async function GET(request, { params }) {
   try {
@@ -9,6 +12,8 @@ export async function GET(request, { params }) {
     const from = searchParams.get('from');
     const to = searchParams.get('to');
     const forBooking = searchParams.get('forBooking') === 'true'; // Flag for booking calculations
+    // Opt-in columnar calendar (lib/calendar-format.js); the raw Uplisting calendar by default
+    const format = searchParams.get('format') || 'uplisting';
     
     if (!from || !to) {
       return NextResponse.json(
@@ -16,6 +21,13 @@ export async function GET(request, { params }) {
         { status: 400 }
       );
     }
+
+    if (format !== 'uplisting' && format !== COMPACT_FORMAT) {
+      return NextResponse.json(
+        { error: `Unknown format: use 'uplisting' or '${COMPACT_FORMAT}'` },
+        { status: 400 }
+      );
+    }
     
     // For bookings, we need to fetch one extra day beyond checkout
     // because the last night's rate in Uplisting corresponds to the checkout date
@@ -33,20 +45,33 @@ export async function GET(request, { params }) {
       });
     }
     
-    const calendarData = await getAvailability(params.propertyId, from, fetchTo);
+    // Booking totals are on the checkout path, so they go ahead of browsing calls
+    const [uplistingCalendar, heldNights] = await Promise.all([
+      getAvailability(params.propertyId, from, fetchTo, {
+        lane: forBooking ? 'critical' : 'browsing',
+      }),
+      getHeldNights(params.propertyId, from, fetchTo),
+    ]);
+    // Nights reserved by checkouts in progress (lib/booking-holds.js) are not on offer
+    const calendarData = applyHolds(uplistingCalendar, heldNights);
+    const calendar = format === COMPACT_FORMAT ? encodeCalendar(calendarData) : calendarData;
+    // Last-known-good calendar served during an Uplisting outage (lib/uplisting.js)
+    const { stale } = calendarData;
+    const cachePolicy = policy => (stale ? CACHE_POLICIES.stale : policy);
     
     // For bookings, use the new accommodation total calculation
     if (forBooking) {
       const accommodationCalc = calculateAccommodationTotal(calendarData, from, to);
       
       if (!accommodationCalc.success) {
-        return NextResponse.json({
-          calendar: calendarData,
+        return conditionalJson(request, {
+          calendar,
+          ...(stale && { stale }),
           pricing: {
             error: accommodationCalc.error,
             available: false
           }
-        });
+        }, cachePolicy(CACHE_POLICIES.booking));
       }
       
       // Check if fallback rates were used and send alert
@@ -94,8 +119,9 @@ export async function GET(request, { params }) {
       }
       
       // Return booking-specific pricing
-      return NextResponse.json({
-        calendar: calendarData,
+      return conditionalJson(request, {
+        calendar,
+        ...(stale && { stale }),
         pricing: {
           total: accommodationCalc.accommodationTotal,
           averageRate: accommodationCalc.averagePerNight,
@@ -105,16 +131,17 @@ export async function GET(request, { params }) {
           usedFallback: accommodationCalc.usedFallback,
           available: true
         }
-      });
+      }, cachePolicy(CACHE_POLICIES.booking));
     }
     
     // For browsing/listing, use the old calculation method
     const pricing = calculatePricing(calendarData);
     
-    return NextResponse.json({
-      calendar: calendarData,
+    return conditionalJson(request, {
+      calendar,
+      ...(stale && { stale }),
       pricing
-    });
+    }, cachePolicy(CACHE_POLICIES.availability));
   } catch (error) {
     logger.error('Error fetching availability', {
       propertyId: params.propertyId,
@@ -1,20 +1,11 @@
 import { NextResponse } from 'next/server';
 import { logger } from '@/lib/logger';
-
-const UPLISTING_API_KEY = process.env.UPLISTING_API_KEY;
-const UPLISTING_API_URL = process.env.UPLISTING_API_URL;
-const UPLISTING_CLIENT_ID = process.env.UPLISTING_CLIENT_ID;
+import { bookingOutcomeUnknown, createBooking, invalidateAvailability } from '@/lib/uplisting';
 
 export async function POST(request) {
   try {
     const bookingData = await request.json();
     
-    const headers = {
-      'Authorization': `Basic ${UPLISTING_API_KEY}`,
-      'X-Uplisting-Client-Id': UPLISTING_CLIENT_ID,
-      'Content-Type': 'application/json'
-    };
-    
     logger.info('Creating Uplisting booking', { service: 'Uplisting' });
     
     // Get base URL from environment or construct it
@@ -48,11 +39,7 @@ export async function POST(request) {
     
     logger.info('Booking payload prepared', { propertyId: bookingData.propertyId });
     
-    const response = await fetch(`${UPLISTING_API_URL}/v2/bookings`, {
-      method: 'POST',
-      headers,
-      body: JSON.stringify(uplistingBooking)
-    });
+    const response = await createBooking(uplistingBooking);
     
     // Handle both JSON and text responses
     let data;
@@ -76,6 +63,7 @@ export async function POST(request) {
     }
     
     logger.info('Booking created successfully', { bookingId: data.data?.id });
+    invalidateAvailability(bookingData.propertyId, bookingData.checkIn, bookingData.checkOut);
     
     // Return booking details including payment link
     return NextResponse.json({
@@ -88,6 +76,13 @@ export async function POST(request) {
     
   } catch (error) {
     logger.error('Error creating booking', error);
+    if (bookingOutcomeUnknown(error)) {
+      // The booking may exist: asking the guest to try again could book them twice
+      return NextResponse.json(
+        { error: 'Your booking is still being confirmed. Please check your email before trying again.' },
+        { status: 504 }
+      );
+    }
     return NextResponse.json(
       { error: 'Failed to create booking. Please try again later.' },
       { status: 500 }
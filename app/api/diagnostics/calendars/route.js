@@ -0,0 +1,24 @@
+import { NextResponse } from 'next/server';
+import { getCalendarCacheStatus } from '@/lib/calendar-cache';
+import { getCalendarWarmerStatus } from '@/lib/calendar-warmer';
+import { getSnapshotStoreStatus } from '@/lib/snapshot-store';
+
+/**
+ * Calendar warmer status, the age of every cached calendar and the
+ * last-known-good snapshot store
+ * GET /api/diagnostics/calendars
+ * Only available when ENABLE_DIAGNOSTICS=true
+ */
+export async function GET() {
+  if (process.env.ENABLE_DIAGNOSTICS !== 'true') {
+    return NextResponse.json({ error: 'Not found' }, { status: 404 });
+  }
+
+  return NextResponse.json({
+    warmer: getCalendarWarmerStatus(),
+    cache: getCalendarCacheStatus(),
+    snapshots: getSnapshotStoreStatus(),
+  }, {
+    headers: { 'Cache-Control': 'no-store' },
+  });
+}
@@ -0,0 +1,113 @@
+import { readdir, stat } from 'fs/promises';
+import path from 'path';
+import v8 from 'v8';
+import { NextResponse } from 'next/server';
+import { getHoldMetrics } from '@/lib/booking-holds';
+import { getCalendarCacheStatus } from '@/lib/calendar-cache';
+import { getEmailServiceStatus } from '@/lib/email';
+import { getMongoStatus } from '@/lib/mongodb';
+import { getCatalogueStatus } from '@/lib/property-catalogue';
+import { getRecaptchaMetrics } from '@/lib/recaptcha';
+import { getSnapshotStoreStatus } from '@/lib/snapshot-store';
+import { getUplistingMetrics } from '@/lib/uplisting';
+import { getUpstreamMetrics } from '@/lib/upstream-http';
+import { getSchedulerMetrics } from '@/lib/upstream-scheduler';
+
+// A snapshot of this process, never prerendered
+export const dynamic = 'force-dynamic';
+export const runtime = 'nodejs';
+
+// Where `next start` and the standalone server keep fetch() responses on disk
+const FETCH_CACHE_DIR = path.join(process.cwd(), '.next', 'cache', 'fetch-cache');
+
+async function directorySize(dir) {
+  let entries;
+  try {
+    entries = await readdir(dir, { withFileTypes: true });
+  } catch {
+    return { files: 0, bytes: 0 };
+  }
+  const sizes = await Promise.all(entries.map(async (entry) => {
+    const full = path.join(dir, entry.name);
+    if (entry.isDirectory()) return directorySize(full);
+    const { size } = await stat(full).catch(() => ({ size: 0 }));
+    return { files: 1, bytes: size };
+  }));
+  return sizes.reduce((sum, size) => ({ files: sum.files + size.files, bytes: sum.bytes + size.bytes }),
+    { files: 0, bytes: 0 });
+}
+
+function rateLimitStatus(request) {
+  // Set by the middleware, which owns the token cache
+  try {
+    return JSON.parse(request.headers.get('x-rate-limit-status'));
+  } catch {
+    return null;
+  }
+}
+
+/**
+ * Process memory and the size of every module-level cache, for soak tests
+ * Every number under `caches` is a size (entries, sockets, bytes), never a
+ * counter, so steady traffic should level it off.
+ * GET /api/diagnostics/memory
+ * Only available when ENABLE_DIAGNOSTICS=true
+ */
+export async function GET(request) {
+  if (process.env.ENABLE_DIAGNOSTICS !== 'true') {
+    return NextResponse.json({ error: 'Not found' }, { status: 404 });
+  }
+
+  const memory = process.memoryUsage();
+  const heap = v8.getHeapStatistics();
+  const uplisting = getUplistingMetrics();
+  const calendars = Object.values(getCalendarCacheStatus().calendars);
+  const catalogue = getCatalogueStatus();
+  const snapshots = getSnapshotStoreStatus();
+  const holds = getHoldMetrics();
+  const origins = Object.values(getUpstreamMetrics().origins);
+  const schedulers = Object.values(getSchedulerMetrics());
+  const rateLimit = rateLimitStatus(request);
+  const email = getEmailServiceStatus();
+
+  return NextResponse.json({
+    pid: process.pid,
+    uptimeS: process.uptime(),
+    memory: {
+      rss: memory.rss,
+      heapTotal: memory.heapTotal,
+      heapUsed: memory.heapUsed,
+      external: memory.external,
+      arrayBuffers: memory.arrayBuffers,
+    },
+    heap: {
+      heapSizeLimit: heap.heap_size_limit,
+      mallocedMemory: heap.malloced_memory,
+      nativeContexts: heap.number_of_native_contexts,
+      detachedContexts: heap.number_of_detached_contexts,
+    },
+    caches: {
+      rateLimit: rateLimit && { tokens: rateLimit.tokens },
+      uplisting: { responses: uplisting.cached, inFlight: uplisting.inFlight },
+      calendars: { windows: calendars.length, days: calendars.reduce((sum, entry) => sum + entry.days, 0) },
+      catalogue: { properties: catalogue.properties, views: catalogue.views, details: catalogue.details },
+      recaptcha: { results: getRecaptchaMetrics().cacheSize },
+      snapshots: { savedKeys: snapshots.savedKeys },
+      holds: { properties: holds.cachedProperties },
+      upstream: {
+        origins: origins.length,
+        openSockets: origins.reduce((sum, origin) => sum + origin.openSockets, 0),
+        freeSockets: origins.reduce((sum, origin) => sum + origin.freeSockets, 0),
+        queued: origins.reduce((sum, origin) => sum + origin.queueDepth, 0),
+      },
+      schedulers: { count: schedulers.length, queued: schedulers.reduce((sum, s) => sum + s.queueDepth, 0) },
+      mongoClients: { count: getMongoStatus().connected ? 1 : 0 },
+      emailClients: {
+        count: Object.values(email).filter(provider => provider.clientLoaded).length,
+      },
+      nextFetchCache: await directorySize(FETCH_CACHE_DIR),
+    },
+  }, {
+    headers: { 'Cache-Control': 'no-store' },
+  });
+}
@@ -0,0 +1,18 @@
+import { NextResponse } from 'next/server';
+import { getUplistingMetrics } from '@/lib/uplisting';
+
+/**
+ * Uplisting client metrics (cache hits and single-flight coalescing per request kind,
+ * rate-limit tokens and queue depth per lane)
+ * GET /api/diagnostics/uplisting
+ * Only available when ENABLE_DIAGNOSTICS=true
+ */
+export async function GET() {
+  if (process.env.ENABLE_DIAGNOSTICS !== 'true') {
+    return NextResponse.json({ error: 'Not found' }, { status: 404 });
+  }
+
+  return NextResponse.json(getUplistingMetrics(), {
+    headers: { 'Cache-Control': 'no-store' },
+  });
+}
@@ -0,0 +1,17 @@
+import { NextResponse } from 'next/server';
+import { getUpstreamMetrics } from '@/lib/upstream-http';
+
+/**
+ * Upstream connection pool metrics (connection reuse, timeouts, queueing per origin)
+ * GET /api/diagnostics/upstream
+ * Only available when ENABLE_DIAGNOSTICS=true
+ */
+export async function GET() {
+  if (process.env.ENABLE_DIAGNOSTICS !== 'true') {
+    return NextResponse.json({ error: 'Not found' }, { status: 404 });
+  }
+
+  return NextResponse.json(getUpstreamMetrics(), {
+    headers: { 'Cache-Control': 'no-store' },
+  });
+}
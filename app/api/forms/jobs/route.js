@@ -1,6 +1,6 @@
 import { NextResponse } from 'next/server';
 import { getEmailService } from '@/lib/email';
-import clientPromise from '@/lib/mongodb';
+import { getMongoClient } from '@/lib/mongodb';
 import { sanitizeEmail, sanitizeText, sanitizePhone, escapeHtml } from '@/lib/sanitize';
 import { logger } from '@/lib/logger';
 
@@ -35,7 +35,7 @@ export async function POST(request) {
     }
 
     // Store in MongoDB
-    const client = await clientPromise;
+    const client = await getMongoClient();
     const db = client.db(process.env.MONGO_DB_NAME || 'swissalpine');
     const submission = {
       type: 'job_application',
@@ -1,5 +1,5 @@
 import { NextResponse } from 'next/server';
-import clientPromise from '@/lib/mongodb';
+import { getMongoClient } from '@/lib/mongodb';
 import { sanitizeEmail } from '@/lib/sanitize';
 import { logger } from '@/lib/logger';
 
@@ -20,7 +20,7 @@ export async function POST(request) {
     }
 
     // Store in MongoDB
-    const client = await clientPromise;
+    const client = await getMongoClient();
     const db = client.db(process.env.MONGO_DB_NAME || 'swissalpine');
     
     // Check if email already exists
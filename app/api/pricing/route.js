@@ -1,6 +1,9 @@
 import { NextResponse } from 'next/server';
 import { getAvailability, calculatePricing, getCurrentMonthRange } from '@/lib/uplisting';
 
+// One calendar read per property; the catalogue is far smaller than this
+const MAX_PROPERTY_IDS = 50;
+
 // Fetch pricing for multiple properties
 export async function POST(request) {
   try {
@@ -14,11 +17,19 @@ export async function POST(request) {
       );
     }
     
+    const uniqueIds = [...new Set(propertyIds)];
+    if (uniqueIds.length > MAX_PROPERTY_IDS) {
+      return NextResponse.json(
+        { error: `At most ${MAX_PROPERTY_IDS} propertyIds per request` },
+        { status: 400 }
+      );
+    }
+    
     // If no dates provided, use current month
     const dateRange = (from && to) ? { from, to } : getCurrentMonthRange();
     
-    // Fetch pricing for all properties in parallel
-    const pricingPromises = propertyIds.map(async (propertyId) => {
+    // Fetch pricing for all properties in parallel; the Uplisting scheduler paces the calls
+    const pricingPromises = uniqueIds.map(async (propertyId) => {
       try {
         const calendarData = await getAvailability(propertyId, dateRange.from, dateRange.to);
         const pricing = calculatePricing(calendarData);
@@ -26,7 +37,8 @@ export async function POST(request) {
         return {
           propertyId,
           pricing,
-          dateRange
+          dateRange,
+          ...(calendarData.stale && { stale: calendarData.stale })
         };
       } catch (error) {
         console.error(`Error fetching pricing for property ${propertyId}:`, error);
@@ -1,16 +1,14 @@
 import { NextResponse } from 'next/server';
-import { getProperty, formatProperty } from '@/lib/uplisting';
-import { setPrimaryImage } from '@/lib/property-config';
+import { getCatalogueProperty } from '@/lib/property-catalogue';
+import { conditionalJson, CACHE_POLICIES } from '@/lib/http-cache';
 
 export async function GET(request, { params }) {
   try {
-    const data = await getProperty(params.id);
-    let property = formatProperty(data);
+    // Primary image ordering and image variants are applied once per refresh
+    const property = await getCatalogueProperty(params.id);
     
-    // Set primary image for this property if configured
-    property = setPrimaryImage(property);
-    
-    return NextResponse.json({ property });
+    // property.stale is set when Uplisting failed and the last known copy is served
+    return conditionalJson(request, { property }, property.stale ? CACHE_POLICIES.stale : CACHE_POLICIES.catalogue);
   } catch (error) {
     console.error('Error fetching property:', error);
     
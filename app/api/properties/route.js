@@ -1,16 +1,35 @@
 import { NextResponse } from 'next/server';
-import { getProperties, formatProperties } from '@/lib/uplisting';
-import { setPrimaryImagesForList } from '@/lib/property-config';
+import { getCatalogueView, parseFields } from '@/lib/property-catalogue';
+import { conditionalResponse, CACHE_POLICIES } from '@/lib/http-cache';
 
-export async function GET() {
+/**
+ * GET /api/properties
+ * 
+ * Query:
+ *   view=card         compact payload for listing cards (full property by default)
+ *   fields=a,b,c      only these top-level keys (id is always included)
+ * 
+ * Bodies are formatted and serialized once per catalogue refresh; clients
+ * revalidating with If-None-Match get a 304. During an Uplisting outage the
+ * last known catalogue is served with `stale: { since }`.
+ */
+export async function GET(request) {
   try {
-    const data = await getProperties();
-    let properties = formatProperties(data);
+    const { searchParams } = new URL(request.url);
+    const view = searchParams.get('view') === 'card' ? 'card' : 'full';
+    const fields = parseFields(searchParams.get('fields'));
     
-    // Set primary images for properties that have them configured
-    properties = setPrimaryImagesForList(properties);
+    const { body, etag, buildMs, cached, stale } = await getCatalogueView({ view, fields });
     
-    return NextResponse.json({ properties });
+    return conditionalResponse(request, {
+      body,
+      etag,
+      // Stale bodies carry `stale: { since }` and are never cached downstream
+      cacheControl: stale ? CACHE_POLICIES.stale : CACHE_POLICIES.catalogue,
+      headers: {
+        'Server-Timing': `serialize;dur=${cached ? 0 : buildMs.toFixed(1)};desc="${cached ? 'cached' : 'built'}"`,
+      },
+    });
   } catch (error) {
     console.error('Error fetching properties:', error);
     
@@ -1,4 +1,5 @@
 import { NextResponse } from 'next/server';
+import { conditionalJson, CACHE_POLICIES } from '@/lib/http-cache';
 
 /**
  * Stripe Configuration API
@@ -8,9 +9,9 @@ import { NextResponse } from 'next/server';
  * SECURITY NOTES:
  * - Only returns publishable key (safe for client-side use)
  * - Secret key never exposed to client
- * - No caching to ensure fresh keys from dashboard
+ * - Always revalidated (ETag) so keys rotated in the dashboard apply immediately
  */
-export async function GET() {
+export async function GET(request) {
   try {
     const publishableKey = process.env.NEXT_PUBLIC_STRIPE_PUBLISHABLE_KEY;
     
@@ -21,17 +22,11 @@ export async function GET() {
       );
     }
 
-    // Return with no-cache headers to prevent key caching
-    const response = NextResponse.json({
-      publishableKey,
+    // Browsers must revalidate on every use; an unchanged key answers with a 304
+    return conditionalJson(request, { publishableKey }, CACHE_POLICIES.config, {
+      'Pragma': 'no-cache',
+      'Expires': '0',
     });
-    
-    // Prevent caching of API keys
-    response.headers.set('Cache-Control', 'no-store, no-cache, must-revalidate, private');
-    response.headers.set('Pragma', 'no-cache');
-    response.headers.set('Expires', '0');
-    
-    return response;
   } catch (error) {
     return NextResponse.json(
       { error: 'Failed to load Stripe configuration' },
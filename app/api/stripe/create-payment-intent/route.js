@@ -1,11 +1,15 @@
 import { NextResponse } from 'next/server';
-import stripe, { stripeConfig } from '@/lib/stripe-client';
-import { calculateBookingPrice, toStripeCents, validateBookingDates } from '@/lib/pricing-calculator';
+import { getStripe, stripeConfig } from '@/lib/stripe-client';
+import { calculateBookingPrice, getPricingPlan, validateBookingDates } from '@/lib/pricing-calculator';
 import { generateIdempotencyKey } from '@/lib/retry-utils';
 import { createBooking } from '@/lib/booking-store';
+import { placeHold, releaseHold } from '@/lib/booking-holds';
+import { getCatalogueProperty } from '@/lib/property-catalogue';
 import { logger } from '@/lib/logger';
 
 export async function POST(request) {
+  let hold = null;
+
   try {
     const body = await request.json();
     
@@ -43,33 +47,35 @@ export async function POST(request) {
 
     const nights = dateValidation.nights;
 
-    // Fetch property data to get fees and taxes
-    const propertyResponse = await fetch(
-      `${process.env.NEXT_PUBLIC_BASE_URL}/api/properties/${propertyId}`,
-      { 
-        headers: { 'Content-Type': 'application/json' },
-        cache: 'no-store'
-      }
-    );
-
-    if (!propertyResponse.ok) {
-      const errorData = await propertyResponse.json().catch(() => ({ error: 'Unknown error' }));
+    // Fees and taxes come from the in-process property catalogue; a loopback
+    // HTTP call here would share the 'anonymous' API rate limit across all guests
+    let property;
+    try {
+      property = await getCatalogueProperty(propertyId);
+    } catch (error) {
       logger.error('Failed to fetch property data', {
         propertyId,
-        status: propertyResponse.status,
-        error: errorData
+        status: error.statusCode,
+        error: error.message
       });
       
       return NextResponse.json(
         { 
           error: 'Unable to fetch property information. Please try again later.',
-          details: process.env.NODE_ENV === 'development' ? errorData : undefined
+          details: process.env.NODE_ENV === 'development' ? error.message : undefined
         },
         { status: 503 }
       );
     }
 
-    const { property } = await propertyResponse.json();
+    // Never charge from a last-known-good copy: fees and taxes may have changed
+    if (property?.stale) {
+      logger.error('Property data is stale, Uplisting unavailable', { propertyId, since: property.stale.since });
+      return NextResponse.json(
+        { error: 'Unable to fetch property information. Please try again later.' },
+        { status: 503 }
+      );
+    }
 
     if (!property) {
       logger.error('Property not found', { propertyId });
@@ -93,12 +99,24 @@ export async function POST(request) {
       adults: adults || 2,
       children: children || 0,
       infants: infants || 0,
-      propertyFees: property.fees || [],
-      propertyTaxes: property.taxes || []
+      plan: getPricingPlan(property)
     });
 
     logger.info('Pricing calculated', { nights, currency: pricing.currency });
 
+    // Reserve the nights until the payment settles, so two guests can't pay for the same dates
+    hold = await placeHold({ propertyId, checkIn, checkOut, owner: guestEmail });
+    if (!hold.held) {
+      logger.warn('Dates held by another checkout', { propertyId, night: hold.night, heldUntil: hold.heldUntil });
+      return NextResponse.json(
+        {
+          error: 'These dates are being booked by another guest. Please choose different dates or try again later.',
+          heldUntil: hold.heldUntil,
+        },
+        { status: 409 }
+      );
+    }
+
     // Generate idempotency key
     const idempotencyKey = generateIdempotencyKey('booking', {
       propertyId,
@@ -108,9 +126,10 @@ export async function POST(request) {
     });
 
     // Create Payment Intent in Stripe
+    const stripe = await getStripe();
     const paymentIntent = await stripe.paymentIntents.create(
       {
-        amount: toStripeCents(pricing.grandTotal),
+        amount: pricing.minor.grandTotal,
         currency: stripeConfig.currency,
         automatic_payment_methods: {
           enabled: true,
@@ -167,6 +186,8 @@ export async function POST(request) {
       bookingStatus: 'pending_payment',
       source: 'website',
       marketingConsent: marketingConsent || false,
+      holdId: hold.holdId,
+      holdExpiresAt: hold.expiresAt,
     });
 
     logger.info('Booking record created', { bookingId: booking.bookingId });
@@ -176,6 +197,7 @@ export async function POST(request) {
       clientSecret: paymentIntent.client_secret,
       paymentIntentId: paymentIntent.id,
       bookingId: booking.bookingId,
+      holdExpiresAt: hold.expiresAt,
       amount: pricing.grandTotal,
       currency: pricing.currency,
       pricing: {
@@ -197,6 +219,12 @@ export async function POST(request) {
       statusCode: error.statusCode,
       stack: process.env.NODE_ENV === 'development' ? error.stack : undefined
     });
+
+    // No payment intent for the guest to pay, so nothing to hold the nights for
+    if (hold?.held) {
+      releaseHold(hold.holdId).catch(releaseError =>
+        logger.error('Failed to release booking hold', { holdId: hold.holdId, error: releaseError.message }));
+    }
     
     // Return user-friendly error message
     const statusCode = error.statusCode || 500;
@@ -1,19 +1,11 @@
 import { NextResponse } from 'next/server';
-import stripe from '@/lib/stripe-client';
+import { getStripe } from '@/lib/stripe-client';
 import { retryWithBackoff } from '@/lib/retry-utils';
 import { alertUplistingBookingFailure } from '@/lib/webhooks/alertFailure';
-import {
-  findBookingByPaymentIntent,
-  updateBookingStatus,
-  updateBookingWithUplisting,
-  markForManualReview,
-  isPaymentIntentProcessed,
-} from '@/lib/booking-store';
+import { claimPaymentIntent, completeClaim, recordPaymentFailure } from '@/lib/booking-store';
+import { releaseHold } from '@/lib/booking-holds';
 import { logger } from '@/lib/logger';
-
-const UPLISTING_API_KEY = process.env.UPLISTING_API_KEY;
-const UPLISTING_API_URL = process.env.UPLISTING_API_URL;
-const UPLISTING_CLIENT_ID = process.env.UPLISTING_CLIENT_ID;
+import { bookingOutcomeUnknown, createBooking, invalidateAvailability } from '@/lib/uplisting';
 
 /**
  * Create booking in Uplisting
@@ -21,13 +13,6 @@ const UPLISTING_CLIENT_ID = process.env.UPLISTING_CLIENT_ID;
  * @returns {Promise<Object>} Uplisting booking response
  */
 async function createUplistingBooking(bookingData) {
-  // Uplisting API key is already base64 encoded, use it directly
-  const headers = {
-    'Authorization': `Basic ${UPLISTING_API_KEY}`,
-    'X-Uplisting-Client-Id': UPLISTING_CLIENT_ID,
-    'Content-Type': 'application/json',
-  };
-
   const uplistingPayload = {
     data: {
       attributes: {
@@ -51,11 +36,8 @@ async function createUplistingBooking(bookingData) {
 
   logger.info('Creating Uplisting booking', { propertyId: bookingData.propertyId });
 
-  const response = await fetch(`${UPLISTING_API_URL}/v2/bookings`, {
-    method: 'POST',
-    headers,
-    body: JSON.stringify(uplistingPayload),
-  });
+  // Paid bookings go ahead of browsing traffic in the Uplisting rate limit
+  const response = await createBooking(uplistingPayload);
 
   const textResponse = await response.text();
   let data;
@@ -79,29 +61,24 @@ async function createUplistingBooking(bookingData) {
 /**
  * Process successful payment
  * @param {Object} paymentIntent - Stripe Payment Intent object
+ * @param {string} eventId - Stripe event ID (the idempotency claim holder)
  */
-async function processSuccessfulPayment(paymentIntent) {
+async function processSuccessfulPayment(paymentIntent, eventId) {
   const paymentIntentId = paymentIntent.id;
   
-  logger.info('Processing successful payment', { paymentIntentId });
+  logger.info('Processing successful payment', { paymentIntentId, eventId });
 
-  // Check if already processed (idempotency)
-  if (await isPaymentIntentProcessed(paymentIntentId)) {
-    logger.warn('Payment Intent already processed', { paymentIntentId });
-    return { success: true, message: 'Already processed' };
-  }
-
-  // Get booking from database
-  const booking = await findBookingByPaymentIntent(paymentIntentId);
+  // Atomic claim (idempotency): of concurrent or repeated deliveries only one
+  // gets here with claimed=true, and it already marks the payment succeeded
+  const { claimed, booking } = await claimPaymentIntent(paymentIntentId, eventId);
   if (!booking) {
     logger.error('No booking found for Payment Intent', { paymentIntentId });
     throw new Error('Booking not found');
   }
-
-  // Update payment status to succeeded
-  await updateBookingStatus(paymentIntentId, 'succeeded', 'processing_booking', {
-    paidAt: new Date(),
-  });
+  if (!claimed) {
+    logger.warn('Payment Intent already processed', { paymentIntentId, eventId, bookingStatus: booking.bookingStatus });
+    return { success: true, message: 'Already processed' };
+  }
 
   // Prepare booking data for Uplisting
   const bookingData = {
@@ -120,12 +97,18 @@ async function processSuccessfulPayment(paymentIntent) {
       () => createUplistingBooking(bookingData),
       2, // max 2 attempts as specified
       2000, // 2 second backoff
-      'Uplisting Booking Creation'
+      'Uplisting Booking Creation',
+      // A timed-out POST may have created the booking: resending could book the guest twice
+      error => !bookingOutcomeUnknown(error)
     );
 
     // Success! Update booking with Uplisting ID
     const uplistingBookingId = uplistingResponse.data?.id;
-    await updateBookingWithUplisting(paymentIntentId, uplistingBookingId, 'confirmed');
+    await completeClaim(paymentIntentId, eventId, { uplistingBookingId });
+
+    // The booked nights are gone: don't keep offering them from the calendar cache.
+    // The booking hold stays until it expires, covering the nights while the calendar catches up.
+    invalidateAvailability(booking.propertyId, booking.checkIn, booking.checkOut);
 
     logger.info('Booking completed successfully', { uplistingBookingId, bookingId: booking.bookingId });
     
@@ -136,8 +119,11 @@ async function processSuccessfulPayment(paymentIntent) {
     };
 
   } catch (error) {
-    // All retry attempts failed
-    logger.error('Failed to create Uplisting booking after retries', error);
+    // All retry attempts failed, or the outcome of one is unknown
+    const outcomeUnknown = bookingOutcomeUnknown(error);
+    logger.error(outcomeUnknown
+      ? 'Uplisting booking outcome unknown, not retrying'
+      : 'Failed to create Uplisting booking after retries', error);
 
     // Send critical admin alert via email
     await alertUplistingBookingFailure({
@@ -160,7 +146,11 @@ async function processSuccessfulPayment(paymentIntent) {
     });
 
     // Mark for manual review
-    await markForManualReview(paymentIntentId, `Uplisting booking failed after 2 retries: ${error.message}`);
+    await completeClaim(paymentIntentId, eventId, {
+      manualReviewReason: outcomeUnknown
+        ? `Uplisting did not answer the booking request (${error.message}); check Uplisting for the booking before creating it`
+        : `Uplisting booking failed after 2 retries: ${error.message}`,
+    });
 
     // Despite failure, we still consider this a success from webhook perspective
     // The payment succeeded, we just need manual intervention for the booking
@@ -182,10 +172,10 @@ async function processFailedPayment(paymentIntent) {
   
   logger.warn('Processing failed payment', { paymentIntentId });
 
-  // Update booking status
-  await updateBookingStatus(paymentIntentId, 'failed', 'cancelled', {
-    failureReason: paymentIntent.last_payment_error?.message || 'Payment failed',
-  });
+  // Update booking status (never downgrades a booking that was already paid).
+  // The hold stays: Stripe sends this for every declined attempt, and the guest
+  // may still confirm the same intent. It goes on cancellation or expiry.
+  await recordPaymentFailure(paymentIntentId, paymentIntent.last_payment_error?.message || 'Payment failed');
 
   return {
     success: true,
@@ -193,6 +183,29 @@ async function processFailedPayment(paymentIntent) {
   };
 }
 
+/**
+ * Process cancelled payment
+ * A cancelled intent can't be confirmed any more, so its nights go back to other guests.
+ * @param {Object} paymentIntent - Stripe Payment Intent object
+ */
+async function processCanceledPayment(paymentIntent) {
+  const paymentIntentId = paymentIntent.id;
+
+  logger.warn('Processing cancelled payment', { paymentIntentId, reason: paymentIntent.cancellation_reason });
+
+  const reason = paymentIntent.cancellation_reason;
+  const booking = await recordPaymentFailure(paymentIntentId, reason ? `Payment cancelled: ${reason}` : 'Payment cancelled');
+
+  if (booking?.holdId) {
+    await releaseHold(booking.holdId);
+  }
+
+  return {
+    success: true,
+    message: 'Payment cancellation recorded',
+  };
+}
+
 /**
  * Webhook handler configuration
  * Disable body parsing to get raw body for signature verification
@@ -232,6 +245,7 @@ export async function POST(request) {
         );
       }
     } else {
+      const stripe = await getStripe();
       event = stripe.webhooks.constructEvent(body, signature, webhookSecret);
     }
     
@@ -249,7 +263,7 @@ export async function POST(request) {
     switch (event.type) {
       case 'payment_intent.succeeded':
         const paymentIntent = event.data.object;
-        const result = await processSuccessfulPayment(paymentIntent);
+        const result = await processSuccessfulPayment(paymentIntent, event.id);
         return NextResponse.json(result);
 
       case 'payment_intent.payment_failed':
@@ -257,6 +271,11 @@ export async function POST(request) {
         const failureResult = await processFailedPayment(failedPaymentIntent);
         return NextResponse.json(failureResult);
 
+      case 'payment_intent.canceled':
+        const canceledPaymentIntent = event.data.object;
+        const cancelResult = await processCanceledPayment(canceledPaymentIntent);
+        return NextResponse.json(cancelResult);
+
       default:
         logger.warn('Unhandled event type', { eventType: event.type });
         return NextResponse.json({ received: true });
@@ -0,0 +1,94 @@
+import { NextResponse } from 'next/server';
+import { sendEmailBatch, sendAdminAlert } from '@/lib/email';
+import { alertUplistingBookingFailure } from '@/lib/webhooks/alertFailure';
+import { logger } from '@/lib/logger';
+
+const MAX_BATCH_SIZE = 500;
+
+/**
+ * Email delivery self-test
+ * GET /api/test-email?count=N
+ *
+ * Sends a simple admin alert, a booking failure alert and (optionally) a
+ * batch of N messages through the configured transport. Disabled unless
+ * ENABLE_TEST_EMAIL_ENDPOINT=true, so it is only reachable in test setups
+ * (typically together with EMAIL_PROVIDER=capture).
+ */
+export async function GET(request) {
+  if (process.env.ENABLE_TEST_EMAIL_ENDPOINT !== 'true') {
+    return NextResponse.json({ error: 'Not found' }, { status: 404 });
+  }
+
+  try {
+    const { searchParams } = new URL(request.url);
+    const count = Math.min(
+      Math.max(parseInt(searchParams.get('count') || '0', 10) || 0, 0),
+      MAX_BATCH_SIZE
+    );
+    const recipient = process.env.ADMIN_EMAIL;
+
+    const simpleAlert = await sendAdminAlert({
+      subject: 'Test email',
+      message: '<p>This is a test email from the Swiss Alpine Journey booking system.</p>',
+      severity: 'info',
+      metadata: { test: true }
+    });
+
+    const bookingFailureAlert = await alertUplistingBookingFailure({
+      paymentIntentId: 'pi_test_email',
+      amount: 0,
+      bookingDetails: {
+        propertyId: 'test',
+        checkIn: 'n/a',
+        checkOut: 'n/a',
+        adults: 0,
+        children: 0,
+        infants: 0,
+        firstName: 'Test',
+        lastName: 'Email',
+        email: recipient,
+        phone: ''
+      },
+      error: 'Test alert - no action required',
+      retryCount: 0
+    });
+
+    let batch = null;
+    if (count > 0) {
+      const messages = Array.from({ length: count }, (_, i) => ({
+        to: recipient,
+        subject: `Batch test email ${i + 1}/${count}`,
+        html: `<p>Batch test message ${i + 1} of ${count}.</p>`,
+        metadata: { test: true, sequence: i + 1 }
+      }));
+
+      const startedAt = performance.now();
+      const result = await sendEmailBatch(messages);
+      const durationMs = performance.now() - startedAt;
+
+      batch = {
+        ...result,
+        sent: result.messageIds.length,
+        durationMs,
+        messagesPerSecond: durationMs > 0 ? (result.messageIds.length / durationMs) * 1000 : null
+      };
+    }
+
+    return NextResponse.json({
+      success: simpleAlert.success && bookingFailureAlert.success && (!batch || batch.success),
+      recipient,
+      provider: simpleAlert.provider,
+      results: {
+        simpleAlert,
+        bookingFailureAlert,
+        batch
+      }
+    });
+  } catch (error) {
+    logger.error('Test email failed', error);
+    return NextResponse.json(
+      { success: false, error: 'Failed to send test email' },
+      { status: 500 }
+    );
+  }
+}
@@ -0,0 +1,97 @@
+import { NextResponse } from 'next/server';
+import { createHmac, timingSafeEqual } from 'crypto';
+import { logger } from '@/lib/logger';
+import { invalidateAvailability } from '@/lib/uplisting';
+
+/**
+ * Uplisting change notifications (bookings, rates, availability)
+ * POST /api/uplisting/webhook
+ *
+ * Each notification invalidates the cached availability of one property for
+ * the changed date span only (the whole calendar when no dates are given).
+ * Signed with HMAC-SHA256 of the raw body (hex) in X-Uplisting-Signature,
+ * keyed with UPLISTING_WEBHOOK_SECRET.
+ */
+export const runtime = 'nodejs';
+
+function signatureMatches(body, signature, secret) {
+  const expected = Buffer.from(createHmac('sha256', secret).update(body).digest('hex'));
+  const received = Buffer.from(String(signature).replace(/^sha256=/, ''));
+  return received.length === expected.length && timingSafeEqual(received, expected);
+}
+
+function toDate(value) {
+  if (!value) return null;
+  const date = String(value).slice(0, 10);
+  return /^\d{4}-\d{2}-\d{2}$/.test(date) ? date : null;
+}
+
+/**
+ * Property and date span of a notification, whatever its envelope
+ * @param {Object} event - Parsed notification body
+ * @returns {Object|null} { type, propertyId, from, to }, or null without a property
+ */
+function changedSpan(event) {
+  const data = event.data || event.payload || event;
+  const attributes = data.attributes || data;
+  const propertyId = attributes.property_id
+    || data.relationships?.property?.data?.id
+    || event.property_id;
+  if (!propertyId) return null;
+
+  let from = toDate(attributes.check_in || attributes.from || attributes.start_date);
+  let to = toDate(attributes.check_out || attributes.to || attributes.end_date);
+  if (Array.isArray(attributes.dates) && attributes.dates.length > 0) {
+    const dates = attributes.dates.map(toDate).filter(Boolean).sort();
+    from = dates[0];
+    to = dates[dates.length - 1];
+  }
+  if (!from || !to) {
+    from = null;
+    to = null;
+  }
+
+  return { type: event.event || event.type || data.type || 'unknown', propertyId: String(propertyId), from, to };
+}
+
+export async function POST(request) {
+  const body = await request.text();
+  const secret = process.env.UPLISTING_WEBHOOK_SECRET;
+
+  if (!secret) {
+    // Only allow unverified notifications in local development
+    if (process.env.NODE_ENV !== 'development') {
+      logger.error('UPLISTING_WEBHOOK_SECRET not configured in production');
+      return NextResponse.json({ error: 'Webhook secret not configured' }, { status: 500 });
+    }
+    logger.warn('Development mode: Uplisting webhook verification skipped');
+  } else {
+    const signature = request.headers.get('x-uplisting-signature');
+    if (!signature || !signatureMatches(body, signature, secret)) {
+      logger.error('Uplisting webhook signature verification failed');
+      return NextResponse.json({ error: 'Webhook signature verification failed' }, { status: 400 });
+    }
+  }
+
+  let events;
+  try {
+    const parsed = JSON.parse(body);
+    events = Array.isArray(parsed) ? parsed : [parsed];
+  } catch (error) {
+    return NextResponse.json({ error: 'Invalid JSON body' }, { status: 400 });
+  }
+
+  const invalidated = [];
+  for (const event of events) {
+    const change = changedSpan(event || {});
+    if (!change) {
+      logger.warn('Uplisting notification without a property', { eventType: event?.event || event?.type });
+      continue;
+    }
+    const { droppedRanges, span } = invalidateAvailability(change.propertyId, change.from, change.to);
+    logger.info('Uplisting calendar change', { ...change, droppedRanges, patching: Boolean(span) });
+    invalidated.push({ ...change, droppedRanges, patched: span });
+  }
+
+  return NextResponse.json({ received: true, invalidated });
+}
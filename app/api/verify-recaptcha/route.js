@@ -1,9 +1,12 @@
 import { NextResponse } from 'next/server';
 import { logger } from '@/lib/logger';
+import { verifyRecaptchaToken, getRecaptchaMetrics, SCORE_THRESHOLD } from '@/lib/recaptcha';
 
 const RECAPTCHA_SECRET_KEY = process.env.RECAPTCHA_SECRET_KEY;
-const RECAPTCHA_VERIFY_URL = 'https://www.google.com/recaptcha/api/siteverify';
-const SCORE_THRESHOLD = 0.5; // Minimum score to pass (0.0-1.0)
+
+function serverTiming(durationMs) {
+  return { 'Server-Timing': `recaptcha;dur=${durationMs.toFixed(1)}` };
+}
 
 /**
  * Verify ReCaptcha v3 token with Google
@@ -32,19 +35,40 @@ export async function POST(request) {
       );
     }
 
-    // Verify token with Google
-    const verifyResponse = await fetch(RECAPTCHA_VERIFY_URL, {
-      method: 'POST',
-      headers: {
-        'Content-Type': 'application/x-www-form-urlencoded',
-      },
-      body: new URLSearchParams({
-        secret: RECAPTCHA_SECRET_KEY,
-        response: token,
-      }),
-    });
+    // Verify token with Google (cached by token hash, replays rejected)
+    let verification;
+    try {
+      verification = await verifyRecaptchaToken(token, { secret: RECAPTCHA_SECRET_KEY });
+    } catch (error) {
+      logger.error('ReCaptcha verifier unavailable', { error: error.message });
+      return NextResponse.json(
+        { success: false, message: 'Verification service unavailable. Please try again.' },
+        { status: 503 }
+      );
+    }
 
-    const verifyResult = await verifyResponse.json();
+    const { result: verifyResult, replay, degraded, durationMs } = verification;
+    const timingHeaders = serverTiming(durationMs);
+
+    if (replay) {
+      logger.warn('ReCaptcha token replay rejected', { action });
+      return NextResponse.json(
+        {
+          success: false,
+          message: 'Verification failed. Please try again.',
+          errorCodes: verifyResult['error-codes'],
+        },
+        { status: 400, headers: timingHeaders }
+      );
+    }
+
+    if (degraded) {
+      logger.warn('ReCaptcha verifier unavailable, failing open', { action });
+      return NextResponse.json(
+        { success: true, degraded: true, message: 'Verification skipped' },
+        { headers: timingHeaders }
+      );
+    }
 
     // Log verification attempt
     logger.info('ReCaptcha verification attempt', {
@@ -67,7 +91,7 @@ export async function POST(request) {
           message: 'Verification failed. Please try again.',
           errorCodes: verifyResult['error-codes'],
         },
-        { status: 400 }
+        { status: 400, headers: timingHeaders }
       );
     }
 
@@ -85,7 +109,7 @@ export async function POST(request) {
           message: 'Verification failed. Please try again or contact support.',
           score: verifyResult.score,
         },
-        { status: 400 }
+        { status: 400, headers: timingHeaders }
       );
     }
 
@@ -101,7 +125,7 @@ export async function POST(request) {
           success: false,
           message: 'Verification action mismatch',
         },
-        { status: 400 }
+        { status: 400, headers: timingHeaders }
       );
     }
 
@@ -111,11 +135,14 @@ export async function POST(request) {
       action: verifyResult.action,
     });
 
-    return NextResponse.json({
-      success: true,
-      score: verifyResult.score,
-      message: 'Verification successful',
-    });
+    return NextResponse.json(
+      {
+        success: true,
+        score: verifyResult.score,
+        message: 'Verification successful',
+      },
+      { headers: timingHeaders }
+    );
   } catch (error) {
     logger.error('ReCaptcha verification error', {
       error: error.message,
@@ -127,3 +154,18 @@ export async function POST(request) {
     );
   }
 }
+
+/**
+ * Verification metrics (cache, replays, timeouts, upstream latency)
+ * GET /api/verify-recaptcha
+ * Only available when ENABLE_DIAGNOSTICS=true
+ */
+export async function GET() {
+  if (process.env.ENABLE_DIAGNOSTICS !== 'true') {
+    return NextResponse.json({ error: 'Not found' }, { status: 404 });
+  }
+
+  return NextResponse.json(getRecaptchaMetrics(), {
+    headers: { 'Cache-Control': 'no-store' },
+  });
+}
@@ -13,10 +13,21 @@ import {
 } from 'lucide-react';
 import { Button } from '@/components/ui/button';
 import { formatDateLocal } from '@/lib/uplisting';
-import { validateBooking, getPropertyConstraints } from '@/lib/booking-validation';
+import { priceFromMatrix } from '@/lib/price-matrix';
+import { decodeCalendar } from '@/lib/calendar-format';
+import {
+  validateBooking,
+  getPropertyConstraints,
+  isAvailableDay,
+  isBookableArrival,
+  isCovered,
+  isValidDeparture,
+  departureWindow,
+  stayErrors,
+} from '@/lib/booking-validation';
 import { MultipleStructuredData } from '@/components/StructuredData';
 import { getPropertySchema, getVacationRentalSchema, getBreadcrumbSchema } from '@/lib/schemas';
-import { optimizeUplistingImage, IMAGE_SIZES, getImageSizes } from '@/lib/image-optimizer';
+import { variantUrl, IMAGE_SIZES, getImageSizes } from '@/lib/image-optimizer';
 import { formatCurrency, formatPerNightRate } from '@/lib/currency-formatter';
 import { useRecaptcha } from '@/hooks/useRecaptcha';
 
@@ -31,6 +42,9 @@ export default function PropertyDetailPage() {
   const [selectedImage, setSelectedImage] = useState(0);
   const [pricingLoading, setPricingLoading] = useState(false);
   const [pricingData, setPricingData] = useState(null);
+  const [priceMatrix, setPriceMatrix] = useState(null);
+  // Starts true so a selection is not priced remotely while the first matrix is on its way
+  const [priceMatrixLoading, setPriceMatrixLoading] = useState(true);
   const [validationErrors, setValidationErrors] = useState([]);
   const [validationWarnings, setValidationWarnings] = useState([]);
   
@@ -43,6 +57,8 @@ export default function PropertyDetailPage() {
   const [availabilityMap, setAvailabilityMap] = useState({});
   const [minimumStay, setMinimumStay] = useState(1);
   const [minCheckOutDate, setMinCheckOutDate] = useState(null);
+  // Valid arrivals and departures of the loaded calendar (see buildConstraintIndex)
+  const [constraintIndex, setConstraintIndex] = useState(null);
   
   // Initialize booking widget state from URL params if available
   const [checkIn, setCheckIn] = useState(
@@ -66,12 +82,20 @@ export default function PropertyDetailPage() {
     fetchProperty();
   }, [params.id]);
 
+  // One price matrix per guest count; date selections are then priced locally
+  const matrixGuests = guests.adults + guests.children + guests.infants;
+  useEffect(() => {
+    if (property) {
+      fetchPriceMatrix();
+    }
+  }, [property, matrixGuests]);
+
   // Fetch pricing when dates change
   useEffect(() => {
-    if (checkIn && checkOut && property) {
+    if (checkIn && checkOut && property && !priceMatrixLoading) {
       fetchPricing();
     }
-  }, [checkIn, checkOut, property]);
+  }, [checkIn, checkOut, property, priceMatrix, priceMatrixLoading]);
 
   // Close guest picker when clicking outside
   useEffect(() => {
@@ -103,14 +127,52 @@ export default function PropertyDetailPage() {
     }
   }
 
+  async function fetchPriceMatrix() {
+    setPriceMatrixLoading(true);
+    try {
+      const from = formatDateLocal(new Date());
+      const res = await fetch(`/api/availability/${params.id}/price-matrix?from=${from}&guests=${matrixGuests}`);
+      if (!res.ok) {
+        throw new Error('Failed to fetch price matrix');
+      }
+      setPriceMatrix(await res.json());
+    } catch (error) {
+      // Selections are priced one request at a time instead
+      console.error('Error fetching price matrix:', error);
+      setPriceMatrix(null);
+    } finally {
+      setPriceMatrixLoading(false);
+    }
+  }
+
   async function fetchPricing() {
     if (!checkIn || !checkOut) return;
     
+    const from = formatDateLocal(checkIn);
+    const to = formatDateLocal(checkOut);
+
+    // Ranges the calendar already rules out are never requested
+    if (constraintIndex) {
+      const errors = stayErrors(constraintIndex, from, to);
+      if (errors.length > 0) {
+        setPricingData(null);
+        setValidationErrors(errors);
+        return;
+      }
+    }
+
+    // Selections inside the matrix window need no request
+    const localPricing = priceFromMatrix(priceMatrix, from, to);
+    if (localPricing) {
+      setPricingData(localPricing);
+      if (!localPricing.available) {
+        alert('Some dates in your selection are not available. Please choose different dates.');
+      }
+      return;
+    }
+
     setPricingLoading(true);
     try {
-      const from = formatDateLocal(checkIn);
-      const to = formatDateLocal(checkOut);
-      
       // Use forBooking=true to get accurate accommodation total with Uplisting's date logic
       const res = await fetch(`/api/availability/${params.id}?from=${from}&to=${to}&forBooking=true`);
       const data = await res.json();
@@ -142,13 +204,15 @@ export default function PropertyDetailPage() {
       const from = formatDateLocal(today);
       const to = formatDateLocal(sixMonthsLater);
       
-      const res = await fetch(`/api/availability/${params.id}?from=${from}&to=${to}`);
+      // Columnar calendar: a fraction of the bytes of Uplisting's per-day objects
+      const res = await fetch(`/api/availability/${params.id}?from=${from}&to=${to}&format=compact`);
       
       if (!res.ok) {
         throw new Error('Failed to fetch availability data');
       }
       
-      const data = await res.json();
+      const compact = await res.json();
+      const data = { ...compact, calendar: decodeCalendar(compact.calendar) };
       setAvailabilityData(data);
       
       // Parse calendar data into map for quick lookup
@@ -175,6 +239,7 @@ export default function PropertyDetailPage() {
         
         setAvailabilityMap(calendarMap);
         setUnavailableDates(unavailable);
+        setConstraintIndex(getPropertyConstraints(property, data.calendar).index);
       }
       
       setCalendarDataFetched(true);
@@ -205,7 +270,7 @@ export default function PropertyDetailPage() {
       adults: guests.adults,
       children: guests.children,
       infants: guests.infants,
-      availabilityData: pricingData
+      availabilityData: { calendar: availabilityData?.calendar?.calendar, pricing: pricingData }
     });
     
     // If there are errors, show them and don't proceed
@@ -315,10 +380,10 @@ export default function PropertyDetailPage() {
             {/* Main large image on the left */}
             <div className="relative h-full rounded-l-xl overflow-hidden cursor-pointer">
               <Image
-                src={optimizeUplistingImage(
-                  property.photos[selectedImage]?.url || '/placeholder.jpg',
-                  IMAGE_SIZES.DETAIL_HERO
-                )}
+                src={variantUrl(
+                  property.photos[selectedImage],
+                  IMAGE_SIZES.DETAIL_HERO.width
+                ) || '/placeholder.jpg'}
                 alt={`${property.name} - Main photo`}
                 fill
                 className="object-cover"
@@ -334,7 +399,7 @@ export default function PropertyDetailPage() {
               {property.photos.slice(0, 20).map((photo, index) => (
                 <div key={index} className="relative h-[245px] overflow-hidden">
                   <Image
-                    src={optimizeUplistingImage(photo.url, IMAGE_SIZES.THUMBNAIL)}
+                    src={variantUrl(photo, IMAGE_SIZES.THUMBNAIL.width)}
                     alt={`${property.name} - Photo ${index + 1}`}
                     fill
                     className={`object-cover cursor-pointer hover:brightness-90 transition ${
@@ -643,11 +708,15 @@ export default function PropertyDetailPage() {
                           const minStay = dayData?.minStay || 1;
                           
                           // Calculate minimum check-out date
-                          const minCheckOut = new Date(start);
-                          minCheckOut.setDate(minCheckOut.getDate() + minStay);
+                          const departures = constraintIndex && departureWindow(constraintIndex, dateStr);
+                          const minCheckOut = departures ? new Date(`${departures.earliest}T00:00:00`) : new Date(start);
+                          if (!departures) {
+                            minCheckOut.setDate(minCheckOut.getDate() + minStay);
+                          }
                           
                           setMinimumStay(minStay);
                           setMinCheckOutDate(minCheckOut);
+                          setValidationErrors([]);
                         }
                         
                         setCheckIn(start);
@@ -666,8 +735,20 @@ export default function PropertyDetailPage() {
                       className="w-full pl-10 pr-4 py-3 border border-gray-200 rounded-lg"
                       dateFormat="MMM dd"
                       minDate={new Date()}
-                      excludeDates={unavailableDates}
+                      excludeDates={constraintIndex ? [] : unavailableDates}
                       filterDate={(date) => {
+                        const dateStr = formatDateLocal(date);
+
+                        // With the calendar loaded, only offer valid arrivals and departures
+                        if (constraintIndex && isCovered(constraintIndex, dateStr)) {
+                          if (checkIn && !checkOut) {
+                            const checkInStr = formatDateLocal(checkIn);
+                            return isValidDeparture(constraintIndex, checkInStr, dateStr) ||
+                              (dateStr < checkInStr && isBookableArrival(constraintIndex, dateStr));
+                          }
+                          return isBookableArrival(constraintIndex, dateStr);
+                        }
+
                         // Always exclude unavailable dates
                         const isUnavailable = unavailableDates.some(
                           unavailableDate => 
@@ -700,12 +781,16 @@ export default function PropertyDetailPage() {
                       onCalendarOpen={fetchCalendarAvailability}
                       disabled={loadingAvailability}
                       dayClassName={(date) => {
-                        const isUnavailable = unavailableDates.some(
-                          unavailableDate => 
-                            unavailableDate.getDate() === date.getDate() &&
-                            unavailableDate.getMonth() === date.getMonth() &&
-                            unavailableDate.getFullYear() === date.getFullYear()
-                        );
+                        const dateStr = formatDateLocal(date);
+                        // Booked mornings that still allow a same-day arrival are not struck through
+                        const isUnavailable = constraintIndex && isCovered(constraintIndex, dateStr)
+                          ? !isAvailableDay(constraintIndex, dateStr) && !isBookableArrival(constraintIndex, dateStr)
+                          : unavailableDates.some(
+                              unavailableDate => 
+                                unavailableDate.getDate() === date.getDate() &&
+                                unavailableDate.getMonth() === date.getMonth() &&
+                                unavailableDate.getFullYear() === date.getFullYear()
+                            );
                         
                         if (isUnavailable) return 'unavailable-date';
                         
@@ -905,13 +990,28 @@ export default function PropertyDetailPage() {
                         ⚠️ Rate data only available for {pricingData.totalNights} of {nights} nights
                       </p>
                     )}
-                    <div className="flex justify-between pt-2 border-t border-gray-200">
-                      <span className="font-medium">Total</span>
-                      <span className="font-medium">{currency} {formatCurrency(totalAccommodation)}</span>
-                    </div>
-                    <p className="text-xs text-gray-500 mt-2">
-                      Service fees and taxes will be added at checkout
-                    </p>
+                    {pricingData.grandTotal > 0 ? (
+                      <>
+                        <div className="flex justify-between">
+                          <span className="text-gray-700">Fees and taxes</span>
+                          <span className="font-medium">{currency} {formatCurrency(pricingData.grandTotal - totalAccommodation)}</span>
+                        </div>
+                        <div className="flex justify-between pt-2 border-t border-gray-200">
+                          <span className="font-medium">Total</span>
+                          <span className="font-medium">{currency} {formatCurrency(pricingData.grandTotal)}</span>
+                        </div>
+                      </>
+                    ) : (
+                      <>
+                        <div className="flex justify-between pt-2 border-t border-gray-200">
+                          <span className="font-medium">Total</span>
+                          <span className="font-medium">{currency} {formatCurrency(totalAccommodation)}</span>
+                        </div>
+                        <p className="text-xs text-gray-500 mt-2">
+                          Service fees and taxes will be added at checkout
+                        </p>
+                      </>
+                    )}
                   </div>
                 )}
 
@@ -4,30 +4,24 @@
  */
 
 import { getAllBlogPostSlugs } from '@/lib/sanity';
+import { getPropertyCatalogue } from '@/lib/property-catalogue';
 
 export default async function sitemap() {
   const baseUrl = process.env.NEXT_PUBLIC_BASE_URL || 'https://swissalpinejourney.com';
   
-  // Fetch properties for dynamic URLs
+  // Properties come straight from the catalogue rather than a request to our own API
   let propertyUrls = [];
   try {
     // During build time, skip fetching properties (they'll be added at runtime)
     // This prevents "Dynamic server usage" errors during static generation
     if (process.env.NODE_ENV !== 'production' || process.env.VERCEL_ENV === 'production') {
-      const apiUrl = process.env.NEXT_PUBLIC_BASE_URL || 'http://localhost:3000';
-      const res = await fetch(`${apiUrl}/api/properties`, {
-        next: { revalidate: 3600 } // Cache for 1 hour
-      });
-      
-      if (res.ok) {
-        const data = await res.json();
-        propertyUrls = (data.properties || []).map(property => ({
-          url: `${baseUrl}/property/${property.id}`,
-          lastModified: property.updated_at || new Date(),
-          changeFrequency: 'weekly',
-          priority: 0.8,
-        }));
-      }
+      const { properties } = await getPropertyCatalogue();
+      propertyUrls = properties.map(property => ({
+        url: `${baseUrl}/property/${property.id}`,
+        lastModified: property.updated_at || new Date(),
+        changeFrequency: 'weekly',
+        priority: 0.8,
+      }));
     }
   } catch (error) {
     console.error('Error fetching properties for sitemap:', error);
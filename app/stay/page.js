@@ -69,7 +69,7 @@ function StayPageContent() {
 
   async function fetchProperties() {
     try {
-      const res = await fetch('/api/properties');
+      const res = await fetch('/api/properties?view=card');
       const data = await res.json();
       const props = data.properties || [];
       setProperties(props);
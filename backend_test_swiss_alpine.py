@@ -12,7 +12,7 @@ import os
 import time
 
 # Configuration
-BASE_URL = "https://secure-forms-2.preview.emergentagent.com"
+BASE_URL = os.environ.get("HARNESS_BASE_URL", "https://secure-forms-2.preview.emergentagent.com")
 API_BASE = f"{BASE_URL}/api"
 
 # Test property IDs from the review request
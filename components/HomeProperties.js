@@ -16,7 +16,7 @@ export default function HomeProperties({ sectionHeading = 'Our listings', ctaTex
 
   async function fetchProperties() {
     try {
-      const res = await fetch('/api/properties');
+      const res = await fetch('/api/properties?view=card');
       const data = await res.json();
       setProperties(data.properties || []);
     } catch (error) {
@@ -6,7 +6,7 @@ import Image from 'next/image';
 import { ChevronLeft, ChevronRight, Users, Bed, Bath, Calendar, Clock, Sparkles } from 'lucide-react';
 import { Button } from '@/components/ui/button';
 import { formatDateLocal } from '@/lib/uplisting';
-import { optimizeUplistingImage, IMAGE_SIZES, getImageSizes } from '@/lib/image-optimizer';
+import { variantUrl, IMAGE_SIZES, getImageSizes } from '@/lib/image-optimizer';
 import { formatCurrency } from '@/lib/currency-formatter';
 
 export default function PropertyCard({ property, priceDisplay, showFallbackWarning, isUnavailable, filters, nights }) {
@@ -99,10 +99,10 @@ export default function PropertyCard({ property, priceDisplay, showFallbackWarni
 
           {/* Property Image - Optimized with Next.js Image */}
           <Image
-            src={optimizeUplistingImage(
-              property.photos[currentImageIndex]?.url || property.photos[0]?.url || '/placeholder.jpg',
-              IMAGE_SIZES.CARD
-            )}
+            src={variantUrl(
+              property.photos[currentImageIndex] || property.photos[0],
+              IMAGE_SIZES.CARD.width
+            ) || '/placeholder.jpg'}
             alt={`${property.name} - Photo ${currentImageIndex + 1}`}
             fill
             className="object-cover group-hover:scale-105 transition-transform duration-300"
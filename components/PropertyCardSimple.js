@@ -5,7 +5,7 @@ import Link from 'next/link';
 import Image from 'next/image';
 import { ChevronLeft, ChevronRight, Users, Bed, Bath } from 'lucide-react';
 import { Button } from '@/components/ui/button';
-import { optimizeUplistingImage, IMAGE_SIZES, getImageSizes } from '@/lib/image-optimizer';
+import { variantUrl, IMAGE_SIZES, getImageSizes } from '@/lib/image-optimizer';
 
 export default function PropertyCardSimple({ property }) {
   const [currentImageIndex, setCurrentImageIndex] = useState(0);
@@ -30,10 +30,10 @@ export default function PropertyCardSimple({ property }) {
     <Link href={`/property/${property.id}`} className="block group cursor-pointer">
       <div className="relative aspect-[4/3] rounded-2xl overflow-hidden mb-4">
         <Image
-          src={optimizeUplistingImage(
-            property.photos[currentImageIndex]?.url || property.photos[0]?.url || '/placeholder.jpg',
-            IMAGE_SIZES.CARD
-          )}
+          src={variantUrl(
+            property.photos[currentImageIndex] || property.photos[0],
+            IMAGE_SIZES.CARD.width
+          ) || '/placeholder.jpg'}
           alt={`${property.name} - Photo ${currentImageIndex + 1}`}
           fill
           className="object-cover group-hover:scale-105 transition-transform duration-300"
@@ -4,13 +4,14 @@ COMPREHENSIVE PRE-DEPLOYMENT BACKEND TESTING
 Testing all critical endpoints with specific scenarios as requested
 """
 
+import os
 import requests
 import json
 import sys
 from datetime import datetime, timedelta
 
 # Configuration
-BASE_URL = "https://secure-forms-2.preview.emergentagent.com"
+BASE_URL = os.environ.get("HARNESS_BASE_URL", "https://secure-forms-2.preview.emergentagent.com")
 API_BASE = f"{BASE_URL}/api"
 
 # Test property IDs from Uplisting
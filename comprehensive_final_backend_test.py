@@ -12,13 +12,14 @@ Testing all critical endpoints mentioned in the review request:
 8. Form Submission APIs - All 4 forms
 """
 
+import os
 import requests
 import json
 import sys
 from datetime import datetime, timedelta
 
 # Configuration
-BASE_URL = "https://secure-forms-2.preview.emergentagent.com"
+BASE_URL = os.environ.get("HARNESS_BASE_URL", "https://secure-forms-2.preview.emergentagent.com")
 API_BASE = f"{BASE_URL}/api"
 
 # Test property IDs from review request
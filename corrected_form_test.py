@@ -3,11 +3,12 @@
 CORRECTED FORM API TESTING - With proper required fields
 """
 
+import os
 import requests
 import json
 
 # Configuration
-BASE_URL = "https://secure-forms-2.preview.emergentagent.com"
+BASE_URL = os.environ.get("HARNESS_BASE_URL", "https://secure-forms-2.preview.emergentagent.com")
 API_BASE = f"{BASE_URL}/api"
 
 print(f"🧪 CORRECTED FORM API TESTING")
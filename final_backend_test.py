@@ -3,12 +3,13 @@
 FINAL BACKEND TESTING - Remaining APIs and Integration Tests
 """
 
+import os
 import requests
 import json
 import sys
 
 # Configuration
-BASE_URL = "https://secure-forms-2.preview.emergentagent.com"
+BASE_URL = os.environ.get("HARNESS_BASE_URL", "https://secure-forms-2.preview.emergentagent.com")
 API_BASE = f"{BASE_URL}/api"
 
 print(f"🧪 FINAL BACKEND TESTING - REMAINING APIS")
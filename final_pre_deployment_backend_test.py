@@ -17,7 +17,7 @@ from datetime import datetime, timedelta
 import os
 
 # Configuration
-BASE_URL = "https://secure-forms-2.preview.emergentagent.com"
+BASE_URL = os.environ.get("HARNESS_BASE_URL", "https://secure-forms-2.preview.emergentagent.com")
 API_BASE = f"{BASE_URL}/api"
 
 # Test property IDs from Uplisting (as specified in review request)
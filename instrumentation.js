@@ -0,0 +1,13 @@
+/**
+ * Server start-up hook (Next.js instrumentation)
+ * Runs once per server process before any request is handled.
+ */
+export async function register() {
+  if (process.env.NEXT_RUNTIME === 'nodejs') {
+    const { restoreCalendarSnapshots, startCalendarWarmer } = await import('./lib/calendar-warmer');
+    const { restoreCatalogueSnapshot } = await import('./lib/property-catalogue');
+    // Last-known-good data first, so an Uplisting outage at boot still has answers
+    await Promise.all([restoreCatalogueSnapshot(), restoreCalendarSnapshots()]);
+    startCalendarWarmer();
+  }
+}
@@ -0,0 +1,209 @@
+/**
+ * Short-lived date-range holds
+ *
+ * Reserves a property's nights between create-payment-intent and the Stripe
+ * webhook, so two guests can't both pay for the same dates. A hold is one
+ * document per night with _id `${propertyId}:${night}`: the unique _id makes
+ * placing a hold atomic per night without transactions, and (propertyId,
+ * night) indexes the nights for range reads. Nights are keyed like Uplisting
+ * rates, by the morning after (a Jan 8 -> Jan 10 stay holds Jan 9 and Jan 10).
+ *
+ * Holds expire after BOOKING_HOLD_TTL_MS; expired nights may be taken over at
+ * once, and a TTL index removes them eventually. A guest placing a hold again
+ * (reloading checkout) refreshes their own nights instead of conflicting, and
+ * the nights move to the new hold: releasing the abandoned one frees nothing.
+ */
+
+import { randomUUID } from 'crypto';
+import { connectToDatabase as connectToMongo } from './mongodb';
+
+const MONGO_URL = process.env.MONGO_URL;
+const COLLECTION_NAME = 'booking_holds';
+// Long enough to fill in card details and pass 3-D Secure
+const HOLD_TTL_MS = parseInt(process.env.BOOKING_HOLD_TTL_MS || '900000', 10);
+// Availability reads share a property's active holds for this long (placing or releasing clears it)
+const READ_CACHE_MS = parseInt(process.env.BOOKING_HOLD_READ_CACHE_MS || '5000', 10);
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+let indexesPromise = null;
+const activeHolds = new Map(); // propertyId -> { loadedAt, promise }
+const metrics = { placed: 0, conflicts: 0, released: 0, reads: 0, readErrors: 0 };
+
+/**
+ * Connect to MongoDB (the shared connection) with the hold indexes in place
+ * @returns {Promise<Object>} Database instance
+ */
+async function connectToDatabase() {
+  const { db } = await connectToMongo();
+  indexesPromise ||= db.collection(COLLECTION_NAME).createIndexes([
+    { key: { propertyId: 1, night: 1 }, name: 'propertyId_night' },
+    { key: { expiresAt: 1 }, name: 'expiresAt_ttl', expireAfterSeconds: 0 },
+  ]).catch((error) => {
+    // Expiry is checked on every read and placement; the indexes only keep it fast and tidy
+    console.error('Failed to create booking hold indexes:', error.message);
+    indexesPromise = null;
+  });
+  await indexesPromise;
+  return db;
+}
+
+/**
+ * Nights of a stay, keyed by the morning after
+ * @param {string} checkIn - YYYY-MM-DD
+ * @param {string} checkOut - YYYY-MM-DD
+ * @returns {Array<string>} YYYY-MM-DD dates after checkIn up to and including checkOut
+ */
+export function stayNights(checkIn, checkOut) {
+  const nights = [];
+  const last = Date.parse(checkOut);
+  for (let time = Date.parse(checkIn) + DAY_MS; time <= last; time += DAY_MS) {
+    nights.push(new Date(time).toISOString().split('T')[0]);
+  }
+  return nights;
+}
+
+/**
+ * Hold a stay's nights for a guest
+ * @param {Object} stay
+ * @param {string} stay.propertyId
+ * @param {string} stay.checkIn - YYYY-MM-DD
+ * @param {string} stay.checkOut - YYYY-MM-DD
+ * @param {string} stay.owner - Who the hold is for (the guest's email)
+ * @returns {Promise<Object>} { held: true, holdId, expiresAt } or
+ *   { held: false, night, heldUntil } for the first night someone else holds
+ */
+export async function placeHold({ propertyId, checkIn, checkOut, owner }) {
+  const db = await connectToDatabase();
+  const holds = db.collection(COLLECTION_NAME);
+  const id = String(propertyId);
+  const guest = owner.trim().toLowerCase();
+  // One per placement (property first, see releaseHold): each payment intent releases only its own nights
+  const holdId = `${id}:${randomUUID()}`;
+  const nights = stayNights(checkIn, checkOut);
+  const now = new Date();
+  const expiresAt = new Date(now.getTime() + HOLD_TTL_MS);
+
+  // Take each night unless someone else holds it: the upsert of a night that is
+  // actively held by another guest collides with that night's _id (E11000).
+  // Ordered, so it stops at the first collision.
+  const operations = nights.map(night => ({
+    updateOne: {
+      filter: { _id: `${id}:${night}`, $or: [{ expiresAt: { $lte: now } }, { owner: guest }] },
+      update: { $set: { propertyId: id, night, holdId, owner: guest, expiresAt, createdAt: now } },
+      upsert: true,
+    },
+  }));
+
+  try {
+    if (operations.length) await holds.bulkWrite(operations, { ordered: true });
+  } catch (error) {
+    // The driver reports one write error as an object, several as an array
+    const [conflict] = [].concat(error.writeErrors || []);
+    if (conflict?.code !== 11000) {
+      activeHolds.delete(id);
+      throw error;
+    }
+
+    // Give back the nights taken before the collision
+    const { index } = conflict;
+    const taken = nights.slice(0, index).map(night => `${id}:${night}`);
+    if (taken.length) await holds.deleteMany({ _id: { $in: taken }, holdId });
+    activeHolds.delete(id);
+
+    const blocking = await holds.findOne({ _id: `${id}:${nights[index]}` }, { projection: { expiresAt: 1 } });
+    metrics.conflicts++;
+    return { held: false, night: nights[index], heldUntil: blocking?.expiresAt || null };
+  }
+
+  activeHolds.delete(id);
+  metrics.placed++;
+  return { held: true, holdId, expiresAt };
+}
+
+/**
+ * Release a hold (payment intent cancelled, or never created)
+ * @param {string} holdId - From placeHold
+ * @returns {Promise<number>} Nights released
+ */
+export async function releaseHold(holdId) {
+  if (!holdId) return 0;
+  const db = await connectToDatabase();
+  const result = await db.collection(COLLECTION_NAME).deleteMany({ holdId });
+  activeHolds.delete(holdId.split(':')[0]);
+  metrics.released += result.deletedCount;
+  return result.deletedCount;
+}
+
+/**
+ * Nights of a property held by checkouts in progress
+ * @param {string} propertyId
+ * @param {string} from - YYYY-MM-DD
+ * @param {string} to - YYYY-MM-DD
+ * @returns {Promise<Set<string>>} Held nights in [from, to]; empty when holds can't be read
+ */
+export async function getHeldNights(propertyId, from, to) {
+  const id = String(propertyId);
+  if (!MONGO_URL) return new Set();
+
+  let entry = activeHolds.get(id);
+  if (!entry || Date.now() - entry.loadedAt > READ_CACHE_MS) {
+    entry = { loadedAt: Date.now(), promise: loadActiveHolds(id) };
+    activeHolds.set(id, entry);
+  }
+
+  const now = Date.now();
+  const held = new Set();
+  for (const hold of await entry.promise) {
+    if (hold.night >= from && hold.night <= to && hold.expiresAt.getTime() > now) held.add(hold.night);
+  }
+  return held;
+}
+
+async function loadActiveHolds(propertyId) {
+  metrics.reads++;
+  try {
+    const db = await connectToDatabase();
+    return await db.collection(COLLECTION_NAME)
+      .find({ propertyId, expiresAt: { $gt: new Date() } }, { projection: { _id: 0, night: 1, expiresAt: 1 } })
+      .toArray();
+  } catch (error) {
+    // Availability still answers from Uplisting; placing a hold is what enforces it
+    metrics.readErrors++;
+    activeHolds.delete(propertyId);
+    console.error('Failed to read booking holds:', propertyId, error.message);
+    return [];
+  }
+}
+
+/**
+ * Mark held nights unavailable in an Uplisting calendar
+ * @param {Object} calendarData - Uplisting calendar ({ data } or { calendar: { days } }); not modified
+ * @param {Set<string>} heldNights - From getHeldNights
+ * @returns {Object} The calendar, copied only if a day changed
+ */
+export function applyHolds(calendarData, heldNights) {
+  if (!heldNights.size) return calendarData;
+  const mark = day => {
+    const date = day.date || day.attributes?.date;
+    if (!heldNights.has(date)) return day;
+    return day.attributes
+      ? { ...day, attributes: { ...day.attributes, available: false }, held: true }
+      : { ...day, available: false, held: true };
+  };
+
+  if (calendarData?.calendar?.days) {
+    return { ...calendarData, calendar: { ...calendarData.calendar, days: calendarData.calendar.days.map(mark) } };
+  }
+  if (Array.isArray(calendarData?.data)) {
+    return { ...calendarData, data: calendarData.data.map(mark) };
+  }
+  return calendarData;
+}
+
+/**
+ * Hold counters
+ * @returns {Object} { ttlMs, cachedProperties, placed, conflicts, released, reads, readErrors }
+ */
+export function getHoldMetrics() {
+  return { ttlMs: HOLD_TTL_MS, cachedProperties: activeHolds.size, ...metrics };
+}
@@ -1,33 +1,47 @@
-import { MongoClient } from 'mongodb';
 import { v4 as uuidv4 } from 'uuid';
+import { connectToDatabase as connectToMongo } from './mongodb';
 
-const MONGO_URL = process.env.MONGO_URL;
-const DB_NAME = process.env.MONGO_DB_NAME || 'swissalpine';
 const COLLECTION_NAME = 'bookings';
+// A claim older than this is presumed dead (process crashed mid-booking) and may be taken over
+const CLAIM_TIMEOUT_MS = parseInt(process.env.BOOKING_CLAIM_TIMEOUT_MS || '600000', 10);
 
-let cachedClient = null;
-let cachedDb = null;
+let indexesPromise = null;
 
 /**
- * Connect to MongoDB
- * @returns {Promise<Object>} Database instance
+ * Unique indexes the webhook claim relies on: one booking per Payment Intent,
+ * and a Stripe event can claim at most one booking
+ * @param {Object} db - Database instance
  */
-async function connectToDatabase() {
-  if (cachedDb) {
-    return { db: cachedDb, client: cachedClient };
-  }
-
-  if (!MONGO_URL) {
-    throw new Error('MONGO_URL is not defined');
-  }
-
-  const client = await MongoClient.connect(MONGO_URL);
-  const db = client.db(DB_NAME);
-
-  cachedClient = client;
-  cachedDb = db;
+function ensureIndexes(db) {
+  indexesPromise ||= db.collection(COLLECTION_NAME).createIndexes([
+    {
+      key: { stripePaymentIntentId: 1 },
+      name: 'stripePaymentIntentId_unique',
+      unique: true,
+      partialFilterExpression: { stripePaymentIntentId: { $type: 'string' } },
+    },
+    {
+      key: { claimedByEventId: 1 },
+      name: 'claimedByEventId_unique',
+      unique: true,
+      partialFilterExpression: { claimedByEventId: { $type: 'string' } },
+    },
+  ]).catch((error) => {
+    // Bookings keep working without them; the claim filter alone is still atomic per document
+    console.error('Failed to create booking indexes:', error.message);
+    indexesPromise = null;
+  });
+  return indexesPromise;
+}
 
-  return { db, client };
+/**
+ * Connect to MongoDB (the shared connection) with the booking indexes in place
+ * @returns {Promise<Object>} { db, client }
+ */
+async function connectToDatabase() {
+  const connection = await connectToMongo();
+  await ensureIndexes(connection.db);
+  return connection;
 }
 
 /**
@@ -53,7 +67,16 @@ export async function createBooking(bookingData) {
     updatedAt: new Date(),
   };
 
-  await bookings.insertOne(booking);
+  try {
+    await bookings.insertOne(booking);
+  } catch (error) {
+    // A replayed create (same Stripe idempotency key, same Payment Intent) keeps the first record
+    if (error.code === 11000 && booking.stripePaymentIntentId) {
+      const existing = await bookings.findOne({ stripePaymentIntentId: booking.stripePaymentIntentId });
+      if (existing) return existing;
+    }
+    throw error;
+  }
   return booking;
 }
 
@@ -161,6 +184,99 @@ export async function markForManualReview(stripePaymentIntentId, reason) {
   return result;
 }
 
+/**
+ * Claim a paid booking for processing (webhook idempotency)
+ * One atomic findOneAndUpdate: marks the payment succeeded and the booking
+ * as processing, recording the claiming Stripe event. Only one of any
+ * number of concurrent or repeated deliveries gets the claim; a claim left
+ * by a crashed process can be taken over after BOOKING_CLAIM_TIMEOUT_MS.
+ * @param {string} stripePaymentIntentId - Stripe Payment Intent ID
+ * @param {string} eventId - Stripe event ID
+ * @returns {Promise<Object>} { claimed, booking } - booking is the claimed
+ *   document, or the current one (null if none) when not claimed
+ */
+export async function claimPaymentIntent(stripePaymentIntentId, eventId) {
+  const { db } = await connectToDatabase();
+  const bookings = db.collection(COLLECTION_NAME);
+  const now = new Date();
+
+  let booking;
+  try {
+    booking = await bookings.findOneAndUpdate(
+      {
+        stripePaymentIntentId,
+        $or: [
+          // Includes bookings cancelled by payment_intent.payment_failed: the guest may retry the same intent
+          { paymentStatus: { $ne: 'succeeded' } },
+          { bookingStatus: 'processing_booking', claimedAt: { $lt: new Date(now.getTime() - CLAIM_TIMEOUT_MS) } },
+        ],
+      },
+      {
+        $set: {
+          paymentStatus: 'succeeded',
+          bookingStatus: 'processing_booking',
+          paidAt: now,
+          claimedAt: now,
+          claimedByEventId: eventId,
+          updatedAt: now,
+        },
+      },
+      { returnDocument: 'after' }
+    );
+  } catch (error) {
+    // claimedByEventId_unique: this event already claimed the booking
+    if (error.code !== 11000) throw error;
+    booking = null;
+  }
+
+  if (booking) {
+    return { claimed: true, booking };
+  }
+  return { claimed: false, booking: await bookings.findOne({ stripePaymentIntentId }) };
+}
+
+/**
+ * Finish a claimed booking in one write
+ * @param {string} stripePaymentIntentId - Stripe Payment Intent ID
+ * @param {string} eventId - Stripe event that holds the claim
+ * @param {Object} outcome
+ * @param {string} [outcome.uplistingBookingId] - Set when Uplisting accepted the booking
+ * @param {string} [outcome.manualReviewReason] - Set when it has to be booked by hand
+ * @returns {Promise<Object|null>} Updated booking, null if the claim was taken over
+ */
+export async function completeClaim(stripePaymentIntentId, eventId, { uplistingBookingId = null, manualReviewReason = null }) {
+  const { db } = await connectToDatabase();
+  const bookings = db.collection(COLLECTION_NAME);
+
+  const update = manualReviewReason
+    ? { requiresManualReview: true, manualReviewReason, bookingStatus: 'pending_manual_review' }
+    : { uplistingBookingId, bookingStatus: 'confirmed' };
+
+  return bookings.findOneAndUpdate(
+    { stripePaymentIntentId, claimedByEventId: eventId },
+    { $set: { ...update, updatedAt: new Date() } },
+    { returnDocument: 'after' }
+  );
+}
+
+/**
+ * Record a failed or cancelled payment unless the booking was already paid
+ * Stripe does not order events: a late payment_failed must not cancel a paid booking.
+ * @param {string} stripePaymentIntentId - Stripe Payment Intent ID
+ * @param {string} failureReason - Stripe's failure message
+ * @returns {Promise<Object|null>} Updated booking, null if none or already paid
+ */
+export async function recordPaymentFailure(stripePaymentIntentId, failureReason) {
+  const { db } = await connectToDatabase();
+  const bookings = db.collection(COLLECTION_NAME);
+
+  return bookings.findOneAndUpdate(
+    { stripePaymentIntentId, paymentStatus: { $ne: 'succeeded' } },
+    { $set: { paymentStatus: 'failed', bookingStatus: 'cancelled', failureReason, updatedAt: new Date() } },
+    { returnDocument: 'after' }
+  );
+}
+
 /**
  * Check if payment intent already processed (idempotency)
  * @param {string} stripePaymentIntentId - Stripe Payment Intent ID
@@ -16,6 +16,242 @@ function calculateNights(checkIn, checkOut) {
   return Math.ceil(diffTime / (1000 * 60 * 60 * 24));
 }
 
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+function dayNumber(date) {
+  return Math.round(Date.parse(date) / DAY_MS);
+}
+
+function dateAt(index, offset) {
+  return new Date((index.firstDay + offset) * DAY_MS).toISOString().split('T')[0];
+}
+
+/**
+ * Build the constraint index of a calendar snapshot
+ *
+ * Day records follow Uplisting's rate convention: a day describes the night
+ * that ends on its morning, so the stay arrival -> departure needs every day
+ * after the arrival up to and including the departure to be available. The
+ * arrival day's closed_for_arrival, minimum_length_of_stay and
+ * maximum_available_nights apply, and the departure day must not be
+ * closed_for_departure. Days missing from the snapshot count as unavailable
+ * and closed.
+ *
+ * Every arrival gets its earliest and latest valid departure; between the two
+ * any day open for departure is valid, so lookups are O(1). Built with a few
+ * linear scans over the days.
+ *
+ * @param {Array} days - Calendar days (calendar.days from Uplisting)
+ * @param {Object} options
+ * @param {number} options.minStay - Minimum stay when a day does not set one
+ * @returns {Object|null} Constraint index, or null without days
+ */
+export function buildConstraintIndex(days, { minStay: defaultMinStay = 1 } = {}) {
+  if (!days || days.length === 0) return null;
+
+  const firstDay = dayNumber(days[0].date);
+  const length = dayNumber(days[days.length - 1].date) - firstDay + 1;
+  const available = new Uint8Array(length);
+  const arrivalOpen = new Uint8Array(length);
+  const departureOpen = new Uint8Array(length);
+  const minStay = new Int32Array(length);
+  const maxStay = new Int32Array(length);
+
+  for (const day of days) {
+    const i = dayNumber(day.date) - firstDay;
+    if (i < 0 || i >= length) continue;
+    available[i] = day.available === false ? 0 : 1;
+    arrivalOpen[i] = day.closed_for_arrival ? 0 : 1;
+    departureOpen[i] = day.closed_for_departure ? 0 : 1;
+    minStay[i] = Math.max(1, day.minimum_length_of_stay || defaultMinStay);
+    maxStay[i] = day.maximum_available_nights || 0;
+  }
+
+  // availableUntil[i]: last day j >= i - 1 with days i..j all available
+  const availableUntil = new Int32Array(length + 1);
+  availableUntil[length] = length - 1;
+  for (let i = length - 1; i >= 0; i--) {
+    availableUntil[i] = available[i] ? availableUntil[i + 1] : i - 1;
+  }
+
+  // nextDeparture[i] / previousDeparture[i]: nearest day open for departure at or after / before i
+  const nextDeparture = new Int32Array(length + 1);
+  nextDeparture[length] = length;
+  for (let i = length - 1; i >= 0; i--) {
+    nextDeparture[i] = departureOpen[i] ? i : nextDeparture[i + 1];
+  }
+  const previousDeparture = new Int32Array(length);
+  for (let i = 0; i < length; i++) {
+    previousDeparture[i] = departureOpen[i] ? i : (i > 0 ? previousDeparture[i - 1] : -1);
+  }
+
+  const earliestDeparture = new Int32Array(length).fill(-1);
+  const latestDeparture = new Int32Array(length).fill(-1);
+  for (let arrival = 0; arrival < length - 1; arrival++) {
+    if (!arrivalOpen[arrival]) continue;
+    let limit = availableUntil[arrival + 1];
+    if (maxStay[arrival]) limit = Math.min(limit, arrival + maxStay[arrival]);
+    const shortest = arrival + minStay[arrival];
+    if (shortest > limit) continue;
+
+    const earliest = nextDeparture[shortest];
+    const latest = previousDeparture[limit];
+    if (earliest <= latest) {
+      earliestDeparture[arrival] = earliest;
+      latestDeparture[arrival] = latest;
+    }
+  }
+
+  const blockedRuns = [];
+  for (let i = 0; i < length; i++) {
+    if (available[i]) continue;
+    const start = i;
+    while (i + 1 < length && !available[i + 1]) i++;
+    blockedRuns.push({ from: start, to: i });
+  }
+
+  const index = {
+    firstDay,
+    length,
+    available,
+    arrivalOpen,
+    departureOpen,
+    minStay,
+    maxStay,
+    earliestDeparture,
+    latestDeparture,
+  };
+  index.blockedRuns = blockedRuns.map(run => ({ from: dateAt(index, run.from), to: dateAt(index, run.to) }));
+  return index;
+}
+
+const constraintIndexes = new WeakMap();
+
+/**
+ * Constraint index for an availability response, built once per calendar snapshot
+ * @param {Object} availabilityData - Object with calendar.days (as validateBooking takes)
+ * @param {Object} property - Property data (default minimum stay)
+ * @returns {Object|null} Constraint index, or null without calendar days
+ */
+export function getConstraintIndex(availabilityData, property) {
+  const days = availabilityData?.calendar?.days;
+  if (!days || days.length === 0) return null;
+
+  let index = constraintIndexes.get(days);
+  if (!index) {
+    index = buildConstraintIndex(days, { minStay: property?.minimum_length_of_stay || 1 });
+    constraintIndexes.set(days, index);
+  }
+  return index;
+}
+
+function offsetOf(index, date) {
+  const offset = dayNumber(date) - index.firstDay;
+  return offset >= 0 && offset < index.length ? offset : -1;
+}
+
+/**
+ * Whether a date lies inside the index's calendar snapshot
+ */
+export function isCovered(index, date) {
+  return offsetOf(index, date) !== -1;
+}
+
+/**
+ * Whether the night ending on the morning of `date` is available
+ */
+export function isAvailableDay(index, date) {
+  const offset = offsetOf(index, date);
+  return offset !== -1 && index.available[offset] === 1;
+}
+
+/**
+ * Whether any stay can start on `date`
+ */
+export function isBookableArrival(index, date) {
+  const offset = offsetOf(index, date);
+  return offset !== -1 && index.earliestDeparture[offset] !== -1;
+}
+
+/**
+ * Earliest and latest valid departure for an arrival
+ * @returns {Object|null} { earliest, latest } as YYYY-MM-DD, or null when no stay can start on checkIn
+ */
+export function departureWindow(index, checkIn) {
+  const offset = offsetOf(index, checkIn);
+  if (offset === -1 || index.earliestDeparture[offset] === -1) return null;
+  return {
+    earliest: dateAt(index, index.earliestDeparture[offset]),
+    latest: dateAt(index, index.latestDeparture[offset]),
+  };
+}
+
+/**
+ * Whether checkIn -> checkOut satisfies every calendar constraint
+ */
+export function isValidDeparture(index, checkIn, checkOut) {
+  const arrival = offsetOf(index, checkIn);
+  const departure = offsetOf(index, checkOut);
+  if (arrival === -1 || departure === -1) return false;
+  return departure >= index.earliestDeparture[arrival] &&
+         departure <= index.latestDeparture[arrival] &&
+         index.departureOpen[departure] === 1;
+}
+
+/**
+ * Calendar errors of a stay, in validateBooking's error format
+ * Returns no errors for stays outside the snapshot; those are left to the server.
+ * @param {Object} index - Constraint index
+ * @param {string} checkIn - Check-in date
+ * @param {string} checkOut - Check-out date
+ * @returns {Array} Errors
+ */
+export function stayErrors(index, checkIn, checkOut) {
+  const arrival = offsetOf(index, checkIn);
+  const departure = offsetOf(index, checkOut);
+  if (arrival === -1 || departure === -1 || isValidDeparture(index, checkIn, checkOut)) return [];
+
+  const errors = [];
+  const nights = departure - arrival;
+  const minStay = index.minStay[arrival] || 1;
+  const maxStay = index.maxStay[arrival];
+
+  if (!index.arrivalOpen[arrival]) {
+    errors.push({
+      field: 'checkIn',
+      message: 'Check-in is not available on the selected date. Please choose a different date.'
+    });
+  }
+  if (nights < minStay) {
+    errors.push({
+      field: 'dates',
+      message: `This property requires a minimum stay of ${minStay} night${minStay !== 1 ? 's' : ''}. You selected ${nights} night${nights !== 1 ? 's' : ''}.`
+    });
+  }
+  if (maxStay && nights > maxStay) {
+    errors.push({
+      field: 'dates',
+      message: `Maximum stay for this property is ${maxStay} night${maxStay !== 1 ? 's' : ''}. You selected ${nights} night${nights !== 1 ? 's' : ''}.`
+    });
+  }
+  if (!index.departureOpen[departure]) {
+    errors.push({
+      field: 'checkOut',
+      message: 'Check-out is not available on the selected date. Please choose a different date.'
+    });
+  }
+  for (let i = arrival + 1; i <= departure; i++) {
+    if (!index.available[i]) {
+      errors.push({
+        field: 'dates',
+        message: 'Some dates in your selected range are not available. Please choose different dates.'
+      });
+      break;
+    }
+  }
+  return errors;
+}
+
 /**
  * Validate booking against property constraints
  * @param {Object} params - Validation parameters
@@ -78,64 +314,33 @@ export function validateBooking({
     return { valid: false, errors, warnings };
   }
   
-  // 3. Validate minimum stay
-  const minStay = availabilityData?.calendar?.days?.[0]?.minimum_length_of_stay || 
-                  property.minimum_length_of_stay || 1;
-  
-  if (nights < minStay) {
-    errors.push({
-      field: 'dates',
-      message: `This property requires a minimum stay of ${minStay} night${minStay !== 1 ? 's' : ''}. You selected ${nights} night${nights !== 1 ? 's' : ''}.`
-    });
-  }
-  
-  // 4. Validate maximum stay (if specified)
-  const maxStay = availabilityData?.calendar?.days?.[0]?.maximum_available_nights;
-  if (maxStay && nights > maxStay) {
-    errors.push({
-      field: 'dates',
-      message: `Maximum stay for this property is ${maxStay} night${maxStay !== 1 ? 's' : ''}. You selected ${nights} night${nights !== 1 ? 's' : ''}.`
-    });
-  }
-  
-  // 5. Check for closed dates
-  if (availabilityData?.calendar?.days) {
-    const closedForArrival = availabilityData.calendar.days.find(
-      day => day.date === checkIn && day.closed_for_arrival
-    );
-    
-    if (closedForArrival) {
-      errors.push({
-        field: 'checkIn',
-        message: 'Check-in is not available on the selected date. Please choose a different date.'
-      });
-    }
-    
-    const closedForDeparture = availabilityData.calendar.days.find(
-      day => day.date === checkOut && day.closed_for_departure
-    );
+  // 3. Calendar rules: minimum/maximum stay, closed arrival/departure days, booked nights
+  const constraintIndex = getConstraintIndex(availabilityData, property);
+
+  if (constraintIndex && isCovered(constraintIndex, checkIn) && isCovered(constraintIndex, checkOut)) {
+    errors.push(...stayErrors(constraintIndex, checkIn, checkOut));
+  } else {
+    // Without calendar data for the stay, only the property-wide stay limits can be checked
+    const minStay = availabilityData?.calendar?.days?.[0]?.minimum_length_of_stay || 
+                    property.minimum_length_of_stay || 1;
     
-    if (closedForDeparture) {
+    if (nights < minStay) {
       errors.push({
-        field: 'checkOut',
-        message: 'Check-out is not available on the selected date. Please choose a different date.'
+        field: 'dates',
+        message: `This property requires a minimum stay of ${minStay} night${minStay !== 1 ? 's' : ''}. You selected ${nights} night${nights !== 1 ? 's' : ''}.`
       });
     }
     
-    // Check if any dates are unavailable
-    const unavailableDates = availabilityData.calendar.days.filter(
-      day => day.available === false
-    );
-    
-    if (unavailableDates.length > 0) {
+    const maxStay = availabilityData?.calendar?.days?.[0]?.maximum_available_nights;
+    if (maxStay && nights > maxStay) {
       errors.push({
         field: 'dates',
-        message: 'Some dates in your selected range are not available. Please choose different dates.'
+        message: `Maximum stay for this property is ${maxStay} night${maxStay !== 1 ? 's' : ''}. You selected ${nights} night${nights !== 1 ? 's' : ''}.`
       });
     }
   }
   
-  // 6. Check overall availability
+  // 4. Check overall availability
   if (availabilityData?.pricing?.available === false) {
     errors.push({
       field: 'dates',
@@ -143,7 +348,7 @@ export function validateBooking({
     });
   }
   
-  // 7. Warnings for extra guests
+  // 5. Warnings for extra guests
   const extraGuestFee = property.fees?.find(
     f => f.attributes?.label === 'extra_guest_charge' && f.attributes?.enabled
   );
@@ -168,7 +373,7 @@ export function validateBooking({
  * Get property constraints for display
  * @param {Object} property - Property data
  * @param {Object} availabilityData - Availability data
- * @returns {Object} Constraint information
+ * @returns {Object} Constraint information; `index` is the calendar's constraint index (null without calendar days)
  */
 export function getPropertyConstraints(property, availabilityData) {
   const constraints = {
@@ -179,7 +384,8 @@ export function getPropertyConstraints(property, availabilityData) {
     checkInTime: property?.check_in_time || 15,
     checkOutTime: property?.check_out_time || 11,
     extraGuestFee: null,
-    guestsIncluded: 0
+    guestsIncluded: 0,
+    index: getConstraintIndex(availabilityData, property),
   };
   
   // Get extra guest fee info
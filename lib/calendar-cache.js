@@ -0,0 +1,220 @@
+/**
+ * Server-side calendar cache
+ *
+ * Holds one calendar window per property (normally the warmer's horizon, see
+ * lib/calendar-warmer.js) and answers any range inside it by slicing, so a
+ * request for a range nobody asked for before does not wait on Uplisting.
+ * Ranges are inclusive YYYY-MM-DD dates, like Uplisting's from/to. Sliced
+ * responses share day objects with the cache and must be treated as read-only.
+ *
+ * Changes pushed by Uplisting mark a date span of a window as dirty; reads
+ * overlapping a dirty span miss until a refresh that started after the
+ * change patches that span or replaces the window. "After" is decided by a
+ * change counter (calendarVersion), not the clock: a read started in the
+ * same millisecond as a change may or may not contain it.
+ */
+
+// Twice the default warm interval: one missed refresh still serves from cache
+const MAX_AGE_MS = parseInt(process.env.CALENDAR_CACHE_MAX_AGE_MS || '120000', 10);
+
+// On globalThis: instrumentation.js (the warmer, snapshot restore) and the
+// route handlers are bundled separately and each get a copy of this module
+const cache = globalThis.__calendarCache ||= {
+  windows: new Map(),
+  // Latest change number per property
+  changes: new Map(),
+  version: 0,
+  metrics: { hits: 0, misses: 0, stale: 0, dirty: 0, invalidations: 0, patches: 0, lastKnown: 0 },
+};
+const { windows, changes, metrics } = cache;
+
+function calendarDays(data) {
+  return data.data || data.calendar?.days || [];
+}
+
+function dayDate(day) {
+  return day.date || day.attributes?.date;
+}
+
+function withDays(data, days) {
+  return data.data ? { ...data, data: days } : { ...data, calendar: { ...data.calendar, days } };
+}
+
+function inRange(day, from, to) {
+  const date = dayDate(day);
+  return date >= from && date <= to;
+}
+
+/**
+ * Current change number; take it before starting an upstream read
+ * @returns {number} Version to pass to storeCalendar / patchCalendar
+ */
+export function calendarVersion() {
+  return cache.version;
+}
+
+/**
+ * Whether a property changed after the given version
+ * @param {string} propertyId - Property ID
+ * @param {number} since - Version taken before an upstream read
+ * @returns {boolean} True when the read may be missing a change
+ */
+export function changedSince(propertyId, since) {
+  return (changes.get(String(propertyId)) || 0) > since;
+}
+
+/**
+ * Store the calendar window for a property, replacing the previous one
+ * @param {string} propertyId - Property ID
+ * @param {string} from - First date of the window (YYYY-MM-DD)
+ * @param {string} to - Last date of the window (YYYY-MM-DD)
+ * @param {Object} data - Uplisting calendar response for from..to
+ * @param {number} fetchedAt - When the upstream request started (ms)
+ * @param {number} since - calendarVersion() when the request started
+ */
+export function storeCalendar(propertyId, from, to, data, fetchedAt = Date.now(), since = cache.version) {
+  const previous = windows.get(String(propertyId));
+  // Changes recorded after this read started may be missing from it, even
+  // where a later patch already applied them to the previous window
+  const changes = (previous?.changes || [])
+    .filter(span => span.version > since)
+    .map(span => ({ ...span, patched: false }));
+  windows.set(String(propertyId), { from, to, data, fetchedAt, changes, restored: false });
+}
+
+/**
+ * Put a persisted window back after a restart (see lib/calendar-warmer.js)
+ * Changes notified while the process was down were missed, so a restored
+ * window only answers readLastKnownCalendar until the warmer replaces it.
+ * @param {string} propertyId - Property ID
+ * @param {string} from - First date of the window (YYYY-MM-DD)
+ * @param {string} to - Last date of the window (YYYY-MM-DD)
+ * @param {Object} data - Uplisting calendar response for from..to
+ * @param {number} fetchedAt - When the window was originally fetched (ms)
+ */
+export function restoreCalendar(propertyId, from, to, data, fetchedAt) {
+  if (windows.has(String(propertyId))) return;
+  windows.set(String(propertyId), { from, to, data, fetchedAt, changes: [], restored: true });
+}
+
+/**
+ * Answer a calendar range from the cached window
+ * @param {string} propertyId - Property ID
+ * @param {string} from - First date (YYYY-MM-DD)
+ * @param {string} to - Last date (YYYY-MM-DD)
+ * @param {number} maxAgeMs - Oldest window accepted
+ * @returns {Object|null} Calendar response shaped like Uplisting's, or null
+ *   when the window is missing, too old or does not cover the range
+ */
+export function readCalendar(propertyId, from, to, maxAgeMs = MAX_AGE_MS) {
+  const entry = windows.get(String(propertyId));
+  if (!entry || from < entry.from || to > entry.to) {
+    metrics.misses++;
+    return null;
+  }
+  if (entry.restored || Date.now() - entry.fetchedAt > maxAgeMs) {
+    metrics.stale++;
+    return null;
+  }
+
+  if (entry.changes.some(span => !span.patched && span.from <= to && span.to >= from)) {
+    metrics.dirty++;
+    return null;
+  }
+
+  metrics.hits++;
+  return withDays(entry.data, calendarDays(entry.data).filter(day => inRange(day, from, to)));
+}
+
+/**
+ * Answer a calendar range from the cached window whatever its age
+ * The fallback when Uplisting fails: the window may be old (restored from a
+ * snapshot at boot) or have dirty spans.
+ * @param {string} propertyId - Property ID
+ * @param {string} from - First date (YYYY-MM-DD)
+ * @param {string} to - Last date (YYYY-MM-DD)
+ * @returns {Object|null} { data, fetchedAt }, or null when no window covers the range
+ */
+export function readLastKnownCalendar(propertyId, from, to) {
+  const entry = windows.get(String(propertyId));
+  if (!entry || from < entry.from || to > entry.to) return null;
+  metrics.lastKnown++;
+  return {
+    data: withDays(entry.data, calendarDays(entry.data).filter(day => inRange(day, from, to))),
+    fetchedAt: entry.fetchedAt,
+  };
+}
+
+/**
+ * Record a change of a property's date span upstream
+ * @param {string} propertyId - Property ID
+ * @param {string} from - First changed date (YYYY-MM-DD)
+ * @param {string} to - Last changed date (YYYY-MM-DD)
+ * @returns {Object|null} The span clipped to the cached window ({ from, to }),
+ *   or null when no cached window overlaps it
+ */
+export function invalidateCalendar(propertyId, from, to) {
+  const version = ++cache.version;
+  changes.set(String(propertyId), version);
+
+  const entry = windows.get(String(propertyId));
+  if (!entry || to < entry.from || from > entry.to) return null;
+
+  const span = {
+    from: from > entry.from ? from : entry.from,
+    to: to < entry.to ? to : entry.to,
+  };
+  entry.changes.push({ ...span, version, patched: false });
+  metrics.invalidations++;
+  return span;
+}
+
+/**
+ * Replace the days of a span with a fresh read of that span
+ * Dirty spans inside it that were recorded before the read started are cleared.
+ * @param {string} propertyId - Property ID
+ * @param {string} from - First date of the read (YYYY-MM-DD)
+ * @param {string} to - Last date of the read (YYYY-MM-DD)
+ * @param {Object} data - Uplisting calendar response for from..to
+ * @param {number} since - calendarVersion() when the read started
+ * @returns {boolean} Whether a window was patched
+ */
+export function patchCalendar(propertyId, from, to, data, since) {
+  const entry = windows.get(String(propertyId));
+  if (!entry || from < entry.from || to > entry.to) return false;
+
+  const days = calendarDays(entry.data)
+    .filter(day => !inRange(day, from, to))
+    .concat(calendarDays(data).filter(day => inRange(day, from, to)))
+    .sort((a, b) => (dayDate(a) < dayDate(b) ? -1 : 1));
+  entry.data = withDays(entry.data, days);
+  for (const span of entry.changes) {
+    if (span.version <= since && span.from >= from && span.to <= to) span.patched = true;
+  }
+  metrics.patches++;
+  return true;
+}
+
+/**
+ * Window and age of every cached calendar
+ * @returns {Object} { maxAgeMs, version, hits, misses, stale, dirty, invalidations, patches, lastKnown,
+ *   calendars: { [propertyId]: { from, to, days, fetchedAt, ageMs, fresh, restored, dirtySpans } } }
+ */
+export function getCalendarCacheStatus() {
+  const now = Date.now();
+  const calendars = {};
+  for (const [propertyId, entry] of windows) {
+    const ageMs = now - entry.fetchedAt;
+    calendars[propertyId] = {
+      from: entry.from,
+      to: entry.to,
+      days: calendarDays(entry.data).length,
+      fetchedAt: new Date(entry.fetchedAt).toISOString(),
+      ageMs,
+      fresh: !entry.restored && ageMs <= MAX_AGE_MS,
+      restored: entry.restored,
+      dirtySpans: entry.changes.filter(span => !span.patched).map(({ from, to }) => ({ from, to })),
+    };
+  }
+  return { maxAgeMs: MAX_AGE_MS, version: cache.version, ...metrics, calendars };
+}
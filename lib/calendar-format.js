@@ -0,0 +1,123 @@
+/**
+ * Compact calendar format
+ *
+ * Columnar encoding of an Uplisting calendar for /api/availability/...
+ * &format=compact: a start date plus one entry per consecutive day in
+ * parallel arrays, instead of an object (often with nested attributes) per
+ * day. Flags are strings of '0'/'1' so long runs compress well under gzip
+ * and parse without allocating an array.
+ *
+ *   { format: 'compact', start: '2026-01-01', days: 3, currency: 'CHF',
+ *     rates: [180, 180, 210], available: '110', closedForArrival: '000',
+ *     closedForDeparture: '000', minStay: [2, 2, 2], maxStay: [28, 28, 28] }
+ *
+ * Days missing from the source calendar are encoded as unavailable with a
+ * zero rate, like a day Uplisting has no data for.
+ */
+
+export const COMPACT_FORMAT = 'compact';
+
+const DAY_MS = 24 * 60 * 60 * 1000;
+const PAD = Array.from({ length: 32 }, (_, i) => String(i).padStart(2, '0'));
+
+function daysInMonth(year, month) {
+  return new Date(Date.UTC(year, month, 0)).getUTCDate();
+}
+
+// `count` consecutive YYYY-MM-DD dates from start, without a Date per day
+function dateSequence(start, count) {
+  const dates = new Array(count);
+  let year = parseInt(start.slice(0, 4), 10);
+  let month = parseInt(start.slice(5, 7), 10);
+  let day = parseInt(start.slice(8, 10), 10);
+  let monthLength = daysInMonth(year, month);
+  let prefix = `${year}-${PAD[month]}-`;
+  for (let i = 0; i < count; i++) {
+    dates[i] = prefix + PAD[day];
+    if (++day > monthLength) {
+      day = 1;
+      if (++month > 12) {
+        month = 1;
+        year++;
+      }
+      monthLength = daysInMonth(year, month);
+      prefix = `${year}-${PAD[month]}-`;
+    }
+  }
+  return dates;
+}
+
+/**
+ * Encode an Uplisting calendar response
+ * @param {Object} calendarData - Uplisting calendar ({ data } or { calendar: { days } })
+ * @returns {Object} Compact calendar; days is 0 and start null without calendar days
+ */
+export function encodeCalendar(calendarData) {
+  const source = calendarData?.data || calendarData?.calendar?.days || [];
+  let first = Infinity;
+  let last = -Infinity;
+  for (const day of source) {
+    const time = Date.parse(day.date || day.attributes?.date);
+    if (time < first) first = time;
+    if (time > last) last = time;
+  }
+
+  const count = first === Infinity ? 0 : Math.round((last - first) / DAY_MS) + 1;
+  const rates = new Array(count).fill(0);
+  const minStay = new Array(count).fill(1);
+  const maxStay = new Array(count).fill(null);
+  const available = new Array(count).fill('0');
+  const closedForArrival = new Array(count).fill('0');
+  const closedForDeparture = new Array(count).fill('0');
+  let currency = null;
+
+  for (const day of source) {
+    const time = Date.parse(day.date || day.attributes?.date);
+    if (Number.isNaN(time)) continue;
+    const i = Math.round((time - first) / DAY_MS);
+    const attributes = day.attributes || {};
+    rates[i] = parseFloat(day.day_rate || day.rate || attributes.rate || attributes.day_rate || 0);
+    if ((day.available ?? attributes.available ?? true) && !attributes.closed) available[i] = '1';
+    if (day.closed_for_arrival || attributes.closed_for_arrival) closedForArrival[i] = '1';
+    if (day.closed_for_departure || attributes.closed_for_departure) closedForDeparture[i] = '1';
+    minStay[i] = day.minimum_length_of_stay ?? attributes.minimum_length_of_stay ?? 1;
+    maxStay[i] = day.maximum_available_nights ?? attributes.maximum_available_nights ?? null;
+    currency ||= day.currency || attributes.currency || null;
+  }
+
+  return {
+    format: COMPACT_FORMAT,
+    start: count ? new Date(first).toISOString().split('T')[0] : null,
+    days: count,
+    currency: currency || 'CHF',
+    rates,
+    available: available.join(''),
+    closedForArrival: closedForArrival.join(''),
+    closedForDeparture: closedForDeparture.join(''),
+    minStay,
+    maxStay,
+  };
+}
+
+/**
+ * Expand a compact calendar back to Uplisting's { calendar: { days } } shape
+ * @param {Object} compact - Output of encodeCalendar
+ * @returns {Object} Calendar accepted by calculatePricing, getPropertyConstraints etc.
+ */
+export function decodeCalendar(compact) {
+  const dates = compact.days ? dateSequence(compact.start, compact.days) : [];
+  const days = new Array(compact.days);
+  for (let i = 0; i < compact.days; i++) {
+    days[i] = {
+      date: dates[i],
+      day_rate: compact.rates[i],
+      available: compact.available.charCodeAt(i) === 49,
+      closed_for_arrival: compact.closedForArrival.charCodeAt(i) === 49,
+      closed_for_departure: compact.closedForDeparture.charCodeAt(i) === 49,
+      minimum_length_of_stay: compact.minStay[i],
+      maximum_available_nights: compact.maxStay[i],
+      currency: compact.currency,
+    };
+  }
+  return { calendar: { days } };
+}
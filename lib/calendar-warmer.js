@@ -0,0 +1,141 @@
+/**
+ * Calendar pre-warmer
+ *
+ * Keeps the calendar of every catalogue property in lib/calendar-cache.js
+ * over a fixed horizon, so availability reads are answered from memory.
+ * Refreshes are staggered: one property every interval / propertyCount ms,
+ * on the scheduler's background lane, so warming never competes with guests
+ * for Uplisting's rate limit. Until every property has been warmed once,
+ * the next property is fetched as soon as the previous one is stored.
+ * Started once per server process from instrumentation.js.
+ *
+ * Warmed windows are also persisted as last-known-good snapshots
+ * (lib/snapshot-store.js) and restored at boot, so Uplisting failures right
+ * after a restart can still be answered, flagged as stale.
+ */
+
+import { fetchCalendar } from './uplisting';
+import { calendarVersion, restoreCalendar, storeCalendar } from './calendar-cache';
+import { getPropertyCatalogue } from './property-catalogue';
+import { loadSnapshots, saveSnapshot } from './snapshot-store';
+
+const ENABLED = process.env.CALENDAR_WARMER_ENABLED !== 'false';
+// Covers the default price matrix window (180 check-in days + 28 nights)
+const HORIZON_DAYS = parseInt(process.env.CALENDAR_WARM_HORIZON_DAYS || '240', 10);
+const INTERVAL_MS = parseInt(process.env.CALENDAR_WARM_INTERVAL_MS || '60000', 10);
+const DAY_MS = 24 * 60 * 60 * 1000;
+const SNAPSHOT_PREFIX = 'calendar:';
+
+// Shared with the route handlers' copy of this module (see lib/calendar-cache.js)
+const state = globalThis.__calendarWarmer ||= {
+  started: false,
+  propertyIds: [],
+  cursor: 0,
+  cycles: 0,
+  refreshes: 0,
+  errors: 0,
+  lastError: null,
+  properties: {},
+};
+
+/**
+ * Window warmed right now: yesterday (UTC) covers guests in earlier time zones
+ * @returns {Object} { from, to } as YYYY-MM-DD
+ */
+export function warmHorizon(now = Date.now()) {
+  const from = new Date(now - DAY_MS).toISOString().split('T')[0];
+  const to = new Date(Date.parse(from) + HORIZON_DAYS * DAY_MS).toISOString().split('T')[0];
+  return { from, to };
+}
+
+async function refreshNext() {
+  if (state.cursor === 0) {
+    // Each cycle picks up properties added to or removed from the catalogue
+    const { properties } = await getPropertyCatalogue();
+    state.propertyIds = properties.map(property => String(property.id));
+    state.cycles++;
+  }
+  if (state.propertyIds.length === 0) return;
+
+  const propertyId = state.propertyIds[state.cursor];
+  state.cursor = (state.cursor + 1) % state.propertyIds.length;
+  const status = state.properties[propertyId] ||= { refreshes: 0, errors: 0, lastRefreshMs: null, lastError: null };
+  const { from, to } = warmHorizon();
+  const startedAt = Date.now();
+  const since = calendarVersion();
+
+  try {
+    const data = await fetchCalendar(propertyId, from, to, { lane: 'background' });
+    // Age counts from the request start: nothing newer than that is in the data
+    storeCalendar(propertyId, from, to, data, startedAt, since);
+    saveSnapshot(`${SNAPSHOT_PREFIX}${propertyId}`, { from, to, data, fetchedAt: startedAt });
+    state.refreshes++;
+    status.refreshes++;
+    status.lastRefreshMs = Date.now() - startedAt;
+  } catch (error) {
+    state.errors++;
+    status.errors++;
+    status.lastError = error.message;
+    throw error;
+  }
+}
+
+function nextDelay() {
+  const warmedOnce = state.propertyIds.length > 0
+    && state.propertyIds.every(propertyId => state.properties[propertyId]?.refreshes > 0);
+  return warmedOnce ? INTERVAL_MS / state.propertyIds.length : 0;
+}
+
+async function tick() {
+  let delay;
+  try {
+    await refreshNext();
+    delay = nextDelay();
+  } catch (error) {
+    state.lastError = error.message;
+    // Back off a full step after a failure, even while warming up
+    delay = INTERVAL_MS / Math.max(state.propertyIds.length, 1);
+  }
+  const timer = setTimeout(tick, delay);
+  timer.unref?.();
+}
+
+/**
+ * Put the last persisted calendar windows into the calendar cache
+ * They only answer as a fallback, flagged as stale, until the warmer
+ * replaces them.
+ * @returns {Promise<number>} Windows restored
+ */
+export async function restoreCalendarSnapshots() {
+  const snapshots = await loadSnapshots(SNAPSHOT_PREFIX);
+  for (const { key, data } of snapshots) {
+    restoreCalendar(key.slice(SNAPSHOT_PREFIX.length), data.from, data.to, data.data, data.fetchedAt);
+  }
+  return snapshots.length;
+}
+
+/**
+ * Start refreshing calendars in the background (once per process)
+ * @returns {boolean} Whether the warmer was started by this call
+ */
+export function startCalendarWarmer() {
+  if (!ENABLED || state.started) return false;
+  state.started = true;
+  tick();
+  return true;
+}
+
+/**
+ * Warmer configuration and per-property refresh counters
+ * @returns {Object} { enabled, started, horizonDays, intervalMs, cycles, refreshes, errors, lastError, properties }
+ */
+export function getCalendarWarmerStatus() {
+  const { propertyIds, cursor, ...counters } = state;
+  return {
+    enabled: ENABLED,
+    horizonDays: HORIZON_DAYS,
+    intervalMs: INTERVAL_MS,
+    horizon: warmHorizon(),
+    ...counters,
+  };
+}
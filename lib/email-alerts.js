@@ -3,9 +3,8 @@
  * Send notifications to admins for system events requiring attention
  */
 
-import { Resend } from 'resend';
+import { getEmailService } from './email';
 
-const resend = new Resend(process.env.RESEND_API_KEY);
 const ADMIN_EMAIL = process.env.ADMIN_EMAIL || 'journey@swissalpinejourney.ch';
 const FROM_EMAIL = process.env.EMAIL_FROM || 'journey@swissalpinejourney.ch';
 
@@ -95,7 +94,7 @@ ACTION REQUIRED:
 Fallback rate used: CHF 300/night
     `;
 
-    await resend.emails.send({
+    const result = await getEmailService().sendEmail({
       from: FROM_EMAIL,
       to: ADMIN_EMAIL,
       subject,
@@ -103,6 +102,10 @@ Fallback rate used: CHF 300/night
       text,
     });
 
+    if (!result.success) {
+      throw new Error(typeof result.error === 'string' ? result.error : result.error?.message || 'Email send failed');
+    }
+
     console.log('✅ Missing rates alert sent to admin:', ADMIN_EMAIL);
     return { success: true };
   } catch (error) {
@@ -185,7 +188,7 @@ ${bookingId ? `- Booking ID: ${bookingId}` : ''}
 Complete fallback used: CHF 300/night × ${nights} nights = CHF ${nights * 300}
     `;
 
-    await resend.emails.send({
+    const result = await getEmailService().sendEmail({
       from: FROM_EMAIL,
       to: ADMIN_EMAIL,
       subject,
@@ -193,6 +196,10 @@ Complete fallback used: CHF 300/night × ${nights} nights = CHF ${nights * 300}
       text,
     });
 
+    if (!result.success) {
+      throw new Error(typeof result.error === 'string' ? result.error : result.error?.message || 'Email send failed');
+    }
+
     console.log('✅ No rates alert sent to admin:', ADMIN_EMAIL);
     return { success: true };
   } catch (error) {
@@ -1,9 +1,12 @@
 // Email service factory
 import { ResendProvider } from './providers/resend';
+import { CaptureProvider } from './providers/capture';
 
 // Provider configuration
 const PROVIDERS = {
   resend: ResendProvider,
+  // Local file sink for tests and offline runs (EMAIL_CAPTURE_FILE)
+  capture: CaptureProvider,
   // Add other providers here as needed
   // sendgrid: SendGridProvider,
 };
@@ -11,6 +14,9 @@ const PROVIDERS = {
 // Default provider from environment or fallback to resend
 const DEFAULT_PROVIDER = process.env.EMAIL_PROVIDER || 'resend';
 
+// One transport instance per provider, shared by every sender in the process
+const instances = {};
+
 /**
  * Email service factory that returns the configured provider
  */
@@ -19,15 +25,53 @@ export function createEmailService(provider = DEFAULT_PROVIDER) {
     console.warn(`Email provider "${provider}" not found, using default (resend)`);
     provider = 'resend';
   }
-  
+
   return new PROVIDERS[provider]();
 }
 
 /**
- * Get the default email service instance
+ * Get the shared email service instance
+ * The provider client is created on first use and reused afterwards
+ */
+export function getEmailService(provider = DEFAULT_PROVIDER) {
+  if (!instances[provider]) {
+    instances[provider] = createEmailService(provider);
+  }
+  return instances[provider];
+}
+
+/**
+ * Shared provider instances, and whether each has created its SDK client
+ * @returns {Object} { [provider]: { clientLoaded } }
+ */
+export function getEmailServiceStatus() {
+  const status = {};
+  for (const [provider, instance] of Object.entries(instances)) {
+    status[provider] = { clientLoaded: Boolean(instance.clientPromise) };
+  }
+  return status;
+}
+
+/**
+ * Send several emails in as few provider calls as possible
+ * Providers without a batch API fall back to sending one by one.
+ * @param {Object[]} messages - Array of email options (from, to, subject, html, text, metadata)
+ * @returns {Promise<Object>} { success, messageIds, failed, provider }
  */
-export function getEmailService() {
-  return createEmailService();
+export async function sendEmailBatch(messages) {
+  const emailService = getEmailService();
+
+  if (typeof emailService.sendBatch === 'function') {
+    return emailService.sendBatch(messages);
+  }
+
+  const results = await Promise.all(messages.map(message => emailService.sendEmail(message)));
+  return {
+    success: results.every(result => result.success),
+    messageIds: results.filter(result => result.success).map(result => result.messageId),
+    failed: results.filter(result => !result.success).length,
+    provider: results[0]?.provider
+  };
 }
 
 /**
@@ -41,7 +85,7 @@ export function getEmailService() {
 export async function sendAdminAlert({ subject, message, severity = 'info', metadata = {} }) {
   const emailService = getEmailService();
   const adminEmail = process.env.ADMIN_EMAIL;
-  
+
   if (!adminEmail) {
     console.error('ADMIN_EMAIL not configured in environment variables');
     return {
@@ -49,7 +93,7 @@ export async function sendAdminAlert({ subject, message, severity = 'info', meta
       error: 'Admin email not configured'
     };
   }
-  
+
   return emailService.sendEmail({
     to: adminEmail,
     subject: `[${severity.toUpperCase()}] ${subject}`,
@@ -0,0 +1,84 @@
+import { appendFile } from 'fs/promises';
+import { randomUUID } from 'crypto';
+
+/**
+ * Local capture sink for tests and offline runs
+ * Writes every message as one JSON line to EMAIL_CAPTURE_FILE instead of
+ * delivering it, so test harnesses can assert exactly what was sent.
+ */
+export class CaptureProvider {
+  constructor() {
+    this.filePath = process.env.EMAIL_CAPTURE_FILE || '/tmp/email-capture.jsonl';
+    this.defaultFrom = process.env.EMAIL_FROM || 'onboarding@resend.dev';
+  }
+
+  /**
+   * Build the captured record for a single message
+   * @param {Object} message - Message options (see sendEmail)
+   * @returns {Object} Captured record
+   */
+  toRecord({ from, to, subject, html, text, metadata = {} }) {
+    return {
+      id: randomUUID(),
+      from: from || this.defaultFrom,
+      to: Array.isArray(to) ? to : [to],
+      subject,
+      html,
+      text,
+      metadata,
+      capturedAt: new Date().toISOString(),
+    };
+  }
+
+  /**
+   * Capture an email to the sink file
+   * @param {Object} options - Email options (same shape as ResendProvider.sendEmail)
+   */
+  async sendEmail(options) {
+    try {
+      const record = this.toRecord(options);
+      await appendFile(this.filePath, JSON.stringify(record) + '\n');
+
+      return {
+        success: true,
+        messageId: record.id,
+        provider: 'capture'
+      };
+    } catch (error) {
+      console.error('Failed to capture email:', error);
+      return {
+        success: false,
+        error: error.message,
+        provider: 'capture'
+      };
+    }
+  }
+
+  /**
+   * Capture several emails with a single write
+   * @param {Object[]} messages - Array of email options
+   * @returns {Promise<Object>} { success, messageIds, failed, provider }
+   */
+  async sendBatch(messages) {
+    const records = messages.map(message => this.toRecord(message));
+
+    try {
+      await appendFile(this.filePath, records.map(record => JSON.stringify(record) + '\n').join(''));
+
+      return {
+        success: true,
+        messageIds: records.map(record => record.id),
+        failed: 0,
+        provider: 'capture'
+      };
+    } catch (error) {
+      console.error('Failed to capture email batch:', error);
+      return {
+        success: false,
+        messageIds: [],
+        failed: records.length,
+        provider: 'capture'
+      };
+    }
+  }
+}
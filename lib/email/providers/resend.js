@@ -1,11 +1,45 @@
-import { Resend } from 'resend';
+// Resend accepts at most 100 messages per batch request
+const BATCH_LIMIT = 100;
 
 export class ResendProvider {
   constructor() {
-    this.client = new Resend(process.env.RESEND_API_KEY);
+    this.clientPromise = null;
     this.defaultFrom = process.env.EMAIL_FROM || 'onboarding@resend.dev';
   }
 
+  /**
+   * The Resend client, created on first send
+   * The SDK is imported here rather than at module load: most routes that can
+   * send an alert never do, and shouldn't load it on a cold start
+   * @returns {Promise<Object>} Resend client
+   */
+  getClient() {
+    // RESEND_BASE_URL (read by the SDK) can point this at a local stand-in
+    this.clientPromise ||= import('resend')
+      .then(({ Resend }) => new Resend(process.env.RESEND_API_KEY))
+      .catch((error) => {
+        this.clientPromise = null;
+        throw error;
+      });
+    return this.clientPromise;
+  }
+
+  /**
+   * Build the Resend payload for a single message
+   * @param {Object} message - Message options (see sendEmail)
+   * @returns {Object} Resend email payload
+   */
+  toPayload({ from, to, subject, html, text, metadata = {} }) {
+    return {
+      from: from || this.defaultFrom,
+      to: Array.isArray(to) ? to : [to],
+      subject,
+      html,
+      text,
+      tags: metadata.tags || [],
+    };
+  }
+
   /**
    * Send an email using Resend
    * @param {Object} options - Email options
@@ -16,16 +50,10 @@ export class ResendProvider {
    * @param {string} options.text - Plain text content (optional)
    * @param {Object} options.metadata - Additional metadata
    */
-  async sendEmail({ from, to, subject, html, text, metadata = {} }) {
+  async sendEmail(options) {
     try {
-      const { data, error } = await this.client.emails.send({
-        from: from || this.defaultFrom,
-        to: Array.isArray(to) ? to : [to],
-        subject,
-        html,
-        text,
-        tags: metadata.tags || [],
-      });
+      const client = await this.getClient();
+      const { data, error } = await client.emails.send(this.toPayload(options));
 
       if (error) {
         console.error('Resend email error:', error);
@@ -51,4 +79,44 @@ export class ResendProvider {
       };
     }
   }
+
+  /**
+   * Send several emails using the Resend batch API
+   * Messages are split into chunks of 100 (the Resend batch limit)
+   * @param {Object[]} messages - Array of email options (see sendEmail)
+   * @returns {Promise<Object>} { success, messageIds, failed, provider }
+   */
+  async sendBatch(messages) {
+    const messageIds = [];
+    let failed = 0;
+
+    for (let i = 0; i < messages.length; i += BATCH_LIMIT) {
+      const chunk = messages.slice(i, i + BATCH_LIMIT);
+      try {
+        const client = await this.getClient();
+        const { data, error } = await client.batch.send(
+          chunk.map(message => this.toPayload(message))
+        );
+
+        if (error) {
+          console.error('Resend batch error:', error);
+          failed += chunk.length;
+          continue;
+        }
+
+        const ids = (data?.data || data || []).map(item => item.id);
+        messageIds.push(...ids);
+      } catch (error) {
+        console.error('Failed to send batch via Resend:', error);
+        failed += chunk.length;
+      }
+    }
+
+    return {
+      success: failed === 0,
+      messageIds,
+      failed,
+      provider: 'resend'
+    };
+  }
 }
@@ -0,0 +1,87 @@
+import { NextResponse } from 'next/server';
+import { createHash } from 'crypto';
+
+/**
+ * HTTP caching helpers for read-only API routes
+ * Content-hash ETags, If-None-Match handling (304) and per-route
+ * Cache-Control policies.
+ */
+
+export const CACHE_POLICIES = {
+  // Catalogue data changes at most once per catalogue refresh
+  catalogue: 'public, max-age=60, stale-while-revalidate=300',
+  // Browsing calendars follow the 60s revalidate window of the Uplisting fetch
+  availability: 'public, max-age=30, stale-while-revalidate=60',
+  // Booking totals are always revalidated before reuse
+  booking: 'private, no-cache',
+  // Publishable keys must reflect the dashboard immediately; revalidation is cheap
+  config: 'private, no-cache, must-revalidate',
+  // Last-known-good data served during an Uplisting outage must not outlive it
+  stale: 'no-store',
+};
+
+/**
+ * Strong ETag for a serialized body
+ * @param {string} body - Response body
+ * @returns {string} Quoted ETag
+ */
+export function computeEtag(body) {
+  return `"${createHash('sha1').update(body).digest('base64url')}"`;
+}
+
+/**
+ * Whether the request's If-None-Match matches the current ETag
+ * Weak comparison, as RFC 9110 requires for If-None-Match.
+ * @param {Request} request - Incoming request
+ * @param {string} etag - Current ETag
+ * @returns {boolean}
+ */
+export function isNotModified(request, etag) {
+  const header = request.headers.get('if-none-match');
+  if (!header) return false;
+  if (header.trim() === '*') return true;
+
+  const strip = tag => tag.trim().replace(/^W\//, '');
+  return header.split(',').some(tag => strip(tag) === strip(etag));
+}
+
+/**
+ * Conditional response for an already serialized JSON body
+ * @param {Request} request - Incoming request
+ * @param {Object} options
+ * @param {string} options.body - Serialized JSON
+ * @param {string} [options.etag] - Precomputed ETag (computed from body otherwise)
+ * @param {string} options.cacheControl - Cache-Control value (see CACHE_POLICIES)
+ * @param {Object} [options.headers] - Extra headers for both 200 and 304
+ * @returns {NextResponse} 304 without body when the client copy is current, 200 otherwise
+ */
+export function conditionalResponse(request, { body, etag = computeEtag(body), cacheControl, headers = {} }) {
+  const cacheHeaders = {
+    ...headers,
+    'ETag': etag,
+    'Cache-Control': cacheControl,
+  };
+
+  if (isNotModified(request, etag)) {
+    return new NextResponse(null, { status: 304, headers: cacheHeaders });
+  }
+
+  return new NextResponse(body, {
+    headers: {
+      ...cacheHeaders,
+      'Content-Type': 'application/json',
+    },
+  });
+}
+
+/**
+ * Conditional JSON response, the cacheable counterpart of NextResponse.json
+ * @param {Request} request - Incoming request
+ * @param {Object} data - Response payload
+ * @param {string} cacheControl - Cache-Control value (see CACHE_POLICIES)
+ * @param {Object} [headers] - Extra headers
+ * @returns {NextResponse}
+ */
+export function conditionalJson(request, data, cacheControl, headers) {
+  return conditionalResponse(request, { body: JSON.stringify(data), cacheControl, headers });
+}
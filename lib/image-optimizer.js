@@ -24,30 +24,52 @@ export function optimizeUplistingImage(url, options = {}) {
   } = options;
   
   // Check if it's a Filestack URL (Uplisting images)
-  if (url.includes('filestackcontent.com')) {
-    // Filestack uses path-based transformations, not query parameters
-    // Format: https://cdn.filestackcontent.com/resize=width:800/quality=value:75/compress/[handle]
-    const parts = url.split('filestackcontent.com/');
-    if (parts.length === 2) {
-      const baseUrl = parts[0] + 'filestackcontent.com/';
-      const handle = parts[1].split('?')[0]; // Remove any existing params
-      
-      // Build Filestack transformation URL
-      // Order: resize, quality, compress, then handle
-      const transformations = [
-        `resize=width:${width},fit:max`,
-        `quality=value:${quality}`,
-        'compress'
-      ].join('/');
-      
-      return `${baseUrl}${transformations}/${handle}`;
-    }
+  const handle = parseFilestackHandle(url);
+  if (handle) {
+    return buildFilestackUrl(handle, { width, quality, format });
   }
   
   // For other URLs, return as-is (Next.js Image will optimize)
   return url;
 }
 
+/**
+ * Extracts the Filestack file handle from a CDN URL
+ * The handle is the last path segment; any transformations already in the
+ * URL (e.g. configured primary images) are dropped so they are not stacked.
+ * 
+ * @param {string} url - Image URL
+ * @returns {string|null} Filestack handle, or null for non-Filestack URLs
+ */
+export function parseFilestackHandle(url) {
+  if (!url || !url.includes('filestackcontent.com/')) return null;
+  
+  const path = url.split('filestackcontent.com/')[1].split('?')[0];
+  const handle = path.split('/').filter(Boolean).pop();
+  return handle || null;
+}
+
+/**
+ * Builds a Filestack transformation URL for a file handle
+ * Filestack uses path-based transformations, not query parameters
+ * Format: https://cdn.filestackcontent.com/resize=width:800,fit:max/quality=value:75/compress/[handle]
+ * 
+ * @param {string} handle - Filestack file handle
+ * @param {Object} options - { width, quality, format } (format 'auto' keeps the source format)
+ * @returns {string} Transformation URL
+ */
+export function buildFilestackUrl(handle, { width = 800, quality = 75, format = 'auto' } = {}) {
+  // Order: resize, quality, output format, compress, then handle
+  const transformations = [
+    `resize=width:${width},fit:max`,
+    `quality=value:${quality}`,
+    format && format !== 'auto' ? `output=format:${format}` : null,
+    'compress'
+  ].filter(Boolean).join('/');
+  
+  return `https://cdn.filestackcontent.com/${transformations}/${handle}`;
+}
+
 /**
  * Gets optimal image dimensions based on use case
  */
@@ -111,3 +133,87 @@ export function getOptimizedImages(images = [], size = 'CARD') {
     original: img.url, // Keep original for reference
   }));
 }
+
+/**
+ * Widths and formats precomputed for every Uplisting photo
+ * Widths follow the IMAGE_SIZES presets so every preset maps to a variant.
+ */
+export const VARIANT_WIDTHS = [400, 640, 800, 1200, 1600];
+export const VARIANT_FORMATS = ['webp', 'jpg'];
+
+// Quality used for each variant width (taken from the matching IMAGE_SIZES preset)
+const VARIANT_QUALITY = Object.fromEntries(
+  Object.values(IMAGE_SIZES).map(({ width, quality }) => [width, quality])
+);
+
+/**
+ * Precomputes srcset-ready variants for one photo URL
+ * Called once per catalogue refresh, not at render time.
+ * 
+ * @param {string} url - Original photo URL
+ * @returns {Object|null} { widths, webp: [...urls], jpg: [...urls] } with url
+ *   arrays parallel to widths, or null for non-Filestack images
+ */
+export function buildImageVariants(url) {
+  const handle = parseFilestackHandle(url);
+  if (!handle) return null;
+  
+  const variants = { widths: VARIANT_WIDTHS };
+  VARIANT_FORMATS.forEach(format => {
+    variants[format] = VARIANT_WIDTHS.map(width =>
+      buildFilestackUrl(handle, { width, quality: VARIANT_QUALITY[width] || 75, format })
+    );
+  });
+  return variants;
+}
+
+/**
+ * Attaches precomputed variants to every photo of a formatted property
+ * @param {Object} property - Formatted property with photos array
+ * @returns {Object} Property with photo.variants set
+ */
+export function withImageVariants(property) {
+  if (!property || !Array.isArray(property.photos)) return property;
+  
+  return {
+    ...property,
+    photos: property.photos.map(photo => ({
+      ...photo,
+      variants: buildImageVariants(photo.url)
+    }))
+  };
+}
+
+/**
+ * Picks the smallest precomputed variant at least `width` pixels wide
+ * Falls back to on-the-fly optimization for photos without variants.
+ * 
+ * @param {Object} photo - Photo object (with optional variants)
+ * @param {number} width - Target width in pixels
+ * @param {string} format - 'webp' or 'jpg'
+ * @returns {string} Image URL
+ */
+export function variantUrl(photo, width = 800, format = 'webp') {
+  if (!photo) return '';
+  
+  const variants = photo.variants;
+  if (!variants || !variants[format]) {
+    return optimizeUplistingImage(photo.url, { width });
+  }
+  
+  const index = variants.widths.findIndex(w => w >= width);
+  return variants[format][index === -1 ? variants.widths.length - 1 : index];
+}
+
+/**
+ * Builds a srcset attribute value from precomputed variants
+ * @param {Object} photo - Photo object with variants
+ * @param {string} format - 'webp' or 'jpg'
+ * @returns {string|undefined} srcset value, or undefined without variants
+ */
+export function toSrcSet(photo, format = 'webp') {
+  const variants = photo?.variants;
+  if (!variants || !variants[format]) return undefined;
+  
+  return variants[format].map((url, i) => `${url} ${variants.widths[i]}w`).join(', ');
+}
@@ -1,12 +1,6 @@
-import { MongoClient } from 'mongodb';
-
 const MONGO_URL = process.env.MONGO_URL;
 const MONGO_DB_NAME = process.env.MONGO_DB_NAME || 'swissalpine';
 
-if (!MONGO_URL) {
-  throw new Error('Please define the MONGO_URL environment variable inside .env');
-}
-
 // MongoDB connection options for Atlas compatibility
 const options = {
   maxPoolSize: 10,
@@ -16,24 +10,68 @@ const options = {
   socketTimeoutMS: 45000,
 };
 
-let cachedClient = null;
-let cachedDb = null;
+// One pool per process: on globalThis because instrumentation.js and the
+// route handlers each bundle their own copy of this module
+const connection = globalThis.__mongoConnection ||= { promise: null };
 
-async function connectToDatabase() {
-  if (cachedClient && cachedDb) {
-    return { client: cachedClient, db: cachedDb };
+function connect() {
+  if (!connection.promise) {
+    if (!MONGO_URL) {
+      throw new Error('Please define the MONGO_URL environment variable inside .env');
+    }
+
+    connection.promise = import('mongodb')
+      .then(({ MongoClient }) => MongoClient.connect(MONGO_URL, options))
+      .then(client => ({ client, db: client.db(MONGO_DB_NAME) }))
+      .catch((error) => {
+        // Let the next request try again
+        connection.promise = null;
+        throw error;
+      });
   }
 
-  const client = await MongoClient.connect(MONGO_URL, options);
+  return connection.promise;
+}
 
-  const db = client.db(MONGO_DB_NAME);
-  
-  cachedClient = client;
-  cachedDb = db;
+/**
+ * Connect on first use, not on import: the driver is loaded and the pool
+ * opened only once something is actually stored. Forms, bookings, booking
+ * holds and snapshots all share this connection.
+ * @param {Object} settings
+ * @param {number} settings.timeoutMs - Reject if not connected by then; the
+ *   connection itself carries on for other callers
+ * @returns {Promise<Object>} { client, db }
+ */
+export async function connectToDatabase({ timeoutMs } = {}) {
+  const connecting = connect();
+  if (!timeoutMs) return connecting;
 
-  return { client, db };
+  let timer;
+  const timeout = new Promise((_, reject) => {
+    timer = setTimeout(() => reject(new Error(`MongoDB not connected after ${timeoutMs}ms`)), timeoutMs);
+  });
+  try {
+    return await Promise.race([connecting, timeout]);
+  } finally {
+    clearTimeout(timer);
+  }
+}
+
+/**
+ * Shared MongoClient
+ * @returns {Promise<Object>} Connected MongoClient
+ */
+export async function getMongoClient() {
+  const { client } = await connectToDatabase();
+  return client;
 }
 
-const clientPromise = connectToDatabase().then(({ client }) => client);
+/**
+ * Connection state of the shared client (connected once a connection is opening or open)
+ * @returns {Object} { connected }
+ */
+export function getMongoStatus() {
+  return { connected: connection.promise !== null };
+}
 
-export default clientPromise;
\ No newline at end of file
+export default getMongoClient;
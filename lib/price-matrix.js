@@ -0,0 +1,152 @@
+import { createQuote, fromMinorUnits, quoteMinor, toMinorUnits } from './pricing-calculator.js';
+
+/**
+ * Stay-length price matrix
+ *
+ * Total prices for every check-in x nights combination in a window, so the
+ * date picker can price any selection locally instead of asking the server
+ * for each range. Built from prefix sums over the nightly rates: the
+ * accommodation total of any stay is prefix[checkIn + nights] - prefix[checkIn],
+ * and fees and taxes come from the property's pricing plan.
+ *
+ * Night i of the window (from + i -> from + i + 1) uses Uplisting's rate and
+ * availability for the morning after (from + i + 1), like
+ * calculateAccommodationTotal and the constraint index. Nights missing from
+ * the calendar count as unavailable.
+ */
+
+export const MATRIX_DEFAULT_DAYS = 180;
+export const MATRIX_MAX_DAYS = 366;
+export const MATRIX_DEFAULT_NIGHTS = 28;
+export const MATRIX_MAX_NIGHTS = 60;
+
+// Same fallback as calculateAccommodationTotal (CHF 300 per night)
+const FALLBACK_RATE_MINOR = 30000;
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+/**
+ * ISO date `offset` days after `from` (both YYYY-MM-DD, UTC)
+ */
+export function addDays(from, offset) {
+  return new Date(Date.parse(from) + offset * DAY_MS).toISOString().split('T')[0];
+}
+
+/**
+ * Last calendar date the matrix needs rates for
+ */
+export function matrixCalendarEnd(from, days, maxNights) {
+  return addDays(from, days + maxNights);
+}
+
+/**
+ * Build the price matrix for one property and guest count
+ * @param {Object} params
+ * @param {Object} params.calendarData - Uplisting calendar covering from .. matrixCalendarEnd(),
+ *   with booking holds applied
+ * @param {Object} params.plan - Pricing plan (getPricingPlan)
+ * @param {number} params.cleaningFee - Cleaning fee in CHF
+ * @param {string} params.from - First check-in date (YYYY-MM-DD)
+ * @param {number} params.days - Number of check-in dates
+ * @param {number} params.maxNights - Longest stay priced
+ * @param {number} params.guests - Total number of guests
+ * @returns {Object} Matrix; all amounts in centimes, grandTotals row-major by check-in
+ */
+export function buildPriceMatrix({ calendarData, plan, cleaningFee = 0, from, days, maxNights, guests }) {
+  const calendarDays = calendarData.data || calendarData.calendar?.days || [];
+  const rateByDate = new Map();
+  const availableByDate = new Map();
+  for (const day of calendarDays) {
+    const date = day.date || day.attributes?.date;
+    if (date) {
+      rateByDate.set(date, parseFloat(day.day_rate || day.rate || day.attributes?.rate || day.attributes?.day_rate || 0));
+      availableByDate.set(date, (day.available ?? day.attributes?.available) !== false);
+    }
+  }
+
+  const length = days + maxNights - 1;
+  const nightlyRates = new Array(length);
+  const fallbackNights = [];
+  const unavailableNights = [];
+  const prefix = new Float64Array(length + 1);
+  for (let i = 0; i < length; i++) {
+    const morning = addDays(from, i + 1);
+    if (!availableByDate.get(morning)) {
+      unavailableNights.push(i);
+    }
+    const rate = rateByDate.get(morning);
+    if (!rate || rate <= 0) {
+      nightlyRates[i] = FALLBACK_RATE_MINOR;
+      fallbackNights.push(i);
+    } else {
+      nightlyRates[i] = toMinorUnits(rate);
+    }
+    prefix[i + 1] = prefix[i] + nightlyRates[i];
+  }
+
+  const cleaningMinor = toMinorUnits(cleaningFee);
+  const quote = createQuote(plan);
+  const grandTotals = new Array(days * maxNights);
+  for (let checkIn = 0; checkIn < days; checkIn++) {
+    const row = checkIn * maxNights;
+    for (let nights = 1; nights <= maxNights; nights++) {
+      const accommodationMinor = prefix[checkIn + nights] - prefix[checkIn];
+      grandTotals[row + nights - 1] = quoteMinor(plan, accommodationMinor, cleaningMinor, nights, guests, quote).grandTotal;
+    }
+  }
+
+  const firstDay = calendarDays[0];
+  return {
+    from,
+    days,
+    maxNights,
+    guests,
+    currency: firstDay?.currency || firstDay?.attributes?.currency || 'CHF',
+    cleaningFee: cleaningMinor,
+    nightlyRates,
+    fallbackNights,
+    unavailableNights,
+    grandTotals,
+  };
+}
+
+/**
+ * Price a selection from a matrix, without a request
+ * Returns null when the stay is outside the matrix, so callers can fall
+ * back to /api/availability/...&forBooking=true. The shape matches that
+ * route's `pricing` object, plus grandTotal (fees and taxes included);
+ * `available` is false when any night of the stay is booked or held.
+ * @param {Object} matrix - Response of /api/availability/[propertyId]/price-matrix
+ * @param {string} checkIn - Check-in date (YYYY-MM-DD)
+ * @param {string} checkOut - Check-out date (YYYY-MM-DD)
+ * @returns {Object|null} Pricing
+ */
+export function priceFromMatrix(matrix, checkIn, checkOut) {
+  if (!matrix) return null;
+  const start = Math.round((Date.parse(checkIn) - Date.parse(matrix.from)) / DAY_MS);
+  const nights = Math.round((Date.parse(checkOut) - Date.parse(checkIn)) / DAY_MS);
+  if (!(start >= 0 && start < matrix.days && nights >= 1 && nights <= matrix.maxNights)) {
+    return null;
+  }
+
+  let accommodationMinor = 0;
+  const nightlyBreakdown = [];
+  for (let i = 0; i < nights; i++) {
+    const rate = matrix.nightlyRates[start + i];
+    accommodationMinor += rate;
+    nightlyBreakdown.push({ date: addDays(matrix.from, start + i + 1), nightNumber: i + 1, rate: fromMinorUnits(rate) });
+  }
+  const inStay = index => index >= start && index < start + nights;
+  const usedFallback = matrix.fallbackNights.some(inStay);
+  const total = fromMinorUnits(accommodationMinor);
+
+  return {
+    total,
+    averageRate: total / nights,
+    totalNights: nights,
+    currency: matrix.currency,
+    nightlyBreakdown,
+    usedFallback,
+    grandTotal: fromMinorUnits(matrix.grandTotals[start * matrix.maxNights + nights - 1]),
+    available: !matrix.unavailableNights.some(inStay),
+  };
+}
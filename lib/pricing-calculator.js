@@ -1,109 +1,202 @@
-import { stripeConfig } from './stripe-config';
+import { stripeConfig } from './stripe-config.js';
 
 /**
- * Calculate extra guest fees based on property configuration
- * @param {number} totalGuests - Total number of guests
+ * Pricing kernel
+ *
+ * All arithmetic happens in integer minor units (centimes). Amounts from
+ * Uplisting are converted once, when a property's pricing plan is built,
+ * and converted back to CHF only for display and API responses.
+ *
+ * Rounding rules:
+ * - input amounts: to the nearest centime, halves up (toMinorUnits)
+ * - per_booking_percentage: subtotal x rate, rounded to the centime (halves up)
+ *   once per booking
+ * - per_booking_amount, per_night, per_person_per_night and the extra guest
+ *   charge: exact multiples of their centime amounts, no rounding
+ */
+
+const TAX_PERCENTAGE = 1;
+const TAX_PER_BOOKING = 2;
+const TAX_PER_NIGHT = 3;
+const TAX_PER_PERSON_PER_NIGHT = 4;
+
+const TAX_KINDS = {
+  per_booking_percentage: { kind: TAX_PERCENTAGE, type: 'percentage' },
+  per_booking_amount: { kind: TAX_PER_BOOKING, type: 'fixed' },
+  per_night: { kind: TAX_PER_NIGHT, type: 'fixed' },
+  per_person_per_night: { kind: TAX_PER_PERSON_PER_NIGHT, type: 'fixed' },
+};
+
+// Percentage rates are held in millionths: 3.8% -> 38000
+const RATE_SCALE = 1000000;
+
+/**
+ * Convert an amount in CHF to centimes (nearest centime, halves up)
+ * Goes through thousandths so binary artefacts (1.005 * 100 = 100.4999...) round as written.
+ * @param {number} amount - Amount in major currency unit
+ * @returns {number} Integer amount in minor units
+ */
+export function toMinorUnits(amount) {
+  return Math.round(Math.round(amount * 1000) / 10);
+}
+
+/**
+ * Convert centimes to CHF
+ * @param {number} minor - Integer amount in minor units
+ * @returns {number} Amount in major currency unit
+ */
+export function fromMinorUnits(minor) {
+  return minor / 100;
+}
+
+/**
+ * Integer division rounding halves up, for non-negative integers
+ */
+function divideRoundHalfUp(numerator, denominator) {
+  let quotient = Math.floor(numerator / denominator);
+  let remainder = numerator - quotient * denominator;
+  if (remainder < 0) {
+    quotient -= 1;
+    remainder += denominator;
+  } else if (remainder >= denominator) {
+    quotient += 1;
+    remainder -= denominator;
+  }
+  return remainder * 2 >= denominator ? quotient + 1 : quotient;
+}
+
+/**
+ * Precompute a property's fees and taxes in minor units
+ * Taxes the calculator would skip (unknown label, type not matching the
+ * label, amount <= 0) are dropped here, once, instead of on every quote.
  * @param {Array} propertyFees - Array of fee objects from Uplisting
- * @returns {number} Extra guest fee amount
+ * @param {Array} propertyTaxes - Array of tax objects from Uplisting
+ * @returns {Object} Pricing plan
  */
-function calculateExtraGuestFee(totalGuests, propertyFees) {
-  if (!propertyFees || propertyFees.length === 0) return 0;
-  
-  const extraGuestFeeConfig = propertyFees.find(
+export function buildPricingPlan(propertyFees = [], propertyTaxes = []) {
+  const extraGuestFeeConfig = (propertyFees || []).find(
     fee => fee.attributes?.label === 'extra_guest_charge' && 
            fee.attributes?.enabled === true
   );
-  
-  if (!extraGuestFeeConfig) return 0;
-  
-  const guestsIncluded = extraGuestFeeConfig.attributes.guests_included || 0;
-  const feePerGuest = extraGuestFeeConfig.attributes.amount || 0;
-  const extraGuests = Math.max(0, totalGuests - guestsIncluded);
-  
-  return extraGuests * feePerGuest;
+
+  const taxes = [];
+  for (const tax of propertyTaxes || []) {
+    const attrs = tax.attributes;
+    const taxKind = TAX_KINDS[attrs?.label];
+    if (!taxKind || attrs.type !== taxKind.type || !(attrs.amount > 0)) continue;
+
+    taxes.push({
+      kind: taxKind.kind,
+      name: attrs.name,
+      rate: attrs.amount,
+      amountMinor: taxKind.kind === TAX_PERCENTAGE ? 0 : toMinorUnits(attrs.amount),
+      rateMillionths: taxKind.kind === TAX_PERCENTAGE ? Math.round(attrs.amount * (RATE_SCALE / 100)) : 0,
+    });
+  }
+
+  return {
+    guestsIncluded: extraGuestFeeConfig ? (extraGuestFeeConfig.attributes.guests_included || 0) : 0,
+    extraGuestFeeMinor: extraGuestFeeConfig ? toMinorUnits(extraGuestFeeConfig.attributes.amount || 0) : 0,
+    taxes,
+  };
 }
 
+const planCache = new WeakMap();
+
 /**
- * Calculate all applicable taxes based on property configuration
- * @param {Object} params - Tax calculation parameters
- * @param {number} params.subtotal - Subtotal before taxes
- * @param {number} params.nights - Number of nights
- * @param {number} params.guests - Total number of guests
- * @param {Array} params.propertyTaxes - Array of tax objects from Uplisting
- * @returns {Object} Tax breakdown and total
+ * Pricing plan for a property object, built once per object
+ * Catalogue properties live until the next catalogue refresh, so the plan is
+ * shared by every quote for that property in between.
+ * @param {Object} property - Property with fees and taxes
+ * @returns {Object} Pricing plan
  */
-function calculateTaxes({ subtotal, nights, guests, propertyTaxes }) {
-  const breakdown = [];
-  let totalTax = 0;
-  
-  if (!propertyTaxes || propertyTaxes.length === 0) {
-    return { breakdown, totalTax: 0 };
+export function getPricingPlan(property) {
+  let plan = planCache.get(property);
+  if (!plan) {
+    plan = buildPricingPlan(property.fees, property.taxes);
+    planCache.set(property, plan);
   }
-  
-  propertyTaxes.forEach(tax => {
-    const attrs = tax.attributes;
-    let taxAmount = 0;
-    
-    switch (attrs.label) {
-      case 'per_booking_percentage':
-        // Percentage tax on subtotal
-        if (attrs.type === 'percentage' && attrs.amount > 0) {
-          taxAmount = subtotal * (attrs.amount / 100);
-          breakdown.push({
-            name: attrs.name,
-            type: 'percentage',
-            rate: attrs.amount,
-            amount: taxAmount
-          });
-        }
-        break;
-        
-      case 'per_booking_amount':
-        // Fixed amount per booking
-        if (attrs.type === 'fixed' && attrs.amount > 0) {
-          taxAmount = attrs.amount;
-          breakdown.push({
-            name: attrs.name,
-            type: 'fixed',
-            amount: taxAmount
-          });
-        }
+  return plan;
+}
+
+/**
+ * Reusable result object for quoteMinor
+ * @param {Object} plan - Pricing plan
+ * @returns {Object} Quote with one tax slot per plan tax
+ */
+export function createQuote(plan) {
+  return {
+    extraGuestFee: 0,
+    subtotal: 0,
+    totalTax: 0,
+    grandTotal: 0,
+    taxes: new Array(plan.taxes.length).fill(0),
+  };
+}
+
+/**
+ * Price a booking in minor units
+ * Writes into `quote` and allocates nothing, so callers pricing many stays
+ * (price matrices, benchmarks) can reuse one quote object.
+ * @param {Object} plan - Pricing plan (buildPricingPlan / getPricingPlan)
+ * @param {number} accommodationMinor - Accommodation total in centimes
+ * @param {number} cleaningMinor - Cleaning fee in centimes
+ * @param {number} nights - Number of nights
+ * @param {number} guests - Total number of guests
+ * @param {Object} quote - Result object from createQuote(plan)
+ * @returns {Object} The same quote object
+ */
+export function quoteMinor(plan, accommodationMinor, cleaningMinor, nights, guests, quote) {
+  const extraGuests = guests > plan.guestsIncluded ? guests - plan.guestsIncluded : 0;
+  const extraGuestFee = extraGuests * plan.extraGuestFeeMinor;
+  const subtotal = accommodationMinor + cleaningMinor + extraGuestFee;
+
+  let totalTax = 0;
+  const taxes = plan.taxes;
+  for (let i = 0; i < taxes.length; i++) {
+    const tax = taxes[i];
+    let amount;
+    switch (tax.kind) {
+      case TAX_PERCENTAGE:
+        amount = divideRoundHalfUp(subtotal * tax.rateMillionths, RATE_SCALE);
         break;
-        
-      case 'per_night':
-        // Fixed amount per night
-        if (attrs.type === 'fixed' && attrs.amount > 0) {
-          taxAmount = attrs.amount * nights;
-          breakdown.push({
-            name: attrs.name,
-            type: 'per_night',
-            nights: nights,
-            rate: attrs.amount,
-            amount: taxAmount
-          });
-        }
+      case TAX_PER_BOOKING:
+        amount = tax.amountMinor;
         break;
-        
-      case 'per_person_per_night':
-        // Tourist tax: per person per night
-        if (attrs.type === 'fixed' && attrs.amount > 0) {
-          taxAmount = attrs.amount * guests * nights;
-          breakdown.push({
-            name: attrs.name,
-            type: 'per_person_per_night',
-            guests: guests,
-            nights: nights,
-            rate: attrs.amount,
-            amount: taxAmount
-          });
-        }
+      case TAX_PER_NIGHT:
+        amount = tax.amountMinor * nights;
         break;
+      default:
+        amount = tax.amountMinor * guests * nights;
+    }
+    quote.taxes[i] = amount;
+    totalTax += amount;
+  }
+
+  quote.extraGuestFee = extraGuestFee;
+  quote.subtotal = subtotal;
+  quote.totalTax = totalTax;
+  quote.grandTotal = subtotal + totalTax;
+  return quote;
+}
+
+/**
+ * Tax breakdown entries for display, in CHF
+ */
+function describeTaxes(plan, quote, nights, guests) {
+  return plan.taxes.map((tax, i) => {
+    const amount = fromMinorUnits(quote.taxes[i]);
+    switch (tax.kind) {
+      case TAX_PERCENTAGE:
+        return { name: tax.name, type: 'percentage', rate: tax.rate, amount };
+      case TAX_PER_BOOKING:
+        return { name: tax.name, type: 'fixed', amount };
+      case TAX_PER_NIGHT:
+        return { name: tax.name, type: 'per_night', nights, rate: tax.rate, amount };
+      default:
+        return { name: tax.name, type: 'per_person_per_night', guests, nights, rate: tax.rate, amount };
     }
-    
-    totalTax += taxAmount;
   });
-  
-  return { breakdown, totalTax };
 }
 
 /**
@@ -117,7 +210,8 @@ function calculateTaxes({ subtotal, nights, guests, propertyTaxes }) {
  * @param {number} params.infants - Number of infants
  * @param {Array} params.propertyFees - Property fees from Uplisting
  * @param {Array} params.propertyTaxes - Property taxes from Uplisting
- * @returns {Object} Complete price breakdown
+ * @param {Object} params.plan - Precomputed pricing plan (built from fees/taxes when omitted)
+ * @returns {Object} Complete price breakdown in CHF, plus the same totals in centimes under `minor`
  */
 export function calculateBookingPrice({
   accommodationTotal,
@@ -127,7 +221,8 @@ export function calculateBookingPrice({
   children = 0,
   infants = 0,
   propertyFees = [],
-  propertyTaxes = []
+  propertyTaxes = [],
+  plan = null
 }) {
   // Validate inputs
   if (!accommodationTotal || accommodationTotal <= 0) {
@@ -136,39 +231,33 @@ export function calculateBookingPrice({
 
   // Calculate total guests
   const totalGuests = adults + children + infants;
-  
-  // Calculate extra guest fees
-  const extraGuestFee = calculateExtraGuestFee(totalGuests, propertyFees);
-  
-  // Calculate subtotal (before taxes)
-  const subtotal = accommodationTotal + cleaningFee + extraGuestFee;
-  
-  // Calculate all applicable taxes
-  const taxes = calculateTaxes({
-    subtotal,
-    nights,
-    guests: totalGuests,
-    propertyTaxes
-  });
-  
-  // Calculate grand total
-  const grandTotal = subtotal + taxes.totalTax;
-  
-  // Calculate average per night for display
-  const averagePerNight = accommodationTotal / nights;
+
+  const pricingPlan = plan || buildPricingPlan(propertyFees, propertyTaxes);
+  const accommodationMinor = toMinorUnits(accommodationTotal);
+  const cleaningMinor = toMinorUnits(cleaningFee);
+  const quote = quoteMinor(pricingPlan, accommodationMinor, cleaningMinor, nights, totalGuests, createQuote(pricingPlan));
 
   return {
     currency: stripeConfig.getCurrency(),
-    accommodationTotal: accommodationTotal,
-    cleaningFee: cleaningFee,
-    extraGuestFee: extraGuestFee,
-    subtotal,
-    taxes: taxes.breakdown,
-    totalTax: taxes.totalTax,
-    grandTotal,
+    accommodationTotal: fromMinorUnits(accommodationMinor),
+    cleaningFee: fromMinorUnits(cleaningMinor),
+    extraGuestFee: fromMinorUnits(quote.extraGuestFee),
+    subtotal: fromMinorUnits(quote.subtotal),
+    taxes: describeTaxes(pricingPlan, quote, nights, totalGuests),
+    totalTax: fromMinorUnits(quote.totalTax),
+    grandTotal: fromMinorUnits(quote.grandTotal),
     nights,
     guests: totalGuests,
-    averagePerNight,
+    // Calculate average per night for display
+    averagePerNight: accommodationTotal / nights,
+    minor: {
+      accommodationTotal: accommodationMinor,
+      cleaningFee: cleaningMinor,
+      extraGuestFee: quote.extraGuestFee,
+      subtotal: quote.subtotal,
+      totalTax: quote.totalTax,
+      grandTotal: quote.grandTotal,
+    },
   };
 }
 
@@ -194,7 +283,7 @@ export function formatPrice(amount, currency = 'CHF') {
  * @returns {number} Amount in cents
  */
 export function toStripeCents(amount) {
-  return Math.round(amount * 100);
+  return toMinorUnits(amount);
 }
 
 /**
@@ -0,0 +1,261 @@
+/**
+ * Property Catalogue
+ *
+ * Holds the formatted property list in memory between catalogue refreshes.
+ * Formatting, primary-image ordering and responsive image variants are
+ * computed once per refresh instead of on every /api/properties response.
+ *
+ * Every refresh is persisted as a last-known-good snapshot (lib/snapshot-store.js).
+ * When Uplisting fails, the previous catalogue - or, right after a restart,
+ * the snapshot - is served with `stale: { since }` and Uplisting is retried
+ * in the background at most every CATALOGUE_STALE_RETRY_MS.
+ */
+
+import { getProperties, getProperty, formatProperties, formatProperty } from './uplisting';
+import { setPrimaryImage, setPrimaryImagesForList } from './property-config';
+import { withImageVariants, IMAGE_SIZES } from './image-optimizer';
+import { computeEtag } from './http-cache';
+import { loadSnapshots, saveSnapshot } from './snapshot-store';
+
+// Matches the revalidate window of the underlying Uplisting fetches
+const CATALOGUE_TTL_MS = parseInt(process.env.PROPERTY_CATALOGUE_TTL_MS || '300000', 10);
+const STALE_RETRY_MS = parseInt(process.env.CATALOGUE_STALE_RETRY_MS || '15000', 10);
+const SNAPSHOT_KEY = 'catalogue';
+
+// Fees the property cards display
+const CARD_FEE_LABELS = ['cleaning_fee', 'extra_guest_charge'];
+const CARD_DESCRIPTION_LENGTH = 100;
+// Distinct serialized views kept per refresh (bounds arbitrary `fields` lists)
+const MAX_CACHED_VIEWS = 32;
+
+// On globalThis so the snapshot restored by instrumentation.js is the one
+// the route handlers' copy of this module serves
+const store = globalThis.__propertyCatalogue ||= {
+  catalogue: null,
+  refreshPromise: null,
+  // Properties restored from the snapshot store at boot, until a refresh succeeds
+  restored: null,
+  detailCache: new Map(),
+};
+const { detailCache } = store;
+
+/**
+ * Apply the per-refresh presentation steps to a formatted property
+ * @param {Object} property - Output of formatProperty
+ * @returns {Object} Property with primary image first and image variants attached
+ */
+function prepareProperty(property) {
+  return withImageVariants(setPrimaryImage(property));
+}
+
+function buildCatalogue(properties, refreshedAt, stale = null) {
+  return {
+    properties,
+    byId: new Map(properties.map(property => [String(property.id), property])),
+    views: new Map(),
+    refreshedAt,
+    expiresAt: stale ? Date.now() + STALE_RETRY_MS : refreshedAt + CATALOGUE_TTL_MS,
+    stale,
+  };
+}
+
+async function refreshCatalogue() {
+  let properties;
+  try {
+    const data = await getProperties();
+    properties = setPrimaryImagesForList(formatProperties(data)).map(withImageVariants);
+  } catch (error) {
+    const lastKnown = store.catalogue || store.restored;
+    if (!lastKnown) throw error;
+
+    const since = new Date(lastKnown.refreshedAt).toISOString();
+    console.warn('Serving last known property catalogue:', error.message, 'since', since);
+    store.catalogue = buildCatalogue(lastKnown.properties, lastKnown.refreshedAt, { since, reason: error.message });
+    return store.catalogue;
+  }
+
+  store.catalogue = buildCatalogue(properties, Date.now());
+  store.restored = null;
+  saveSnapshot(SNAPSHOT_KEY, { properties, refreshedAt: store.catalogue.refreshedAt }, { force: true });
+  return store.catalogue;
+}
+
+/**
+ * Get the current catalogue, refreshing it when older than the TTL
+ * Concurrent callers during a refresh share the same refresh. A stale
+ * catalogue is returned at once while the retry runs in the background.
+ * @returns {Promise<Object>} { properties, byId, refreshedAt, stale }
+ */
+export async function getPropertyCatalogue() {
+  if (store.catalogue && Date.now() < store.catalogue.expiresAt) {
+    return store.catalogue;
+  }
+
+  if (!store.refreshPromise) {
+    store.refreshPromise = refreshCatalogue().finally(() => {
+      store.refreshPromise = null;
+    });
+  }
+  if (store.catalogue?.stale) {
+    return store.catalogue;
+  }
+  return store.refreshPromise;
+}
+
+/**
+ * Load the last-known-good catalogue from the snapshot store
+ * Called once at boot; it is only served if the first refresh fails.
+ * @returns {Promise<boolean>} Whether a snapshot was found
+ */
+export async function restoreCatalogueSnapshot() {
+  const [snapshot] = await loadSnapshots(SNAPSHOT_KEY);
+  if (!snapshot?.data?.properties) return false;
+  store.restored = { properties: snapshot.data.properties, refreshedAt: snapshot.data.refreshedAt };
+  return true;
+}
+
+/**
+ * Get a single prepared property (detail payload from /properties/:id)
+ * When Uplisting fails the last known detail or catalogue entry is returned
+ * with `stale: { since }`.
+ * @param {string} id - Property ID
+ * @returns {Promise<Object>} Prepared property
+ */
+export async function getCatalogueProperty(id) {
+  const key = String(id);
+  const cached = detailCache.get(key);
+  if (cached && Date.now() - cached.refreshedAt < CATALOGUE_TTL_MS) {
+    return cached.property;
+  }
+
+  let property;
+  try {
+    property = prepareProperty(formatProperty(await getProperty(key)));
+  } catch (error) {
+    const lastKnown = cached || await lastKnownCatalogueEntry(key);
+    if (!lastKnown) throw error;
+    return {
+      ...lastKnown.property,
+      stale: { since: new Date(lastKnown.refreshedAt).toISOString(), reason: error.message },
+    };
+  }
+  detailCache.set(key, { property, refreshedAt: Date.now() });
+  return property;
+}
+
+async function lastKnownCatalogueEntry(key) {
+  const current = await getPropertyCatalogue().catch(() => null);
+  const property = current?.byId.get(key);
+  return property ? { property, refreshedAt: current.refreshedAt } : null;
+}
+
+/**
+ * Sizes of the in-memory catalogue
+ * @returns {Object} { properties, views, details, restored, refreshedAt }
+ */
+export function getCatalogueStatus() {
+  return {
+    properties: store.catalogue?.properties.length ?? 0,
+    views: store.catalogue?.views.size ?? 0,
+    details: detailCache.size,
+    restored: store.restored?.properties.length ?? 0,
+    refreshedAt: store.catalogue ? new Date(store.catalogue.refreshedAt).toISOString() : null,
+  };
+}
+
+/**
+ * Compact projection of a property for listing cards
+ * Carries only what PropertyCard, PropertyCardSimple and the /stay filters use.
+ * @param {Object} property - Prepared catalogue property
+ * @returns {Object} Card payload
+ */
+export function toCardView(property) {
+  const cardWidth = IMAGE_SIZES.CARD.width;
+
+  return {
+    id: property.id,
+    name: property.name,
+    description: property.description?.substring(0, CARD_DESCRIPTION_LENGTH),
+    address: property.address && {
+      city: property.address.city,
+      state: property.address.state,
+    },
+    maximum_capacity: property.maximum_capacity,
+    bedrooms: property.bedrooms,
+    bathrooms: property.bathrooms,
+    minimum_length_of_stay: property.minimum_length_of_stay,
+    check_in_time: property.check_in_time,
+    check_out_time: property.check_out_time,
+    amenities: (property.amenities || []).map(amenity => ({ name: amenity.name })),
+    fees: (property.fees || [])
+      .filter(fee => CARD_FEE_LABELS.includes(fee.attributes?.label))
+      .map(fee => ({
+        id: fee.id,
+        attributes: {
+          label: fee.attributes.label,
+          enabled: fee.attributes.enabled,
+          amount: fee.attributes.amount,
+          guests_included: fee.attributes.guests_included,
+        },
+      })),
+    // Cards never render wider than the CARD preset, so only those webp variants are sent
+    photos: (property.photos || []).map(photo => {
+      if (!photo.variants) return { url: photo.url };
+      const count = photo.variants.widths.filter(width => width <= cardWidth).length;
+      return {
+        url: photo.url,
+        variants: {
+          widths: photo.variants.widths.slice(0, count),
+          webp: photo.variants.webp.slice(0, count),
+        },
+      };
+    }),
+  };
+}
+
+/**
+ * Normalize a comma-separated `fields` parameter
+ * @param {string|null} fields - e.g. "name,photos"
+ * @returns {string[]|null} Sorted unique top-level keys (always including id)
+ */
+export function parseFields(fields) {
+  if (!fields) return null;
+  const keys = fields.split(',').map(key => key.trim()).filter(key => /^[A-Za-z_]+$/.test(key));
+  return [...new Set(['id', ...keys])].sort();
+}
+
+/**
+ * Serialized /api/properties body for a view, built once per catalogue refresh
+ * @param {Object} options
+ * @param {string} options.view - 'full' or 'card'
+ * @param {string[]|null} options.fields - Top-level keys to keep (from parseFields)
+ * @returns {Promise<Object>} { body, etag, buildMs, cached, stale }
+ */
+export async function getCatalogueView({ view = 'full', fields = null } = {}) {
+  const current = await getPropertyCatalogue();
+  const key = `${view}|${fields ? fields.join(',') : '*'}`;
+
+  const cached = current.views.get(key);
+  if (cached) return { ...cached, cached: true };
+
+  const startedAt = performance.now();
+  let properties = view === 'card' ? current.properties.map(toCardView) : current.properties;
+  if (fields) {
+    properties = properties.map(property =>
+      Object.fromEntries(fields.filter(field => field in property).map(field => [field, property[field]]))
+    );
+  }
+
+  const body = JSON.stringify(current.stale ? { properties, stale: current.stale } : { properties });
+  const entry = {
+    body,
+    etag: computeEtag(body),
+    buildMs: performance.now() - startedAt,
+    stale: Boolean(current.stale),
+  };
+
+  if (current.views.size < MAX_CACHED_VIEWS) {
+    current.views.set(key, entry);
+  }
+  return { ...entry, cached: false };
+}
@@ -10,6 +10,14 @@ const tokenCache = new LRUCache({
   ttl: 60000, // 1 minute
 });
 
+/**
+ * Size of the shared token cache
+ * @returns {Object} { tokens, max }
+ */
+export function getRateLimitStatus() {
+  return { tokens: tokenCache.size, max: tokenCache.max };
+}
+
 export function rateLimit(options = {}) {
   const {
     uniqueTokenPerInterval = 500,
@@ -0,0 +1,171 @@
+import { createHash } from 'crypto';
+import { LRUCache } from 'lru-cache';
+import { logger } from './logger';
+import { upstreamFetch } from './upstream-http';
+
+/**
+ * ReCaptcha v3 verification
+ * Verifies tokens against Google's siteverify endpoint over a keep-alive
+ * connection, with a strict timeout, a short-lived result cache keyed by
+ * token hash (which also rejects replayed tokens) and timing metrics.
+ */
+
+const RECAPTCHA_VERIFY_URL = process.env.RECAPTCHA_VERIFY_URL || 'https://www.google.com/recaptcha/api/siteverify';
+const TIMEOUT_MS = parseInt(process.env.RECAPTCHA_TIMEOUT_MS || '3000', 10);
+// 'closed' rejects submissions when Google cannot be reached, 'open' lets them through
+const FAIL_MODE = process.env.RECAPTCHA_FAIL_MODE === 'open' ? 'open' : 'closed';
+// Google tokens are valid for two minutes and can only be verified once
+const CACHE_TTL_MS = parseInt(process.env.RECAPTCHA_CACHE_TTL_MS || '120000', 10);
+
+export const SCORE_THRESHOLD = 0.5; // Minimum score to pass (0.0-1.0)
+
+const verifyUrl = new URL(RECAPTCHA_VERIFY_URL);
+
+const resultCache = new LRUCache({
+  max: 5000,
+  ttl: CACHE_TTL_MS,
+});
+
+const LATENCY_SAMPLES = 500;
+const metrics = {
+  verifications: 0,
+  upstreamCalls: 0,
+  replaysRejected: 0,
+  timeouts: 0,
+  upstreamErrors: 0,
+  failOpen: 0,
+  reusedConnections: 0,
+  latenciesMs: [],
+};
+
+function hashToken(token) {
+  return createHash('sha256').update(token).digest('hex');
+}
+
+function recordLatency(ms) {
+  metrics.latenciesMs.push(ms);
+  if (metrics.latenciesMs.length > LATENCY_SAMPLES) {
+    metrics.latenciesMs.shift();
+  }
+}
+
+function percentile(sorted, p) {
+  if (sorted.length === 0) return null;
+  const index = Math.min(sorted.length - 1, Math.ceil((p / 100) * sorted.length) - 1);
+  return sorted[Math.max(0, index)];
+}
+
+/**
+ * POST the token to the verifier on the shared keep-alive pool
+ * @param {string} secret - ReCaptcha secret key
+ * @param {string} token - Client token
+ * @returns {Promise<Object>} Parsed siteverify response
+ */
+async function postSiteverify(secret, token) {
+  const response = await upstreamFetch(verifyUrl, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
+    body: new URLSearchParams({ secret, response: token }).toString(),
+    connectTimeoutMs: TIMEOUT_MS,
+    readTimeoutMs: TIMEOUT_MS,
+  });
+  if (response.reusedConnection) metrics.reusedConnections++;
+
+  if (response.status >= 500) {
+    throw new Error(`Verifier responded with ${response.status}`);
+  }
+  try {
+    return await response.json();
+  } catch (error) {
+    throw new Error('Invalid response from verifier');
+  }
+}
+
+/**
+ * Verify a ReCaptcha token
+ * Each token is accepted at most once: a second presentation within the cache
+ * window is rejected as a replay without calling Google again.
+ * @param {string} token - Client token
+ * @param {Object} options
+ * @param {string} options.secret - ReCaptcha secret key
+ * @returns {Promise<Object>} { result, replay, degraded, durationMs }
+ *   result has the siteverify shape ({ success, score, action, 'error-codes' })
+ */
+export async function verifyRecaptchaToken(token, { secret = process.env.RECAPTCHA_SECRET_KEY } = {}) {
+  const startedAt = performance.now();
+  const key = hashToken(token);
+  metrics.verifications++;
+
+  if (resultCache.has(key)) {
+    metrics.replaysRejected++;
+    return {
+      result: { success: false, 'error-codes': ['timeout-or-duplicate'] },
+      replay: true,
+      degraded: false,
+      durationMs: performance.now() - startedAt,
+    };
+  }
+
+  // Claim the token before going upstream so concurrent replays are rejected too
+  resultCache.set(key, { pending: true });
+
+  try {
+    metrics.upstreamCalls++;
+    const result = await postSiteverify(secret, token);
+    const durationMs = performance.now() - startedAt;
+    recordLatency(durationMs);
+    resultCache.set(key, { pending: false, success: result.success });
+
+    return { result, replay: false, degraded: false, durationMs };
+  } catch (error) {
+    const durationMs = performance.now() - startedAt;
+    recordLatency(durationMs);
+    if (error.code === 'ETIMEDOUT') {
+      metrics.timeouts++;
+    } else {
+      metrics.upstreamErrors++;
+    }
+    // Let the client retry with the same token if the verifier never answered
+    resultCache.delete(key);
+
+    logger.warn('ReCaptcha verifier unavailable', {
+      error: error.message,
+      failMode: FAIL_MODE,
+    });
+
+    if (FAIL_MODE === 'open') {
+      metrics.failOpen++;
+      return {
+        result: { success: true, score: SCORE_THRESHOLD, action: null },
+        replay: false,
+        degraded: true,
+        durationMs,
+      };
+    }
+
+    error.degraded = true;
+    throw error;
+  }
+}
+
+/**
+ * Snapshot of verification metrics
+ * @returns {Object} Counters plus latency percentiles over recent upstream calls
+ */
+export function getRecaptchaMetrics() {
+  const sorted = [...metrics.latenciesMs].sort((a, b) => a - b);
+  const { latenciesMs, ...counters } = metrics;
+
+  return {
+    ...counters,
+    failMode: FAIL_MODE,
+    timeoutMs: TIMEOUT_MS,
+    cacheSize: resultCache.size,
+    latencyMs: {
+      samples: sorted.length,
+      p50: percentile(sorted, 50),
+      p95: percentile(sorted, 95),
+      p99: percentile(sorted, 99),
+    },
+  };
+}
@@ -15,9 +15,10 @@ function sleep(ms) {
  * @param {number} maxAttempts - Maximum retry attempts
  * @param {number} backoffMs - Base backoff time in milliseconds
  * @param {string} operationName - Name for logging
+ * @param {Function} shouldRetry - Called with the error; false stops retrying and throws it
  * @returns {Promise} Result of function or throws last error
  */
-export async function retryWithBackoff(fn, maxAttempts = retryConfig.maxAttempts, backoffMs = retryConfig.backoffMs, operationName = 'operation') {
+export async function retryWithBackoff(fn, maxAttempts = retryConfig.maxAttempts, backoffMs = retryConfig.backoffMs, operationName = 'operation', shouldRetry = () => true) {
   let lastError;
   
   for (let attempt = 1; attempt <= maxAttempts; attempt++) {
@@ -34,6 +35,11 @@ export async function retryWithBackoff(fn, maxAttempts = retryConfig.maxAttempts
       lastError = error;
       console.error(`❌ [${operationName}] Attempt ${attempt} failed:`, error.message);
       
+      if (!shouldRetry(error)) {
+        console.error(`🛑 [${operationName}] Not retrying: ${error.message}`);
+        throw error;
+      }
+      
       if (attempt < maxAttempts) {
         const delay = backoffMs * attempt; // Linear backoff
         console.log(`⏳ [${operationName}] Retrying in ${delay}ms...`);
@@ -6,6 +6,8 @@ const config = {
   dataset: process.env.NEXT_PUBLIC_SANITY_DATASET || 'production',
   apiVersion: process.env.NEXT_PUBLIC_SANITY_API_VERSION || '2024-01-01',
   useCdn: false, // Set to false to get fresh data for image updates
+  // A local stand-in or cassette replay (tests/harness); unset in production
+  ...(process.env.SANITY_API_HOST && { apiHost: process.env.SANITY_API_HOST, useProjectHostname: false }),
 };
 
 export const sanityClient = createClient(config);
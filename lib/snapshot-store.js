@@ -0,0 +1,130 @@
+/**
+ * Last-known-good snapshots of Uplisting data
+ *
+ * Durable copies of the formatted property catalogue and the warmed calendar
+ * windows, so a freshly started instance has something to serve (flagged as
+ * stale) when Uplisting is slow or down. Stored in MongoDB when MONGO_URL is
+ * set, otherwise as JSON files under SNAPSHOT_DIR; SNAPSHOT_STORE=mongo|disk|off
+ * overrides the choice. Snapshots are a fallback only: store failures are
+ * logged and never reach the request that triggered them.
+ */
+
+import { mkdir, readdir, readFile, rename, writeFile } from 'fs/promises';
+import path from 'path';
+import { connectToDatabase as connectToMongo } from './mongodb';
+
+const MONGO_URL = process.env.MONGO_URL;
+const DB_NAME = process.env.MONGO_DB_NAME || 'swissalpine';
+const COLLECTION_NAME = 'uplisting_snapshots';
+const STORE = process.env.SNAPSHOT_STORE || (MONGO_URL ? 'mongo' : 'disk');
+const SNAPSHOT_DIR = process.env.SNAPSHOT_DIR || path.join(process.cwd(), '.snapshots');
+// Calendars are re-warmed every minute; persisting each refresh would be wasted writes
+const MIN_SAVE_INTERVAL_MS = parseInt(process.env.SNAPSHOT_MIN_SAVE_INTERVAL_MS || '300000', 10);
+// Fail fast: a snapshot is only useful if it doesn't hold up start-up
+const CONNECT_TIMEOUT_MS = 3000;
+
+const lastSavedAt = new Map();
+const metrics = { saves: 0, skipped: 0, loads: 0, errors: 0, lastError: null };
+
+/**
+ * Connect to MongoDB (the shared connection)
+ * The driver is only loaded by the mongo store, never by the disk store.
+ * @returns {Promise<Object>} Database instance
+ */
+async function connectToDatabase() {
+  const { db } = await connectToMongo({ timeoutMs: CONNECT_TIMEOUT_MS });
+  return db;
+}
+
+function snapshotFile(key) {
+  return path.join(SNAPSHOT_DIR, `${encodeURIComponent(key)}.json`);
+}
+
+function recordError(action, key, error) {
+  metrics.errors++;
+  metrics.lastError = `${action} ${key}: ${error.message}`;
+  console.error(`Snapshot ${action} failed:`, key, error.message);
+}
+
+/**
+ * Persist a snapshot, replacing the previous one for the key
+ * @param {string} key - e.g. 'catalogue' or 'calendar:84656'
+ * @param {Object} data - JSON-serializable snapshot
+ * @param {Object} options
+ * @param {boolean} options.force - Save even within SNAPSHOT_MIN_SAVE_INTERVAL_MS of the last save
+ * @returns {Promise<boolean>} Whether the snapshot was written
+ */
+export async function saveSnapshot(key, data, { force = false } = {}) {
+  if (STORE === 'off') return false;
+  const now = Date.now();
+  if (!force && now - (lastSavedAt.get(key) || 0) < MIN_SAVE_INTERVAL_MS) {
+    metrics.skipped++;
+    return false;
+  }
+  lastSavedAt.set(key, now);
+
+  const snapshot = { key, data, savedAt: new Date(now).toISOString() };
+  try {
+    if (STORE === 'mongo') {
+      const db = await connectToDatabase();
+      await db.collection(COLLECTION_NAME).replaceOne({ _id: key }, snapshot, { upsert: true });
+    } else {
+      await mkdir(SNAPSHOT_DIR, { recursive: true });
+      // Write then rename, so a crash mid-write never leaves a truncated snapshot
+      const file = snapshotFile(key);
+      await writeFile(`${file}.tmp`, JSON.stringify(snapshot));
+      await rename(`${file}.tmp`, file);
+    }
+    metrics.saves++;
+    return true;
+  } catch (error) {
+    lastSavedAt.delete(key);
+    recordError('save', key, error);
+    return false;
+  }
+}
+
+/**
+ * Load every snapshot whose key starts with a prefix
+ * @param {string} prefix - Key prefix ('' for all)
+ * @returns {Promise<Array>} [{ key, data, savedAt }], empty when the store is unavailable
+ */
+export async function loadSnapshots(prefix = '') {
+  if (STORE === 'off') return [];
+  try {
+    let snapshots;
+    if (STORE === 'mongo') {
+      const db = await connectToDatabase();
+      const escaped = prefix.replace(/[.*+?^${}()|[\]\\]/g, '\\$&');
+      snapshots = await db.collection(COLLECTION_NAME)
+        .find({ _id: { $regex: `^${escaped}` } }, { projection: { _id: 0 } })
+        .toArray();
+    } else {
+      const files = await readdir(SNAPSHOT_DIR).catch(error => {
+        if (error.code === 'ENOENT') return [];
+        throw error;
+      });
+      const names = files.filter(file => file.endsWith('.json') && decodeURIComponent(file).startsWith(prefix));
+      snapshots = await Promise.all(names.map(async file => JSON.parse(await readFile(path.join(SNAPSHOT_DIR, file), 'utf8'))));
+    }
+    metrics.loads += snapshots.length;
+    return snapshots;
+  } catch (error) {
+    recordError('load', prefix || '*', error);
+    return [];
+  }
+}
+
+/**
+ * Store backend and counters
+ * @returns {Object} { store, location, minSaveIntervalMs, savedKeys, saves, skipped, loads, errors, lastError }
+ */
+export function getSnapshotStoreStatus() {
+  return {
+    store: STORE,
+    location: STORE === 'mongo' ? `${DB_NAME}.${COLLECTION_NAME}` : STORE === 'disk' ? SNAPSHOT_DIR : null,
+    minSaveIntervalMs: MIN_SAVE_INTERVAL_MS,
+    savedKeys: lastSavedAt.size,
+    ...metrics,
+  };
+}
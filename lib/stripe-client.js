@@ -1,37 +1,49 @@
-import Stripe from 'stripe';
+// Lazy initialization of Stripe client: the SDK is only loaded by routes that
+// call Stripe, not by everything importing the configuration below
+let stripePromise = null;
 
-// Lazy initialization of Stripe client
-let stripeInstance = null;
+/**
+ * SDK host options for STRIPE_API_BASE (e.g. a local stand-in); empty when unset
+ * @param {string|undefined} apiBase - e.g. "http://127.0.0.1:4103"
+ * @returns {Object} host, port and protocol
+ */
+function apiBaseOptions(apiBase) {
+  if (!apiBase) return {};
+  const url = new URL(apiBase);
+  return {
+    host: url.hostname,
+    port: url.port || (url.protocol === 'http:' ? 80 : 443),
+    protocol: url.protocol.replace(':', ''),
+  };
+}
 
 /**
  * Get Stripe client instance (lazy initialization)
- * This defers initialization until runtime to avoid build-time errors
+ * This defers loading the SDK and validating the key until first use, so
+ * neither the build nor a cold start of an unrelated route pays for it
+ * @returns {Promise<Object>} Stripe client
  */
-function getStripeClient() {
-  if (!stripeInstance) {
+export function getStripe() {
+  if (!stripePromise) {
     // Validate at runtime (not at module load time)
     if (!process.env.STRIPE_SECRET_KEY) {
       throw new Error('STRIPE_SECRET_KEY is not defined in environment variables');
     }
-    
-    stripeInstance = new Stripe(process.env.STRIPE_SECRET_KEY, {
-      apiVersion: '2024-12-18.acacia', // Stable API version (Dec 2024)
-      typescript: false,
-    });
-  }
-  
-  return stripeInstance;
-}
 
-// Export as a proxy object that initializes on first property access
-export const stripe = new Proxy({}, {
-  get(target, prop) {
-    const client = getStripeClient();
-    const value = client[prop];
-    // Bind methods to maintain correct 'this' context
-    return typeof value === 'function' ? value.bind(client) : value;
+    stripePromise = import('stripe')
+      .then(({ default: Stripe }) => new Stripe(process.env.STRIPE_SECRET_KEY, {
+        apiVersion: '2024-12-18.acacia', // Stable API version (Dec 2024)
+        typescript: false,
+        ...apiBaseOptions(process.env.STRIPE_API_BASE),
+      }))
+      .catch((error) => {
+        stripePromise = null;
+        throw error;
+      });
   }
-});
+
+  return stripePromise;
+}
 
 // Stripe configuration helper
 export const stripeConfig = {
@@ -62,4 +74,4 @@ export const adminConfig = {
   alertEnabled: process.env.ADMIN_ALERT_ENABLED === 'true',
 };
 
-export default stripe;
+export default getStripe;
@@ -1,7 +1,19 @@
 // Uplisting API Client
+import { createHash } from 'crypto';
+import { LRUCache } from 'lru-cache';
+import { upstreamFetch } from './upstream-http';
+import { getScheduler } from './upstream-scheduler';
+import {
+  calendarVersion, changedSince, invalidateCalendar, patchCalendar, readCalendar, readLastKnownCalendar,
+} from './calendar-cache';
+
 const UPLISTING_API_KEY = process.env.UPLISTING_API_KEY;
 const UPLISTING_API_URL = process.env.UPLISTING_API_URL || 'https://connect.uplisting.io';
 const UPLISTING_CLIENT_ID = process.env.UPLISTING_CLIENT_ID;
+const RATE_LIMIT_PER_SEC = parseFloat(process.env.UPLISTING_RATE_LIMIT_PER_SEC || '5');
+const RATE_LIMIT_BURST = parseInt(process.env.UPLISTING_RATE_LIMIT_BURST || '10', 10);
+// Booking creation can be slow; a read timeout there leaves its outcome unknown
+const BOOKING_READ_TIMEOUT_MS = parseInt(process.env.UPLISTING_BOOKING_TIMEOUT_MS || '60000', 10);
 
 // Validate environment variables at module load
 function validateEnvironment() {
@@ -42,6 +54,122 @@ function getHeaders() {
 // Check environment on module load
 const isConfigured = validateEnvironment();
 
+// Uplisting rate-limits per API key, so every call made with the key shares one bucket
+const keyFingerprint = createHash('sha256').update(UPLISTING_API_KEY || '').digest('hex').slice(0, 8);
+const scheduler = getScheduler(`uplisting:${keyFingerprint}`, {
+  ratePerSecond: RATE_LIMIT_PER_SEC,
+  burst: RATE_LIMIT_BURST,
+});
+
+/**
+ * Call the Uplisting API through the rate-limit scheduler
+ * @param {string} path - Path below UPLISTING_API_URL (e.g. '/v2/bookings')
+ * @param {Object} options - upstreamFetch options
+ * @param {string} options.lane - 'critical' for booking calls, 'browsing' (default) or 'background'
+ * @returns {Promise<Object>} upstreamFetch response
+ */
+export function uplistingRequest(path, { lane = 'browsing', ...options } = {}) {
+  const headers = getHeaders();
+  return scheduler.schedule(lane, () => upstreamFetch(`${UPLISTING_API_URL}${path}`, { ...options, headers }));
+}
+
+/**
+ * Create a booking in Uplisting (POST /v2/bookings, critical lane)
+ * The POST is not idempotent. It gets BOOKING_READ_TIMEOUT_MS instead of the
+ * default read timeout, and must not be resent after bookingOutcomeUnknown(error).
+ * @param {Object} payload - JSON:API booking document
+ * @returns {Promise<Object>} upstreamFetch response
+ */
+export function createBooking(payload) {
+  return uplistingRequest('/v2/bookings', {
+    method: 'POST',
+    body: JSON.stringify(payload),
+    lane: 'critical',
+    readTimeoutMs: BOOKING_READ_TIMEOUT_MS,
+  });
+}
+
+/**
+ * Whether a failed booking POST may still have created the booking
+ * True for read timeouts: the request was sent and no answer came back.
+ * @param {Error} error - Error thrown by createBooking
+ * @returns {boolean}
+ */
+export function bookingOutcomeUnknown(error) {
+  return error?.code === 'ETIMEDOUT' && error.phase === 'read';
+}
+
+// Single-flight: concurrent identical reads share one upstream request.
+// Until a response is cached every concurrent miss would otherwise go to
+// Uplisting. Waiters share the parsed response, so callers must treat it as
+// read-only.
+const inFlight = new Map();
+const singleFlightMetrics = {};
+
+// Parsed read responses, kept for the windows the Next fetch cache used to
+// apply (`next: { revalidate }`) before reads moved to the pooled client
+const responseCache = new LRUCache({ max: 2000 });
+
+function metricsFor(kind) {
+  return singleFlightMetrics[kind] ||= { calls: 0, cacheHits: 0, upstream: 0, coalesced: 0, errors: 0, lastKnown: 0 };
+}
+
+function singleFlight(kind, key, request) {
+  const metrics = metricsFor(kind);
+  metrics.calls++;
+
+  const pending = inFlight.get(key);
+  if (pending) {
+    metrics.coalesced++;
+    return pending;
+  }
+
+  metrics.upstream++;
+  const promise = request()
+    .catch((error) => {
+      metrics.errors++;
+      throw error;
+    })
+    .finally(() => {
+      // An invalidation may have replaced this entry with a newer read
+      if (inFlight.get(key) === promise) inFlight.delete(key);
+    });
+  inFlight.set(key, promise);
+  return promise;
+}
+
+// propertyId: don't cache a calendar read if the property changed while it ran
+function cachedRead(kind, key, ttlMs, request, propertyId = null) {
+  const cached = responseCache.get(key);
+  if (cached !== undefined) {
+    const metrics = metricsFor(kind);
+    metrics.calls++;
+    metrics.cacheHits++;
+    return Promise.resolve(cached);
+  }
+  return singleFlight(kind, key, async () => {
+    const since = calendarVersion();
+    const data = await request();
+    if (propertyId === null || !changedSince(propertyId, since)) {
+      responseCache.set(key, data, { ttl: ttlMs });
+    }
+    return data;
+  });
+}
+
+/**
+ * Snapshot of read metrics per request kind and of the rate-limit scheduler
+ * @returns {Object} { inFlight, cached, requests: { [kind]: { calls, cacheHits, upstream, coalesced, errors, lastKnown } },
+ *   scheduler: { tokens, pausedForMs, queueDepth, throttled, retries, lanes } }
+ */
+export function getUplistingMetrics() {
+  const requests = {};
+  for (const [kind, metrics] of Object.entries(singleFlightMetrics)) {
+    requests[kind] = { ...metrics };
+  }
+  return { inFlight: inFlight.size, cached: responseCache.size, requests, scheduler: scheduler.snapshot() };
+}
+
 // Helper to format date as YYYY-MM-DD in local timezone (not UTC)
 export function formatDateLocal(date) {
   if (!date) return null;
@@ -52,41 +180,47 @@ export function formatDateLocal(date) {
 }
 
 export async function verifyApiKey() {
-  const response = await fetch(`${UPLISTING_API_URL}/users/me`, { headers: getHeaders() });
+  const response = await uplistingRequest('/users/me');
   return response.json();
 }
 
 export async function getProperties() {
-  const response = await fetch(`${UPLISTING_API_URL}/properties`, { 
-    headers: getHeaders(),
-    next: { revalidate: 300 } // Cache for 5 minutes
+  const path = '/properties';
+  return cachedRead('properties', path, 300000, async () => { // Cache for 5 minutes
+    const response = await uplistingRequest(path);
+    if (!response.ok) {
+      const errorText = await response.text();
+      console.error('Uplisting API error:', response.status, errorText);
+      throw new Error(`Failed to fetch properties: ${response.status}`);
+    }
+    return response.json();
   });
-  if (!response.ok) {
-    const errorText = await response.text();
-    console.error('Uplisting API error:', response.status, errorText);
-    throw new Error(`Failed to fetch properties: ${response.status}`);
-  }
-  return response.json();
 }
 
 export async function getProperty(id) {
-  const response = await fetch(`${UPLISTING_API_URL}/properties/${id}`, { 
-    headers: getHeaders(),
-    next: { revalidate: 300 }
+  const path = `/properties/${id}`;
+  return cachedRead('property', path, 300000, async () => {
+    const response = await uplistingRequest(path);
+    if (!response.ok) {
+      const errorText = await response.text();
+      console.error('Uplisting API error:', response.status, errorText);
+      throw new Error(`Failed to fetch property: ${response.status}`);
+    }
+    return response.json();
   });
-  if (!response.ok) {
-    const errorText = await response.text();
-    console.error('Uplisting API error:', response.status, errorText);
-    throw new Error(`Failed to fetch property: ${response.status}`);
-  }
-  return response.json();
 }
 
-export async function getAvailability(propertyId, from, to) {
-  const response = await fetch(
-    `${UPLISTING_API_URL}/calendar/${propertyId}?from=${from}&to=${to}`,
-    { headers: getHeaders(), next: { revalidate: 60 } } // Cache for 1 minute
-  );
+/**
+ * Read a calendar straight from Uplisting, bypassing every cache
+ * @param {string} propertyId - Property ID
+ * @param {string} from - First date (YYYY-MM-DD)
+ * @param {string} to - Last date (YYYY-MM-DD)
+ * @param {Object} options
+ * @param {string} options.lane - Scheduler lane (default 'browsing')
+ * @returns {Promise<Object>} Uplisting calendar response
+ */
+export async function fetchCalendar(propertyId, from, to, { lane = 'browsing' } = {}) {
+  const response = await uplistingRequest(`/calendar/${propertyId}?from=${from}&to=${to}`, { lane });
   if (!response.ok) {
     const errorText = await response.text();
     console.error('Uplisting API error:', response.status, errorText);
@@ -95,6 +229,87 @@ export async function getAvailability(propertyId, from, to) {
   return response.json();
 }
 
+/**
+ * Calendar for a range: warmed window, recent response or Uplisting
+ * If Uplisting fails and a cached window (possibly restored from a snapshot
+ * at boot) covers the range, that is returned with `stale: { since, reason }`.
+ * @param {string} propertyId - Property ID
+ * @param {string} from - First date (YYYY-MM-DD)
+ * @param {string} to - Last date (YYYY-MM-DD)
+ * @param {Object} options
+ * @param {string} options.lane - Scheduler lane (default 'browsing')
+ * @returns {Promise<Object>} Uplisting calendar response
+ */
+export async function getAvailability(propertyId, from, to, { lane = 'browsing' } = {}) {
+  // Ranges inside a warmed calendar window never wait on Uplisting
+  const warmed = readCalendar(propertyId, from, to);
+  if (warmed) {
+    const metrics = metricsFor('availability');
+    metrics.calls++;
+    metrics.cacheHits++;
+    return warmed;
+  }
+
+  const path = `/calendar/${propertyId}?from=${from}&to=${to}`;
+  try {
+    return await cachedRead('availability', path, 60000, () => fetchCalendar(propertyId, from, to, { lane }), String(propertyId)); // Cache for 1 minute
+  } catch (error) {
+    const lastKnown = readLastKnownCalendar(propertyId, from, to);
+    if (!lastKnown) throw error;
+    metricsFor('availability').lastKnown++;
+    return {
+      ...lastKnown.data,
+      stale: { since: new Date(lastKnown.fetchedAt).toISOString(), reason: error.message },
+    };
+  }
+}
+
+/**
+ * Drop cached availability for a property's changed date span
+ * Cached ranges overlapping the span are forgotten; a warmed calendar window
+ * is marked dirty for the span and patched with one background read of just
+ * that span. Called for Uplisting change notifications and our own bookings.
+ * @param {string} propertyId - Property ID
+ * @param {string|null} from - First changed date (YYYY-MM-DD), null for the whole calendar
+ * @param {string|null} to - Last changed date (YYYY-MM-DD), null for the whole calendar
+ * @returns {Object} { droppedRanges, span } - span is the window span being
+ *   patched, or null when no warmed window overlaps the change
+ */
+export function invalidateAvailability(propertyId, from = null, to = null) {
+  const id = String(propertyId);
+  const first = from || '0000-01-01';
+  const last = to || '9999-12-31';
+  const prefix = `/calendar/${id}?`;
+
+  // Recorded before anything else, so reads already running don't cache their result
+  const span = invalidateCalendar(id, first, last);
+
+  let droppedRanges = 0;
+  const overlaps = (key) => {
+    if (!key.startsWith(prefix)) return false;
+    const params = new URLSearchParams(key.slice(prefix.length));
+    return params.get('from') <= last && params.get('to') >= first;
+  };
+  for (const key of [...responseCache.keys()]) {
+    if (overlaps(key)) {
+      responseCache.delete(key);
+      droppedRanges++;
+    }
+  }
+  for (const key of [...inFlight.keys()]) {
+    if (overlaps(key)) inFlight.delete(key);
+  }
+
+  if (span) {
+    const since = calendarVersion();
+    fetchCalendar(id, span.from, span.to, { lane: 'background' })
+      .then(data => patchCalendar(id, span.from, span.to, data, since))
+      .catch(error => console.error('Calendar patch failed:', id, span.from, span.to, error.message));
+  }
+
+  return { droppedRanges, span };
+}
+
 // Helper to get current month date range
 export function getCurrentMonthRange() {
   const now = new Date();
@@ -303,11 +518,8 @@ export function calculateAccommodationTotal(calendarData, checkInDate, checkOutD
   };
 }
 
-export async function getBookings(propertyId, from, to) {
-  const response = await fetch(
-    `${UPLISTING_API_URL}/bookings/${propertyId}?from=${from}&to=${to}`,
-    { headers: getHeaders() }
-  );
+export async function getBookings(propertyId, from, to, { lane = 'browsing' } = {}) {
+  const response = await uplistingRequest(`/bookings/${propertyId}?from=${from}&to=${to}`, { lane });
   if (!response.ok) {
     const errorText = await response.text();
     console.error('Uplisting API error:', response.status, errorText);
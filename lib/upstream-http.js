@@ -0,0 +1,232 @@
+import http from 'http';
+import https from 'https';
+
+/**
+ * Shared upstream HTTP client
+ * One keep-alive agent per origin, so TCP and TLS setup is paid once per
+ * socket instead of once per request. Every request has a connect timeout
+ * (socket established) and a read timeout (no bytes for that long), and at
+ * most MAX_CONCURRENCY requests per origin are in flight; the rest wait in a
+ * FIFO queue. Responses are buffered and returned in a small fetch-like
+ * shape: { ok, status, headers.get(), text(), json(), reusedConnection }.
+ */
+
+const CONNECT_TIMEOUT_MS = parseInt(process.env.UPSTREAM_CONNECT_TIMEOUT_MS || '3000', 10);
+const READ_TIMEOUT_MS = parseInt(process.env.UPSTREAM_READ_TIMEOUT_MS || '10000', 10);
+const MAX_CONCURRENCY = parseInt(process.env.UPSTREAM_MAX_CONCURRENCY || '16', 10);
+
+// Methods that may be resent when a pooled socket turns out to be closed
+const IDEMPOTENT_METHODS = new Set(['GET', 'HEAD', 'OPTIONS']);
+const LATENCY_SAMPLES = 500;
+
+const pools = new Map();
+
+function getPool(url) {
+  let pool = pools.get(url.origin);
+  if (!pool) {
+    const transport = url.protocol === 'http:' ? http : https;
+    pool = {
+      transport,
+      connectEvent: transport === https ? 'secureConnect' : 'connect',
+      agent: new transport.Agent({ keepAlive: true, maxSockets: MAX_CONCURRENCY, maxFreeSockets: MAX_CONCURRENCY }),
+      active: 0,
+      waiting: [],
+      metrics: {
+        requests: 0,
+        errors: 0,
+        connectTimeouts: 0,
+        readTimeouts: 0,
+        staleSocketRetries: 0,
+        newConnections: 0,
+        reusedConnections: 0,
+        queued: 0,
+        maxQueueDepth: 0,
+        connectMs: [],
+        latenciesMs: [],
+      },
+    };
+    pools.set(url.origin, pool);
+  }
+  return pool;
+}
+
+function recordSample(samples, ms) {
+  samples.push(ms);
+  if (samples.length > LATENCY_SAMPLES) {
+    samples.shift();
+  }
+}
+
+function percentile(sorted, p) {
+  if (sorted.length === 0) return null;
+  const index = Math.min(sorted.length - 1, Math.ceil((p / 100) * sorted.length) - 1);
+  return sorted[Math.max(0, index)];
+}
+
+function acquire(pool) {
+  if (pool.active < MAX_CONCURRENCY) {
+    pool.active++;
+    return Promise.resolve();
+  }
+  pool.metrics.queued++;
+  return new Promise((resolve) => {
+    pool.waiting.push(resolve);
+    pool.metrics.maxQueueDepth = Math.max(pool.metrics.maxQueueDepth, pool.waiting.length);
+  });
+}
+
+function release(pool) {
+  const next = pool.waiting.shift();
+  if (next) {
+    // The slot passes straight to the next waiter
+    next();
+  } else {
+    pool.active--;
+  }
+}
+
+function timeoutError(phase, ms, url) {
+  const error = new Error(`Upstream ${phase} timeout after ${ms}ms (${url.origin})`);
+  error.code = 'ETIMEDOUT';
+  error.phase = phase;
+  return error;
+}
+
+function toResponse(res, body, reusedConnection) {
+  return {
+    ok: res.statusCode >= 200 && res.statusCode < 300,
+    status: res.statusCode,
+    headers: { get: name => res.headers[name.toLowerCase()] ?? null },
+    reusedConnection,
+    text: async () => body.toString('utf8'),
+    json: async () => JSON.parse(body.toString('utf8')),
+  };
+}
+
+function send(pool, url, { method, headers, body, connectTimeoutMs, readTimeoutMs }) {
+  return new Promise((resolve, reject) => {
+    const startedAt = performance.now();
+    const req = pool.transport.request(url, { method, headers, agent: pool.agent }, (res) => {
+      const chunks = [];
+      res.on('data', chunk => chunks.push(chunk));
+      res.on('end', () => resolve(toResponse(res, Buffer.concat(chunks), req.reusedSocket)));
+      res.on('error', reject);
+    });
+
+    req.on('socket', (socket) => {
+      if (req.reusedSocket) {
+        pool.metrics.reusedConnections++;
+        return;
+      }
+      pool.metrics.newConnections++;
+      if (!socket.connecting) return;
+      const timer = setTimeout(() => {
+        pool.metrics.connectTimeouts++;
+        req.destroy(timeoutError('connect', connectTimeoutMs, url));
+      }, connectTimeoutMs);
+      socket.once(pool.connectEvent, () => {
+        clearTimeout(timer);
+        recordSample(pool.metrics.connectMs, performance.now() - startedAt);
+      });
+      socket.once('close', () => clearTimeout(timer));
+    });
+
+    // Socket inactivity; Node starts it once the socket is connected
+    req.setTimeout(readTimeoutMs, () => {
+      pool.metrics.readTimeouts++;
+      req.destroy(timeoutError('read', readTimeoutMs, url));
+    });
+    req.on('error', (error) => {
+      error.reusedSocket = req.reusedSocket;
+      reject(error);
+    });
+    req.end(body);
+  });
+}
+
+/**
+ * Request an upstream URL on the origin's pooled keep-alive agent
+ * @param {string|URL} input - Absolute URL
+ * @param {Object} options
+ * @param {string} options.method - HTTP method (default GET)
+ * @param {Object} options.headers - Request headers
+ * @param {string|Buffer} options.body - Request body
+ * @param {number} options.connectTimeoutMs - Override UPSTREAM_CONNECT_TIMEOUT_MS
+ * @param {number} options.readTimeoutMs - Override UPSTREAM_READ_TIMEOUT_MS
+ * @returns {Promise<Object>} { ok, status, headers, reusedConnection, text(), json() }
+ *   Timeouts reject with code 'ETIMEDOUT' and phase 'connect' or 'read'.
+ */
+export async function upstreamFetch(input, {
+  method = 'GET',
+  headers = {},
+  body,
+  connectTimeoutMs = CONNECT_TIMEOUT_MS,
+  readTimeoutMs = READ_TIMEOUT_MS,
+} = {}) {
+  const url = input instanceof URL ? input : new URL(input);
+  const pool = getPool(url);
+  const requestHeaders = { ...headers };
+  if (body !== undefined && requestHeaders['Content-Length'] === undefined) {
+    requestHeaders['Content-Length'] = Buffer.byteLength(body);
+  }
+
+  await acquire(pool);
+  const startedAt = performance.now();
+  pool.metrics.requests++;
+  try {
+    try {
+      return await send(pool, url, { method, headers: requestHeaders, body, connectTimeoutMs, readTimeoutMs });
+    } catch (error) {
+      // The server may close an idle keep-alive socket just as we reuse it
+      if (!(error.reusedSocket && error.code === 'ECONNRESET' && IDEMPOTENT_METHODS.has(method))) {
+        throw error;
+      }
+      pool.metrics.staleSocketRetries++;
+      return await send(pool, url, { method, headers: requestHeaders, body, connectTimeoutMs, readTimeoutMs });
+    }
+  } catch (error) {
+    pool.metrics.errors++;
+    throw error;
+  } finally {
+    recordSample(pool.metrics.latenciesMs, performance.now() - startedAt);
+    release(pool);
+  }
+}
+
+/**
+ * Snapshot of pool metrics per upstream origin
+ * @returns {Object} { connectTimeoutMs, readTimeoutMs, maxConcurrency, origins: { [origin]: {...} } }
+ */
+export function getUpstreamMetrics() {
+  const origins = {};
+  for (const [origin, pool] of pools) {
+    const { connectMs, latenciesMs, ...counters } = pool.metrics;
+    const connect = [...connectMs].sort((a, b) => a - b);
+    const latency = [...latenciesMs].sort((a, b) => a - b);
+    const connections = counters.newConnections + counters.reusedConnections;
+    const countSockets = sockets => Object.values(sockets).reduce((sum, list) => sum + list.length, 0);
+
+    origins[origin] = {
+      ...counters,
+      reuseRate: connections ? counters.reusedConnections / connections : null,
+      active: pool.active,
+      queueDepth: pool.waiting.length,
+      openSockets: countSockets(pool.agent.sockets),
+      freeSockets: countSockets(pool.agent.freeSockets),
+      connectMs: { samples: connect.length, p50: percentile(connect, 50), p95: percentile(connect, 95) },
+      latencyMs: {
+        samples: latency.length,
+        p50: percentile(latency, 50),
+        p95: percentile(latency, 95),
+        p99: percentile(latency, 99),
+      },
+    };
+  }
+
+  return {
+    connectTimeoutMs: CONNECT_TIMEOUT_MS,
+    readTimeoutMs: READ_TIMEOUT_MS,
+    maxConcurrency: MAX_CONCURRENCY,
+    origins,
+  };
+}
@@ -0,0 +1,247 @@
+/**
+ * Outbound request scheduler
+ * One token bucket per upstream credential: a request starts only when a
+ * token is available, and requests waiting for a token start in lane order
+ * (critical, then browsing, then background), first-in first-out within a
+ * lane. A 429 empties the bucket and pauses it for the Retry-After period;
+ * the throttled request is retried from the front of its lane. Each lane has
+ * a maximum queue wait, so browsing traffic fails fast instead of piling up
+ * behind a pause while booking calls keep their place.
+ */
+
+export const LANES = ['critical', 'browsing', 'background'];
+
+const DEFAULT_MAX_WAIT_MS = { critical: 30000, browsing: 5000, background: 60000 };
+const MAX_RETRIES = 2;
+// Used when a 429 carries no usable Retry-After
+const DEFAULT_RETRY_AFTER_MS = 1000;
+const MAX_RETRY_AFTER_MS = 60000;
+
+// One bucket per credential for the whole process, whichever bundle asks for it
+const schedulers = globalThis.__upstreamSchedulers ||= new Map();
+
+/**
+ * Parse a Retry-After header (delay in seconds or an HTTP date)
+ * @param {string|null} value - Header value
+ * @param {number} now - Current time in ms
+ * @returns {number|null} Delay in ms, or null when absent or invalid
+ */
+export function parseRetryAfter(value, now = Date.now()) {
+  if (value === null || value === undefined || String(value).trim() === '') return null;
+  const seconds = Number(value);
+  if (Number.isFinite(seconds)) return Math.max(0, seconds * 1000);
+  const date = Date.parse(value);
+  return Number.isNaN(date) ? null : Math.max(0, date - now);
+}
+
+function rateLimitedError(lane, waitedMs) {
+  const error = new Error(`Upstream rate limit: ${lane} request waited ${waitedMs}ms without a slot`);
+  error.code = 'ERATELIMITED';
+  error.statusCode = 503;
+  error.userMessage = 'Service is busy. Please try again in a moment.';
+  return error;
+}
+
+function createScheduler(name, { ratePerSecond, burst, maxWaitMs }) {
+  const queues = Object.fromEntries(LANES.map(lane => [lane, []]));
+  let tokens = burst;
+  let lastRefill = Date.now();
+  let pausedUntil = 0;
+  let wakeTimer = null;
+
+  const metrics = {
+    throttled: 0,
+    retries: 0,
+    lanes: Object.fromEntries(LANES.map(lane => [lane, {
+      scheduled: 0,
+      started: 0,
+      expired: 0,
+      maxDepth: 0,
+      totalWaitMs: 0,
+      maxWaitMs: 0,
+    }])),
+  };
+
+  function refill(now) {
+    // No tokens accrue while paused: after a 429 the bucket restarts empty
+    if (now <= lastRefill) return;
+    tokens = Math.min(burst, tokens + ((now - lastRefill) * ratePerSecond) / 1000);
+    lastRefill = now;
+  }
+
+  function pause(ms) {
+    const until = Date.now() + ms;
+    if (until > pausedUntil) {
+      pausedUntil = until;
+      lastRefill = until;
+      tokens = 0;
+    }
+  }
+
+  function enqueue(job, front) {
+    const queue = queues[job.lane];
+    if (front) {
+      queue.unshift(job);
+    } else {
+      queue.push(job);
+    }
+    const laneMetrics = metrics.lanes[job.lane];
+    laneMetrics.maxDepth = Math.max(laneMetrics.maxDepth, queue.length);
+
+    const remaining = job.enqueuedAt + maxWaitMs[job.lane] - Date.now();
+    job.timer = setTimeout(() => {
+      const index = queue.indexOf(job);
+      if (index === -1) return;
+      queue.splice(index, 1);
+      laneMetrics.expired++;
+      job.reject(rateLimitedError(job.lane, Date.now() - job.enqueuedAt));
+    }, Math.max(0, remaining));
+  }
+
+  async function start(job) {
+    clearTimeout(job.timer);
+    job.attempts++;
+    const laneMetrics = metrics.lanes[job.lane];
+    const waitedMs = Date.now() - job.enqueuedAt;
+    laneMetrics.started++;
+    laneMetrics.totalWaitMs += waitedMs;
+    laneMetrics.maxWaitMs = Math.max(laneMetrics.maxWaitMs, waitedMs);
+
+    let response;
+    try {
+      response = await job.request();
+    } catch (error) {
+      job.reject(error);
+      return;
+    }
+    if (response.status !== 429) {
+      job.resolve(response);
+      return;
+    }
+
+    metrics.throttled++;
+    const retryAfterMs = Math.min(
+      parseRetryAfter(response.headers.get('retry-after')) ?? DEFAULT_RETRY_AFTER_MS,
+      MAX_RETRY_AFTER_MS
+    );
+    pause(retryAfterMs);
+    // Out of retries or past the lane's wait budget: the caller sees the 429
+    if (job.attempts > MAX_RETRIES || Date.now() + retryAfterMs > job.enqueuedAt + maxWaitMs[job.lane]) {
+      job.resolve(response);
+      return;
+    }
+    metrics.retries++;
+    enqueue(job, true);
+    pump();
+  }
+
+  function nextJob() {
+    for (const lane of LANES) {
+      if (queues[lane].length > 0) return queues[lane].shift();
+    }
+    return null;
+  }
+
+  function queued() {
+    return LANES.reduce((sum, lane) => sum + queues[lane].length, 0);
+  }
+
+  function pump() {
+    const now = Date.now();
+    refill(now);
+    while (tokens >= 1 && now >= pausedUntil) {
+      const job = nextJob();
+      if (!job) break;
+      tokens--;
+      start(job);
+    }
+
+    if (queued() > 0 && !wakeTimer) {
+      const waitMs = now < pausedUntil
+        ? pausedUntil - now
+        : Math.ceil(((1 - tokens) * 1000) / ratePerSecond);
+      wakeTimer = setTimeout(() => {
+        wakeTimer = null;
+        pump();
+      }, Math.max(1, waitMs));
+    }
+  }
+
+  /**
+   * Run a request when the bucket allows it
+   * @param {string} lane - 'critical', 'browsing' or 'background'
+   * @param {Function} request - () => Promise<Response> (upstreamFetch shape)
+   * @returns {Promise<Object>} The response; rejects with code 'ERATELIMITED'
+   *   when the request waited longer than its lane allows
+   */
+  function schedule(lane, request) {
+    if (!LANES.includes(lane)) {
+      return Promise.reject(new Error(`Unknown scheduler lane: ${lane}`));
+    }
+    metrics.lanes[lane].scheduled++;
+    return new Promise((resolve, reject) => {
+      enqueue({ lane, request, resolve, reject, enqueuedAt: Date.now(), attempts: 0, timer: null }, false);
+      pump();
+    });
+  }
+
+  function snapshot() {
+    refill(Date.now());
+    const lanes = {};
+    for (const lane of LANES) {
+      const { totalWaitMs, ...counters } = metrics.lanes[lane];
+      lanes[lane] = {
+        ...counters,
+        depth: queues[lane].length,
+        maxWaitAllowedMs: maxWaitMs[lane],
+        avgWaitMs: counters.started ? totalWaitMs / counters.started : null,
+      };
+    }
+    return {
+      ratePerSecond,
+      burst,
+      tokens: Math.floor(tokens),
+      pausedForMs: Math.max(0, pausedUntil - Date.now()),
+      queueDepth: queued(),
+      throttled: metrics.throttled,
+      retries: metrics.retries,
+      lanes,
+    };
+  }
+
+  return { name, schedule, snapshot };
+}
+
+/**
+ * Get the scheduler for one upstream credential, creating it on first use
+ * @param {string} name - Scheduler name (one per API key)
+ * @param {Object} options
+ * @param {number} options.ratePerSecond - Sustained request rate
+ * @param {number} options.burst - Bucket size
+ * @param {Object} options.maxWaitMs - Maximum queue wait per lane
+ * @returns {Object} { name, schedule(lane, request), snapshot() }
+ */
+export function getScheduler(name, { ratePerSecond = 5, burst = 10, maxWaitMs = {} } = {}) {
+  let scheduler = schedulers.get(name);
+  if (!scheduler) {
+    scheduler = createScheduler(name, {
+      ratePerSecond,
+      burst,
+      maxWaitMs: { ...DEFAULT_MAX_WAIT_MS, ...maxWaitMs },
+    });
+    schedulers.set(name, scheduler);
+  }
+  return scheduler;
+}
+
+/**
+ * Snapshot of every scheduler: tokens, pause, queue depth per lane
+ * @returns {Object} { [name]: snapshot }
+ */
+export function getSchedulerMetrics() {
+  const result = {};
+  for (const [name, scheduler] of schedulers) {
+    result[name] = scheduler.snapshot();
+  }
+  return result;
+}
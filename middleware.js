@@ -1,5 +1,5 @@
 import { NextResponse } from 'next/server';
-import { rateLimit } from './lib/rate-limit';
+import { getRateLimitStatus, rateLimit } from './lib/rate-limit';
 
 // Configure rate limiters for different endpoints
 const apiLimiter = rateLimit({
@@ -24,6 +24,13 @@ export async function middleware(request) {
   if (!pathname.startsWith('/api/')) {
     return NextResponse.next();
   }
+
+  // The token cache lives in the middleware's runtime, not the route's: pass its size along
+  if (pathname === '/api/diagnostics/memory') {
+    const headers = new Headers(request.headers);
+    headers.set('x-rate-limit-status', JSON.stringify(getRateLimitStatus()));
+    return NextResponse.next({ request: { headers } });
+  }
   
   // Get client identifier (IP address)
   const token = request.headers.get('x-forwarded-for') || 
@@ -1,3 +1,7 @@
+// PROFILE_BUILD=true next build keeps function names and emits source maps
+// in the server bundle, so CPU profiles map back to lib/ (tests/harness profile)
+const profileBuild = process.env.PROFILE_BUILD === 'true';
+
 const nextConfig = {
   output: 'standalone',
   images: {
@@ -22,6 +26,9 @@ const nextConfig = {
   experimental: {
     // Remove if not using Server Components
     serverComponentsExternalPackages: ['mongodb'],
+    // instrumentation.js starts the calendar warmer
+    instrumentationHook: true,
+    ...(profileBuild && { serverMinification: false, serverSourceMaps: true }),
   },
   webpack(config, { dev }) {
     if (dev) {
@@ -0,0 +1,202 @@
+#!/usr/bin/env node
+/**
+ * Micro-benchmark for the pricing kernel (lib/pricing-calculator.js)
+ *
+ * Prices the same generated bookings through calculateBookingPrice (one
+ * result object per quote) and through quoteMinor with a reused quote and
+ * precomputed plans, and reports quotes per second and heap growth.
+ *
+ * Usage: node scripts/benchmark-pricing.mjs [options]
+ *   --quotes N         bookings per timed run (default 200000)
+ *   --rounds N         timed runs per variant, best one reported (default 5)
+ *   --cases in.json    price these cases instead ({plans, cases}, see below)
+ *   --out out.json     with --cases: write the results in centimes
+ *
+ * A cases file holds Uplisting-shaped plans and positional bookings:
+ *   { "plans": [{ "fees": [...], "taxes": [...] }],
+ *     "cases": [[plan, accommodationTotal, cleaningFee, nights, adults, children, infants]] }
+ * The output has one row per case:
+ *   [accommodation, cleaning, extraGuestFee, subtotal, totalTax, grandTotal, [taxes...]]
+ * tests/harness (pricing-kernel) uses it to diff the kernel against the NumPy reference.
+ */
+
+import { readFileSync, writeFileSync } from 'node:fs';
+import { setFlagsFromString } from 'node:v8';
+import { runInNewContext } from 'node:vm';
+import {
+  buildPricingPlan,
+  calculateBookingPrice,
+  createQuote,
+  quoteMinor,
+  toMinorUnits,
+} from '../lib/pricing-calculator.js';
+
+function parseArgs(argv) {
+  const args = { quotes: 200000, rounds: 5, cases: null, out: null };
+  for (let i = 0; i < argv.length; i++) {
+    switch (argv[i]) {
+      case '--quotes': args.quotes = parseInt(argv[++i], 10); break;
+      case '--rounds': args.rounds = parseInt(argv[++i], 10); break;
+      case '--cases': args.cases = argv[++i]; break;
+      case '--out': args.out = argv[++i]; break;
+      default: throw new Error(`Unknown option: ${argv[i]}`);
+    }
+  }
+  return args;
+}
+
+// Small deterministic generator so runs are comparable
+function random(seed) {
+  let state = seed >>> 0;
+  return () => {
+    state = (state * 1664525 + 1013904223) >>> 0;
+    return state / 4294967296;
+  };
+}
+
+const fee = (label, amount, extra = {}) => ({ attributes: { label, enabled: true, amount, ...extra } });
+const tax = (label, type, amount, name) => ({ attributes: { label, type, amount, name } });
+
+const SAMPLE_PLANS = [
+  {
+    fees: [fee('cleaning_fee', 150), fee('extra_guest_charge', 35, { guests_included: 4 })],
+    taxes: [tax('per_booking_percentage', 'percentage', 3.8, 'VAT'), tax('per_person_per_night', 'fixed', 2.5, 'Tourist tax')],
+  },
+  {
+    fees: [fee('cleaning_fee', 120)],
+    taxes: [tax('per_person_per_night', 'fixed', 3.2, 'Tourist tax'), tax('per_night', 'fixed', 1.1, 'Local levy')],
+  },
+  {
+    fees: [fee('extra_guest_charge', 25.5, { guests_included: 2 })],
+    taxes: [tax('per_booking_amount', 'fixed', 15, 'Booking tax'), tax('per_booking_percentage', 'percentage', 8.1, 'VAT')],
+  },
+];
+
+function sampleCases(count) {
+  const next = random(20251201);
+  const cases = new Array(count);
+  for (let i = 0; i < count; i++) {
+    const nights = 1 + Math.floor(next() * 28);
+    cases[i] = [
+      Math.floor(next() * SAMPLE_PLANS.length),
+      Math.round((80 + next() * 620) * nights * 100) / 100,
+      Math.round(next() * 300 * 100) / 100,
+      nights,
+      1 + Math.floor(next() * 8),
+      Math.floor(next() * 4),
+      Math.floor(next() * 2),
+    ];
+  }
+  return cases;
+}
+
+function priceCases({ plans, cases }) {
+  const built = plans.map(plan => buildPricingPlan(plan.fees, plan.taxes));
+  const quotes = built.map(createQuote);
+  return cases.map(([planIndex, accommodation, cleaning, nights, adults, children, infants]) => {
+    const plan = built[planIndex];
+    const accommodationMinor = toMinorUnits(accommodation);
+    const cleaningMinor = toMinorUnits(cleaning);
+    const quote = quoteMinor(plan, accommodationMinor, cleaningMinor, nights, adults + children + infants, quotes[planIndex]);
+    return [accommodationMinor, cleaningMinor, quote.extraGuestFee, quote.subtotal, quote.totalTax, quote.grandTotal, [...quote.taxes]];
+  });
+}
+
+// Collect garbage before each run so heap growth reflects that run's allocations
+setFlagsFromString('--expose-gc');
+const collectGarbage = runInNewContext('gc');
+
+function measure(label, rounds, run) {
+  let best = Infinity;
+  let heapGrowth = 0;
+  let checksum = 0;
+  for (let round = 0; round < rounds; round++) {
+    collectGarbage();
+    const heapBefore = process.memoryUsage().heapUsed;
+    const startedAt = performance.now();
+    checksum = run();
+    const elapsed = performance.now() - startedAt;
+    if (elapsed < best) {
+      best = elapsed;
+      heapGrowth = process.memoryUsage().heapUsed - heapBefore;
+    }
+  }
+  return { label, ms: best, heapGrowth, checksum };
+}
+
+function benchmark(args) {
+  const cases = sampleCases(args.quotes);
+  const plans = SAMPLE_PLANS.map(plan => buildPricingPlan(plan.fees, plan.taxes));
+  const quotes = plans.map(createQuote);
+
+  const objectApi = () => {
+    let sum = 0;
+    for (const [planIndex, accommodation, cleaning, nights, adults, children, infants] of cases) {
+      const sample = SAMPLE_PLANS[planIndex];
+      sum += calculateBookingPrice({
+        accommodationTotal: accommodation, cleaningFee: cleaning, nights, adults, children, infants,
+        propertyFees: sample.fees, propertyTaxes: sample.taxes,
+      }).minor.grandTotal;
+    }
+    return sum;
+  };
+
+  const objectApiWithPlan = () => {
+    let sum = 0;
+    for (const [planIndex, accommodation, cleaning, nights, adults, children, infants] of cases) {
+      sum += calculateBookingPrice({
+        accommodationTotal: accommodation, cleaningFee: cleaning, nights, adults, children, infants,
+        plan: plans[planIndex],
+      }).minor.grandTotal;
+    }
+    return sum;
+  };
+
+  const kernel = () => {
+    let sum = 0;
+    for (let i = 0; i < cases.length; i++) {
+      const row = cases[i];
+      const planIndex = row[0];
+      sum += quoteMinor(
+        plans[planIndex], toMinorUnits(row[1]), toMinorUnits(row[2]),
+        row[3], row[4] + row[5] + row[6], quotes[planIndex]
+      ).grandTotal;
+    }
+    return sum;
+  };
+
+  // Warm up so every variant is measured optimized
+  objectApi(); objectApiWithPlan(); kernel();
+
+  const results = [
+    measure('calculateBookingPrice (fees/taxes)', args.rounds, objectApi),
+    measure('calculateBookingPrice (plan)', args.rounds, objectApiWithPlan),
+    measure('quoteMinor (plan, reused quote)', args.rounds, kernel),
+  ];
+
+  console.log(`📊 ${args.quotes.toLocaleString()} quotes, best of ${args.rounds}:`);
+  for (const result of results) {
+    const perSecond = args.quotes / (result.ms / 1000);
+    console.log(`  ${result.label.padEnd(38)} ${result.ms.toFixed(1).padStart(8)}ms  ` +
+      `${Math.round(perSecond).toLocaleString().padStart(12)} quotes/s  ` +
+      `heap ${(result.heapGrowth / 1024 / 1024).toFixed(1).padStart(6)}MB`);
+  }
+
+  if (new Set(results.map(result => result.checksum)).size !== 1) {
+    console.error('❌ variants disagree on the total of all quotes');
+    process.exit(1);
+  }
+  console.log(`✅ all variants agree (sum of grand totals: ${results[0].checksum} centimes)`);
+}
+
+const args = parseArgs(process.argv.slice(2));
+if (args.cases) {
+  const results = priceCases(JSON.parse(readFileSync(args.cases, 'utf8')));
+  if (args.out) {
+    writeFileSync(args.out, JSON.stringify(results));
+  } else {
+    process.stdout.write(JSON.stringify(results));
+  }
+} else {
+  benchmark(args);
+}
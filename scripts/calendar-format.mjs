@@ -0,0 +1,94 @@
+#!/usr/bin/env node
+/**
+ * Time and check the compact calendar format (lib/calendar-format.js)
+ *
+ * Usage: node scripts/calendar-format.mjs --calendars in.json [--rounds N]
+ *   --calendars in.json   Uplisting calendar responses ({ calendars: [...] })
+ *   --rounds N            timing repetitions per calendar (default 200)
+ *
+ * For each calendar, in both formats (uplisting, compact):
+ *   serializeMs  what the route adds: encodeCalendar (compact only) + JSON.stringify
+ *   parseMs      what the property page does: JSON.parse (+ decodeCalendar)
+ *                and building its per-date availability map
+ * plus the compact body and the number of days whose decoded fields differ
+ * from the source, so tests/harness (calendar-format) can size and verify it.
+ */
+
+import { readFileSync } from 'node:fs';
+import { decodeCalendar, encodeCalendar } from '../lib/calendar-format.js';
+
+function parseArgs(argv) {
+  const args = { calendars: null, rounds: 200 };
+  for (let i = 0; i < argv.length; i++) {
+    switch (argv[i]) {
+      case '--calendars': args.calendars = argv[++i]; break;
+      case '--rounds': args.rounds = parseInt(argv[++i], 10); break;
+      default: throw new Error(`Unknown option: ${argv[i]}`);
+    }
+  }
+  if (!args.calendars) throw new Error('--calendars is required');
+  return args;
+}
+
+// The property page's calendar map (app/property/[id]/page.js)
+function availabilityMap(days) {
+  const map = {};
+  for (const day of days) {
+    map[day.date] = {
+      available: day.available,
+      minStay: day.minimum_length_of_stay || 1,
+      maxStay: day.maximum_available_nights,
+      dayRate: day.day_rate,
+      closedForArrival: day.closed_for_arrival || false,
+      closedForDeparture: day.closed_for_departure || false,
+    };
+  }
+  return map;
+}
+
+function rawDays(calendar) {
+  return calendar.calendar?.days || calendar.data || [];
+}
+
+function time(rounds, fn) {
+  fn();
+  const startedAt = performance.now();
+  for (let i = 0; i < rounds; i++) fn();
+  return (performance.now() - startedAt) / rounds;
+}
+
+function mismatches(raw, decoded) {
+  const expected = availabilityMap(rawDays(raw));
+  const actual = availabilityMap(decoded.calendar.days);
+  let count = 0;
+  for (const [date, day] of Object.entries(expected)) {
+    const other = actual[date];
+    if (!other || Object.keys(day).some(key => Boolean(day[key]) !== Boolean(other[key])
+      || (typeof day[key] === 'number' && day[key] !== other[key]))) {
+      count++;
+    }
+  }
+  return count;
+}
+
+const args = parseArgs(process.argv.slice(2));
+const { calendars } = JSON.parse(readFileSync(args.calendars, 'utf8'));
+
+const results = calendars.map((raw) => {
+  const uplistingBody = JSON.stringify(raw);
+  const compactBody = JSON.stringify(encodeCalendar(raw));
+  return {
+    compactBody,
+    mismatches: mismatches(raw, decodeCalendar(JSON.parse(compactBody))),
+    serializeMs: {
+      uplisting: time(args.rounds, () => JSON.stringify(raw)),
+      compact: time(args.rounds, () => JSON.stringify(encodeCalendar(raw))),
+    },
+    parseMs: {
+      uplisting: time(args.rounds, () => availabilityMap(rawDays(JSON.parse(uplistingBody)))),
+      compact: time(args.rounds, () => availabilityMap(decodeCalendar(JSON.parse(compactBody)).calendar.days)),
+    },
+  };
+});
+
+process.stdout.write(JSON.stringify({ results }));
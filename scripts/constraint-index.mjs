@@ -0,0 +1,87 @@
+#!/usr/bin/env node
+/**
+ * Evaluate or time the booking constraint index (lib/booking-validation.js)
+ *
+ * Usage: node scripts/constraint-index.mjs [options]
+ *   --calendars in.json   evaluate these calendars ({ calendars: [{ days, minStay }] })
+ *   --out out.json        with --calendars: write the results there instead of stdout
+ *   --days N              without --calendars: time buildConstraintIndex on calendars
+ *                         of N/4, N/2 and N days (default 4096)
+ *
+ * For each calendar the output holds the blocked runs and one string per
+ * arrival day with '1' for every valid departure day, so
+ * tests/harness (constraint-index) can compare it with brute force.
+ */
+
+import { readFileSync, writeFileSync } from 'node:fs';
+import { buildConstraintIndex, isValidDeparture } from '../lib/booking-validation.js';
+
+function parseArgs(argv) {
+  const args = { calendars: null, out: null, days: 4096 };
+  for (let i = 0; i < argv.length; i++) {
+    switch (argv[i]) {
+      case '--calendars': args.calendars = argv[++i]; break;
+      case '--out': args.out = argv[++i]; break;
+      case '--days': args.days = parseInt(argv[++i], 10); break;
+      default: throw new Error(`Unknown option: ${argv[i]}`);
+    }
+  }
+  return args;
+}
+
+function evaluate({ days, minStay }) {
+  const index = buildConstraintIndex(days, { minStay });
+  const dates = days.map(day => day.date);
+  return {
+    blockedRuns: index ? index.blockedRuns : [],
+    valid: dates.map(checkIn => dates.map(checkOut => (
+      index && isValidDeparture(index, checkIn, checkOut) ? '1' : '0'
+    )).join('')),
+  };
+}
+
+function sampleCalendar(length) {
+  const days = new Array(length);
+  let state = 36;
+  const next = () => {
+    state = (state * 1664525 + 1013904223) >>> 0;
+    return state / 4294967296;
+  };
+  for (let i = 0; i < length; i++) {
+    days[i] = {
+      date: new Date(Date.UTC(2026, 0, 1) + i * 86400000).toISOString().split('T')[0],
+      available: next() > 0.15,
+      closed_for_arrival: next() < 0.1,
+      closed_for_departure: next() < 0.1,
+      minimum_length_of_stay: 1 + Math.floor(next() * 5),
+      maximum_available_nights: next() < 0.5 ? 28 : 0,
+    };
+  }
+  return days;
+}
+
+function time(length) {
+  const days = sampleCalendar(length);
+  buildConstraintIndex(days);
+  const rounds = 20;
+  const startedAt = performance.now();
+  for (let i = 0; i < rounds; i++) buildConstraintIndex(days);
+  return (performance.now() - startedAt) / rounds;
+}
+
+const args = parseArgs(process.argv.slice(2));
+if (args.calendars) {
+  const { calendars } = JSON.parse(readFileSync(args.calendars, 'utf8'));
+  const results = JSON.stringify(calendars.map(evaluate));
+  if (args.out) {
+    writeFileSync(args.out, results);
+  } else {
+    process.stdout.write(results);
+  }
+} else {
+  console.log('📊 buildConstraintIndex:');
+  for (const length of [args.days / 4, args.days / 2, args.days]) {
+    const ms = time(length);
+    console.log(`  ${String(length).padStart(7)} days  ${ms.toFixed(3).padStart(8)}ms  ${(ms * 1000 / length).toFixed(3)}µs/day`);
+  }
+}
@@ -0,0 +1,331 @@
+/**
+ * Sanity Image Migration Engine
+ *
+ * Moves remote images into Sanity with a bounded worker pool:
+ * - downloads stream to a spool file while being hashed (no whole-image buffers)
+ * - images are content-addressed by SHA-1, the same hash Sanity derives asset
+ *   ids from, so identical content is uploaded at most once
+ * - the manifest (sanity-image-mapping.json format) is checkpointed after every
+ *   image, so an interrupted run resumes where it stopped
+ *
+ * Manifest entries keep their existing fields (id, originalUrl, description,
+ * usage, sanityAssetId, sanityUrl) and gain sha1, bytes, status, migratedAt
+ * and error.
+ */
+
+const fs = require('fs');
+const fsp = require('fs/promises');
+const os = require('os');
+const path = require('path');
+const http = require('http');
+const https = require('https');
+const { createHash, randomUUID } = require('crypto');
+const { Transform } = require('stream');
+const { pipeline } = require('stream/promises');
+const { getSanityClient } = require('./sanity-client');
+
+const DEFAULTS = {
+  concurrency: 4,
+  retries: 3,
+  backoffMs: 500,
+  timeoutMs: 60000,
+  maxRedirects: 5,
+};
+
+// Sanity image asset ids embed the content hash: image-<sha1>-<w>x<h>-<ext>
+const ASSET_ID_PATTERN = /^image-([a-f0-9]{40})-/;
+
+const EXTENSIONS = {
+  'image/jpeg': 'jpg',
+  'image/png': 'png',
+  'image/webp': 'webp',
+  'image/gif': 'gif',
+  'image/avif': 'avif',
+};
+
+const sleep = ms => new Promise(resolve => setTimeout(resolve, ms));
+
+function loadManifest(manifestPath) {
+  if (!fs.existsSync(manifestPath)) {
+    return { images: [] };
+  }
+  const manifest = JSON.parse(fs.readFileSync(manifestPath, 'utf8'));
+  manifest.images = manifest.images || [];
+  return manifest;
+}
+
+/**
+ * Serializes manifest writes; each write replaces the file atomically
+ */
+class ManifestWriter {
+  constructor(manifestPath, manifest) {
+    this.manifestPath = manifestPath;
+    this.manifest = manifest;
+    this.pending = Promise.resolve();
+    this.writes = 0;
+  }
+
+  checkpoint() {
+    this.pending = this.pending.then(async () => {
+      const tmpPath = `${this.manifestPath}.${process.pid}.tmp`;
+      await fsp.writeFile(tmpPath, JSON.stringify(this.manifest, null, 2) + '\n');
+      await fsp.rename(tmpPath, this.manifestPath);
+      this.writes++;
+    });
+    return this.pending;
+  }
+}
+
+/**
+ * Stream a URL to a spool file, hashing it on the way
+ * @returns {Promise<Object>} { file, sha1, bytes, contentType }
+ */
+function download(url, spoolDir, options, redirects = 0) {
+  const transport = url.startsWith('http:') ? http : https;
+
+  return new Promise((resolve, reject) => {
+    const req = transport.get(url, (res) => {
+      if ([301, 302, 303, 307, 308].includes(res.statusCode) && res.headers.location) {
+        res.resume();
+        if (redirects >= options.maxRedirects) {
+          reject(new Error(`Too many redirects: ${url}`));
+          return;
+        }
+        const next = new URL(res.headers.location, url).toString();
+        download(next, spoolDir, options, redirects + 1).then(resolve, reject);
+        return;
+      }
+
+      if (res.statusCode !== 200) {
+        res.resume();
+        reject(new Error(`HTTP ${res.statusCode}: ${url}`));
+        return;
+      }
+
+      const hash = createHash('sha1');
+      let bytes = 0;
+      const file = path.join(spoolDir, randomUUID());
+      const tap = new Transform({
+        transform(chunk, encoding, callback) {
+          hash.update(chunk);
+          bytes += chunk.length;
+          callback(null, chunk);
+        },
+      });
+
+      pipeline(res, tap, fs.createWriteStream(file))
+        .then(() => resolve({
+          file,
+          sha1: hash.digest('hex'),
+          bytes,
+          contentType: (res.headers['content-type'] || 'image/jpeg').split(';')[0].trim(),
+        }))
+        .catch(async (error) => {
+          await fsp.rm(file, { force: true });
+          reject(error);
+        });
+    });
+
+    req.setTimeout(options.timeoutMs, () => {
+      req.destroy(new Error(`Download timed out after ${options.timeoutMs}ms: ${url}`));
+    });
+    req.on('error', reject);
+  });
+}
+
+async function withRetries(fn, { retries, backoffMs }) {
+  let lastError;
+  for (let attempt = 1; attempt <= retries; attempt++) {
+    try {
+      return await fn();
+    } catch (error) {
+      lastError = error;
+      if (attempt < retries) {
+        await sleep(backoffMs * 2 ** (attempt - 1));
+      }
+    }
+  }
+  throw lastError;
+}
+
+/**
+ * Run worker(item) over items with at most `concurrency` in flight
+ */
+async function runPool(items, concurrency, worker) {
+  let next = 0;
+  const workers = Array.from({ length: Math.min(concurrency, items.length) }, async () => {
+    while (next < items.length) {
+      const item = items[next++];
+      await worker(item);
+    }
+  });
+  await Promise.all(workers);
+}
+
+/**
+ * Merge images into the manifest, keyed by id
+ * Existing entries keep their migration state; new ones are appended.
+ */
+function mergeImages(manifest, images) {
+  const byId = new Map(manifest.images.map(image => [image.id, image]));
+  for (const image of images) {
+    const existing = byId.get(image.id);
+    if (existing) {
+      Object.assign(existing, { ...image, ...pick(existing, ['sanityAssetId', 'sanityUrl', 'sha1', 'bytes', 'status', 'migratedAt']) });
+    } else {
+      manifest.images.push({ ...image });
+    }
+  }
+}
+
+function pick(object, keys) {
+  return Object.fromEntries(keys.filter(key => object[key] !== undefined).map(key => [key, object[key]]));
+}
+
+function isMigrated(image) {
+  return Boolean(image.sanityAssetId) && image.status !== 'failed';
+}
+
+/**
+ * Migrate every pending image of a manifest
+ * @param {Object} options
+ * @param {string} options.manifestPath - Manifest file (sanity-image-mapping.json format)
+ * @param {Object[]} [options.images] - Images to add to the manifest before migrating
+ * @param {Object} [options.client] - Sanity client (the shared script client by default)
+ * @param {Function} [options.resolveUrl] - Maps an entry to its download URL
+ * @param {number} [options.concurrency] - Images in flight
+ * @param {boolean} [options.force] - Migrate entries that already have an asset
+ * @param {boolean} [options.dryRun] - Only report what would be migrated
+ * @param {Function} [options.onProgress] - Called with (image, outcome) after each image
+ * @returns {Promise<Object>} Run statistics
+ */
+async function migrateImages(options) {
+  const settings = { ...DEFAULTS, ...options };
+  const {
+    manifestPath,
+    resolveUrl = image => image.originalUrl,
+    force = false,
+    dryRun = false,
+    onProgress = () => {},
+  } = settings;
+
+  const manifest = loadManifest(manifestPath);
+  if (settings.images) {
+    mergeImages(manifest, settings.images);
+  }
+
+  const stats = {
+    total: manifest.images.length,
+    pending: 0,
+    uploaded: 0,
+    deduped: 0,
+    existing: 0,
+    resumed: 0,
+    failed: 0,
+    bytesDownloaded: 0,
+    bytesUploaded: 0,
+    durationMs: 0,
+  };
+
+  const pending = manifest.images.filter(image => force || !isMigrated(image));
+  stats.resumed = stats.total - pending.length;
+  stats.pending = pending.length;
+  if (dryRun || pending.length === 0) {
+    return stats;
+  }
+
+  const client = settings.client || getSanityClient();
+  const writer = new ManifestWriter(manifestPath, manifest);
+  const spoolDir = await fsp.mkdtemp(path.join(os.tmpdir(), 'sanity-migration-'));
+
+  // sha1 -> asset, seeded from assets migrated by earlier runs
+  const assets = new Map();
+  for (const image of manifest.images) {
+    if (!isMigrated(image)) continue;
+    const sha1 = image.sha1 || ASSET_ID_PATTERN.exec(image.sanityAssetId)?.[1];
+    if (sha1) {
+      assets.set(sha1, { _id: image.sanityAssetId, url: image.sanityUrl });
+    }
+  }
+  // sha1 -> in-flight upload, so concurrent duplicates wait for one upload
+  const inflight = new Map();
+
+  async function resolveAsset(image, downloaded) {
+    const { sha1 } = downloaded;
+    if (assets.has(sha1)) return { asset: assets.get(sha1), outcome: 'deduped' };
+    if (inflight.has(sha1)) return { asset: await inflight.get(sha1), outcome: 'deduped' };
+
+    const upload = (async () => {
+      const existing = await client.fetch(
+        '*[_type == "sanity.imageAsset" && sha1hash == $hash][0]{_id, url}',
+        { hash: sha1 }
+      );
+      if (existing) return { ...existing, reused: true };
+
+      const ext = EXTENSIONS[downloaded.contentType] || 'jpg';
+      const asset = await withRetries(() => client.assets.upload('image', fs.createReadStream(downloaded.file), {
+        filename: `${image.id}.${ext}`,
+        contentType: downloaded.contentType,
+        title: image.description,
+        description: image.description,
+      }), settings);
+      stats.bytesUploaded += downloaded.bytes;
+      return { _id: asset._id, url: asset.url };
+    })();
+
+    inflight.set(sha1, upload);
+    try {
+      const asset = await upload;
+      assets.set(sha1, { _id: asset._id, url: asset.url });
+      return { asset, outcome: asset.reused ? 'existing' : 'uploaded' };
+    } finally {
+      inflight.delete(sha1);
+    }
+  }
+
+  const startedAt = Date.now();
+  try {
+    await runPool(pending, settings.concurrency, async (image) => {
+      let downloaded = null;
+      let outcome;
+      try {
+        downloaded = await withRetries(() => download(resolveUrl(image), spoolDir, settings), settings);
+        stats.bytesDownloaded += downloaded.bytes;
+
+        const resolved = await resolveAsset(image, downloaded);
+        outcome = resolved.outcome;
+        Object.assign(image, {
+          sanityAssetId: resolved.asset._id,
+          sanityUrl: resolved.asset.url,
+          sha1: downloaded.sha1,
+          bytes: downloaded.bytes,
+          status: 'migrated',
+          migratedAt: new Date().toISOString(),
+        });
+        delete image.error;
+      } catch (error) {
+        outcome = 'failed';
+        image.status = 'failed';
+        image.error = error.message;
+      } finally {
+        if (downloaded) await fsp.rm(downloaded.file, { force: true });
+      }
+
+      stats[outcome]++;
+      await writer.checkpoint();
+      onProgress(image, outcome);
+    });
+  } finally {
+    await writer.pending;
+    await fsp.rm(spoolDir, { recursive: true, force: true });
+  }
+
+  stats.durationMs = Date.now() - startedAt;
+  stats.manifestWrites = writer.writes;
+  return stats;
+}
+
+module.exports = {
+  migrateImages,
+  loadManifest,
+};
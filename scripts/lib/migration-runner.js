@@ -0,0 +1,250 @@
+/**
+ * In-process Sanity migration runner
+ *
+ * A migration step is a plain object:
+ *   { name, dependsOn: ['other-step'], documents: [singletonDoc, ...] }
+ * or, for steps that are not singleton upserts, { name, dependsOn, run(context) }.
+ *
+ * Steps run in one process on one shared client. A step starts as soon as
+ * all of its dependencies have finished, so independent steps run
+ * concurrently. Each step's writes are committed as a single transaction.
+ * With dryRun the transactions are validated by Sanity but not applied.
+ */
+
+const { getSanityClient } = require('./sanity-client');
+
+/**
+ * Create or update singleton documents (one document per _type) in one transaction
+ * @param {Object} client - Sanity client
+ * @param {Object[]} documents - Documents, each with a distinct _type
+ * @param {Object} options
+ * @param {boolean} options.dryRun - Validate without applying
+ * @returns {Promise<Object>} { created, updated, mutations }
+ */
+async function upsertSingletons(client, documents, { dryRun = false } = {}) {
+  const types = documents.map(document => document._type);
+  const existing = await client.fetch('*[_type in $types]{_id, _type}', { types });
+  const idByType = new Map();
+  for (const document of existing) {
+    if (!idByType.has(document._type)) idByType.set(document._type, document._id);
+  }
+
+  const transaction = client.transaction();
+  let created = 0;
+  let updated = 0;
+  for (const document of documents) {
+    const id = idByType.get(document._type);
+    if (id) {
+      transaction.patch(id, patch => patch.set(document));
+      updated++;
+    } else {
+      transaction.create(document);
+      created++;
+    }
+  }
+
+  await transaction.commit({ dryRun });
+  return { created, updated, mutations: created + updated };
+}
+
+/**
+ * Check step declarations and return them keyed by name
+ * Throws on duplicate names, unknown dependencies and cycles.
+ */
+function validateGraph(steps) {
+  const byName = new Map();
+  for (const step of steps) {
+    if (byName.has(step.name)) throw new Error(`Duplicate migration step: ${step.name}`);
+    byName.set(step.name, step);
+  }
+
+  for (const step of steps) {
+    for (const dependency of step.dependsOn || []) {
+      if (!byName.has(dependency)) {
+        throw new Error(`Migration step ${step.name} depends on unknown step ${dependency}`);
+      }
+    }
+  }
+
+  const state = new Map();
+  const visit = (name, trail) => {
+    if (state.get(name) === 'done') return;
+    if (state.get(name) === 'visiting') {
+      throw new Error(`Migration dependency cycle: ${[...trail, name].join(' -> ')}`);
+    }
+    state.set(name, 'visiting');
+    for (const dependency of byName.get(name).dependsOn || []) {
+      visit(dependency, [...trail, name]);
+    }
+    state.set(name, 'done');
+  };
+  steps.forEach(step => visit(step.name, []));
+
+  return byName;
+}
+
+/**
+ * Steps needed to run `only` (and everything they depend on)
+ */
+function selectSteps(byName, only) {
+  if (!only) return [...byName.values()];
+  const selected = new Set();
+  const add = (name) => {
+    if (!byName.has(name)) throw new Error(`Unknown migration step: ${name}`);
+    if (selected.has(name)) return;
+    selected.add(name);
+    (byName.get(name).dependsOn || []).forEach(add);
+  };
+  only.forEach(add);
+  return [...byName.values()].filter(step => selected.has(step.name));
+}
+
+/**
+ * Run migration steps in dependency order, independent steps concurrently
+ * A failed step skips its dependents; unrelated steps still run.
+ * @param {Object[]} steps - Step declarations
+ * @param {Object} options
+ * @param {Object} [options.client] - Sanity client (the shared script client by default)
+ * @param {boolean} [options.dryRun] - Validate writes without applying them
+ * @param {number} [options.concurrency] - Steps in flight (default: unbounded)
+ * @param {string[]} [options.only] - Run only these steps and their dependencies
+ * @param {Function} [options.onStep] - Called with each step result as it settles
+ * @returns {Promise<Object>} { results, durationMs, serialMs, criticalPathMs, success }
+ */
+async function runMigrations(steps, options = {}) {
+  const byName = validateGraph(steps);
+  const selected = selectSteps(byName, options.only);
+  const client = options.client || getSanityClient();
+  const dryRun = Boolean(options.dryRun);
+  const concurrency = options.concurrency || Infinity;
+  const onStep = options.onStep || (() => {});
+
+  const results = new Map();
+  const waiting = new Set(selected.map(step => step.name));
+  const running = new Map();
+  const context = { client, dryRun, steps: selected };
+  const startedAt = performance.now();
+
+  const finish = (step, result) => {
+    results.set(step.name, result);
+    onStep(result);
+  };
+
+  const start = (step) => {
+    const stepStartedAt = performance.now();
+    const execute = step.run
+      ? step.run(context)
+      : upsertSingletons(client, step.documents, { dryRun });
+
+    const promise = Promise.resolve(execute)
+      .then(
+        output => ({ status: 'success', output }),
+        error => ({ status: 'failed', error: error.message })
+      )
+      .then((outcome) => {
+        running.delete(step.name);
+        finish(step, {
+          name: step.name,
+          ...outcome,
+          startMs: stepStartedAt - startedAt,
+          durationMs: performance.now() - stepStartedAt,
+        });
+      });
+    running.set(step.name, promise);
+  };
+
+  while (waiting.size > 0 || running.size > 0) {
+    for (const name of [...waiting]) {
+      const step = byName.get(name);
+      const dependencies = (step.dependsOn || []).map(dependency => results.get(dependency));
+
+      if (dependencies.some(result => result && result.status !== 'success')) {
+        waiting.delete(name);
+        finish(step, { name, status: 'skipped', error: 'dependency did not succeed', startMs: null, durationMs: 0 });
+        continue;
+      }
+      if (dependencies.every(Boolean) && running.size < concurrency) {
+        waiting.delete(name);
+        start(step);
+      }
+    }
+
+    // Selected steps always include their dependencies, so with nothing
+    // running every waiting step is startable or skippable on the next pass
+    if (running.size > 0) {
+      await Promise.race(running.values());
+    }
+  }
+
+  const ordered = selected.map(step => results.get(step.name));
+
+  // Longest chain of step durations through the graph: the best any runner can do
+  const finishAt = new Map();
+  const pathTo = (name) => {
+    if (!finishAt.has(name)) {
+      const dependencies = (byName.get(name).dependsOn || []).map(pathTo);
+      finishAt.set(name, Math.max(0, ...dependencies) + results.get(name).durationMs);
+    }
+    return finishAt.get(name);
+  };
+  selected.forEach(step => pathTo(step.name));
+
+  return {
+    results: ordered,
+    durationMs: performance.now() - startedAt,
+    serialMs: ordered.reduce((sum, result) => sum + result.durationMs, 0),
+    criticalPathMs: Math.max(0, ...finishAt.values()),
+    success: ordered.every(result => result.status === 'success'),
+    dryRun,
+  };
+}
+
+const STATUS_ICONS = { success: '✅', failed: '❌', skipped: '⏭️ ' };
+
+/**
+ * Print a per-step timing report
+ */
+function printReport(report) {
+  console.log(`\n📊 Migration report${report.dryRun ? ' (dry run)' : ''}:`);
+  for (const result of report.results) {
+    const timing = result.startMs === null
+      ? ''
+      : ` +${result.startMs.toFixed(0)}ms, took ${result.durationMs.toFixed(0)}ms`;
+    const detail = result.status === 'success' && result.output?.mutations !== undefined
+      ? ` (${result.output.created} created, ${result.output.updated} updated)`
+      : result.error ? ` (${result.error})` : '';
+    console.log(`  ${STATUS_ICONS[result.status]} ${result.name}${timing}${detail}`);
+  }
+  console.log(`\n  ⏱️  Wall time: ${report.durationMs.toFixed(0)}ms`);
+  console.log(`  🐢 Sum of steps (serial run): ${report.serialMs.toFixed(0)}ms`);
+  console.log(`  🧭 Critical path: ${report.criticalPathMs.toFixed(0)}ms`);
+}
+
+/**
+ * Run a single step as a standalone script (node scripts/migrate-x.js)
+ * Dependencies are not run; the step's writes are still one transaction.
+ */
+async function runStandalone(step) {
+  try {
+    console.log(`🚀 Starting ${step.name} migration...`);
+    const client = getSanityClient();
+    const result = step.run
+      ? await step.run({ client, dryRun: false, steps: [step] })
+      : await upsertSingletons(client, step.documents);
+    if (result?.mutations !== undefined) {
+      console.log(`✅ ${result.created} created, ${result.updated} updated`);
+    }
+    console.log('\n✨ Migration complete!');
+  } catch (error) {
+    console.error('❌ Migration failed:', error);
+    process.exit(1);
+  }
+}
+
+module.exports = {
+  upsertSingletons,
+  runMigrations,
+  runStandalone,
+  printReport,
+  validateGraph,
+};
@@ -0,0 +1,26 @@
+/**
+ * Sanity client for scripts
+ * Created once per process and shared by every migration step in it.
+ * SANITY_API_HOST points the client at another API host (e.g. a local stand-in).
+ */
+
+let client = null;
+
+function getSanityClient() {
+  if (!client) {
+    const { createClient } = require('@sanity/client');
+    const apiHost = process.env.SANITY_API_HOST;
+
+    client = createClient({
+      projectId: process.env.NEXT_PUBLIC_SANITY_PROJECT_ID || 'vrhdu6hl',
+      dataset: process.env.NEXT_PUBLIC_SANITY_DATASET || 'production',
+      token: process.env.SANITY_API_TOKEN,
+      apiVersion: '2024-01-01',
+      useCdn: false,
+      ...(apiHost ? { apiHost, useProjectHostname: false } : {}),
+    });
+  }
+  return client;
+}
+
+module.exports = { getSanityClient };
@@ -2,154 +2,106 @@
 /**
  * Sanity Image Migration Script
  * Downloads images from Unsplash and uploads them to Sanity CDN
- * 
- * Usage: node scripts/migrate-all-images-to-sanity.js
+ *
+ * Images are migrated concurrently, deduplicated by content hash and
+ * checkpointed to sanity-image-mapping.json after each image, so an
+ * interrupted run picks up where it stopped.
+ *
+ * Usage: node scripts/migrate-all-images-to-sanity.js [options]
+ *   --concurrency N   images in flight (default 4)
+ *   --force           re-migrate images that already have a Sanity asset
+ *   --dry-run         only report what would be migrated
+ *   --manifest PATH   mapping file (default scripts/sanity-image-mapping.json)
+ *
+ * Environment: SANITY_API_TOKEN (write token), NEXT_PUBLIC_SANITY_PROJECT_ID,
+ * NEXT_PUBLIC_SANITY_DATASET, SANITY_API_HOST (optional API host override)
  */
 
-const { createClient } = require('@sanity/client');
-const fs = require('fs');
+require('dotenv').config({ path: '.env' });
 const path = require('path');
-const https = require('https');
+const { migrateImages } = require('./lib/image-migration');
 
-// Sanity configuration
-const SANITY_PROJECT_ID = 'vrhdu6hl';
-const SANITY_DATASET = 'production';
-const SANITY_API_VERSION = '2024-01-01';
-const SANITY_TOKEN = 'skaa51stG1QnhmY1ENuHE7kozwvo3Kp6rH2SUtbzeO9l2qvJXAYgK1YQWV5sTepwc6z4A6dTpSFa6gXcmR358cSP3zkvfJhTQ17Qb75S5wfPemyWcPK3cWfabdjl9NjM4z3pi6Jp4Ogtm6d4F8I80tD6SmuCdp1vjasE8Jsgw9OewM7bKb7k';
+function parseArgs(argv) {
+  const args = {
+    concurrency: 4,
+    force: false,
+    dryRun: false,
+    manifest: path.join(__dirname, 'sanity-image-mapping.json'),
+  };
+  for (let i = 0; i < argv.length; i++) {
+    switch (argv[i]) {
+      case '--concurrency': args.concurrency = parseInt(argv[++i], 10); break;
+      case '--force': args.force = true; break;
+      case '--dry-run': args.dryRun = true; break;
+      case '--manifest': args.manifest = path.resolve(argv[++i]); break;
+      default: throw new Error(`Unknown option: ${argv[i]}`);
+    }
+  }
+  return args;
+}
 
-// Initialize Sanity client with write token
-const client = createClient({
-  projectId: SANITY_PROJECT_ID,
-  dataset: SANITY_DATASET,
-  apiVersion: SANITY_API_VERSION,
-  token: SANITY_TOKEN,
-  useCdn: false
-});
+// Full-size JPEG rendition for Unsplash sources; other URLs are used as-is
+function downloadUrl(image) {
+  const url = image.originalUrl;
+  if (!url.startsWith('https://images.unsplash.com/')) return url;
+  return url.includes('?') ? `${url}&w=1920&q=85&fm=jpg` : `${url}?w=1920&q=85&fm=jpg`;
+}
 
-// Load image mapping
-const mappingPath = path.join(__dirname, 'sanity-image-mapping.json');
-const mapping = JSON.parse(fs.readFileSync(mappingPath, 'utf8'));
+const ICONS = { uploaded: '✅', deduped: '♻️ ', existing: '♻️ ', failed: '❌' };
 
-// Helper: Download image from URL
-function downloadImage(url) {
-  return new Promise((resolve, reject) => {
-    // Construct full Unsplash URL with quality params
-    const fullUrl = url.includes('?') 
-      ? `${url}&w=1920&q=85&fm=jpg`
-      : `${url}?w=1920&q=85&fm=jpg`;
-    
-    console.log(`  📥 Downloading: ${fullUrl.substring(0, 80)}...`);
-    
-    https.get(fullUrl, (response) => {
-      if (response.statusCode === 301 || response.statusCode === 302) {
-        // Handle redirect
-        return downloadImage(response.headers.location).then(resolve).catch(reject);
-      }
-      
-      if (response.statusCode !== 200) {
-        reject(new Error(`HTTP ${response.statusCode}: ${url}`));
-        return;
-      }
-      
-      const chunks = [];
-      response.on('data', chunk => chunks.push(chunk));
-      response.on('end', () => resolve(Buffer.concat(chunks)));
-      response.on('error', reject);
-    }).on('error', reject);
-  });
-}
+async function main() {
+  const args = parseArgs(process.argv.slice(2));
 
-// Helper: Upload image to Sanity
-async function uploadToSanity(imageBuffer, filename, description) {
-  try {
-    console.log(`  📤 Uploading to Sanity: ${filename}`);
-    
-    const asset = await client.assets.upload('image', imageBuffer, {
-      filename: filename,
-      contentType: 'image/jpeg',
-      title: description,
-      description: description
-    });
-    
-    console.log(`  ✅ Uploaded! Asset ID: ${asset._id}`);
-    return asset;
-  } catch (error) {
-    console.error(`  ❌ Upload failed: ${error.message}`);
-    throw error;
+  if (!args.dryRun && !process.env.SANITY_API_TOKEN) {
+    throw new Error('SANITY_API_TOKEN is required');
   }
-}
 
-// Main migration function
-async function migrateImages() {
   console.log('\n🚀 Starting Sanity Image Migration\n');
-  console.log(`Project: ${SANITY_PROJECT_ID}`);
-  console.log(`Dataset: ${SANITY_DATASET}`);
-  console.log(`Total images to migrate: ${mapping.images.length}\n`);
-  
-  const results = [];
-  
-  for (let i = 0; i < mapping.images.length; i++) {
-    const image = mapping.images[i];
-    console.log(`\n[${i + 1}/${mapping.images.length}] Processing: ${image.id}`);
-    console.log(`  Description: ${image.description}`);
-    
-    try {
-      // Download image
-      const imageBuffer = await downloadImage(image.originalUrl);
-      console.log(`  ✅ Downloaded (${(imageBuffer.length / 1024).toFixed(2)} KB)`);
-      
-      // Upload to Sanity
-      const filename = `${image.id}.jpg`;
-      const asset = await uploadToSanity(imageBuffer, filename, image.description);
-      
-      // Update mapping with asset ID
-      image.sanityAssetId = asset._id;
-      image.sanityUrl = asset.url;
-      
-      results.push({
-        id: image.id,
-        success: true,
-        assetId: asset._id,
-        url: asset.url
-      });
-      
-      console.log(`  🎉 Success!`);
-      
-    } catch (error) {
-      console.error(`  ❌ Failed: ${error.message}`);
-      results.push({
-        id: image.id,
-        success: false,
-        error: error.message
-      });
-    }
-    
-    // Small delay to avoid rate limits
-    if (i < mapping.images.length - 1) {
-      await new Promise(resolve => setTimeout(resolve, 1000));
-    }
+  console.log(`Manifest: ${args.manifest}`);
+  console.log(`Concurrency: ${args.concurrency}\n`);
+
+  let done = 0;
+  const stats = await migrateImages({
+    manifestPath: args.manifest,
+    resolveUrl: downloadUrl,
+    concurrency: args.concurrency,
+    force: args.force,
+    dryRun: args.dryRun,
+    onProgress: (image, outcome) => {
+      done++;
+      const detail = outcome === 'failed' ? image.error : image.sanityAssetId;
+      console.log(`${ICONS[outcome]} [${done}] ${image.id}: ${outcome} ${detail}`);
+    },
+  });
+
+  if (args.dryRun) {
+    console.log(`📝 Dry run: ${stats.pending} of ${stats.total} images would be migrated`);
+    return;
   }
-  
-  // Save updated mapping
-  fs.writeFileSync(mappingPath, JSON.stringify(mapping, null, 2));
-  console.log(`\n💾 Updated mapping saved to: ${mappingPath}`);
-  
-  // Print summary
+
+  const seconds = stats.durationMs / 1000;
   console.log('\n📊 Migration Summary:');
-  console.log(`  ✅ Successful: ${results.filter(r => r.success).length}`);
-  console.log(`  ❌ Failed: ${results.filter(r => !r.success).length}`);
-  console.log(`  📦 Total: ${results.length}`);
-  
-  if (results.some(r => !r.success)) {
-    console.log('\n⚠️  Some images failed to migrate. Check the logs above.');
+  console.log(`  ✅ Uploaded: ${stats.uploaded}`);
+  console.log(`  ♻️  Deduplicated: ${stats.deduped + stats.existing}`);
+  console.log(`  ⏭️  Already migrated: ${stats.resumed}`);
+  console.log(`  ❌ Failed: ${stats.failed}`);
+  console.log(`  📦 Total: ${stats.total}`);
+  if (seconds > 0) {
+    console.log(`  ⚡ ${(stats.pending / seconds).toFixed(1)} images/s, ` +
+      `${(stats.bytesDownloaded / 1024 / 1024 / seconds).toFixed(2)} MB/s downloaded`);
+  }
+  console.log(`\n💾 Mapping checkpointed to: ${args.manifest}`);
+  console.log(`STATS ${JSON.stringify(stats)}`);
+
+  if (stats.failed > 0) {
+    console.log('\n⚠️  Some images failed to migrate. Re-run to retry them.');
     process.exit(1);
   }
-  
+
   console.log('\n✅ All images migrated successfully!\n');
 }
 
-// Run migration
-migrateImages().catch(error => {
+main().catch(error => {
   console.error('\n💥 Migration failed:', error);
   process.exit(1);
 });
@@ -1,13 +1,5 @@
-const { createClient } = require('@sanity/client');
 require('dotenv').config({ path: '.env' });
-
-const client = createClient({
-  projectId: process.env.NEXT_PUBLIC_SANITY_PROJECT_ID || 'vrhdu6hl',
-  dataset: process.env.NEXT_PUBLIC_SANITY_DATASET || 'production',
-  token: process.env.SANITY_API_TOKEN,
-  apiVersion: '2024-01-01',
-  useCdn: false,
-});
+const { runStandalone } = require('./lib/migration-runner');
 
 const cleaningContent = {
   _type: 'cleaningServicesSettingsHybrid',
@@ -83,30 +75,13 @@ const cleaningContent = {
   }
 };
 
-async function migrate() {
-  try {
-    console.log('🚀 Starting cleaning services migration...');
-
-    const existing = await client.fetch(`*[_type == "cleaningServicesSettingsHybrid"][0]`);
-    
-    if (existing) {
-      console.log('✅ Cleaning services content already exists. Updating...');
-      const result = await client
-        .patch(existing._id)
-        .set(cleaningContent)
-        .commit();
-      console.log('✅ Cleaning services updated successfully!');
-    } else {
-      console.log('📝 Creating new cleaning services content...');
-      const result = await client.create(cleaningContent);
-      console.log('✅ Cleaning services created successfully!');
-    }
+// Migration step for scripts/run-all-migrations.js
+module.exports = {
+  name: 'cleaning-services',
+  dependsOn: ['image-assets'],
+  documents: [cleaningContent],
+};
 
-    console.log('\n✨ Migration complete!');
-  } catch (error) {
-    console.error('❌ Migration failed:', error);
-    process.exit(1);
-  }
+if (require.main === module) {
+  runStandalone(module.exports);
 }
-
-migrate();
@@ -1,13 +1,5 @@
-const { createClient } = require('@sanity/client');
 require('dotenv').config({ path: '.env' });
-
-const client = createClient({
-  projectId: process.env.NEXT_PUBLIC_SANITY_PROJECT_ID || 'vrhdu6hl',
-  dataset: process.env.NEXT_PUBLIC_SANITY_DATASET || 'production',
-  token: process.env.SANITY_API_TOKEN,
-  apiVersion: '2024-01-01',
-  useCdn: false,
-});
+const { runStandalone } = require('./lib/migration-runner');
 
 const contactContent = {
   _type: 'contactSettingsHybrid',
@@ -31,30 +23,13 @@ const contactContent = {
   }
 };
 
-async function migrate() {
-  try {
-    console.log('🚀 Starting contact page migration...');
-
-    const existing = await client.fetch(`*[_type == "contactSettingsHybrid"][0]`);
-    
-    if (existing) {
-      console.log('✅ Contact content already exists. Updating...');
-      const result = await client
-        .patch(existing._id)
-        .set(contactContent)
-        .commit();
-      console.log('✅ Contact page updated successfully!');
-    } else {
-      console.log('📝 Creating new contact content...');
-      const result = await client.create(contactContent);
-      console.log('✅ Contact page created successfully!');
-    }
+// Migration step for scripts/run-all-migrations.js
+module.exports = {
+  name: 'contact',
+  dependsOn: [],
+  documents: [contactContent],
+};
 
-    console.log('\n✨ Migration complete!');
-  } catch (error) {
-    console.error('❌ Migration failed:', error);
-    process.exit(1);
-  }
+if (require.main === module) {
+  runStandalone(module.exports);
 }
-
-migrate();
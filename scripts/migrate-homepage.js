@@ -1,13 +1,5 @@
-const { createClient } = require('@sanity/client');
 require('dotenv').config({ path: '.env' });
-
-const client = createClient({
-  projectId: process.env.NEXT_PUBLIC_SANITY_PROJECT_ID || 'vrhdu6hl',
-  dataset: process.env.NEXT_PUBLIC_SANITY_DATASET || 'production',
-  token: process.env.SANITY_API_TOKEN,
-  apiVersion: '2024-01-01',
-  useCdn: false,
-});
+const { runStandalone } = require('./lib/migration-runner');
 
 const homeContent = {
   _type: 'homeSettingsHybrid',
@@ -67,33 +59,13 @@ const homeContent = {
   }
 };
 
-async function migrate() {
-  try {
-    console.log('🚀 Starting homepage migration...');
-
-    // Check if content already exists
-    const existing = await client.fetch(`*[_type == "homeSettingsHybrid"][0]`);
-    
-    if (existing) {
-      console.log('✅ Homepage content already exists. Updating...');
-      const result = await client
-        .patch(existing._id)
-        .set(homeContent)
-        .commit();
-      console.log('✅ Homepage updated successfully!');
-      console.log('Document ID:', result._id);
-    } else {
-      console.log('📝 Creating new homepage content...');
-      const result = await client.create(homeContent);
-      console.log('✅ Homepage created successfully!');
-      console.log('Document ID:', result._id);
-    }
+// Migration step for scripts/run-all-migrations.js
+module.exports = {
+  name: 'homepage',
+  dependsOn: ['image-assets'],
+  documents: [homeContent],
+};
 
-    console.log('\n✨ Migration complete!');
-  } catch (error) {
-    console.error('❌ Migration failed:', error);
-    process.exit(1);
-  }
+if (require.main === module) {
+  runStandalone(module.exports);
 }
-
-migrate();
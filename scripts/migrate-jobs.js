@@ -1,13 +1,5 @@
-const { createClient } = require('@sanity/client');
 require('dotenv').config({ path: '.env' });
-
-const client = createClient({
-  projectId: process.env.NEXT_PUBLIC_SANITY_PROJECT_ID || 'vrhdu6hl',
-  dataset: process.env.NEXT_PUBLIC_SANITY_DATASET || 'production',
-  token: process.env.SANITY_API_TOKEN,
-  apiVersion: '2024-01-01',
-  useCdn: false,
-});
+const { runStandalone } = require('./lib/migration-runner');
 
 const jobsContent = {
   _type: 'jobsSettingsHybrid',
@@ -78,30 +70,13 @@ const jobsContent = {
   }
 };
 
-async function migrate() {
-  try {
-    console.log('🚀 Starting jobs page migration...');
-
-    const existing = await client.fetch(`*[_type == "jobsSettingsHybrid"][0]`);
-    
-    if (existing) {
-      console.log('✅ Jobs content already exists. Updating...');
-      const result = await client
-        .patch(existing._id)
-        .set(jobsContent)
-        .commit();
-      console.log('✅ Jobs page updated successfully!');
-    } else {
-      console.log('📝 Creating new jobs content...');
-      const result = await client.create(jobsContent);
-      console.log('✅ Jobs page created successfully!');
-    }
+// Migration step for scripts/run-all-migrations.js
+module.exports = {
+  name: 'jobs',
+  dependsOn: ['image-assets'],
+  documents: [jobsContent],
+};
 
-    console.log('\n✨ Migration complete!');
-  } catch (error) {
-    console.error('❌ Migration failed:', error);
-    process.exit(1);
-  }
+if (require.main === module) {
+  runStandalone(module.exports);
 }
-
-migrate();
@@ -1,13 +1,5 @@
-const { createClient } = require('@sanity/client');
 require('dotenv').config({ path: '.env' });
-
-const client = createClient({
-  projectId: process.env.NEXT_PUBLIC_SANITY_PROJECT_ID || 'vrhdu6hl',
-  dataset: process.env.NEXT_PUBLIC_SANITY_DATASET || 'production',
-  token: process.env.SANITY_API_TOKEN,
-  apiVersion: '2024-01-01',
-  useCdn: false,
-});
+const { runStandalone } = require('./lib/migration-runner');
 
 const legalContent = {
   _type: 'legalSettingsHybrid',
@@ -127,30 +119,13 @@ const legalContent = {
   }
 };
 
-async function migrate() {
-  try {
-    console.log('🚀 Starting legal page migration...');
-
-    const existing = await client.fetch(`*[_type == "legalSettingsHybrid"][0]`);
-    
-    if (existing) {
-      console.log('✅ Legal content already exists. Updating...');
-      const result = await client
-        .patch(existing._id)
-        .set(legalContent)
-        .commit();
-      console.log('✅ Legal page updated successfully!');
-    } else {
-      console.log('📝 Creating new legal content...');
-      const result = await client.create(legalContent);
-      console.log('✅ Legal page created successfully!');
-    }
+// Migration step for scripts/run-all-migrations.js
+module.exports = {
+  name: 'legal',
+  dependsOn: [],
+  documents: [legalContent],
+};
 
-    console.log('\n✨ Migration complete!');
-  } catch (error) {
-    console.error('❌ Migration failed:', error);
-    process.exit(1);
-  }
+if (require.main === module) {
+  runStandalone(module.exports);
 }
-
-migrate();
@@ -1,13 +1,5 @@
-const { createClient } = require('@sanity/client');
 require('dotenv').config({ path: '.env' });
-
-const client = createClient({
-  projectId: process.env.NEXT_PUBLIC_SANITY_PROJECT_ID || 'vrhdu6hl',
-  dataset: process.env.NEXT_PUBLIC_SANITY_DATASET || 'production',
-  token: process.env.SANITY_API_TOKEN,
-  apiVersion: '2024-01-01',
-  useCdn: false,
-});
+const { runStandalone } = require('./lib/migration-runner');
 
 const rentalContent = {
   _type: 'rentalServicesSettingsHybrid',
@@ -83,30 +75,13 @@ const rentalContent = {
   }
 };
 
-async function migrate() {
-  try {
-    console.log('🚀 Starting rental services migration...');
-
-    const existing = await client.fetch(`*[_type == "rentalServicesSettingsHybrid"][0]`);
-    
-    if (existing) {
-      console.log('✅ Rental services content already exists. Updating...');
-      const result = await client
-        .patch(existing._id)
-        .set(rentalContent)
-        .commit();
-      console.log('✅ Rental services updated successfully!');
-    } else {
-      console.log('📝 Creating new rental services content...');
-      const result = await client.create(rentalContent);
-      console.log('✅ Rental services created successfully!');
-    }
+// Migration step for scripts/run-all-migrations.js
+module.exports = {
+  name: 'rental-services',
+  dependsOn: ['image-assets'],
+  documents: [rentalContent],
+};
 
-    console.log('\n✨ Migration complete!');
-  } catch (error) {
-    console.error('❌ Migration failed:', error);
-    process.exit(1);
-  }
+if (require.main === module) {
+  runStandalone(module.exports);
 }
-
-migrate();
@@ -0,0 +1,81 @@
+#!/usr/bin/env node
+/**
+ * Drive the outbound scheduler (lib/upstream-scheduler.js) against an
+ * Uplisting stand-in, without the Next server
+ *
+ * Usage: node scripts/rate-limit-check.mjs --url http://127.0.0.1:4102 [options]
+ *   --rate N          scheduler tokens per second (default 5)
+ *   --burst N         scheduler bucket size (default 10)
+ *   --browsing N      browsing calendar reads, all queued at once (default 60)
+ *   --critical N      critical calendar reads, one every --spacing-ms (default 10)
+ *   --spacing-ms N    gap between critical reads (default 200)
+ *   --property-base N first property ID to read (default 900000)
+ *   --api-key, --client-id   Uplisting credentials the stand-in expects
+ *
+ * Prints JSON: per lane the latency of each request and a count per outcome
+ * (HTTP status or error code), plus the scheduler snapshot at the end, so
+ * tests/harness (rate-limit --direct) can check the lanes against the
+ * stand-in's own 429 count.
+ */
+
+import { upstreamFetch } from '../lib/upstream-http.js';
+import { getScheduler } from '../lib/upstream-scheduler.js';
+
+function parseArgs(argv) {
+  const args = {
+    url: null, rate: 5, burst: 10, browsing: 60, critical: 10, spacingMs: 200,
+    propertyBase: 900000, apiKey: 'aGFybmVzczpoYXJuZXNz', clientId: 'harness-client',
+  };
+  for (let i = 0; i < argv.length; i++) {
+    switch (argv[i]) {
+      case '--url': args.url = argv[++i]; break;
+      case '--rate': args.rate = parseFloat(argv[++i]); break;
+      case '--burst': args.burst = parseInt(argv[++i], 10); break;
+      case '--browsing': args.browsing = parseInt(argv[++i], 10); break;
+      case '--critical': args.critical = parseInt(argv[++i], 10); break;
+      case '--spacing-ms': args.spacingMs = parseInt(argv[++i], 10); break;
+      case '--property-base': args.propertyBase = parseInt(argv[++i], 10); break;
+      case '--api-key': args.apiKey = argv[++i]; break;
+      case '--client-id': args.clientId = argv[++i]; break;
+      default: throw new Error(`Unknown option: ${argv[i]}`);
+    }
+  }
+  if (!args.url) throw new Error('--url is required');
+  return args;
+}
+
+const args = parseArgs(process.argv.slice(2));
+const scheduler = getScheduler('rate-limit-check', { ratePerSecond: args.rate, burst: args.burst });
+const headers = { Authorization: `Basic ${args.apiKey}`, 'X-Uplisting-Client-Id': args.clientId };
+const results = { browsing: [], critical: [] };
+
+async function read(lane, n) {
+  const startedAt = performance.now();
+  const path = `/calendar/${args.propertyBase + n}?from=2026-01-01&to=2026-01-15`;
+  let outcome;
+  try {
+    const response = await scheduler.schedule(lane, () => upstreamFetch(`${args.url}${path}`, { headers }));
+    await response.text();
+    outcome = String(response.status);
+  } catch (error) {
+    outcome = error.code || error.message;
+  }
+  results[lane].push({ outcome, ms: performance.now() - startedAt });
+}
+
+const sleep = ms => new Promise(resolve => setTimeout(resolve, ms));
+const pending = [];
+for (let i = 0; i < args.browsing; i++) pending.push(read('browsing', i));
+for (let i = 0; i < args.critical; i++) {
+  await sleep(args.spacingMs);
+  pending.push(read('critical', args.browsing + i));
+}
+await Promise.all(pending);
+
+const lanes = {};
+for (const [lane, requests] of Object.entries(results)) {
+  const outcomes = {};
+  for (const { outcome } of requests) outcomes[outcome] = (outcomes[outcome] || 0) + 1;
+  lanes[lane] = { outcomes, latenciesMs: requests.map(request => request.ms) };
+}
+process.stdout.write(JSON.stringify({ lanes, scheduler: scheduler.snapshot() }));
@@ -0,0 +1,90 @@
+/**
+ * Time module loading in a Node process (preload with --require)
+ *
+ * Usage: REQUIRE_TIMINGS_FILE=/tmp/timings.json \
+ *          NODE_OPTIONS="--require ./scripts/require-timings.cjs" node .next/standalone/server.js
+ *
+ * Every require() that loads a module (not a cache hit, not a builtin) is
+ * timed; the file is rewritten a few times a second and on exit with
+ *   { pid, listeningAt, firstRequestAt, records: [{ file, at, inclusiveMs, selfMs, depth }] }
+ * Times are milliseconds since the process started (performance.now()).
+ * selfMs excludes the nested requires, so summing it never double counts.
+ * listeningAt and firstRequestAt mark when the HTTP server started listening
+ * and received its first request, so tests/harness (cold-start) can tell
+ * start-up loading from what the first request of a route loads.
+ *
+ * Modules loaded with import() bypass require() and aren't timed; in the
+ * Next.js server bundle that only concerns external ESM-only packages.
+ */
+
+const fs = require('fs');
+const http = require('http');
+const Module = require('module');
+const path = require('path');
+const { performance } = require('perf_hooks');
+
+const FILE = process.env.REQUIRE_TIMINGS_FILE;
+
+if (FILE) {
+  const records = [];
+  const stack = [];
+  const marks = { listeningAt: null, firstRequestAt: null };
+  let dirty = false;
+
+  const round = value => Math.round(value * 1000) / 1000;
+
+  const originalLoad = Module._load;
+  Module._load = function timedLoad(request, parent, isMain) {
+    let filename;
+    try {
+      filename = Module._resolveFilename(request, parent, isMain);
+    } catch {
+      return originalLoad.apply(this, arguments);
+    }
+    if (!path.isAbsolute(filename) || Module._cache[filename]) {
+      return originalLoad.apply(this, arguments);
+    }
+
+    const frame = { nestedMs: 0 };
+    stack.push(frame);
+    const startedAt = performance.now();
+    try {
+      return originalLoad.apply(this, arguments);
+    } finally {
+      const inclusiveMs = performance.now() - startedAt;
+      stack.pop();
+      if (stack.length) stack[stack.length - 1].nestedMs += inclusiveMs;
+      records.push({
+        file: filename,
+        at: round(startedAt),
+        inclusiveMs: round(inclusiveMs),
+        selfMs: round(inclusiveMs - frame.nestedMs),
+        depth: stack.length,
+      });
+      dirty = true;
+    }
+  };
+
+  const originalEmit = http.Server.prototype.emit;
+  http.Server.prototype.emit = function markedEmit(event) {
+    if (event === 'listening' && marks.listeningAt === null) {
+      marks.listeningAt = round(performance.now());
+      dirty = true;
+    } else if (event === 'request' && marks.firstRequestAt === null) {
+      marks.firstRequestAt = round(performance.now());
+      dirty = true;
+    }
+    return originalEmit.apply(this, arguments);
+  };
+
+  const flush = () => {
+    if (!dirty) return;
+    dirty = false;
+    // Write then rename, so a reader never sees half a file
+    fs.writeFileSync(`${FILE}.tmp`, JSON.stringify({ pid: process.pid, ...marks, records }));
+    fs.renameSync(`${FILE}.tmp`, FILE);
+  };
+
+  setInterval(flush, 200).unref();
+  process.on('exit', flush);
+}
@@ -1,25 +1,89 @@
-const { execSync } = require('child_process');
-
-const migrations = [
-  'migrate-homepage.js',
-  'migrate-contact.js',
-  'migrate-cleaning-services.js',
-  'migrate-rental-services.js',
-  'migrate-jobs.js',
-  'migrate-legal.js'
+#!/usr/bin/env node
+/**
+ * Run all page migrations in one process
+ *
+ * Steps declare their dependencies (see each migrate-*.js); independent
+ * pages are migrated concurrently on one shared Sanity client, and each
+ * page is written in a single transaction.
+ *
+ * Usage: node scripts/run-all-migrations.js [options]
+ *   --dry-run          validate every transaction without applying it
+ *   --concurrency N    steps in flight (default: all independent steps)
+ *   --only a,b         run only these steps (and what they depend on)
+ */
+
+require('dotenv').config({ path: '.env' });
+const { runMigrations, printReport } = require('./lib/migration-runner');
+
+const pages = [
+  require('./migrate-homepage'),
+  require('./migrate-contact'),
+  require('./migrate-cleaning-services'),
+  require('./migrate-rental-services'),
+  require('./migrate-jobs'),
+  require('./migrate-legal'),
 ];
 
-console.log('🚀 Running all migrations...\n');
+function collectImageRefs(value, refs = new Set()) {
+  if (Array.isArray(value)) {
+    value.forEach(item => collectImageRefs(item, refs));
+  } else if (value && typeof value === 'object') {
+    if (typeof value._ref === 'string' && value._ref.startsWith('image-')) refs.add(value._ref);
+    Object.values(value).forEach(item => collectImageRefs(item, refs));
+  }
+  return refs;
+}
+
+// Pages referencing image assets wait for this check, so no page is written with a dangling image
+const imageAssets = {
+  name: 'image-assets',
+  dependsOn: [],
+  async run({ client, steps }) {
+    const refs = [...collectImageRefs(steps.map(step => step.documents || []))];
+    const found = new Set(await client.fetch('*[_id in $ids]._id', { ids: refs }));
+    const missing = refs.filter(ref => !found.has(ref));
+    if (missing.length > 0) {
+      throw new Error(`Missing image assets: ${missing.join(', ')}`);
+    }
+    return { checked: refs.length };
+  },
+};
+
+function parseArgs(argv) {
+  const args = { dryRun: false, concurrency: undefined, only: undefined };
+  for (let i = 0; i < argv.length; i++) {
+    switch (argv[i]) {
+      case '--dry-run': args.dryRun = true; break;
+      case '--concurrency': args.concurrency = parseInt(argv[++i], 10); break;
+      case '--only': args.only = argv[++i].split(','); break;
+      default: throw new Error(`Unknown option: ${argv[i]}`);
+    }
+  }
+  return args;
+}
+
+async function main() {
+  const args = parseArgs(process.argv.slice(2));
+  console.log(`🚀 Running all migrations${args.dryRun ? ' (dry run)' : ''}...\n`);
+
+  const report = await runMigrations([imageAssets, ...pages], {
+    ...args,
+    onStep: (result) => {
+      const icon = { success: '✅', failed: '❌', skipped: '⏭️ ' }[result.status];
+      console.log(`${icon} ${result.name} ${result.status}${result.error ? `: ${result.error}` : ''}`);
+    },
+  });
+
+  printReport(report);
 
-for (const migration of migrations) {
-  try {
-    console.log(`➡️ Running ${migration}...`);
-    execSync(`node scripts/${migration}`, { stdio: 'inherit', cwd: '/app' });
-    console.log(`\n`);
-  } catch (error) {
-    console.error(`❌ Failed to run ${migration}`);
+  if (!report.success) {
+    console.error('\n❌ Some migrations did not complete');
     process.exit(1);
   }
+  console.log('\n✨ All migrations completed successfully!\n');
 }
 
-console.log('✨ All migrations completed successfully!\n');
+main().catch((error) => {
+  console.error('❌ Failed to run migrations:', error);
+  process.exit(1);
+});
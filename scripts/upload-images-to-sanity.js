@@ -1,13 +1,9 @@
-const { createClient } = require('@sanity/client');
 require('dotenv').config({ path: '.env' });
+const path = require('path');
+const { migrateImages } = require('./lib/image-migration');
 
-const client = createClient({
-  projectId: process.env.NEXT_PUBLIC_SANITY_PROJECT_ID || 'vrhdu6hl',
-  dataset: process.env.NEXT_PUBLIC_SANITY_DATASET || 'production',
-  token: process.env.SANITY_API_TOKEN,
-  apiVersion: '2024-01-01',
-  useCdn: false,
-});
+// Shares the mapping (and its content-hash dedupe) with migrate-all-images-to-sanity.js
+const mappingPath = path.join(__dirname, 'sanity-image-mapping.json');
 
 // Images to upload
 const imagesToUpload = [
@@ -28,45 +24,41 @@ const imagesToUpload = [
   }
 ];
 
-async function uploadImageToSanity(imageUrl, imageName, altText) {
-  try {
-    console.log(`📥 Downloading ${imageName}...`);
-    const response = await fetch(imageUrl);
-    const arrayBuffer = await response.arrayBuffer();
-    const buffer = Buffer.from(arrayBuffer);
-    
-    console.log(`⬆️  Uploading ${imageName} to Sanity...`);
-    const asset = await client.assets.upload('image', buffer, {
-      filename: `${imageName}.jpg`,
-    });
-    
-    console.log(`✅ Uploaded ${imageName}: ${asset._id}`);
-    return {
-      _type: 'image',
-      asset: {
-        _type: 'reference',
-        _ref: asset._id
-      },
-      alt: altText
-    };
-  } catch (error) {
-    console.error(`❌ Failed to upload ${imageName}:`, error);
-    return null;
-  }
-}
-
 async function uploadAllImages() {
   console.log('🚀 Starting image upload to Sanity CDN...\n');
   
-  const uploadedImages = {};
+  const stats = await migrateImages({
+    manifestPath: mappingPath,
+    images: imagesToUpload.map(img => ({ id: img.name, originalUrl: img.url, description: img.alt })),
+    onProgress: (image, outcome) => {
+      if (outcome === 'failed') {
+        console.error(`❌ Failed to upload ${image.id}: ${image.error}`);
+      } else {
+        console.log(`✅ ${outcome === 'uploaded' ? 'Uploaded' : 'Reused'} ${image.id}: ${image.sanityAssetId}`);
+      }
+    },
+  });
   
+  const { images } = require(mappingPath);
+  const uploadedImages = {};
   for (const img of imagesToUpload) {
-    const result = await uploadImageToSanity(img.url, img.name, img.alt);
-    if (result) {
-      uploadedImages[img.name] = result;
+    const entry = images.find(image => image.id === img.name);
+    if (entry?.sanityAssetId && entry.status !== 'failed') {
+      uploadedImages[img.name] = {
+        _type: 'image',
+        asset: {
+          _type: 'reference',
+          _ref: entry.sanityAssetId
+        },
+        alt: img.alt
+      };
     }
   }
   
+  if (stats.failed > 0) {
+    throw new Error(`${stats.failed} image(s) failed to upload`);
+  }
+  
   console.log('\n✨ All images uploaded successfully!');
   console.log('\nUploaded Image References:');
   console.log(JSON.stringify(uploadedImages, null, 2));
@@ -0,0 +1,13 @@
+"""
+Local performance and fault-injection harness.
+
+Runs the Next.js API against local stand-ins for the external services
+(Google reCAPTCHA, Uplisting, Stripe, Sanity, Resend) so load tests and
+benchmarks can run offline and reproducibly.
+
+    python -m tests.harness standins          # run every stand-in in the foreground
+    python -m tests.harness <scenario> --help # scenario options
+
+The server under test must be started with the environment printed by
+`python -m tests.harness env` so its upstream URLs point at the stand-ins.
+"""
@@ -0,0 +1,85 @@
+"""Command-line entry point: python -m tests.harness <scenario> [options]"""
+
+import argparse
+import importlib
+import sys
+import time
+
+from . import cassettes, config
+from .standins import STANDINS
+
+SCENARIOS = [
+    "recaptcha",
+    "image-variants",
+    "property-views",
+    "conditional-get",
+    "sanity-migration",
+    "pricing-fuzz",
+    "pricing-kernel",
+    "price-matrix",
+    "constraint-index",
+    "thundering-herd",
+    "upstream-pool",
+    "rate-limit",
+    "calendar-warmer",
+    "calendar-invalidation",
+    "calendar-format",
+    "snapshot-restart",
+    "webhook-replay",
+    "booking-holds",
+    "reconcile",
+    "cold-start",
+    "profile",
+    "soak",
+]
+
+
+def run_standins(args):
+    running = [cls().start() for cls in STANDINS.values()]
+    for standin in running:
+        print(f"🧪 {standin.name} stand-in on {standin.url}")
+    print("\nStart the server with:")
+    for key, value in config.server_env().items():
+        print(f"  {key}={value}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for standin in running:
+            standin.stop()
+    return 0
+
+
+def print_env(args):
+    for key, value in config.server_env().items():
+        print(f"{key}={value}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m tests.harness", description=__doc__)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("standins", help="run every stand-in until interrupted").set_defaults(func=run_standins)
+    subparsers.add_parser("env", help="print the server environment for the stand-ins").set_defaults(func=print_env)
+    record = subparsers.add_parser("record", help="proxy to the real APIs, recording a cassette")
+    cassettes.add_arguments(record, replay=False)
+    record.set_defaults(func=cassettes.run_record)
+    replay = subparsers.add_parser("replay", help="serve a recorded cassette from the stand-in ports")
+    cassettes.add_arguments(replay, replay=True)
+    replay.set_defaults(func=cassettes.run_replay)
+
+    for name in SCENARIOS:
+        module = importlib.import_module(f".scenarios.{name.replace('-', '_')}", __package__)
+        sub = subparsers.add_parser(name, help=module.DESCRIPTION)
+        module.add_arguments(sub)
+        sub.set_defaults(func=module.run)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
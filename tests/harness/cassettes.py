@@ -0,0 +1,261 @@
+"""
+Record upstream exchanges into cassettes and replay them from the stand-ins.
+
+    python -m tests.harness record --cassette DIR   # proxy to the real APIs, recording
+    python -m tests.harness replay --cassette DIR   # serve the recording instead
+
+Both run until interrupted, on the stand-in ports (config.PORTS), and print
+the server environment that points Uplisting, Stripe, Sanity and Resend at
+them. Record with a server that has real credentials. The recording proxy
+forwards each request as it is, and appends one JSON line per exchange to
+DIR/<service>.jsonl: method, path, query, a digest of the request body, and
+the status, headers, body and latency of the response. Request headers are
+never written, but response bodies are: cassettes recorded against live
+accounts hold live data, which is why DIR defaults to the git-ignored
+tests/harness/cassettes/.
+
+A replayed request is answered, in recording order, by the next exchange
+with the same method, path, query and body. Failing that, the same method,
+path and query. Failing that, the same method and path, which covers
+scenarios that move their dates with the calendar. What the recording never
+saw gets a 404 and is counted as missing. --timing original sleeps each
+exchange's recorded latency, to reproduce a performance run; --timing none
+answers at once, for fast functional runs. Scenarios use the replaying
+stand-ins with --external-standin.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from . import config
+from .load import session
+from .standins import Response, StandIn
+
+DEFAULT_DIR = Path(__file__).resolve().parent / "cassettes"
+SERVICES = ("uplisting", "stripe", "sanity", "resend")
+
+# Hop-by-hop or rewritten by the stand-in's own HTTP server
+SKIPPED_REQUEST_HEADERS = {"host", "content-length", "connection", "accept-encoding", "transfer-encoding"}
+KEPT_RESPONSE_HEADERS = {"content-type", "retry-after", "etag", "request-id", "x-ratelimit-limit",
+                         "x-ratelimit-remaining", "x-ratelimit-reset", "ratelimit-limit", "ratelimit-remaining",
+                         "ratelimit-reset"}
+
+
+def upstream_url(service):
+    """Real API origin for a service; HARNESS_UPSTREAM_<SERVICE> overrides it"""
+    override = os.environ.get(f"HARNESS_UPSTREAM_{service.upper()}")
+    if override:
+        return override.rstrip("/")
+    if service == "sanity":
+        project = os.environ.get("NEXT_PUBLIC_SANITY_PROJECT_ID")
+        return f"https://{project}.api.sanity.io" if project else None
+    return {
+        "uplisting": "https://connect.uplisting.io",
+        "stripe": "https://api.stripe.com",
+        "resend": "https://api.resend.com",
+    }[service]
+
+
+def cassette_env(services=SERVICES):
+    """Server environment for the recording proxies or replaying stand-ins"""
+    env = {
+        "uplisting": {"UPLISTING_API_URL": config.standin_url("uplisting")},
+        "stripe": {"STRIPE_API_BASE": config.standin_url("stripe")},
+        "sanity": {"SANITY_API_HOST": config.standin_url("sanity")},
+        "resend": {"RESEND_BASE_URL": config.standin_url("resend"), "EMAIL_PROVIDER": "resend"},
+    }
+    return {key: value for service in services for key, value in env[service].items()}
+
+
+def request_key(method, raw_path):
+    parts = urlsplit(raw_path)
+    return method, parts.path, urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+
+
+def body_digest(body):
+    return hashlib.sha256(body or b"").hexdigest()[:16]
+
+
+class RecordingProxy(StandIn):
+    """Forwards every request to the real API and appends the exchange to the cassette"""
+
+    def __init__(self, service, upstream, path, **kwargs):
+        self.name = service
+        self.upstream = upstream
+        self.path = Path(path)
+        self.started = time.monotonic()
+        self.recorded = 0
+        self.write_lock = threading.Lock()
+        super().__init__(**kwargs)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.handle = open(self.path, "a")
+
+    def dispatch(self, method, raw_path, headers, body):
+        if raw_path.startswith("/__harness"):
+            return super().dispatch(method, raw_path, headers, body)
+        forwarded = {k: v for k, v in headers.items() if k.lower() not in SKIPPED_REQUEST_HEADERS}
+        started = time.perf_counter()
+        try:
+            upstream = session().request(method, f"{self.upstream}{raw_path}", headers=forwarded, data=body or None,
+                                         timeout=60, allow_redirects=False)
+        except Exception as error:
+            self.count("upstream_errors")
+            return Response(502, {"error": f"recording proxy: {error}"})
+        latency_ms = (time.perf_counter() - started) * 1000
+
+        _, path, query = request_key(method, raw_path)
+        kept = {k: v for k, v in upstream.headers.items() if k.lower() in KEPT_RESPONSE_HEADERS}
+        exchange = {"at_ms": round((time.monotonic() - self.started) * 1000, 1), "method": method, "path": path,
+                    "query": query, "body_sha256": body_digest(body), "status": upstream.status_code,
+                    "headers": kept, "latency_ms": round(latency_ms, 1)}
+        try:
+            exchange["body"] = upstream.content.decode("utf-8")
+        except UnicodeDecodeError:
+            exchange["body_b64"] = base64.b64encode(upstream.content).decode("ascii")
+        with self.write_lock:
+            self.handle.write(json.dumps(exchange) + "\n")
+            self.handle.flush()
+            self.recorded += 1
+        self.count(f"{method} {path}")
+        return Response(upstream.status_code, raw=upstream.content, headers=kept)
+
+    def stop(self):
+        super().stop()
+        self.handle.close()
+
+
+class CassetteStandIn(StandIn):
+    """Answers from a recorded cassette, with or without the recorded latency"""
+
+    def __init__(self, service, path, timing="none", **kwargs):
+        self.name = service
+        self.timing = timing
+        self.matches = Counter()
+        self.missing = Counter()
+        self.exact, self.by_query, self.by_path = {}, {}, {}
+        with open(path) as handle:
+            for line in handle:
+                if not line.strip():
+                    continue
+                exchange = json.loads(line)
+                key = (exchange["method"], exchange["path"], exchange["query"])
+                self.exact.setdefault(key + (exchange["body_sha256"],), []).append(exchange)
+                self.by_query.setdefault(key, []).append(exchange)
+                self.by_path.setdefault(key[:2], []).append(exchange)
+        # Position per list; the last exchange answers once a list is used up
+        self.cursors = Counter()
+        super().__init__(**kwargs)
+
+    def next_exchange(self, method, raw_path, body):
+        key = request_key(method, raw_path)
+        for kind, table, lookup in (("exact", self.exact, key + (body_digest(body),)),
+                                    ("query", self.by_query, key), ("path", self.by_path, key[:2])):
+            exchanges = table.get(lookup)
+            if exchanges:
+                with self.lock:
+                    index = min(self.cursors[(kind, lookup)], len(exchanges) - 1)
+                    self.cursors[(kind, lookup)] += 1
+                    self.matches[kind] += 1
+                return exchanges[index]
+        with self.lock:
+            self.missing[f"{method} {key[1]}"] += 1
+        return None
+
+    def dispatch(self, method, raw_path, headers, body):
+        if raw_path.startswith("/__harness"):
+            return super().dispatch(method, raw_path, headers, body)
+        exchange = self.next_exchange(method, raw_path, body)
+        if exchange is None:
+            return Response(404, {"error": f"{method} {raw_path} is not in the {self.name} cassette"})
+        self.count(f"{method} {exchange['path']}")
+        if self.timing == "original":
+            time.sleep(exchange["latency_ms"] / 1000)
+        payload = (base64.b64decode(exchange["body_b64"]) if "body_b64" in exchange
+                   else exchange["body"].encode("utf-8"))
+        return Response(exchange["status"], raw=payload, headers=exchange["headers"])
+
+    def stats(self):
+        stats = super().stats()
+        with self.lock:
+            stats.update(matches=dict(self.matches), missing=dict(self.missing))
+        return stats
+
+
+def add_arguments(parser, replay):
+    parser.add_argument("--cassette", required=True,
+                        help="cassette directory, or a name under tests/harness/cassettes/")
+    parser.add_argument("--services", nargs="*", default=list(SERVICES), choices=SERVICES)
+    if replay:
+        parser.add_argument("--timing", choices=["original", "none"], default="none",
+                            help="sleep each recorded latency, or answer at once")
+
+
+def cassette_dir(name):
+    path = Path(name)
+    return path if path.is_absolute() or path.exists() or "/" in name else DEFAULT_DIR / name
+
+
+def serve(standins, env):
+    for standin in standins:
+        print(f"🧪 {standin.name} on {standin.url}")
+    print("\nStart the server with:")
+    for key, value in env.items():
+        print(f"  {key}={value}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for standin in standins:
+            standin.stop()
+
+
+def run_record(args):
+    directory = cassette_dir(args.cassette)
+    proxies = []
+    for service in args.services:
+        upstream = upstream_url(service)
+        if not upstream:
+            print(f"⚠️  not recording {service}: set NEXT_PUBLIC_SANITY_PROJECT_ID or HARNESS_UPSTREAM_SANITY")
+            continue
+        proxies.append(RecordingProxy(service, upstream, directory / f"{service}.jsonl").start())
+        print(f"🔴 {service}: {upstream} -> {directory / f'{service}.jsonl'}")
+    # Credentials stay the server's own: only the API locations change
+    serve(proxies, cassette_env([proxy.name for proxy in proxies]))
+    for proxy in proxies:
+        print(f"📼 {proxy.name}: {proxy.recorded} exchange(s) recorded")
+    return 0
+
+
+def run_replay(args):
+    directory = cassette_dir(args.cassette)
+    standins = []
+    for service in args.services:
+        path = directory / f"{service}.jsonl"
+        if path.exists():
+            standins.append(CassetteStandIn(service, path, timing=args.timing).start())
+        elif args.services != list(SERVICES):
+            print(f"❌ no {service} cassette in {directory}")
+            return 1
+    if not standins:
+        print(f"❌ no cassettes in {directory}")
+        return 1
+    env = cassette_env([standin.name for standin in standins])
+    if "resend" in env.get("EMAIL_PROVIDER", ""):
+        env["RESEND_API_KEY"] = "re_harness"
+    serve(standins, {**config.server_env(), **env})
+    problems = 0
+    for standin in standins:
+        stats = standin.stats()
+        print(f"📼 {standin.name}: {dict(stats['matches']) or 'no requests'}"
+              + (f", missing {stats['missing']}" if stats["missing"] else ""))
+        problems += sum(stats["missing"].values())
+    return 0 if not problems else 1
@@ -0,0 +1,57 @@
+"""Harness configuration: server URL, stand-in ports and server environment."""
+
+import os
+
+BASE_URL = os.environ.get("HARNESS_BASE_URL", "http://localhost:3000")
+API_BASE = f"{BASE_URL}/api"
+
+STANDIN_HOST = os.environ.get("HARNESS_STANDIN_HOST", "127.0.0.1")
+
+# Fixed ports so a server started once can be reused across harness runs
+PORTS = {
+    "recaptcha": int(os.environ.get("HARNESS_RECAPTCHA_PORT", "4101")),
+    "uplisting": int(os.environ.get("HARNESS_UPLISTING_PORT", "4102")),
+    "stripe": int(os.environ.get("HARNESS_STRIPE_PORT", "4103")),
+    "sanity": int(os.environ.get("HARNESS_SANITY_PORT", "4104")),
+    "resend": int(os.environ.get("HARNESS_RESEND_PORT", "4105")),
+}
+
+RECAPTCHA_SECRET = "harness-recaptcha-secret"
+STRIPE_SECRET = "sk_test_harness"
+STRIPE_WEBHOOK_SECRET = "whsec_harness"
+UPLISTING_WEBHOOK_SECRET = "harness-uplisting-webhook-secret"
+
+# Bookings are stored in a real MongoDB; the harness uses its own database
+MONGO_URL = os.environ.get("HARNESS_MONGO_URL", "mongodb://127.0.0.1:27017")
+MONGO_DB_NAME = os.environ.get("HARNESS_MONGO_DB", "swissalpine_harness")
+
+
+# How scenarios that restart the server launch it (after `next build`); PORT is set per run
+SERVER_COMMAND = os.environ.get("HARNESS_SERVER_COMMAND", "node .next/standalone/server.js").split()
+
+
+def standin_url(name):
+    return f"http://{STANDIN_HOST}:{PORTS[name]}"
+
+
+def server_env():
+    """Environment the Next.js server needs to talk to the stand-ins"""
+    return {
+        "RECAPTCHA_VERIFY_URL": f"{standin_url('recaptcha')}/recaptcha/api/siteverify",
+        "RECAPTCHA_SECRET_KEY": RECAPTCHA_SECRET,
+        "UPLISTING_API_URL": standin_url("uplisting"),
+        "UPLISTING_API_KEY": "aGFybmVzczpoYXJuZXNz",
+        "UPLISTING_CLIENT_ID": "harness-client",
+        "UPLISTING_WEBHOOK_SECRET": UPLISTING_WEBHOOK_SECRET,
+        "NEXT_PUBLIC_BASE_URL": BASE_URL,
+        "NEXT_PUBLIC_STRIPE_PUBLISHABLE_KEY": "pk_test_harness",
+        "STRIPE_SECRET_KEY": STRIPE_SECRET,
+        "STRIPE_API_BASE": standin_url("stripe"),
+        "STRIPE_WEBHOOK_SECRET": STRIPE_WEBHOOK_SECRET,
+        "MONGO_URL": MONGO_URL,
+        "MONGO_DB_NAME": MONGO_DB_NAME,
+        "EMAIL_PROVIDER": "capture",
+        "EMAIL_CAPTURE_FILE": os.environ.get("EMAIL_CAPTURE_FILE", "/tmp/email-capture.jsonl"),
+        "ENABLE_TEST_EMAIL_ENDPOINT": "true",
+        "ENABLE_DIAGNOSTICS": "true",
+    }
@@ -0,0 +1,236 @@
+"""
+Deterministic Uplisting fixture data shaped like the real JSON:API payloads.
+
+Property ids match the production listings so the primary-image
+configuration in lib/property-config.js applies to the fixtures too.
+"""
+
+import random
+from datetime import date, timedelta
+
+PROPERTY_IDS = ["84656", "174947", "186289"]
+
+PROPERTY_PROFILES = {
+    "84656": {"name": "Sunny Alps View: Central Bliss", "base_rate": 180, "capacity": 5, "bedrooms": 2,
+              "guests_included": 4, "extra_guest": 30, "cleaning": 169, "min_stay": 2},
+    "174947": {"name": "Chalet Matterhorn Panorama", "base_rate": 240, "capacity": 6, "bedrooms": 3,
+               "guests_included": 4, "extra_guest": 35, "cleaning": 190, "min_stay": 2},
+    "186289": {"name": "Grächen Family Retreat", "base_rate": 320, "capacity": 8, "bedrooms": 4,
+               "guests_included": 6, "extra_guest": 40, "cleaning": 220, "min_stay": 3},
+}
+
+# Handles of the configured primary images (see PRIMARY_IMAGES)
+PRIMARY_HANDLES = {
+    "84656": "P8zGn2yTiq7FL6P1yctj",
+    "186289": "wURZa6mSQ6di77fLopiq",
+    "174947": "G1TCaC2UThunMnKsTuuz",
+}
+
+# Ids from here on are generated "fuzz" properties with randomized fees and taxes
+FUZZ_PROPERTY_BASE = 900000
+
+TAX_LABELS = ["per_booking_percentage", "per_booking_amount", "per_night", "per_person_per_night"]
+TAX_NAMES = {
+    "per_booking_percentage": "Per booking percentage",
+    "per_booking_amount": "Per booking amount",
+    "per_night": "Per night",
+    "per_person_per_night": "Per person per night",
+}
+TAX_PER = {
+    "per_booking_percentage": "booking",
+    "per_booking_amount": "booking",
+    "per_night": "night",
+    "per_person_per_night": "person_per_night",
+}
+# The tax type lib/pricing-calculator.js requires for each label
+TAX_TYPES = {label: "percentage" if label == "per_booking_percentage" else "fixed" for label in TAX_LABELS}
+
+PHOTOS_PER_PROPERTY = 24
+AMENITIES = ["Wifi", "Kitchen", "Washing machine", "Balcony", "Parking", "Ski storage",
+             "Mountain view", "Dishwasher", "Fireplace", "Heating", "TV", "Coffee maker"]
+
+
+def is_known_property(property_id):
+    return property_id in PROPERTY_PROFILES or (property_id.isdigit() and int(property_id) >= FUZZ_PROPERTY_BASE)
+
+
+def profile_for(property_id):
+    if property_id in PROPERTY_PROFILES:
+        return PROPERTY_PROFILES[property_id]
+    rng = random.Random(f"profile-{property_id}")
+    capacity = rng.randint(2, 12)
+    return {
+        "name": f"Fuzz property {property_id}", "base_rate": rng.randint(90, 600), "capacity": capacity,
+        "bedrooms": max(1, capacity // 2), "guests_included": rng.randint(0, capacity),
+        "extra_guest": round(rng.uniform(5, 60), rng.choice([0, 1, 2])),
+        "cleaning": round(rng.uniform(40, 300), rng.choice([0, 2])), "min_stay": rng.randint(1, 3),
+    }
+
+
+def fee_tax_plan(property_id):
+    """
+    Fees and taxes of a property as plain values, in the order the API lists them.
+
+    Production ids get the fixed configuration of the real listings. Fuzz ids
+    get randomized ones: disabled extra-guest charges, missing or zero-amount
+    taxes, taxes whose type does not match their label, and shuffled order.
+    """
+    profile = profile_for(property_id)
+    if property_id in PROPERTY_PROFILES:
+        return {
+            "cleaning": profile["cleaning"],
+            "extra_guest_enabled": True,
+            "extra_guest": profile["extra_guest"],
+            "guests_included": profile["guests_included"],
+            "taxes": [
+                {"label": "per_booking_percentage", "type": "percentage", "amount": 3.8},
+                {"label": "per_person_per_night", "type": "fixed", "amount": 3},
+                {"label": "per_booking_amount", "type": "fixed", "amount": 0},
+                {"label": "per_night", "type": "fixed", "amount": 0},
+            ],
+        }
+
+    rng = random.Random(f"plan-{property_id}")
+    taxes = []
+    for label in TAX_LABELS:
+        if rng.random() < 0.2:
+            continue
+        tax_type = TAX_TYPES[label] if rng.random() < 0.85 else rng.choice(["percentage", "fixed"])
+        if rng.random() < 0.15:
+            amount = 0
+        elif label == "per_booking_percentage":
+            amount = round(rng.uniform(0.5, 12.5), rng.choice([1, 2]))
+        else:
+            amount = round(rng.uniform(0.5, 10), rng.choice([0, 2]))
+        taxes.append({"label": label, "type": tax_type, "amount": amount})
+    rng.shuffle(taxes)
+    return {
+        "cleaning": profile["cleaning"],
+        "extra_guest_enabled": rng.random() < 0.8,
+        "extra_guest": profile["extra_guest"],
+        "guests_included": profile["guests_included"],
+        "taxes": taxes,
+    }
+
+
+def _handle(rng):
+    alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+    return "".join(rng.choice(alphabet) for _ in range(20))
+
+
+def build_property(property_id):
+    """Return (resource, included) for one property"""
+    rng = random.Random(int(property_id))
+    profile = profile_for(property_id)
+    included = []
+
+    address_id = f"{property_id}-address"
+    included.append({"id": address_id, "type": "addresses", "attributes": {
+        "street": f"Dorfstrasse {rng.randint(1, 80)}", "city": "Grächen", "state": "Valais",
+        "zip_code": "3925", "country": "Switzerland",
+    }})
+
+    photo_refs = []
+    handles = [_handle(rng) for _ in range(PHOTOS_PER_PROPERTY)]
+    # The primary image lives somewhere in the middle, as in production
+    if property_id in PRIMARY_HANDLES:
+        handles[PHOTOS_PER_PROPERTY // 2] = PRIMARY_HANDLES[property_id]
+    for index, handle in enumerate(handles):
+        photo_id = f"{property_id}-photo-{index}"
+        photo_refs.append({"id": photo_id, "type": "photos"})
+        url = f"https://cdn.filestackcontent.com/{handle}"
+        if handle == PRIMARY_HANDLES.get(property_id):
+            url = f"https://cdn.filestackcontent.com/resize=width:1200,fit:max/quality=value:80/compress/{handle}"
+        included.append({"id": photo_id, "type": "photos", "attributes": {
+            "url": url, "description": f"{profile['name']} photo {index + 1}", "position": index,
+        }})
+
+    amenity_refs = []
+    for index, name in enumerate(AMENITIES):
+        amenity_id = f"{property_id}-amenity-{index}"
+        amenity_refs.append({"id": amenity_id, "type": "amenities"})
+        included.append({"id": amenity_id, "type": "amenities", "attributes": {"name": name, "key": name.lower()}})
+
+    plan = fee_tax_plan(property_id)
+    included.extend([
+        {"id": f"{property_id}-cleaning_fee", "type": "property_fees", "attributes": {
+            "name": "Cleaning fee", "label": "cleaning_fee", "enabled": True, "amount": plan["cleaning"]}},
+        {"id": f"{property_id}-extra_guest_charge", "type": "property_fees", "attributes": {
+            "name": "Extra guest charge", "label": "extra_guest_charge", "enabled": plan["extra_guest_enabled"],
+            "amount": plan["extra_guest"], "guests_included": plan["guests_included"]}},
+    ])
+    for index, tax in enumerate(plan["taxes"], start=1):
+        included.append({"id": f"{property_id}-tax-{index}", "type": "property_taxes", "attributes": {
+            "name": TAX_NAMES[tax["label"]], "label": tax["label"], "type": tax["type"],
+            "per": TAX_PER[tax["label"]], "amount": tax["amount"]}})
+
+    description = " ".join(
+        f"{profile['name']} offers a bright alpine living space with views over the Mischabel range."
+        for _ in range(6)
+    )
+    resource = {
+        "id": property_id,
+        "type": "properties",
+        "attributes": {
+            "name": profile["name"],
+            "title": profile["name"],
+            "description": description,
+            "type": "apartment",
+            "currency": "CHF",
+            "maximum_capacity": profile["capacity"],
+            "bedrooms": profile["bedrooms"],
+            "beds": profile["bedrooms"] + 1,
+            "bed_types": ["double", "single"],
+            "bathrooms": max(1, profile["bedrooms"] - 1),
+            "check_in_time": 15,
+            "check_out_time": 10,
+            "minimum_length_of_stay": profile["min_stay"],
+            "uplisting_domain": "https://swissalpinejourney.uplisting.io",
+            "property_slug": profile["name"].lower().replace(" ", "-").replace(":", ""),
+            "updated_at": "2025-11-01T00:00:00Z",
+        },
+        "relationships": {
+            "address": {"data": {"id": address_id, "type": "addresses"}},
+            "photos": {"data": photo_refs},
+            "amenities": {"data": amenity_refs},
+        },
+    }
+    return resource, included
+
+
+def nightly_rate(property_id, day):
+    """Deterministic nightly rate: weekend and winter uplift plus per-day noise"""
+    profile = profile_for(property_id)
+    rng = random.Random(f"{property_id}-{day.isoformat()}")
+    rate = profile["base_rate"]
+    if day.weekday() in (4, 5):
+        rate *= 1.2
+    if day.month in (12, 1, 2):
+        rate *= 1.35
+    return round(rate + rng.randint(-15, 15), 2)
+
+
+def calendar_day(property_id, day, booked=False):
+    rng = random.Random(f"avail-{property_id}-{day.isoformat()}")
+    profile = profile_for(property_id)
+    return {
+        "date": day.isoformat(),
+        "day_rate": nightly_rate(property_id, day),
+        "available": not booked and rng.random() > 0.12,
+        "closed_for_arrival": day.weekday() == 6,
+        "closed_for_departure": False,
+        "minimum_length_of_stay": profile["min_stay"],
+        "maximum_available_nights": 28,
+        "currency": "CHF",
+    }
+
+
+def date_range(start, end):
+    day = start
+    while day <= end:
+        yield day
+        day += timedelta(days=1)
+
+
+def parse_date(value):
+    return date.fromisoformat(value)
@@ -0,0 +1,94 @@
+"""Concurrent load generation and latency statistics."""
+
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+_local = threading.local()
+
+
+def session():
+    """Per-thread keep-alive session, like a browser reusing its connection"""
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+    return _local.session
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class LoadResult:
+    def __init__(self, latencies_ms, errors, elapsed_s, outcomes):
+        self.latencies_ms = sorted(latencies_ms)
+        self.errors = errors
+        self.elapsed_s = elapsed_s
+        self.outcomes = outcomes
+
+    @property
+    def count(self):
+        return len(self.latencies_ms)
+
+    @property
+    def throughput(self):
+        return self.count / self.elapsed_s if self.elapsed_s else 0.0
+
+    def p(self, pct):
+        return percentile(self.latencies_ms, pct)
+
+    def summary(self):
+        return {
+            "requests": self.count,
+            "errors": self.errors,
+            "throughput_rps": round(self.throughput, 1),
+            "p50_ms": round(self.p(50), 1),
+            "p95_ms": round(self.p(95), 1),
+            "p99_ms": round(self.p(99), 1),
+            "max_ms": round(self.latencies_ms[-1], 1) if self.latencies_ms else 0.0,
+        }
+
+
+def run_load(task, total, concurrency):
+    """
+    Call task(i) for i in range(total) from `concurrency` threads.
+
+    task returns a truthy value on success (any value is kept in outcomes) and
+    may raise; exceptions are counted as errors.
+    """
+    latencies = []
+    outcomes = []
+    errors = 0
+    lock = threading.Lock()
+
+    def timed(i):
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            outcome = task(i)
+            ok = bool(outcome)
+        except Exception as e:
+            outcome, ok = e, False
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            latencies.append(elapsed)
+            outcomes.append(outcome)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(timed, range(total)))
+    return LoadResult(latencies, errors, time.perf_counter() - started, outcomes)
+
+
+def print_summary(title, result):
+    s = result.summary()
+    print(f"📊 {title}")
+    print(f"   requests={s['requests']} errors={s['errors']} throughput={s['throughput_rps']} req/s")
+    print(f"   p50={s['p50_ms']}ms p95={s['p95_ms']}ms p99={s['p99_ms']}ms max={s['max_ms']}ms")
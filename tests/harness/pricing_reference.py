@@ -0,0 +1,163 @@
+"""
+NumPy reference implementation of lib/pricing-calculator.js.
+
+Mirrors the integer kernel (buildPricingPlan, quoteMinor and
+calculateBookingPrice): amounts are converted to centimes once and every
+total is computed in int64 centimes with the same rounding rules, so the
+expected totals match the JavaScript ones exactly. The vectorized functions
+take one array element per booking; `booking_price` is a plain scalar port
+used to cross-check the vectorized path.
+"""
+
+import math
+
+import numpy as np
+
+from .fixtures import TAX_LABELS, TAX_TYPES
+
+LABEL_INDEX = {label: index for index, label in enumerate(TAX_LABELS)}
+PERCENTAGE, BOOKING, NIGHT, PERSON_NIGHT = (LABEL_INDEX[label] for label in TAX_LABELS)
+NOT_APPLIED = -1
+# Percentage rates in millionths, as RATE_SCALE in the calculator
+RATE_SCALE = 1_000_000
+
+
+class PlanTable:
+    """Fee and tax plans (fixtures.fee_tax_plan) of many properties as arrays, in centimes"""
+
+    def __init__(self, plans):
+        slots = max([1] + [len(plan["taxes"]) for plan in plans])
+        self.extra_guest = np.array(
+            [to_minor(plan["extra_guest"] or 0) if plan["extra_guest_enabled"] else 0 for plan in plans],
+            dtype=np.int64,
+        )
+        self.guests_included = np.array(
+            [(plan["guests_included"] or 0) if plan["extra_guest_enabled"] else 0 for plan in plans],
+            dtype=np.int64,
+        )
+        # Per tax slot, in API order: the label index, or NOT_APPLIED when the
+        # calculator drops the tax (wrong type for its label, or amount <= 0).
+        # tax_amount holds centimes, or millionths for percentages.
+        self.tax_label = np.full((len(plans), slots), NOT_APPLIED, dtype=np.int8)
+        self.tax_amount = np.zeros((len(plans), slots), dtype=np.int64)
+        for row, plan in enumerate(plans):
+            for slot, tax in enumerate(plan["taxes"]):
+                if tax["type"] == TAX_TYPES[tax["label"]] and tax["amount"] > 0:
+                    self.tax_label[row, slot] = LABEL_INDEX[tax["label"]]
+                    self.tax_amount[row, slot] = tax_units(tax)
+
+
+def calculate_extra_guest_fee(total_guests, plan, table):
+    return np.maximum(0, total_guests - table.guests_included[plan]) * table.extra_guest[plan]
+
+
+def calculate_taxes(subtotal, nights, guests, plan, table):
+    """Return (centimes per tax slot, total tax); slots keep the API order"""
+    labels = table.tax_label[plan]
+    amounts = table.tax_amount[plan]
+    per_slot = np.zeros(labels.shape, dtype=np.int64)
+
+    for slot in range(labels.shape[1]):
+        label, amount = labels[:, slot], amounts[:, slot]
+        per_slot[:, slot] = np.select(
+            [label == PERCENTAGE, label == BOOKING, label == NIGHT, label == PERSON_NIGHT],
+            [divide_round_half_up(subtotal * amount, RATE_SCALE), amount, amount * nights, amount * guests * nights],
+            0,
+        )
+    return per_slot, per_slot.sum(axis=1)
+
+
+def calculate_booking_price(plan, accommodation_total, cleaning_fee, nights, adults, children, infants, table):
+    """Vectorized calculateBookingPrice; every argument is an array of equal length
+
+    Money fields are returned in CHF (centimes / 100, as the API reports
+    them); `minor` holds the same totals in centimes.
+    """
+    nights = nights.astype(np.int64)
+    total_guests = (adults + children + infants).astype(np.int64)
+    accommodation = to_minor(accommodation_total)
+    cleaning = to_minor(cleaning_fee)
+    extra_guest_fee = calculate_extra_guest_fee(total_guests, plan, table)
+    subtotal = accommodation + cleaning + extra_guest_fee
+    tax_slots, total_tax = calculate_taxes(subtotal, nights, total_guests, plan, table)
+    grand_total = subtotal + total_tax
+    minor = {
+        "accommodationTotal": accommodation,
+        "cleaningFee": cleaning,
+        "extraGuestFee": extra_guest_fee,
+        "subtotal": subtotal,
+        "totalTax": total_tax,
+        "grandTotal": grand_total,
+    }
+    return {
+        **{field: values / 100 for field, values in minor.items()},
+        "averagePerNight": accommodation_total / nights,
+        "taxSlots": tax_slots / 100,
+        "taxApplied": table.tax_label[plan] != NOT_APPLIED,
+        "stripeAmount": grand_total,
+        "minor": {**minor, "taxSlots": tax_slots},
+    }
+
+
+def js_round_array(values):
+    """Math.round: nearest integer, halves toward +infinity"""
+    values = np.asarray(values, dtype=np.float64)
+    floor = np.floor(values)
+    return (floor + (values - floor >= 0.5)).astype(np.int64)
+
+
+def to_minor(amount):
+    """toMinorUnits: nearest centime via thousandths, halves up"""
+    if np.ndim(amount) == 0:
+        return js_round(js_round(amount * 1000) / 10)
+    return js_round_array(js_round_array(np.asarray(amount, dtype=np.float64) * 1000) / 10)
+
+
+def tax_units(tax):
+    """Centimes for fixed taxes, millionths for percentages"""
+    if tax["label"] == "per_booking_percentage":
+        return js_round(tax["amount"] * (RATE_SCALE / 100))
+    return to_minor(tax["amount"])
+
+
+def divide_round_half_up(numerator, denominator):
+    """Integer division of non-negative integers, halves up"""
+    return (numerator * 2 + denominator) // (denominator * 2)
+
+
+def booking_price(plan, accommodation_total, cleaning_fee, nights, adults, children, infants):
+    """Scalar port of calculateBookingPrice for a single fixtures.fee_tax_plan, in centimes"""
+    total_guests = adults + children + infants
+
+    extra_guest_fee = 0
+    if plan["extra_guest_enabled"]:
+        guests_included = plan["guests_included"] or 0
+        extra_guest_fee = max(0, total_guests - guests_included) * to_minor(plan["extra_guest"] or 0)
+
+    subtotal = to_minor(accommodation_total) + to_minor(cleaning_fee) + extra_guest_fee
+    breakdown = []
+    for tax in plan["taxes"]:
+        if tax["type"] == TAX_TYPES[tax["label"]] and tax["amount"] > 0:
+            units = tax_units(tax)
+            breakdown.append({
+                "per_booking_percentage": lambda: divide_round_half_up(subtotal * units, RATE_SCALE),
+                "per_booking_amount": lambda: units,
+                "per_night": lambda: units * nights,
+                "per_person_per_night": lambda: units * total_guests * nights,
+            }[tax["label"]]())
+
+    total_tax = sum(breakdown)
+    grand_total = subtotal + total_tax
+    return {
+        "extraGuestFee": extra_guest_fee,
+        "subtotal": subtotal,
+        "taxes": breakdown,
+        "totalTax": total_tax,
+        "grandTotal": grand_total,
+        "stripeAmount": grand_total,
+    }
+
+
+def js_round(value):
+    floor = math.floor(value)
+    return floor + (1 if value - floor >= 0.5 else 0)
@@ -0,0 +1,250 @@
+"""
+Summaries of V8 profiles written by the Next.js server.
+
+Reads .cpuprofile (node --cpu-prof), .heapprofile (--heap-prof) and
+.heapsnapshot files and attributes time and memory to functions. Frames in
+the server bundle are mapped back to their source (lib/uplisting.js:303)
+through the chunk's source map when the build has one (PROFILE_BUILD=true
+next build), or else by function name when exactly one top-level
+definition in lib/ has it. A minified build without source maps only
+yields chunk locations.
+"""
+
+import bisect
+import json
+import re
+from collections import Counter, defaultdict
+from itertools import accumulate
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+from .server import REPO_ROOT
+
+# V8 bookkeeping nodes, reported separately from the code that ran
+META_FRAMES = {"(root)", "(program)", "(idle)", "(garbage collector)"}
+# Builtins have no script; these names are unambiguous enough to qualify
+NATIVE_NAMES = {"stringify": "JSON.stringify", "parse": "JSON.parse"}
+
+BASE64 = {c: i for i, c in enumerate("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/")}
+DEFINITION = re.compile(r"^(?:export\s+)?(?:async\s+)?(?:function\s*\*?\s*(\w+)|(?:const|let)\s+(\w+)\s*=\s*"
+                        r"(?:async\s+)?(?:function\b|\([^)]*\)\s*=>|\w+\s*=>))", re.M)
+
+
+def decode_vlq(segment):
+    values, value, shift = [], 0, 0
+    for char in segment:
+        digit = BASE64[char]
+        value += (digit & 31) << shift
+        if digit & 32:
+            shift += 5
+        else:
+            values.append(-(value >> 1) if value & 1 else value >> 1)
+            value, shift = 0, 0
+    return values
+
+
+class SourceMap:
+    """Source map v3: generated (line, column) -> (source, line, name)"""
+
+    def __init__(self, data):
+        self.sources = data.get("sources", [])
+        self.names = data.get("names", [])
+        self.lines = []
+        source = orig_line = orig_col = name = 0
+        for line in data.get("mappings", "").split(";"):
+            column, segments = 0, []
+            for segment in filter(None, line.split(",")):
+                fields = decode_vlq(segment)
+                column += fields[0]
+                if len(fields) >= 4:
+                    source, orig_line, orig_col = source + fields[1], orig_line + fields[2], orig_col + fields[3]
+                    if len(fields) == 5:
+                        name += fields[4]
+                    segments.append((column, source, orig_line, name if len(fields) == 5 else None))
+            self.lines.append(segments)
+
+    def lookup(self, line, column):
+        """(source, 0-based line, name or None) of the segment at or before the position"""
+        segments = self.lines[line] if 0 <= line < len(self.lines) else []
+        index = bisect.bisect_right(segments, (column, float("inf"))) - 1
+        if index < 0:
+            return None
+        _, source, orig_line, name = segments[index]
+        return self.sources[source], orig_line, self.names[name] if name is not None else None
+
+
+def repo_path(source):
+    """lib/uplisting.js for webpack://_N_E/./lib/uplisting.js and the like, else None"""
+    source = source.split("?")[0]
+    if "node_modules/" in source:
+        return None
+    for root in ("lib/", "app/", "components/"):
+        index = source.find(root)
+        if index >= 0 and (index == 0 or source[index - 1] in "/."):
+            return source[index:]
+    return None
+
+
+class FrameResolver:
+    """(name, location, repo file) for a profile call frame, cached per position"""
+
+    def __init__(self, repo_root=REPO_ROOT):
+        self.repo_root = Path(repo_root)
+        self.maps = {}
+        self.cache = {}
+        self.definitions = self.index_definitions()
+
+    def index_definitions(self):
+        found = defaultdict(list)
+        for path in sorted((self.repo_root / "lib").rglob("*.js")):
+            text = path.read_text(errors="replace")
+            for match in DEFINITION.finditer(text):
+                found[match.group(1) or match.group(2)].append(
+                    (path.relative_to(self.repo_root).as_posix(), text.count("\n", 0, match.start()) + 1))
+        return {name: places[0] for name, places in found.items() if len(places) == 1}
+
+    def source_map(self, path):
+        if path not in self.maps:
+            map_path = Path(f"{path}.map")
+            try:
+                self.maps[path] = SourceMap(json.loads(map_path.read_text()))
+            except (OSError, ValueError):
+                self.maps[path] = None
+        return self.maps[path]
+
+    def __call__(self, frame):
+        key = (frame["functionName"], frame["url"], frame["lineNumber"], frame["columnNumber"])
+        if key not in self.cache:
+            self.cache[key] = self.resolve(*key)
+        return self.cache[key]
+
+    def resolve(self, name, url, line, column):
+        if name in META_FRAMES:
+            return name, "", None
+        if not url:
+            return NATIVE_NAMES.get(name, name or "(anonymous)"), "(native)", None
+        if url.startswith("node:"):
+            return name or "(anonymous)", url, None
+        path = unquote(urlparse(url).path) if url.startswith("file:") else url
+        source_map = self.source_map(path)
+        mapped = source_map.lookup(line, column) if source_map else None
+        if mapped:
+            source, orig_line, orig_name = mapped
+            file = repo_path(source)
+            name = name or orig_name or "(anonymous)"
+            if file:
+                return name, f"{file}:{orig_line + 1}", file
+            return name, source.split("node_modules/")[-1], None
+        if name in self.definitions:
+            file, def_line = self.definitions[name]
+            return name, f"{file}:{def_line}", file
+        if "node_modules/" in path:
+            return name or "(anonymous)", path.split("node_modules/")[-1], None
+        if "/.next/" in path:
+            path = ".next/" + path.split("/.next/")[-1]
+        return name or "(anonymous)", f"{path}:{line + 1}", None
+
+
+def sample_durations(profile):
+    """Microseconds each sample stands for: until the next sample, or the profile's end"""
+    times = list(accumulate(profile["timeDeltas"], initial=profile["startTime"]))[1:]
+    ends = times[1:] + [profile["endTime"]]
+    return [max(0, end - start) for start, end in zip(times, ends)]
+
+
+class CpuSummary:
+    """Self and total time per function across one or more .cpuprofile files"""
+
+    def __init__(self, resolve):
+        self.resolve = resolve
+        self.self_us = Counter()
+        self.total_us = Counter()
+        self.meta_us = Counter()
+        self.file_us = Counter()
+        self.folded = Counter()
+        self.locations = {}
+        self.wall_us = 0
+
+    def add(self, profile):
+        nodes = {node["id"]: node for node in profile["nodes"]}
+        node_us = Counter()
+        for node_id, us in zip(profile["samples"], sample_durations(profile)):
+            node_us[node_id] += us
+        self.wall_us += profile["endTime"] - profile["startTime"]
+
+        # Depth-first with the stack of functions, counting recursion once in totals
+        root = profile["nodes"][0]["id"]
+        subtree_us = {}
+        order, stack = [], [root]
+        while stack:
+            node_id = stack.pop()
+            order.append(node_id)
+            stack.extend(nodes[node_id].get("children", ()))
+        for node_id in reversed(order):
+            subtree_us[node_id] = node_us[node_id] + sum(subtree_us[c] for c in nodes[node_id].get("children", ()))
+
+        active = Counter()
+        stack = [(root, (), False)]
+        while stack:
+            node_id, path, leaving = stack.pop()
+            name, location, file = self.resolve(nodes[node_id]["callFrame"])
+            key = (name, location)
+            if leaving:
+                active[key] -= 1
+                continue
+            if name in META_FRAMES:
+                self.meta_us[name] += node_us[node_id]
+                if name != "(root)" and node_us[node_id]:
+                    self.folded[name] += node_us[node_id]
+            else:
+                self.locations[key] = file
+                self.self_us[key] += node_us[node_id]
+                if file:
+                    self.file_us[file] += node_us[node_id]
+                if not active[key]:
+                    self.total_us[key] += subtree_us[node_id]
+                active[key] += 1
+                path = path + (f"{name} ({location})".replace(";", ":") if location else name,)
+                if node_us[node_id]:
+                    self.folded[";".join(path)] += node_us[node_id]
+                stack.append((node_id, path, True))
+            for child in nodes[node_id].get("children", ()):
+                stack.append((child, path, False))
+
+    @property
+    def sampled_us(self):
+        return sum(self.self_us.values()) + sum(self.meta_us.values())
+
+    def folded_lines(self):
+        """Brendan Gregg's folded stacks, in microseconds (flamegraph.pl, speedscope)"""
+        return [f"{stack} {us}" for stack, us in sorted(self.folded.items())]
+
+
+def heap_profile_summary(profile, resolve, totals=None):
+    """Bytes still allocated per function in a --heap-prof sampling profile"""
+    totals = Counter() if totals is None else totals
+    stack = [profile["head"]]
+    while stack:
+        node = stack.pop()
+        name, location, _ = resolve(node["callFrame"])
+        if node.get("selfSize") and name not in META_FRAMES:
+            totals[(name, location)] += node["selfSize"]
+        stack.extend(node.get("children", ()))
+    return totals
+
+
+def heap_snapshot_summary(path):
+    """(count, shallow bytes) per constructor, or per (type) for non-objects"""
+    snapshot = json.loads(Path(path).read_text())
+    meta = snapshot["snapshot"]["meta"]
+    fields = meta["node_fields"]
+    width = len(fields)
+    type_at, name_at, size_at = fields.index("type"), fields.index("name"), fields.index("self_size")
+    types, strings, nodes = meta["node_types"][0], snapshot["strings"], snapshot["nodes"]
+    counts, sizes = Counter(), Counter()
+    for index in range(0, len(nodes), width):
+        kind = types[nodes[index + type_at]]
+        key = strings[nodes[index + name_at]] if kind == "object" else f"({kind})"
+        counts[key] += 1
+        sizes[key] += nodes[index + size_at]
+    return counts, sizes
@@ -0,0 +1,282 @@
+"""
+Reconciliation of website bookings across MongoDB, Stripe and Uplisting.
+
+Streams the bookings collection by cursor, fetches each booking's payment
+intent from Stripe with bounded parallelism (more than `concurrency`
+requests are never in flight, and at most a few batches of bookings are held
+in memory), and joins it with the property's Uplisting bookings, which are
+fetched up front per property and month. Uplisting bookings are matched by
+the id the booking store recorded, and otherwise by stay and guest email,
+which finds bookings created at Uplisting whose id never made it to MongoDB.
+
+Bookings touched within the grace period are skipped: a webhook may still be
+working on them. Repairs only ever touch MongoDB, guarded by the state the
+report saw, so running them twice (or racing a webhook) is harmless.
+
+Stripe and Uplisting are reached like the server reaches them
+(STRIPE_API_BASE / STRIPE_SECRET_KEY, UPLISTING_API_URL / UPLISTING_API_KEY /
+UPLISTING_CLIENT_ID), defaulting to the stand-ins.
+"""
+
+import os
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+
+from . import config
+from .load import session
+
+# kind -> (what it means, whether --repair can fix it in MongoDB)
+MISMATCHES = {
+    "paid_not_booked": ("Stripe charged the guest but Uplisting has no booking", True),
+    "booking_not_linked": ("Uplisting has the booking but MongoDB doesn't record it", True),
+    "uplisting_booking_missing": ("MongoDB links an Uplisting booking that Uplisting doesn't have", False),
+    "booked_not_paid": ("Uplisting booking for a payment that did not succeed", False),
+    "unpaid_marked_paid": ("MongoDB records a payment that Stripe doesn't", False),
+    "intent_missing": ("Stripe doesn't know the payment intent", False),
+    "amount_mismatch": ("Stripe charged a different amount than the booking total", False),
+}
+
+BOOKING_FIELDS = ["bookingId", "stripePaymentIntentId", "propertyId", "checkIn", "checkOut", "guestEmail",
+                  "grandTotal", "paymentStatus", "bookingStatus", "uplistingBookingId", "requiresManualReview",
+                  "updatedAt", "reconciledAt"]
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class Upstreams:
+    """Stripe and Uplisting endpoints, with a retry for throttling and transient errors"""
+
+    def __init__(self):
+        self.stripe_base = os.environ.get("STRIPE_API_BASE", config.standin_url("stripe"))
+        self.stripe_headers = {"Authorization": f"Bearer {os.environ.get('STRIPE_SECRET_KEY', config.STRIPE_SECRET)}"}
+        self.uplisting_base = os.environ.get("UPLISTING_API_URL", config.standin_url("uplisting"))
+        self.uplisting_headers = {
+            "Authorization": f"Basic {os.environ.get('UPLISTING_API_KEY', 'aGFybmVzczpoYXJuZXNz')}",
+            "X-Uplisting-Client-Id": os.environ.get("UPLISTING_CLIENT_ID", "harness-client"),
+        }
+        self.requests = Counter()
+        self._lock = threading.Lock()
+
+    def get(self, name, url, headers, attempts=4):
+        for attempt in range(attempts):
+            response = session().get(url, headers=headers, timeout=30)
+            with self._lock:
+                self.requests[name] += 1
+            if response.status_code not in RETRY_STATUSES or attempt == attempts - 1:
+                return response
+            time.sleep(float(response.headers.get("Retry-After") or 0.25 * 2 ** attempt))
+        return response
+
+    def payment_intent(self, intent_id):
+        """The payment intent, or None when Stripe doesn't have it"""
+        response = self.get("stripe", f"{self.stripe_base}/v1/payment_intents/{intent_id}", self.stripe_headers)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    def uplisting_bookings(self, property_id, start, end):
+        response = self.get("uplisting", f"{self.uplisting_base}/bookings/{property_id}?from={start}&to={end}",
+                            self.uplisting_headers)
+        response.raise_for_status()
+        return response.json().get("data", [])
+
+
+class UplistingIndex:
+    """Uplisting bookings by id and by (property, check-in, check-out, guest email)"""
+
+    def __init__(self):
+        self.by_id = {}
+        self.by_stay = {}
+        self.referenced = set()
+
+    @staticmethod
+    def stay_key(property_id, check_in, check_out, email):
+        return str(property_id), str(check_in), str(check_out), (email or "").strip().lower()
+
+    def add(self, property_id, row):
+        attributes = row.get("attributes", {})
+        booking = {"id": str(row["id"]), "propertyId": str(attributes.get("property_id") or property_id),
+                   "checkIn": attributes.get("check_in"), "checkOut": attributes.get("check_out"),
+                   "guestEmail": attributes.get("guest_email") or attributes.get("email")}
+        self.by_id[booking["id"]] = booking
+        self.by_stay[self.stay_key(booking["propertyId"], booking["checkIn"], booking["checkOut"],
+                                   booking["guestEmail"])] = booking
+
+    def match(self, booking):
+        """(Uplisting booking or None, whether the recorded id was found)"""
+        linked = booking.get("uplistingBookingId")
+        if linked and str(linked) in self.by_id:
+            found = self.by_id[str(linked)]
+        else:
+            found = self.by_stay.get(self.stay_key(booking.get("propertyId"), booking.get("checkIn"),
+                                                   booking.get("checkOut"), booking.get("guestEmail")))
+        if found:
+            self.referenced.add(found["id"])
+        return found, bool(linked and str(linked) in self.by_id)
+
+    def unreferenced(self):
+        return [booking for booking_id, booking in self.by_id.items() if booking_id not in self.referenced]
+
+
+def months(start, end):
+    """[first, last] day pairs of the calendar months covering start..end"""
+    windows = []
+    first = start.replace(day=1)
+    while first <= end:
+        following = (first + timedelta(days=32)).replace(day=1)
+        windows.append((first, following - timedelta(days=1)))
+        first = following
+    return windows
+
+
+def load_uplisting(collection, upstreams, pool):
+    """Every Uplisting booking of the properties and months the collection's bookings cover"""
+    index = UplistingIndex()
+    properties = [str(p) for p in collection.distinct("propertyId") if p]
+    span = list(collection.aggregate([{"$group": {"_id": None, "first": {"$min": "$checkIn"},
+                                                  "last": {"$max": "$checkOut"}}}]))
+    if not properties or not span or not span[0]["first"]:
+        return index
+    windows = months(date.fromisoformat(span[0]["first"]), date.fromisoformat(span[0]["last"]))
+    jobs = [(property_id, first, last) for property_id in properties for first, last in windows]
+    for (property_id, _, _), rows in zip(jobs, pool.map(lambda job: upstreams.uplisting_bookings(*job), jobs)):
+        for row in rows:
+            index.add(property_id, row)
+    return index
+
+
+def bounded(pool, fn, items, limit):
+    """Yield (item, fn(item)) in order, with at most `limit` calls submitted ahead"""
+    pending = deque()
+    for item in items:
+        pending.append((item, pool.submit(fn, item)))
+        if len(pending) >= limit:
+            item, future = pending.popleft()
+            yield item, future.result()
+    while pending:
+        item, future = pending.popleft()
+        yield item, future.result()
+
+
+def stream_bookings(collection, batch_size):
+    cursor = collection.find({"stripePaymentIntentId": {"$type": "string"}},
+                             projection=BOOKING_FIELDS, batch_size=batch_size).sort("_id", 1)
+    yield from cursor
+
+
+def minor_units(amount):
+    return round(float(amount or 0) * 100)
+
+
+def classify(booking, intent, uplisting, linked_found):
+    """Mismatch kinds for one booking"""
+    if intent is None:
+        return ["intent_missing"]
+    kinds = []
+    paid = intent.get("status") == "succeeded"
+    linked = booking.get("uplistingBookingId")
+    if linked and not linked_found:
+        kinds.append("uplisting_booking_missing")
+    if paid and uplisting is None and not linked:
+        kinds.append("paid_not_booked")
+    if paid and uplisting is not None and (not linked_found or booking.get("paymentStatus") != "succeeded"):
+        kinds.append("booking_not_linked")
+    if not paid and uplisting is not None:
+        kinds.append("booked_not_paid")
+    if not paid and booking.get("paymentStatus") == "succeeded":
+        kinds.append("unpaid_marked_paid")
+    if paid and booking.get("grandTotal") is not None and intent.get("amount") != minor_units(booking["grandTotal"]):
+        kinds.append("amount_mismatch")
+    return kinds
+
+
+def repair_for(kind, booking, uplisting, now):
+    """(filter, update) bringing MongoDB in line, or None"""
+    if kind == "booking_not_linked":
+        return ({"_id": booking["_id"], "uplistingBookingId": booking.get("uplistingBookingId")},
+                {"$set": {"uplistingBookingId": uplisting["id"], "paymentStatus": "succeeded",
+                          "bookingStatus": "confirmed", "reconciledAt": now, "updatedAt": now}})
+    if kind == "paid_not_booked" and not booking.get("requiresManualReview"):
+        return ({"_id": booking["_id"], "uplistingBookingId": booking.get("uplistingBookingId"),
+                 "requiresManualReview": {"$ne": True}},
+                {"$set": {"paymentStatus": "succeeded", "bookingStatus": "pending_manual_review",
+                          "requiresManualReview": True,
+                          "manualReviewReason": "Reconciliation: paid in Stripe, no Uplisting booking",
+                          "reconciledAt": now, "updatedAt": now}})
+    return None
+
+
+def reconcile(collection, upstreams=None, concurrency=32, batch_size=1000, grace=timedelta(minutes=15),
+              repair=False, on_mismatch=None):
+    """
+    Reconcile a bookings collection (a pymongo Collection).
+
+    on_mismatch(record) is called for every mismatch and unreferenced Uplisting
+    booking as it is found; records are {kind, bookingId, stripePaymentIntentId,
+    propertyId, checkIn, checkOut, detail, repair}. Returns the totals:
+    {bookings, skipped_recent, mismatches: Counter, repairs_planned,
+    repairs_applied, unreferenced, requests: Counter, elapsed_s}.
+    """
+    from pymongo import UpdateOne
+
+    upstreams = upstreams or Upstreams()
+    started = time.perf_counter()
+    now = datetime.now(timezone.utc)
+    cutoff = now - grace
+    totals = {"bookings": 0, "skipped_recent": 0, "mismatches": Counter(), "repairs_planned": 0,
+              "repairs_applied": 0, "unreferenced": 0}
+    repairs = []
+
+    def flush():
+        if repairs:
+            result = collection.bulk_write(repairs, ordered=False)
+            totals["repairs_applied"] += result.modified_count
+            repairs.clear()
+
+    def report(record):
+        if on_mismatch:
+            on_mismatch(record)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        index = load_uplisting(collection, upstreams, pool)
+        fetch = lambda booking: upstreams.payment_intent(booking["stripePaymentIntentId"])  # noqa: E731
+        for booking, intent in bounded(pool, fetch, stream_bookings(collection, batch_size), concurrency * 4):
+            totals["bookings"] += 1
+            uplisting, linked_found = index.match(booking)
+            updated_at = booking.get("updatedAt")
+            # A repair of ours is not a webhook at work
+            touched = updated_at and updated_at != booking.get("reconciledAt")
+            if touched and updated_at.replace(tzinfo=updated_at.tzinfo or timezone.utc) > cutoff:
+                totals["skipped_recent"] += 1
+                continue
+            for kind in classify(booking, intent, uplisting, linked_found):
+                totals["mismatches"][kind] += 1
+                fix = repair_for(kind, booking, uplisting, now)
+                totals["repairs_planned"] += bool(fix)
+                if fix and repair:
+                    repairs.append(UpdateOne(*fix))
+                report({
+                    "kind": kind, "bookingId": booking.get("bookingId"),
+                    "stripePaymentIntentId": booking["stripePaymentIntentId"],
+                    "propertyId": booking.get("propertyId"), "checkIn": booking.get("checkIn"),
+                    "checkOut": booking.get("checkOut"), "detail": MISMATCHES[kind][0],
+                    "stripeStatus": intent and intent.get("status"),
+                    "uplistingBookingId": uplisting and uplisting["id"],
+                    "repair": fix and fix[1]["$set"],
+                })
+            if len(repairs) >= batch_size:
+                flush()
+        flush()
+
+    for booking in index.unreferenced():
+        totals["unreferenced"] += 1
+        report({"kind": "unreferenced_uplisting", "uplistingBookingId": booking["id"],
+                "propertyId": booking["propertyId"], "checkIn": booking["checkIn"],
+                "checkOut": booking["checkOut"], "detail": "Uplisting booking no website booking refers to"})
+
+    totals["requests"] = upstreams.requests
+    totals["elapsed_s"] = time.perf_counter() - started
+    return totals
@@ -0,0 +1 @@
+"""Harness scenarios. Each module exposes add_arguments(parser) and run(args)."""
@@ -0,0 +1,242 @@
+"""
+Concurrent checkouts racing for the same nights.
+
+Each of --rounds picks a fixture property and a --window-day stretch of
+future dates, then --clients guests ask /api/stripe/create-payment-intent for
+random 2-5 night stays inside it, all at once. Booking holds must let through
+only guests whose nights don't overlap (the rest get 409), availability must
+show the held nights as taken, and settling every winner with a signed
+payment_intent.succeeded webhook must create one Uplisting booking each: zero
+double-sold nights, nothing reaching the stand-in's double-booking check and
+no payment ending in manual review.
+
+Finally a declined attempt (payment_intent.payment_failed) must keep the
+hold, since the guest may still pay the same intent, and cancelling the
+intent (payment_intent.canceled) must release it: another guest must then
+get the same dates straight away. A guest who reloads checkout holds the
+same stay twice: cancelling the abandoned first intent must leave the
+nights held for the second.
+"""
+
+import itertools
+import json
+import random
+import threading
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from .. import config, fixtures
+from ..load import session
+from ..standins import StripeStandIn, UplistingStandIn, fetch_stats
+from .webhook_replay import deliver, stripe_signature, succeeded_event
+
+DESCRIPTION = "Race concurrent checkouts for the same dates and count double-sold nights"
+
+# Distinct client addresses, so the middleware's per-IP payment limit stays out of the way
+ADDRESSES = (f"10.45.{n // 250}.{n % 250}" for n in itertools.count())
+ADDRESS_LOCK = threading.Lock()
+
+
+def add_arguments(parser):
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--clients", type=int, default=20, help="concurrent checkouts per round")
+    parser.add_argument("--window", type=int, default=14, help="days the stays of a round fall in")
+    parser.add_argument("--seed", type=int, default=45)
+    parser.add_argument("--external-standin", action="store_true",
+                        help="use stand-ins started with `python -m tests.harness standins`")
+
+
+def nights(check_in, check_out):
+    """Nights keyed by the morning after, like Uplisting rates and the booking holds"""
+    return {check_in + timedelta(days=d) for d in range(1, (check_out - check_in).days + 1)}
+
+
+def checkout(property_id, check_in, check_out, run_id, email=None):
+    with ADDRESS_LOCK:
+        address = next(ADDRESSES)
+    response = session().post(f"{config.API_BASE}/stripe/create-payment-intent", timeout=60, json={
+        "propertyId": property_id,
+        "checkIn": check_in.isoformat(),
+        "checkOut": check_out.isoformat(),
+        "guestName": "Harness Hold Guest",
+        "guestEmail": email or f"hold-{run_id}-{uuid.uuid4().hex[:8]}@harness.test",
+        "adults": 2,
+        "accommodationTotal": 1,
+    }, headers={"X-Forwarded-For": address})
+    body = response.json() if response.headers.get("content-type", "").startswith("application/json") else {}
+    return response.status_code, body
+
+
+def race(property_id, stays, run_id):
+    """Start every checkout at the same moment; [(stay, status, body)]"""
+    barrier = threading.Barrier(len(stays))
+
+    def attempt(stay):
+        barrier.wait()
+        return (stay, *checkout(property_id, *stay, run_id))
+
+    with ThreadPoolExecutor(max_workers=len(stays)) as pool:
+        return list(pool.map(attempt, stays))
+
+
+def unavailable_nights(property_id, start, end):
+    response = session().get(f"{config.API_BASE}/availability/{property_id}?from={start}&to={end}", timeout=30)
+    response.raise_for_status()
+    return {date.fromisoformat(d) for d in response.json()["pricing"].get("unavailableDates") or []}
+
+
+def failed_event(intent_id):
+    return json.dumps({
+        "id": f"evt_{uuid.uuid4().hex[:24]}",
+        "object": "event",
+        "type": "payment_intent.payment_failed",
+        "data": {"object": {"id": intent_id, "object": "payment_intent", "status": "requires_payment_method",
+                            "last_payment_error": {"message": "Your card was declined."}}},
+    }).encode()
+
+
+def canceled_event(intent_id):
+    return json.dumps({
+        "id": f"evt_{uuid.uuid4().hex[:24]}",
+        "object": "event",
+        "type": "payment_intent.canceled",
+        "data": {"object": {"id": intent_id, "object": "payment_intent", "status": "canceled",
+                            "cancellation_reason": "abandoned"}},
+    }).encode()
+
+
+def send_webhook(payload):
+    return session().post(f"{config.API_BASE}/stripe/webhook", data=payload, timeout=30, headers={
+        "Content-Type": "application/json", "Stripe-Signature": stripe_signature(payload)}).status_code
+
+
+def release_check(property_id, check_in, run_id):
+    """Hold, decline then cancel the payment, trying the same nights as another guest after each"""
+    check_out = check_in + timedelta(days=3)
+    status, first = checkout(property_id, check_in, check_out, run_id)
+    if status != 200:
+        return f"release check: first checkout answered {status}"
+    status, _ = checkout(property_id, check_in, check_out, run_id)
+    if status != 409:
+        return f"release check: a second guest got held dates ({status})"
+    status = send_webhook(failed_event(first["paymentIntentId"]))
+    if status != 200:
+        return f"release check: payment_failed webhook answered {status}"
+    status, _ = checkout(property_id, check_in, check_out, run_id)
+    if status != 409:
+        return f"release check: a declined attempt gave the dates to another guest ({status})"
+    status = send_webhook(canceled_event(first["paymentIntentId"]))
+    if status != 200:
+        return f"release check: canceled webhook answered {status}"
+    status, _ = checkout(property_id, check_in, check_out, run_id)
+    if status != 200:
+        return f"release check: the dates stayed held after the intent was cancelled ({status})"
+    return None
+
+
+def reload_check(property_id, check_in, run_id):
+    """Hold the same stay twice as one guest, cancel the first intent, and try the nights as another guest"""
+    check_out = check_in + timedelta(days=3)
+    email = f"hold-{run_id}-reload@harness.test"
+    status, first = checkout(property_id, check_in, check_out, run_id, email=email)
+    if status != 200:
+        return f"reload check: first checkout answered {status}"
+    status, second = checkout(property_id, check_in, check_out, run_id, email=email)
+    if status != 200:
+        return f"reload check: the same guest's second checkout answered {status}"
+    status = send_webhook(canceled_event(first["paymentIntentId"]))
+    if status != 200:
+        return f"reload check: canceled webhook answered {status}"
+    status, _ = checkout(property_id, check_in, check_out, run_id)
+    # Free the nights whatever happened
+    send_webhook(canceled_event(second["paymentIntentId"]))
+    if status != 409:
+        return f"reload check: cancelling the abandoned intent freed the live checkout's dates ({status})"
+    return None
+
+
+def run(args):
+    standins = []
+    if not args.external_standin:
+        standins = [UplistingStandIn().start(), StripeStandIn().start()]
+
+    rng = random.Random(args.seed)
+    run_id = uuid.uuid4().hex[:8]
+    # Far out, and a new stretch per run, so a reused stand-in's earlier bookings don't get in the way
+    first_day = date.today() + timedelta(days=random.randint(60, 700))
+    statuses = Counter()
+    problems = []
+    winners = []
+    try:
+        before = fetch_stats("uplisting")["calls"]
+        for round_number in range(args.rounds):
+            property_id = fixtures.PROPERTY_IDS[round_number % len(fixtures.PROPERTY_IDS)]
+            start = first_day + timedelta(days=round_number * (args.window + 7))
+            stays = []
+            for _ in range(args.clients):
+                length = rng.randint(2, 5)
+                check_in = start + timedelta(days=rng.randint(0, args.window - length))
+                stays.append((check_in, check_in + timedelta(days=length)))
+
+            results = race(property_id, stays, run_id)
+            won = [(stay, body) for stay, status, body in results if status == 200]
+            statuses.update(status for _, status, _ in results)
+            held = set()
+            for (check_in, check_out), _ in won:
+                stay_nights = nights(check_in, check_out)
+                if held & stay_nights:
+                    problems.append(f"round {round_number + 1}: overlapping checkouts both got a payment intent")
+                held |= stay_nights
+            shown = unavailable_nights(property_id, start, start + timedelta(days=args.window + 1))
+            if held - shown:
+                problems.append(f"round {round_number + 1}: {len(held - shown)} held night(s) shown as available")
+            print(f"🏁 round {round_number + 1}: {property_id} {start}+{args.window}d, "
+                  f"{len(won)} of {args.clients} checkouts held {len(held)} night(s)")
+            winners.extend((property_id, stay, body) for stay, body in won)
+
+        outcomes = Counter()
+        sold = Counter()
+        for property_id, stay, body in winners:
+            intent = {"id": body["paymentIntentId"], "amount": round(body["amount"] * 100)}
+            status, message, _ = deliver(succeeded_event(intent, f"evt_{uuid.uuid4().hex[:24]}"))
+            outcomes[f"{status} {message}"] += 1
+            if message == "booked":
+                sold.update((property_id, night) for night in nights(*stay))
+        after = fetch_stats("uplisting")["calls"]
+
+        last_day = first_day + timedelta(days=args.rounds * (args.window + 7))
+        for check in (release_check(fixtures.PROPERTY_IDS[0], last_day, run_id),
+                      reload_check(fixtures.PROPERTY_IDS[0], last_day + timedelta(days=7), run_id)):
+            if check:
+                problems.append(check)
+    finally:
+        for standin in standins:
+            standin.stop()
+
+    created = after.get("bookings_created", 0) - before.get("bookings_created", 0)
+    rejected = after.get("double_booking_rejected", 0) - before.get("double_booking_rejected", 0)
+    double_sold = sum(count - 1 for count in sold.values() if count > 1)
+    unbooked = sum(count for outcome, count in outcomes.items() if not outcome.endswith("booked"))
+
+    print("💳 checkouts: " + ", ".join(f"{count} × {status}" for status, count in sorted(statuses.items())))
+    print(f"📨 settled {len(winners)} payment(s): "
+          + ", ".join(f"{count} × {outcome}" for outcome, count in sorted(outcomes.items())))
+    print(f"🏠 Uplisting: {created} booking(s) created, {rejected} rejected as double bookings; "
+          f"{double_sold} double-sold night(s)")
+
+    if statuses.keys() - {200, 409}:
+        problems.append(f"unexpected checkout answers: {dict(statuses)}")
+    if created != len(winners):
+        problems.append(f"{created} Uplisting bookings for {len(winners)} paid checkouts")
+    if rejected or double_sold:
+        problems.append(f"{rejected} rejected at Uplisting, {double_sold} night(s) sold twice")
+    if unbooked:
+        problems.append(f"{unbooked} paid checkout(s) did not end in an Uplisting booking")
+
+    for problem in problems:
+        print(f"❌ {problem}")
+    print("✅ Concurrent checkouts never sold a night twice" if not problems
+          else f"❌ {len(problems)} problem(s)")
+    return 0 if not problems else 1
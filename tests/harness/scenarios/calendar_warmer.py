@@ -0,0 +1,137 @@
+"""
+Availability latency with the calendar warmer.
+
+The Uplisting stand-in answers every calendar call after --latency-ms. The
+scenario waits until /api/diagnostics/calendars shows every fixture property
+warmed, then requests --requests availability ranges nobody has asked for
+before, in two sets:
+  - inside the warm horizon: should be answered from the calendar cache
+  - beyond the horizon: every range has to go to Uplisting (the baseline)
+Reports p50/p95 and upstream calendar calls for both, plus the age of each
+warmed calendar. Inside the horizon p95 should stay well below the stand-in
+latency, and the only upstream calls should be the warmer's own refreshes.
+"""
+
+import random
+import time
+from datetime import date, timedelta
+
+from .. import config, fixtures
+from ..load import print_summary, run_load, session
+from ..standins import UplistingStandIn, configure, fetch_stats
+
+DESCRIPTION = "Show that availability p95 no longer contains Uplisting latency once calendars are warm"
+
+CALENDAR_KEY = "GET /calendar/{id}"
+
+
+def add_arguments(parser):
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency-ms", type=int, default=250, help="stand-in latency per request")
+    parser.add_argument("--warm-timeout", type=int, default=120, help="seconds to wait for the warmer")
+    parser.add_argument("--seed", type=int, default=40)
+    parser.add_argument("--external-standin", action="store_true",
+                        help="use a stand-in started with `python -m tests.harness standins`")
+
+
+def calendar_status():
+    response = session().get(f"{config.API_BASE}/diagnostics/calendars", timeout=10)
+    response.raise_for_status()
+    return response.json()
+
+
+def wait_until_warm(timeout_s):
+    deadline = time.monotonic() + timeout_s
+    while True:
+        status = calendar_status()
+        calendars = status["cache"]["calendars"]
+        if all(calendars.get(pid, {}).get("fresh") for pid in fixtures.PROPERTY_IDS):
+            return status
+        if time.monotonic() > deadline:
+            return None
+        time.sleep(1)
+
+
+def print_freshness(status):
+    print(f"🌡️  Warmer: horizon {status['warmer']['horizonDays']} days, refresh every "
+          f"{status['warmer']['intervalMs'] / 1000:.0f}s, {status['warmer']['refreshes']} refreshes, "
+          f"{status['warmer']['errors']} errors")
+    for property_id, calendar in sorted(status["cache"]["calendars"].items()):
+        print(f"   {property_id:>8}  {calendar['from']} .. {calendar['to']}  {calendar['days']} days  "
+              f"age {calendar['ageMs'] / 1000:5.1f}s{'' if calendar['fresh'] else '  STALE'}")
+
+
+def random_ranges(rng, count, first_day, last_day):
+    """(property, from, to, forBooking) with from in first_day..last_day"""
+    ranges = []
+    for _ in range(count):
+        check_in = first_day + timedelta(days=rng.randint(0, (last_day - first_day).days))
+        ranges.append((rng.choice(fixtures.PROPERTY_IDS), check_in,
+                       check_in + timedelta(days=rng.randint(1, 28)), rng.random() < 0.3))
+    return ranges
+
+
+def measure(label, ranges, args):
+    def task(i):
+        property_id, check_in, check_out, for_booking = ranges[i]
+        response = session().get(
+            f"{config.API_BASE}/availability/{property_id}?from={check_in.isoformat()}"
+            f"&to={check_out.isoformat()}{'&forBooking=true' if for_booking else ''}", timeout=60)
+        return response.status_code == 200
+
+    before = fetch_stats("uplisting")["calls"].get(CALENDAR_KEY, 0)
+    result = run_load(task, len(ranges), args.concurrency)
+    upstream = fetch_stats("uplisting")["calls"].get(CALENDAR_KEY, 0) - before
+    print_summary(label, result)
+    print(f"   upstream calendar calls: {upstream}")
+    return result, upstream
+
+
+def run(args):
+    standin = None
+    if args.external_standin:
+        configure("uplisting", latency_ms=args.latency_ms)
+    else:
+        standin = UplistingStandIn(latency_ms=args.latency_ms).start()
+
+    rng = random.Random(args.seed + int(time.time()) % 1000)
+    problems = []
+    try:
+        print(f"⏳ Waiting for the warmer (stand-in latency {args.latency_ms}ms)...")
+        status = wait_until_warm(args.warm_timeout)
+        if status is None:
+            print("❌ calendars were not warmed in time (is CALENDAR_WARMER_ENABLED=false?)")
+            return 1
+        print_freshness(status)
+
+        horizon_to = date.fromisoformat(status["warmer"]["horizon"]["to"])
+        today = date.today()
+        # Stays must end inside the horizon, forBooking reads one day past checkout
+        inside = random_ranges(rng, args.requests, today, horizon_to - timedelta(days=30))
+        beyond = random_ranges(rng, args.requests, horizon_to + timedelta(days=1), horizon_to + timedelta(days=300))
+
+        warm, warm_upstream = measure("Inside the warm horizon", inside, args)
+        cold, cold_upstream = measure("Beyond the horizon (upstream)", beyond, args)
+        print_freshness(calendar_status())
+    finally:
+        if standin:
+            standin.stop()
+        else:
+            configure("uplisting", latency_ms=0)
+
+    refreshes_allowed = len(fixtures.PROPERTY_IDS) * (1 + int(warm.elapsed_s * 1000 // status["warmer"]["intervalMs"]) + 1)
+    if warm.errors or cold.errors:
+        problems.append(f"{warm.errors + cold.errors} request(s) failed")
+    if warm.p(95) >= args.latency_ms:
+        problems.append(f"warm p95 {warm.p(95):.0f}ms still contains the {args.latency_ms}ms upstream latency")
+    if warm_upstream > refreshes_allowed:
+        problems.append(f"{warm_upstream} upstream calls while warm (warmer refreshes allow {refreshes_allowed})")
+
+    print(f"📊 p95 inside the horizon {warm.p(95):.0f}ms vs beyond it {cold.p(95):.0f}ms; "
+          f"upstream calls {warm_upstream} vs {cold_upstream}")
+    for problem in problems:
+        print(f"❌ {problem}")
+    print("✅ Warm availability reads no longer wait on Uplisting" if not problems
+          else f"❌ {len(problems)} problem(s)")
+    return 0 if not problems else 1
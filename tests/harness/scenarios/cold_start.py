@@ -0,0 +1,222 @@
+"""
+Cold-start latency per route, with module load timings.
+
+For every route, --repeats times: starts a fresh server (config.SERVER_COMMAND,
+after `next build`) with scripts/require-timings.cjs preloaded, waits until
+it listens, sends the route's request once (cold) and again (warm), and
+stops it. Reports per route the medians of:
+  - listen: process start until the port accepts connections
+  - first / warm: latency of the first and the second request
+  - startup load: module load time before the server listened
+  - first load: module load time while serving the first request
+and the modules that cost most during the first request (server chunks are
+tagged with the SDKs they bundle).
+
+Heavy clients are initialized on first use: a route that doesn't call
+Stripe or send email must not load the Stripe or Resend SDK, even if it
+imports modules that can. --save writes the medians as a baseline, and
+--compare fails on first-request regressions beyond --tolerance.
+"""
+
+import json
+import os
+import statistics
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from pathlib import Path
+
+from .. import fixtures
+from ..load import session
+from ..server import REPO_ROOT, NextServer
+from ..standins import StripeStandIn, UplistingStandIn
+
+DESCRIPTION = "Restart the server per route and time the first request and module loading"
+
+PRELOAD = REPO_ROOT / "scripts" / "require-timings.cjs"
+METRICS = ("listen_s", "first_ms", "warm_ms", "startup_load_ms", "first_load_ms")
+
+# SDKs initialized on first use, and strings their (minified) bundles keep
+CLIENT_MARKERS = {
+    "stripe": (b"api.stripe.com",),
+    "resend": (b"api.resend.com",),
+    "mongodb": (b"MongoServerSelectionError",),
+}
+
+
+def routes():
+    """name -> (method, path, JSON body, SDKs the route may load)"""
+    property_id = fixtures.PROPERTY_IDS[0]
+    check_in = date.today() + timedelta(days=30)
+    return {
+        "properties": ("GET", "/api/properties", None, {"mongodb"}),
+        "property": ("GET", f"/api/properties/{property_id}", None, {"mongodb"}),
+        "availability": ("GET", f"/api/availability/{property_id}?from={check_in}"
+                                f"&to={check_in + timedelta(days=42)}", None, {"mongodb"}),
+        "stripe-config": ("GET", "/api/stripe/config", None, set()),
+        # Invalid requests: the route module loads, nothing is stored or sent
+        "contact": ("POST", "/api/forms/contact", {}, {"mongodb"}),
+        "newsletter": ("POST", "/api/forms/newsletter", {}, {"mongodb"}),
+        "create-payment-intent": ("POST", "/api/stripe/create-payment-intent", {}, {"stripe", "mongodb"}),
+        "stripe-webhook": ("POST", "/api/stripe/webhook", {}, {"stripe", "mongodb"}),
+    }
+
+
+def add_arguments(parser):
+    parser.add_argument("--routes", nargs="*", help=f"routes to measure (default: all of {', '.join(routes())})")
+    parser.add_argument("--repeats", type=int, default=3, help="fresh servers per route")
+    parser.add_argument("--port", type=int, default=3100)
+    parser.add_argument("--top", type=int, default=5, help="slowest modules to list per route")
+    parser.add_argument("--with-warmer", action="store_true",
+                        help="leave the calendar warmer on (its start-up fetches add noise)")
+    parser.add_argument("--save", help="write the medians to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON from --save to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed first-request slowdown")
+    parser.add_argument("--external-standin", action="store_true",
+                        help="use stand-ins started with `python -m tests.harness standins`")
+
+
+def timed_request(server, method, path, body):
+    started = time.perf_counter()
+    response = session().request(method, f"http://127.0.0.1:{server.port}{path}", json=body, timeout=60,
+                                 headers={"X-Forwarded-For": "10.47.0.1"})
+    return (time.perf_counter() - started) * 1000, response.status_code
+
+
+def module_label(filename):
+    """Package name for node_modules, path below .next/server for the app bundle"""
+    parts = Path(filename).parts
+    if "node_modules" in parts:
+        rest = parts[len(parts) - parts[::-1].index("node_modules"):]
+        return "/".join(rest[:2]) if rest[0].startswith("@") else rest[0]
+    if "server" in parts:
+        return "/".join(parts[len(parts) - parts[::-1].index("server"):])
+    return os.path.relpath(filename, REPO_ROOT)
+
+
+class ClientTagger:
+    """Which heavy SDKs a loaded file is (or bundles), read once per file"""
+
+    def __init__(self):
+        self.tags = {}
+        self.by_label = defaultdict(set)
+
+    def __call__(self, filename):
+        if filename not in self.tags:
+            label = module_label(filename)
+            if label in CLIENT_MARKERS:
+                found = {label}
+            else:
+                try:
+                    content = Path(filename).read_bytes()
+                except OSError:
+                    content = b""
+                found = {client for client, markers in CLIENT_MARKERS.items()
+                         if "node_modules" not in filename and any(m in content for m in markers)}
+            self.tags[filename] = found
+            self.by_label[label] |= found
+        return self.tags[filename]
+
+
+def measure(route, args, env, tagger):
+    method, path, body, _ = routes()[route]
+    with tempfile.NamedTemporaryFile(suffix=".json") as handle:
+        timings_file = handle.name
+    node_options = f"{os.environ.get('NODE_OPTIONS', '')} --require {PRELOAD}".strip()
+    server = NextServer(args.port, {**env, "REQUIRE_TIMINGS_FILE": timings_file, "NODE_OPTIONS": node_options})
+    with server:
+        listen_s = server.wait_listening()
+        first_ms, status = timed_request(server, method, path, body)
+        warm_ms, _ = timed_request(server, method, path, body)
+        time.sleep(0.3)  # the preload rewrites its file every 200ms
+    try:
+        timings = json.loads(Path(timings_file).read_text())
+    finally:
+        Path(timings_file).unlink(missing_ok=True)
+
+    listening_at = timings["listeningAt"] or 0
+    first_at = timings["firstRequestAt"] or float("inf")
+    during_first = [r for r in timings["records"] if first_at <= r["at"] <= first_at + first_ms]
+    loaded_clients = set()
+    for record in timings["records"]:
+        if record["at"] <= first_at + first_ms:
+            loaded_clients |= tagger(record["file"])
+    modules = defaultdict(float)
+    for record in during_first:
+        modules[module_label(record["file"])] += record["selfMs"]
+    return {
+        "status": status,
+        "listen_s": listen_s,
+        "first_ms": first_ms,
+        "warm_ms": warm_ms,
+        "startup_load_ms": sum(r["selfMs"] for r in timings["records"] if r["at"] < listening_at),
+        "first_load_ms": sum(r["selfMs"] for r in during_first),
+        "modules": modules,
+        "clients": loaded_clients,
+    }
+
+
+def run(args):
+    selected = args.routes or list(routes())
+    unknown = set(selected) - set(routes())
+    if unknown:
+        print(f"❌ unknown route(s): {', '.join(sorted(unknown))}")
+        return 1
+
+    standins = [] if args.external_standin else [UplistingStandIn().start(), StripeStandIn().start()]
+    env = {} if args.with_warmer else {"CALENDAR_WARMER_ENABLED": "false"}
+    tagger = ClientTagger()
+    results = {}
+    try:
+        for route in selected:
+            runs = [measure(route, args, env, tagger) for _ in range(args.repeats)]
+            results[route] = runs
+            print(f"🧊 {route}: " + ", ".join(f"{r['first_ms']:.0f}ms" for r in runs)
+                  + f" (status {runs[0]['status']})")
+    finally:
+        for standin in standins:
+            standin.stop()
+
+    medians = {route: {metric: statistics.median(r[metric] for r in runs) for metric in METRICS}
+               for route, runs in results.items()}
+    print(f"\n📊 medians over {args.repeats} fresh server(s) per route")
+    print(f"   {'route':<22} {'listen':>7} {'first':>9} {'warm':>8} {'startup load':>13} {'first load':>11}  SDKs")
+    problems = []
+    for route, runs in results.items():
+        m = medians[route]
+        clients = set().union(*(r["clients"] for r in runs))
+        print(f"   {route:<22} {m['listen_s']:6.2f}s {m['first_ms']:7.1f}ms {m['warm_ms']:6.1f}ms "
+              f"{m['startup_load_ms']:11.1f}ms {m['first_load_ms']:9.1f}ms  {', '.join(sorted(clients)) or '-'}")
+        unexpected = clients - routes()[route][3]
+        if unexpected:
+            problems.append(f"{route} loads {', '.join(sorted(unexpected))} without using it")
+
+    print("\n🐢 slowest module loads during the first request (mean self time)")
+    for route, runs in results.items():
+        totals = defaultdict(float)
+        for r in runs:
+            for label, ms in r["modules"].items():
+                totals[label] += ms / len(runs)
+        top = sorted(totals.items(), key=lambda item: -item[1])[:args.top]
+        listed = ", ".join(f"{label} {ms:.1f}ms" + (f" [{', '.join(sorted(tagger.by_label[label]))}]"
+                                                    if tagger.by_label.get(label) else "")
+                           for label, ms in top)
+        print(f"   {route:<22} {listed or '-'}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        for route, m in medians.items():
+            before = baseline.get(route, {}).get("first_ms")
+            # Small absolute differences are noise on a fresh process
+            if before and m["first_ms"] > before * (1 + args.tolerance) and m["first_ms"] - before > 20:
+                problems.append(f"{route}: first request {m['first_ms']:.0f}ms, baseline {before:.0f}ms")
+    if args.save:
+        Path(args.save).write_text(json.dumps(medians, indent=2))
+        print(f"💾 medians saved to {args.save}")
+
+    for problem in problems:
+        print(f"❌ {problem}")
+    print("✅ No route loads an SDK it doesn't use" + (" and no cold-start regression" if args.compare else "")
+          if not problems else f"❌ {len(problems)} problem(s)")
+    return 0 if not problems else 1
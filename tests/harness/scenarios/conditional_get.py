@@ -0,0 +1,127 @@
+"""
+Conditional GET on the read-only API routes.
+
+Replays a scripted browsing session (home, /stay, property pages with their
+calendars, checkout, then navigating back) with a browser-like client that
+keeps an ETag cache and revalidates with If-None-Match. Verifies that:
+  - every read-only route sends an ETag and a Cache-Control header
+  - a matching If-None-Match yields 304 with an empty body
+  - a stale If-None-Match yields the full 200 body
+and reports how many bytes revalidation saved over the session.
+"""
+
+from datetime import date, timedelta
+
+from .. import config, fixtures
+from ..load import session
+
+DESCRIPTION = "Verify ETag/304 handling and measure bytes saved over a browsing session"
+
+
+def add_arguments(parser):
+    parser.add_argument("--rounds", type=int, default=3,
+                        help="how many times the session is replayed (navigating back and forth)")
+
+
+def browsing_session(property_ids):
+    today = date.today()
+    calendar_from = today.isoformat()
+    calendar_to = (today + timedelta(days=182)).isoformat()
+    check_in = (today + timedelta(days=30)).isoformat()
+    check_out = (today + timedelta(days=34)).isoformat()
+
+    paths = ["/properties?view=card", "/properties?view=card"]
+    for property_id in property_ids:
+        paths += [
+            f"/properties/{property_id}",
+            f"/availability/{property_id}?from={calendar_from}&to={calendar_to}",
+            f"/availability/{property_id}?from={check_in}&to={check_out}&forBooking=true",
+        ]
+    paths += ["/stripe/config", "/properties?view=card"]
+    return paths
+
+
+class BrowserCache:
+    """ETag cache of a single browser tab"""
+
+    def __init__(self):
+        self.entries = {}
+        self.stats = {"requests": 0, "200": 0, "304": 0, "bytes": 0, "bytes_saved": 0}
+        self.problems = []
+
+    def get(self, path):
+        url = f"{config.API_BASE}{path}"
+        headers = {}
+        if path in self.entries:
+            headers["If-None-Match"] = self.entries[path]["etag"]
+
+        response = session().get(url, headers=headers, timeout=30)
+        self.stats["requests"] += 1
+        etag = response.headers.get("ETag")
+
+        if not response.headers.get("Cache-Control"):
+            self.problems.append(f"{path}: no Cache-Control")
+
+        if response.status_code == 304:
+            self.stats["304"] += 1
+            if response.content:
+                self.problems.append(f"{path}: 304 with a body")
+            if path not in self.entries:
+                self.problems.append(f"{path}: 304 without If-None-Match")
+            else:
+                self.stats["bytes_saved"] += len(self.entries[path]["body"])
+            return self.entries.get(path, {}).get("body")
+
+        if response.status_code != 200:
+            self.problems.append(f"{path}: status {response.status_code}")
+            return None
+
+        self.stats["200"] += 1
+        self.stats["bytes"] += len(response.content)
+        if not etag:
+            self.problems.append(f"{path}: no ETag")
+        elif path in self.entries and self.entries[path]["body"] == response.content:
+            self.problems.append(f"{path}: unchanged body re-sent instead of 304")
+        if etag:
+            self.entries[path] = {"etag": etag, "body": response.content}
+        return response.content
+
+
+def check_stale_etag(path):
+    response = session().get(f"{config.API_BASE}{path}", headers={"If-None-Match": '"stale"'}, timeout=30)
+    if response.status_code != 200 or not response.content:
+        return [f"{path}: stale ETag answered with {response.status_code}"]
+    weak = session().get(f"{config.API_BASE}{path}",
+                         headers={"If-None-Match": f"W/{response.headers.get('ETag')}"}, timeout=30)
+    if weak.status_code != 304:
+        return [f"{path}: weak ETag form answered with {weak.status_code}"]
+    return []
+
+
+def run(args):
+    paths = browsing_session(fixtures.PROPERTY_IDS)
+    browser = BrowserCache()
+
+    for _ in range(args.rounds):
+        for path in paths:
+            browser.get(path)
+
+    problems = list(browser.problems)
+    for path in ("/properties", f"/properties/{fixtures.PROPERTY_IDS[0]}", "/stripe/config"):
+        problems += check_stale_etag(path)
+
+    stats = browser.stats
+    total = stats["bytes"] + stats["bytes_saved"]
+    print(f"🧭 {stats['requests']} requests over {args.rounds} round(s) of {len(paths)} navigations")
+    print(f"   200={stats['200']} 304={stats['304']}")
+    print(f"   bytes downloaded={stats['bytes']:,} bytes saved by 304s={stats['bytes_saved']:,} "
+          f"({stats['bytes_saved'] / total:.0%} of {total:,})" if total else "   no bytes transferred")
+
+    for problem in problems[:10]:
+        print(f"❌ {problem}")
+    if stats["304"] == 0:
+        print("❌ no request was answered with 304")
+        problems.append("no 304s")
+
+    print("✅ conditional GET OK" if not problems else f"❌ {len(problems)} problem(s)")
+    return 0 if not problems else 1
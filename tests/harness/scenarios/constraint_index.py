@@ -0,0 +1,151 @@
+"""
+Property-based check of the booking constraint index against brute force.
+
+Generates random calendar snapshots (booked runs, closed arrival and
+departure days, per-day minimum and maximum stays, missing days and missing
+fields), evaluates every arrival x departure pair with buildConstraintIndex
+through scripts/constraint-index.mjs, and compares each answer and the
+blocked runs with a direct check of the rules on the raw days. Reports the
+smallest failing calendar. No server needed.
+"""
+
+import json
+import random
+import subprocess
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+
+DESCRIPTION = "Check the constraint index against brute-force stay validation"
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+SCRIPT = REPO_ROOT / "scripts" / "constraint-index.mjs"
+
+
+def add_arguments(parser):
+    parser.add_argument("--calendars", type=int, default=400)
+    parser.add_argument("--max-days", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=36)
+    parser.add_argument("--skip-timing", action="store_true")
+
+
+def random_calendar(rng, max_days):
+    """A calendar snapshot drawn from a random mix of densities"""
+    length = rng.randint(1, max_days)
+    booked, closed_arrival, closed_departure = rng.random() * 0.5, rng.random() * 0.3, rng.random() * 0.3
+    start = date(2026, 1, 1) + timedelta(days=rng.randint(0, 365))
+    days = []
+    available = True
+    for offset in range(length):
+        # Bookings come in runs: flip availability now and then
+        if rng.random() < booked:
+            available = not available
+        if 0 < offset < length - 1 and rng.random() < 0.03:
+            continue  # missing day
+        day = {"date": (start + timedelta(days=offset)).isoformat()}
+        if rng.random() > 0.02:
+            day["available"] = available
+        day["closed_for_arrival"] = rng.random() < closed_arrival
+        day["closed_for_departure"] = rng.random() < closed_departure
+        day["minimum_length_of_stay"] = rng.choice([None, 0, 1, 1, 2, 3, 5, 7])
+        day["maximum_available_nights"] = rng.choice([None, 0, 3, 7, 14, 28])
+        days.append(day)
+    return {"days": days, "minStay": rng.choice([1, 2, 3])}
+
+
+def valid_stay(calendar, by_date, check_in, check_out):
+    """The booking rules, checked directly on the days"""
+    arrival, departure = date.fromisoformat(check_in), date.fromisoformat(check_out)
+    nights = (departure - arrival).days
+    if nights < 1:
+        return False
+    first = by_date[check_in]
+    if first.get("closed_for_arrival") or by_date[check_out].get("closed_for_departure"):
+        return False
+    if nights < max(1, first.get("minimum_length_of_stay") or calendar["minStay"]):
+        return False
+    max_stay = first.get("maximum_available_nights") or 0
+    if max_stay and nights > max_stay:
+        return False
+    # Each day describes the night ending on its morning
+    for offset in range(1, nights + 1):
+        day = by_date.get((arrival + timedelta(days=offset)).isoformat())
+        if day is None or day.get("available") is False:
+            return False
+    return True
+
+
+def blocked_runs(calendar):
+    by_date = {day["date"]: day for day in calendar["days"]}
+    first = date.fromisoformat(calendar["days"][0]["date"])
+    last = date.fromisoformat(calendar["days"][-1]["date"])
+    runs, current = [], None
+    for offset in range((last - first).days + 1):
+        day_date = (first + timedelta(days=offset)).isoformat()
+        day = by_date.get(day_date)
+        if day is None or day.get("available") is False:
+            if current:
+                current["to"] = day_date
+            else:
+                current = {"from": day_date, "to": day_date}
+                runs.append(current)
+        else:
+            current = None
+    return runs
+
+
+def problems_for(calendar, result):
+    problems = []
+    by_date = {day["date"]: day for day in calendar["days"]}
+    dates = [day["date"] for day in calendar["days"]]
+    for row, check_in in enumerate(dates):
+        for column, check_out in enumerate(dates):
+            expected = valid_stay(calendar, by_date, check_in, check_out)
+            if (result["valid"][row][column] == "1") != expected:
+                problems.append(f"{check_in} -> {check_out}: index {'valid' if not expected else 'invalid'}, "
+                                f"brute force {'valid' if expected else 'invalid'}")
+    if result["blockedRuns"] != blocked_runs(calendar):
+        problems.append(f"blocked runs {result['blockedRuns']} != {blocked_runs(calendar)}")
+    return problems
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    calendars = [random_calendar(rng, args.max_days) for _ in range(args.calendars)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        calendars_path, out_path = Path(tmp) / "calendars.json", Path(tmp) / "out.json"
+        calendars_path.write_text(json.dumps({"calendars": calendars}))
+        result = subprocess.run(
+            ["node", str(SCRIPT), "--calendars", str(calendars_path), "--out", str(out_path)],
+            cwd=REPO_ROOT, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            print(result.stderr[-2000:])
+            print("❌ constraint index run failed")
+            return 1
+        results = json.loads(out_path.read_text())
+
+    failing = []
+    pairs = 0
+    for calendar, outcome in zip(calendars, results):
+        pairs += len(calendar["days"]) ** 2
+        problems = problems_for(calendar, outcome)
+        if problems:
+            failing.append((len(calendar["days"]), calendar, problems))
+
+    print(f"🔎 {len(calendars)} calendars, {pairs:,} arrival x departure pairs checked")
+    if failing:
+        _, calendar, problems = min(failing, key=lambda failure: failure[0])
+        print(f"❌ {len(failing)} calendar(s) disagree; smallest ({len(calendar['days'])} days):")
+        print(json.dumps(calendar, indent=1))
+        for problem in problems[:10]:
+            print(f"   {problem}")
+    else:
+        print("✅ constraint index matches brute-force validation")
+
+    if not args.skip_timing:
+        timing = subprocess.run(["node", str(SCRIPT)], cwd=REPO_ROOT, capture_output=True, text=True)
+        print(timing.stdout.rstrip())
+
+    return 0 if not failing else 1
@@ -0,0 +1,103 @@
+"""
+Responsive image variants on /api/properties.
+
+Checks that every photo carries precomputed Filestack variants with the
+expected widths, formats and handle, and that the configured primary image
+comes first. With --download it also fetches the card image of each
+property from the CDN and compares original vs variant bytes, i.e. how much
+image data the listing page saves.
+"""
+
+import re
+
+from .. import config, fixtures
+from ..load import session
+
+DESCRIPTION = "Verify precomputed image variants and measure listing image bytes"
+
+EXPECTED_WIDTHS = [400, 640, 800, 1200, 1600]
+CARD_WIDTH = 800
+VARIANT_PATTERN = re.compile(
+    r"^https://cdn\.filestackcontent\.com/resize=width:(\d+),fit:max/quality=value:(\d+)"
+    r"/output=format:(webp|jpg)/compress/([A-Za-z0-9]+)$"
+)
+
+
+def add_arguments(parser):
+    parser.add_argument("--download", action="store_true",
+                        help="download card images from the CDN to measure byte savings")
+
+
+def handle_of(url):
+    return url.split("?")[0].rstrip("/").split("/")[-1]
+
+
+def check_photo(photo):
+    problems = []
+    variants = photo.get("variants")
+    if not variants:
+        return ["missing variants"]
+    if variants.get("widths") != EXPECTED_WIDTHS:
+        problems.append(f"widths {variants.get('widths')}")
+    for fmt in ("webp", "jpg"):
+        urls = variants.get(fmt) or []
+        if len(urls) != len(EXPECTED_WIDTHS):
+            problems.append(f"{fmt}: {len(urls)} urls")
+            continue
+        for width, url in zip(EXPECTED_WIDTHS, urls):
+            match = VARIANT_PATTERN.match(url)
+            if not match:
+                problems.append(f"malformed {url}")
+            elif int(match.group(1)) != width or match.group(3) != fmt:
+                problems.append(f"{url} is not {width}w {fmt}")
+            elif match.group(4) != handle_of(photo["url"]):
+                problems.append(f"{url} has the wrong handle")
+    return problems
+
+
+def content_length(url):
+    response = session().get(url, timeout=60)
+    response.raise_for_status()
+    return len(response.content)
+
+
+def run(args):
+    response = session().get(f"{config.API_BASE}/properties", timeout=30)
+    if response.status_code != 200:
+        print(f"❌ /api/properties returned {response.status_code}")
+        return 1
+
+    properties = response.json()["properties"]
+    photos = sum(len(p.get("photos", [])) for p in properties)
+    print(f"📦 /api/properties: {len(properties)} properties, {photos} photos, {len(response.content):,} bytes")
+
+    failures = 0
+    for prop in properties:
+        for index, photo in enumerate(prop.get("photos", [])):
+            problems = check_photo(photo)
+            if problems:
+                failures += 1
+                print(f"❌ {prop['id']} photo {index}: {'; '.join(problems[:3])}")
+
+        primary = fixtures.PRIMARY_HANDLES.get(str(prop["id"]))
+        if primary and prop.get("photos") and handle_of(prop["photos"][0]["url"]) != primary:
+            failures += 1
+            print(f"❌ {prop['id']}: primary image is not first")
+
+    if failures == 0:
+        print(f"✅ All {photos} photos carry valid webp/jpg variants at {EXPECTED_WIDTHS}")
+
+    if args.download:
+        original_total = variant_total = 0
+        for prop in properties:
+            photo = prop["photos"][0]
+            card = photo["variants"]["webp"][EXPECTED_WIDTHS.index(CARD_WIDTH)]
+            original = content_length(photo["url"])
+            variant = content_length(card)
+            original_total += original
+            variant_total += variant
+            print(f"   {prop['id']}: original {original:,} B → card webp {variant:,} B")
+        saved = 100 * (1 - variant_total / original_total) if original_total else 0
+        print(f"📉 Listing card images: {original_total:,} B → {variant_total:,} B ({saved:.1f}% smaller)")
+
+    return 0 if failures == 0 else 1
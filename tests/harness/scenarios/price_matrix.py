@@ -0,0 +1,182 @@
+"""
+Requests per date-picker session: per-selection pricing vs the price matrix.
+
+Replays simulated guest sessions on property pages. Each session opens the
+availability calendar, pokes --selections date ranges and changes the guest
+count --guest-changes times, and is played twice:
+  - per-selection: one /api/availability/...&forBooking=true per selection
+    (how app/property/[id]/page.js priced selections before)
+  - matrix: one /api/availability/[id]/price-matrix per guest count, every
+    selection priced locally (a port of priceFromMatrix)
+Reports API requests, upstream calendar calls, bytes and latency per
+session for both, and checks every locally priced selection against the
+forBooking accommodation total and the reference engine's grand total. A
+selection the matrix calls available must not contain a night the fixture
+calendar marks unavailable.
+"""
+
+import random
+import time
+from datetime import date, timedelta
+
+from .. import config, fixtures
+from ..load import session
+from ..pricing_reference import booking_price, to_minor
+from ..standins import UplistingStandIn, fetch_stats
+
+DESCRIPTION = "Compare requests per date-picker session with and without the price matrix"
+
+MATRIX_DAYS = 180
+MATRIX_NIGHTS = 28
+
+
+def add_arguments(parser):
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--selections", type=int, default=12, help="date ranges poked per session")
+    parser.add_argument("--guest-changes", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=35)
+    parser.add_argument("--external-standin", action="store_true",
+                        help="use a stand-in started with `python -m tests.harness standins`")
+
+
+def plan_session(rng, today, selection_count, guest_changes):
+    """Property, guest counts and the selections poked under each of them"""
+    property_id = rng.choice(fixtures.PROPERTY_IDS)
+    capacity = fixtures.profile_for(property_id)["capacity"]
+    guest_counts = [2] + [rng.randint(1, capacity) for _ in range(guest_changes)]
+    selections = []
+    for _ in range(selection_count):
+        check_in = today + timedelta(days=rng.randint(1, MATRIX_DAYS - 1))
+        nights = rng.randint(1, 14)
+        selections.append((rng.randrange(len(guest_counts)), check_in, check_in + timedelta(days=nights)))
+    return property_id, guest_counts, sorted(selections, key=lambda selection: selection[0])
+
+
+class Session:
+    """Counts the API requests and bytes of one simulated page session"""
+
+    def __init__(self):
+        self.requests = 0
+        self.bytes = 0
+        self.elapsed_ms = 0.0
+
+    def get(self, path):
+        started = time.perf_counter()
+        response = session().get(f"{config.API_BASE}{path}", timeout=60)
+        self.elapsed_ms += (time.perf_counter() - started) * 1000
+        self.requests += 1
+        self.bytes += len(response.content)
+        response.raise_for_status()
+        return response.json()
+
+
+def open_calendar(browser, property_id, today):
+    browser.get(f"/availability/{property_id}?from={today.isoformat()}"
+                f"&to={(today + timedelta(days=182)).isoformat()}")
+
+
+def per_selection(property_id, guest_counts, selections, today):
+    browser = Session()
+    open_calendar(browser, property_id, today)
+    totals = []
+    for _, check_in, check_out in selections:
+        data = browser.get(f"/availability/{property_id}?from={check_in.isoformat()}"
+                           f"&to={check_out.isoformat()}&forBooking=true")
+        totals.append(data["pricing"]["total"])
+    return browser, totals
+
+
+def price_from_matrix(matrix, check_in, check_out):
+    """Port of priceFromMatrix: (accommodation, grand total in centimes, available), or None"""
+    start = (check_in - date.fromisoformat(matrix["from"])).days
+    nights = (check_out - check_in).days
+    if not (0 <= start < matrix["days"] and 1 <= nights <= matrix["maxNights"]):
+        return None
+    accommodation = sum(matrix["nightlyRates"][start:start + nights])
+    available = not any(start <= index < start + nights for index in matrix["unavailableNights"])
+    return accommodation, matrix["grandTotals"][start * matrix["maxNights"] + nights - 1], available
+
+
+def with_matrix(property_id, guest_counts, selections, today):
+    browser = Session()
+    open_calendar(browser, property_id, today)
+    matrices = {}
+    priced = []
+    for guests_index, check_in, check_out in selections:
+        guests = guest_counts[guests_index]
+        if guests not in matrices:
+            matrices[guests] = browser.get(
+                f"/availability/{property_id}/price-matrix?from={today.isoformat()}"
+                f"&days={MATRIX_DAYS}&maxNights={MATRIX_NIGHTS}&guests={guests}"
+            )
+        priced.append(price_from_matrix(matrices[guests], check_in, check_out))
+    return browser, priced
+
+
+def upstream_calendar_calls():
+    calls = fetch_stats("uplisting")["calls"]
+    return sum(count for key, count in calls.items() if "calendar" in key)
+
+
+def run(args):
+    standin = None if args.external_standin else UplistingStandIn().start()
+    rng = random.Random(args.seed)
+    today = date.today()
+    totals = {"per-selection": [0, 0, 0.0, 0], "matrix": [0, 0, 0.0, 0]}
+    problems = []
+
+    try:
+        for _ in range(args.sessions):
+            property_id, guest_counts, selections = plan_session(rng, today, args.selections, args.guest_changes)
+
+            before = upstream_calendar_calls()
+            legacy, legacy_totals = per_selection(property_id, guest_counts, selections, today)
+            middle = upstream_calendar_calls()
+            local, priced = with_matrix(property_id, guest_counts, selections, today)
+            after = upstream_calendar_calls()
+
+            for name, browser, upstream in (("per-selection", legacy, middle - before), ("matrix", local, after - middle)):
+                stats = totals[name]
+                stats[0] += browser.requests
+                stats[1] += browser.bytes
+                stats[2] += browser.elapsed_ms
+                stats[3] += upstream
+
+            plan = fixtures.fee_tax_plan(property_id)
+            for (guests_index, check_in, check_out), total, result in zip(selections, legacy_totals, priced):
+                if result is None:
+                    problems.append(f"{property_id} {check_in}..{check_out}: outside the matrix")
+                    continue
+                accommodation, grand_total, available = result
+                # Stand-in bookings and holds only take nights away, so only this direction is wrong
+                closed = [night for night in fixtures.date_range(check_in, check_out) if night != check_in
+                          and not fixtures.calendar_day(property_id, night)["available"]]
+                if available and closed:
+                    problems.append(f"{property_id} {check_in}..{check_out}: matrix offers unavailable "
+                                    f"night(s) {', '.join(night.isoformat() for night in closed)}")
+                if accommodation != to_minor(total):
+                    problems.append(f"{property_id} {check_in}..{check_out}: matrix accommodation "
+                                    f"{accommodation}, forBooking {to_minor(total)}")
+                expected = booking_price(plan, accommodation / 100, plan["cleaning"],
+                                         (check_out - check_in).days, guest_counts[guests_index], 0, 0)
+                if grand_total != expected["grandTotal"]:
+                    problems.append(f"{property_id} {check_in}..{check_out}: matrix total {grand_total}, "
+                                    f"reference {expected['grandTotal']}")
+    finally:
+        if standin:
+            standin.stop()
+
+    print(f"🗓️  {args.sessions} sessions, {args.selections} selections and "
+          f"{args.guest_changes} guest change(s) each (per session):")
+    for name, (requests_made, size, elapsed_ms, upstream) in totals.items():
+        print(f"  {name:<14} {requests_made / args.sessions:6.1f} API requests  "
+              f"{upstream / args.sessions:6.1f} upstream calendar calls  "
+              f"{size / args.sessions / 1024:8.1f} KB  {elapsed_ms / args.sessions:8.1f} ms waiting")
+    saved = 1 - totals["matrix"][0] / max(totals["per-selection"][0], 1)
+    print(f"📉 {saved:.0%} fewer API requests per session with the price matrix")
+
+    for problem in problems[:10]:
+        print(f"❌ {problem}")
+    print("✅ matrix prices match forBooking and the reference" if not problems
+          else f"❌ {len(problems)} mismatch(es)")
+    return 0 if not problems else 1
@@ -0,0 +1,253 @@
+"""
+Fuzz /api/stripe/create-payment-intent against the NumPy reference pricing.
+
+Generates tens of thousands of stay / guest / fee / tax combinations as
+arrays over the production listings and generated fuzz properties (with
+randomized fees and all four tax labels, see fixtures.fee_tax_plan),
+computes every expected total in one vectorized pass and then posts the
+bookings to the API in concurrent batches. Each response's pricing, tax
+breakdown and the amount of the created Stripe payment intent are compared
+exactly with the reference.
+
+create-payment-intent holds a stay's nights (lib/booking-holds.js), so every
+case gets its own slot on its property, MAX_NIGHTS apart, and its hold is
+released with a payment_intent.canceled webhook once checked. A 409 (dates
+held by another checkout, e.g. a scenario running alongside) is reported on
+its own: that case was never priced.
+
+Needs the Uplisting and Stripe stand-ins (started here unless
+--external-standin) and a MongoDB at HARNESS_MONGO_URL for booking records.
+"""
+
+import ipaddress
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+import numpy as np
+import requests
+
+from .. import config, fixtures
+from ..load import print_summary, run_load, session
+from ..pricing_reference import PlanTable, booking_price, calculate_booking_price
+from ..standins import StripeStandIn, UplistingStandIn
+from .booking_holds import canceled_event, send_webhook
+
+DESCRIPTION = "Fuzz payment-intent pricing against the vectorized reference engine"
+
+FIELDS = ["accommodationTotal", "cleaningFee", "extraGuestFee", "subtotal", "totalTax", "grandTotal"]
+# Payment intents are limited to 10 per client per hour (middleware.js)
+REQUESTS_PER_CLIENT = 10
+MAX_NIGHTS = 28
+
+
+def add_arguments(parser):
+    parser.add_argument("--combinations", type=int, default=20000)
+    parser.add_argument("--fuzz-properties", type=int, default=50,
+                        help="generated properties with randomized fees and taxes")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=20251201)
+    parser.add_argument("--offline", action="store_true",
+                        help="only check the vectorized engine against the scalar port")
+    parser.add_argument("--external-standin", action="store_true",
+                        help="use stand-ins started with `python -m tests.harness standins`")
+
+
+def generate(count, property_ids, seed):
+    rng = np.random.default_rng(seed)
+    plan = rng.integers(0, len(property_ids), count)
+    nights = rng.integers(1, MAX_NIGHTS + 1, count)
+    # adults == 0 exercises the route's `adults || 2` default
+    adults = rng.choice(np.arange(0, 9), count, p=[0.05] + [0.95 / 8] * 8)
+    children = rng.integers(0, 5, count)
+    infants = rng.integers(0, 3, count)
+
+    nightly = rng.uniform(80, 700, count)
+    decimals = rng.choice([0, 1, 2], count)
+    accommodation = np.round(nightly * nights * 10.0 ** decimals) / 10.0 ** decimals
+
+    plans = [fixtures.fee_tax_plan(property_id) for property_id in property_ids]
+    listed_cleaning = np.array([p["cleaning"] for p in plans], dtype=np.float64)[plan]
+    cleaning_kind = rng.choice(["listed", "omitted", "random"], count, p=[0.7, 0.15, 0.15])
+    cleaning = np.select(
+        [cleaning_kind == "listed", cleaning_kind == "omitted"],
+        [listed_cleaning, 0.0],
+        np.round(rng.uniform(0, 400, count), 2),
+    )
+    # The n-th case of a property checks in n * MAX_NIGHTS days out: no two stays share a night
+    order = np.argsort(plan, kind="stable")
+    rank = np.empty(count, dtype=np.int64)
+    rank[order] = np.arange(count) - np.searchsorted(plan[order], plan[order])
+    check_in_offset = 1 + rank * MAX_NIGHTS
+
+    return {
+        "plan": plan, "nights": nights, "adults": adults, "children": children, "infants": infants,
+        "accommodation": accommodation, "cleaning": cleaning, "cleaning_omitted": cleaning_kind == "omitted",
+        "check_in_offset": check_in_offset,
+    }, plans
+
+
+def expected_prices(cases, table):
+    # create-payment-intent defaults adults to 2 when missing or 0
+    adults = np.where(cases["adults"] == 0, 2, cases["adults"])
+    return calculate_booking_price(
+        cases["plan"], cases["accommodation"], cases["cleaning"], cases["nights"],
+        adults, cases["children"], cases["infants"], table,
+    )
+
+
+def self_check(cases, plans, expected, sample):
+    """Compare a sample of the vectorized results with the scalar port, in centimes"""
+    problems = []
+    minor = expected["minor"]
+    for i in sample:
+        adults = int(cases["adults"][i]) or 2
+        scalar = booking_price(
+            plans[cases["plan"][i]], float(cases["accommodation"][i]), float(cases["cleaning"][i]),
+            int(cases["nights"][i]), adults, int(cases["children"][i]), int(cases["infants"][i]),
+        )
+        for field in ("extraGuestFee", "subtotal", "totalTax", "grandTotal"):
+            if scalar[field] != minor[field][i]:
+                problems.append(f"row {i} {field}: scalar {scalar[field]!r} vector {minor[field][i]!r}")
+        if scalar["stripeAmount"] != expected["stripeAmount"][i]:
+            problems.append(f"row {i} stripeAmount: scalar {scalar['stripeAmount']!r} "
+                            f"vector {expected['stripeAmount'][i]!r}")
+        vector_taxes = [int(v) for v in minor["taxSlots"][i][expected["taxApplied"][i]]]
+        if scalar["taxes"] != vector_taxes:
+            problems.append(f"row {i} taxes: scalar {scalar['taxes']} vector {vector_taxes}")
+    return problems
+
+
+def client_address(index):
+    return str(ipaddress.IPv4Address(0x0A000000 + index // REQUESTS_PER_CLIENT))
+
+
+def payload(cases, property_ids, index):
+    check_in = date.today() + timedelta(days=int(cases["check_in_offset"][index]))
+    body = {
+        "propertyId": property_ids[cases["plan"][index]],
+        "checkIn": check_in.isoformat(),
+        "checkOut": (check_in + timedelta(days=int(cases["nights"][index]))).isoformat(),
+        "adults": int(cases["adults"][index]),
+        "children": int(cases["children"][index]),
+        "infants": int(cases["infants"][index]),
+        "guestName": f"Fuzz Guest {index}",
+        "guestEmail": f"fuzz-{index}@example.com",
+        "accommodationTotal": float(cases["accommodation"][index]),
+        "marketingConsent": False,
+    }
+    if not cases["cleaning_omitted"][index]:
+        body["cleaningFee"] = float(cases["cleaning"][index])
+    return body
+
+
+def compare(index, data, intent, expected):
+    mismatches = []
+    pricing = data.get("pricing", {})
+    for field in FIELDS:
+        if pricing.get(field) != float(expected[field][index]):
+            mismatches.append((field, float(expected[field][index]), pricing.get(field)))
+
+    expected_taxes = [float(v) for v in expected["taxSlots"][index][expected["taxApplied"][index]]]
+    actual_taxes = [tax.get("amount") for tax in pricing.get("taxes", [])]
+    if actual_taxes != expected_taxes:
+        mismatches.append(("taxes", expected_taxes, actual_taxes))
+
+    if intent is not None and intent.get("amount") != int(expected["stripeAmount"][index]):
+        mismatches.append(("stripeAmount", int(expected["stripeAmount"][index]), intent.get("amount")))
+    return mismatches
+
+
+def run(args):
+    property_ids = fixtures.PROPERTY_IDS + [
+        str(fixtures.FUZZ_PROPERTY_BASE + i) for i in range(args.fuzz_properties)
+    ]
+
+    started = time.perf_counter()
+    cases, plans = generate(args.combinations, property_ids, args.seed)
+    table = PlanTable(plans)
+    generated = time.perf_counter()
+    expected = expected_prices(cases, table)
+    computed = time.perf_counter()
+    print(f"🧮 {args.combinations:,} combinations over {len(property_ids)} properties: "
+          f"generated in {(generated - started) * 1000:.0f}ms, priced in {(computed - generated) * 1000:.1f}ms "
+          f"({args.combinations / max(computed - generated, 1e-9):,.0f} bookings/s)")
+
+    sample = np.random.default_rng(args.seed + 1).choice(args.combinations, min(2000, args.combinations), replace=False)
+    problems = self_check(cases, plans, expected, sample)
+    for problem in problems[:5]:
+        print(f"❌ reference self-check: {problem}")
+    print(f"{'✅' if not problems else '❌'} vectorized vs scalar reference on {len(sample):,} rows")
+    if args.offline or problems:
+        return 0 if not problems else 1
+
+    standins = []
+    if not args.external_standin:
+        standins = [UplistingStandIn().start(), StripeStandIn().start()]
+
+    stripe_session = requests.Session()
+    stripe_auth = {"Authorization": f"Bearer {config.STRIPE_SECRET}"}
+    mismatches = Counter()
+    examples = []
+    failures = Counter()
+    outcomes = Counter()
+
+    def check(index):
+        response = session().post(
+            f"{config.API_BASE}/stripe/create-payment-intent",
+            json=payload(cases, property_ids, index),
+            headers={"X-Forwarded-For": client_address(index)},
+            timeout=60,
+        )
+        if response.status_code == 409:
+            outcomes["held"] += 1
+            return False
+        if response.status_code != 200:
+            failures[response.status_code] += 1
+            return False
+        data = response.json()
+        intent = stripe_session.get(
+            f"{config.standin_url('stripe')}/v1/payment_intents/{data['paymentIntentId']}",
+            headers=stripe_auth, timeout=10,
+        ).json()
+        found = compare(index, data, intent, expected)
+        # Give the nights back, so re-runs and other scenarios find them free
+        if send_webhook(canceled_event(data["paymentIntentId"])) != 200:
+            outcomes["not released"] += 1
+        for field, want, got in found:
+            mismatches[field] += 1
+            if len(examples) < 10:
+                examples.append((index, field, want, got))
+        return not found
+
+    try:
+        total_checked = 0
+        total_elapsed = 0.0
+        for start in range(0, args.combinations, args.batch_size):
+            indexes = list(range(start, min(start + args.batch_size, args.combinations)))
+            result = run_load(lambda i: check(indexes[i]), len(indexes), args.concurrency)
+            total_checked += result.count
+            total_elapsed += result.elapsed_s
+            print_summary(f"batch {start // args.batch_size + 1}: rows {indexes[0]}-{indexes[-1]}", result)
+    finally:
+        for standin in standins:
+            standin.stop()
+
+    print(f"\n⚡ {total_checked:,} API comparisons in {total_elapsed:.1f}s "
+          f"({total_checked / max(total_elapsed, 1e-9):.1f} bookings/s)")
+    if outcomes["held"]:
+        print(f"⚠️  {outcomes['held']} case(s) not priced: their dates were held by another checkout (409)")
+    if outcomes["not released"]:
+        print(f"⚠️  {outcomes['not released']} hold(s) not released: the canceled webhook failed")
+    for status, count in failures.items():
+        print(f"❌ {count} request(s) answered {status}")
+    for field, count in mismatches.most_common():
+        print(f"❌ {field}: {count} mismatch(es)")
+    for index, field, want, got in examples:
+        print(f"   row {index} {field}: expected {want!r}, API {got!r} "
+              f"(request {payload(cases, property_ids, index)})")
+
+    ok = not mismatches and not failures
+    print("✅ API pricing matches the reference" if ok else "❌ pricing differs from the reference")
+    return 0 if ok else 1
@@ -0,0 +1,107 @@
+"""
+Diff the integer pricing kernel against the NumPy reference, then benchmark it.
+
+Generates the same fee / tax / stay combinations as pricing-fuzz, prices
+them in-process with scripts/benchmark-pricing.mjs (buildPricingPlan +
+quoteMinor, no server needed) and compares every centime total and tax
+slot with pricing_reference. Finishes with the script's micro-benchmark
+unless --skip-benchmark.
+"""
+
+import json
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from .. import fixtures
+from ..pricing_reference import PlanTable
+from .pricing_fuzz import expected_prices, generate
+
+DESCRIPTION = "Check the integer pricing kernel against the reference engine and benchmark it"
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+SCRIPT = REPO_ROOT / "scripts" / "benchmark-pricing.mjs"
+FIELDS = ["accommodationTotal", "cleaningFee", "extraGuestFee", "subtotal", "totalTax", "grandTotal"]
+
+
+def add_arguments(parser):
+    parser.add_argument("--combinations", type=int, default=100000)
+    parser.add_argument("--fuzz-properties", type=int, default=200,
+                        help="generated properties with randomized fees and taxes")
+    parser.add_argument("--seed", type=int, default=20251202)
+    parser.add_argument("--quotes", type=int, default=200000, help="quotes per benchmark run")
+    parser.add_argument("--skip-benchmark", action="store_true")
+
+
+def uplisting_plan(property_id):
+    """Fees and taxes of a property as lib/uplisting.js hands them to the calculator"""
+    _, included = fixtures.build_property(property_id)
+    return {
+        "fees": [item for item in included if item["type"] == "property_fees"],
+        "taxes": [item for item in included if item["type"] == "property_taxes"],
+    }
+
+
+def node(*args):
+    return subprocess.run(["node", str(SCRIPT), *args], cwd=REPO_ROOT, capture_output=True, text=True)
+
+
+def run(args):
+    property_ids = fixtures.PROPERTY_IDS + [
+        str(fixtures.FUZZ_PROPERTY_BASE + i) for i in range(args.fuzz_properties)
+    ]
+    cases, plans = generate(args.combinations, property_ids, args.seed)
+    reference = expected_prices(cases, PlanTable(plans))
+    expected = reference["minor"]
+    adults = np.where(cases["adults"] == 0, 2, cases["adults"])
+
+    rows = np.column_stack([
+        cases["plan"], cases["accommodation"], cases["cleaning"], cases["nights"],
+        adults, cases["children"], cases["infants"],
+    ]).tolist()
+    for row in rows:
+        for column in (0, 3, 4, 5, 6):
+            row[column] = int(row[column])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cases_path, out_path = Path(tmp) / "cases.json", Path(tmp) / "out.json"
+        cases_path.write_text(json.dumps({
+            "plans": [uplisting_plan(property_id) for property_id in property_ids],
+            "cases": rows,
+        }))
+        started = time.perf_counter()
+        result = node("--cases", str(cases_path), "--out", str(out_path))
+        elapsed = time.perf_counter() - started
+        if result.returncode != 0:
+            print(result.stderr[-2000:])
+            print("❌ kernel run failed")
+            return 1
+        actual = json.loads(out_path.read_text())
+
+    print(f"🧮 {args.combinations:,} quotes over {len(property_ids)} properties priced by the kernel "
+          f"in {elapsed:.2f}s (including node start-up and JSON)")
+
+    problems = []
+    for i, row in enumerate(actual):
+        for column, field in enumerate(FIELDS):
+            if row[column] != int(expected[field][i]):
+                problems.append(f"row {i} {field}: reference {int(expected[field][i])}, kernel {row[column]}")
+        taxes = [int(v) for v in expected["taxSlots"][i][reference["taxApplied"][i]]]
+        if row[6] != taxes:
+            problems.append(f"row {i} taxes: reference {taxes}, kernel {row[6]}")
+    for problem in problems[:10]:
+        print(f"❌ {problem}")
+    print(f"{'✅' if not problems else '❌'} kernel vs reference: "
+          f"{len(actual):,} quotes, {len(problems)} mismatch(es) (centimes, exact)")
+
+    if not args.skip_benchmark:
+        result = node("--quotes", str(args.quotes))
+        print(result.stdout.rstrip())
+        if result.returncode != 0:
+            problems.append("benchmark variants disagree")
+
+    return 0 if not problems else 1
+
@@ -0,0 +1,205 @@
+"""
+Profile the server while another scenario loads it.
+
+    python -m tests.harness profile [options] <scenario> [scenario options]
+
+Starts a fresh server (config.SERVER_COMMAND, which must run node) with V8
+CPU profiling on, and optionally the sampling heap profiler
+(--heap-profile) and heap snapshots before and after the load
+(--heap-snapshots; writing them shows up in the CPU profile as
+writeHeapSnapshot). Runs the scenario against it, stops it so Node writes
+its profiles, and summarizes them into --out (default
+/tmp/harness-profile-<scenario>):
+  - report.txt: top functions by self time, self time per lib/ file,
+    allocation sites and heap growth by constructor
+  - cpu.folded: folded stacks for flamegraph.pl or speedscope
+  - raw/: the .cpuprofile, .heapprofile and .heapsnapshot files, for
+    Chrome DevTools
+
+Build with `PROFILE_BUILD=true next build` first: the default build is
+minified and has no server source maps, so most frames can't be traced
+back to lib/. Profile options go before the scenario name; everything
+after it is the scenario's. Scenarios that start their own servers can't
+be profiled this way.
+"""
+
+import argparse
+import importlib
+import json
+import shutil
+import signal
+import time
+from collections import Counter
+from pathlib import Path
+
+from .. import config
+from ..profiles import CpuSummary, FrameResolver, heap_profile_summary, heap_snapshot_summary
+from ..server import NextServer
+
+DESCRIPTION = "Run a scenario against a server with CPU/heap profiling and summarize the profiles"
+
+# They restart the server themselves
+UNPROFILABLE = {"profile", "cold-start", "snapshot-restart"}
+
+
+def add_arguments(parser):
+    parser.add_argument("--out", help="report directory (default: /tmp/harness-profile-<scenario>)")
+    parser.add_argument("--port", type=int, default=3100)
+    parser.add_argument("--interval-us", type=int, default=1000, help="CPU sampling interval")
+    parser.add_argument("--heap-profile", action="store_true", help="also record allocation sites (--heap-prof)")
+    parser.add_argument("--heap-snapshots", action="store_true",
+                        help="write heap snapshots before and after the load and compare them")
+    parser.add_argument("--top", type=int, default=30, help="functions to list")
+    parser.add_argument("scenario", help="scenario to run under the profiler")
+    parser.add_argument("scenario_args", nargs=argparse.REMAINDER, help="options for the scenario")
+
+
+def profilable():
+    from ..__main__ import SCENARIOS
+
+    return [name for name in SCENARIOS if name not in UNPROFILABLE]
+
+
+def load_scenario(name, argv):
+    module = importlib.import_module(f".{name.replace('-', '_')}", __package__)
+    parser = argparse.ArgumentParser(prog=f"python -m tests.harness profile {name}")
+    module.add_arguments(parser)
+    return module, parser.parse_args(argv)
+
+
+def heap_snapshot(server, directory, label, timeout_s=300):
+    """Have the server write a heap snapshot (--heapsnapshot-signal) and wait until it's complete"""
+    before = set(directory.glob("*.heapsnapshot"))
+    server.process.send_signal(signal.SIGUSR2)
+    deadline = time.monotonic() + timeout_s
+    size = -1
+    while time.monotonic() < deadline:
+        time.sleep(0.5)
+        new = set(directory.glob("*.heapsnapshot")) - before
+        if new:
+            path = new.pop()
+            # Written synchronously and closed at the end: done once the size settles
+            if path.stat().st_size == size:
+                return path.rename(directory / f"{label}.heapsnapshot")
+            size = path.stat().st_size
+    raise TimeoutError(f"no {label} heap snapshot after {timeout_s}s")
+
+
+def ms(us):
+    return us / 1000
+
+
+def cpu_report(summary, top):
+    sampled = summary.sampled_us or 1
+    busy = sampled - summary.meta_us["(idle)"]
+    lines = [f"CPU: {ms(summary.wall_us) / 1000:.1f}s profiled, {ms(busy) / 1000:.1f}s busy "
+             f"({summary.meta_us['(garbage collector)'] / max(busy, 1):.1%} of it garbage collection)", "",
+             f"Top {top} functions by self time (% of busy time)",
+             f"  {'self ms':>9} {'self %':>7} {'total ms':>9}  function  location"]
+    for key, us in summary.self_us.most_common(top):
+        name, location = key
+        lines.append(f"  {ms(us):9.1f} {us / max(busy, 1):7.1%} {ms(summary.total_us[key]):9.1f}  {name}  {location}")
+    lines += ["", "Self time per source file"]
+    for file, us in summary.file_us.most_common():
+        lines.append(f"  {ms(us):9.1f} {us / max(busy, 1):7.1%}  {file}")
+    unmapped = sum(us for (name, location), us in summary.self_us.items()
+                   if ".next/" in location and not summary.locations[(name, location)])
+    if unmapped > busy * 0.05:
+        lines += ["", f"  {ms(unmapped):.0f}ms self time is in bundle chunks that couldn't be mapped to "
+                      "source; build with PROFILE_BUILD=true for source maps"]
+    return lines
+
+
+def heap_report(allocations, snapshots, top):
+    lines = []
+    if allocations is not None:
+        lines += ["", f"Top {top} allocation sites still live at exit (sampling heap profile)",
+                  f"  {'KiB':>9}  function  location"]
+        for (name, location), size in allocations.most_common(top):
+            lines.append(f"  {size / 1024:9.1f}  {name}  {location}")
+    if snapshots:
+        (before_counts, before_sizes), (after_counts, after_sizes) = snapshots
+        growth = Counter(after_sizes)
+        growth.subtract(before_sizes)
+        lines += ["", f"Heap growth over the load: {sum(before_sizes.values()) / 2**20:.1f} MiB -> "
+                      f"{sum(after_sizes.values()) / 2**20:.1f} MiB (shallow sizes)",
+                  f"  {'KiB':>9} {'objects':>9}  constructor"]
+        for key, size in growth.most_common(top):
+            if size <= 0:
+                break
+            lines.append(f"  {size / 1024:9.1f} {after_counts[key] - before_counts[key]:9d}  {key}")
+    return lines
+
+
+def run(args):
+    if args.scenario not in profilable():
+        print(f"❌ can't profile {args.scenario!r}; choose from {', '.join(profilable())}")
+        return 1
+    module, scenario_args = load_scenario(args.scenario, args.scenario_args)
+    out = Path(args.out or f"/tmp/harness-profile-{args.scenario}")
+    raw = out / "raw"
+    shutil.rmtree(raw, ignore_errors=True)
+    raw.mkdir(parents=True)
+    node_args = [f"--cpu-prof-dir={raw}", "--cpu-prof", f"--cpu-prof-interval={args.interval_us}",
+                 f"--diagnostic-dir={raw}"]
+    if args.heap_profile:
+        node_args += [f"--heap-prof-dir={raw}", "--heap-prof"]
+    if args.heap_snapshots:
+        node_args.append("--heapsnapshot-signal=SIGUSR2")
+
+    # The scenario finds the server through config, and the server's base URL through its env
+    saved = config.BASE_URL, config.API_BASE
+    config.BASE_URL = f"http://127.0.0.1:{args.port}"
+    config.API_BASE = f"{config.BASE_URL}/api"
+    try:
+        with NextServer(args.port, log_path=out / "server.log", node_args=node_args) as server:
+            print(f"🔬 server listening after {server.wait_listening():.1f}s, profiling into {raw}")
+            if args.heap_snapshots:
+                heap_snapshot(server, raw, "before")
+            started = time.perf_counter()
+            try:
+                status = module.run(scenario_args)
+            except Exception as error:  # the profile of a crashed run is still worth reading
+                print(f"❌ {args.scenario} raised {error!r}")
+                status = 1
+            print(f"🔬 {args.scenario} finished in {time.perf_counter() - started:.1f}s with {status}")
+            if args.heap_snapshots:
+                heap_snapshot(server, raw, "after")
+    finally:
+        config.BASE_URL, config.API_BASE = saved
+
+    cpu_profiles = sorted(raw.glob("*.cpuprofile"))
+    if not cpu_profiles:
+        print(f"❌ the server wrote no CPU profile; see {out / 'server.log'}")
+        return 1
+    resolve = FrameResolver()
+    summary = CpuSummary(resolve)
+    for path in cpu_profiles:
+        summary.add(json.loads(path.read_text()))
+    allocations = None
+    if args.heap_profile:
+        allocations = Counter()
+        for path in sorted(raw.glob("*.heapprofile")):
+            heap_profile_summary(json.loads(path.read_text()), resolve, allocations)
+    snapshots = None
+    if args.heap_snapshots:
+        snapshots = [heap_snapshot_summary(raw / f"{label}.heapsnapshot") for label in ("before", "after")]
+
+    title = [f"Profile of {args.scenario} {' '.join(args.scenario_args)}".rstrip(),
+             f"Profiles: {', '.join(p.name for p in cpu_profiles)}", ""]
+    report = title + cpu_report(summary, args.top) + heap_report(allocations, snapshots, args.top)
+    (out / "report.txt").write_text("\n".join(report) + "\n")
+    (out / "cpu.folded").write_text("\n".join(summary.folded_lines()) + "\n")
+
+    print("\n".join(cpu_report(summary, min(args.top, 15))[:18]))
+    print(f"\n📝 {out / 'report.txt'}")
+    print(f"🔥 {out / 'cpu.folded'} (flamegraph.pl or https://www.speedscope.app)")
+    problems = []
+    if status:
+        problems.append(f"{args.scenario} failed; the profiles cover the failing run")
+    if not summary.self_us:
+        problems.append("the CPU profile has no samples outside V8 bookkeeping")
+    for problem in problems:
+        print(f"❌ {problem}")
+    print("✅ Profiles written and summarized" if not problems else f"❌ {len(problems)} problem(s)")
+    return 0 if not problems else 1
@@ -0,0 +1,137 @@
+"""
+Payload size and cost of the /api/properties views.
+
+Fetches the full list, the card projection and a `fields` projection and
+compares, per view:
+  - payload bytes, raw and gzip-compressed (what the browser downloads)
+  - server serialization time, from the Server-Timing header of the first
+    (uncached) and later (cached) responses
+  - client parse time (json.loads over the body, median of --parse-runs)
+  - request latency under load
+It also checks that every view carries an ETag and that the card view holds
+everything PropertyCard reads.
+"""
+
+import gzip
+import json
+import statistics
+import time
+
+from .. import config
+from ..load import print_summary, run_load, session
+
+DESCRIPTION = "Compare payload bytes, serialization and parse time of the property views"
+
+VIEWS = {
+    "full": "",
+    "card": "?view=card",
+    "fields": "?fields=id,name,photos",
+}
+
+CARD_KEYS = {
+    "id", "name", "description", "address", "maximum_capacity", "bedrooms", "bathrooms",
+    "minimum_length_of_stay", "check_in_time", "check_out_time", "amenities", "fees", "photos",
+}
+
+
+def add_arguments(parser):
+    parser.add_argument("--requests", type=int, default=200, help="requests per view under load")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--parse-runs", type=int, default=50, help="json.loads repetitions per view")
+
+
+def server_timing(response, metric="serialize"):
+    """Return (duration_ms, description) for a Server-Timing metric"""
+    for entry in response.headers.get("Server-Timing", "").split(","):
+        parts = [part.strip() for part in entry.split(";")]
+        if parts[0] != metric:
+            continue
+        values = dict(part.split("=", 1) for part in parts[1:] if "=" in part)
+        return float(values.get("dur", 0)), values.get("desc", "").strip('"')
+    return None, None
+
+
+def parse_time_ms(body, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        json.loads(body)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def check_card(properties):
+    problems = []
+    for prop in properties:
+        missing = CARD_KEYS - prop.keys()
+        extra = prop.keys() - CARD_KEYS
+        if missing:
+            problems.append(f"{prop.get('id')}: missing {sorted(missing)}")
+        if extra:
+            problems.append(f"{prop.get('id')}: unexpected {sorted(extra)}")
+        if len(prop.get("description") or "") > 100:
+            problems.append(f"{prop.get('id')}: description not truncated")
+    return problems
+
+
+def run(args):
+    rows = {}
+    failures = 0
+
+    for view, query in VIEWS.items():
+        url = f"{config.API_BASE}/properties{query}"
+        first = session().get(url, timeout=30)
+        if first.status_code != 200:
+            print(f"❌ {view}: /api/properties{query} returned {first.status_code}")
+            return 1
+        second = session().get(url, timeout=30)
+
+        if not first.headers.get("ETag"):
+            print(f"❌ {view}: no ETag header")
+            failures += 1
+        elif first.headers["ETag"] != second.headers.get("ETag"):
+            print(f"❌ {view}: ETag changed between identical requests")
+            failures += 1
+
+        body = first.content
+        build_ms, build_desc = server_timing(first)
+        cached_ms, cached_desc = server_timing(second)
+        result = run_load(lambda i, u=url: session().get(u, timeout=30).status_code == 200,
+                          args.requests, args.concurrency)
+        print_summary(f"{view} ({url})", result)
+
+        rows[view] = {
+            "bytes": len(body),
+            "gzip_bytes": len(gzip.compress(body)),
+            "build_ms": build_ms if build_desc == "built" else None,
+            "cached_ms": cached_ms,
+            "parse_ms": parse_time_ms(body, args.parse_runs),
+            "p50_ms": result.p(50),
+            "errors": result.errors,
+        }
+        failures += result.errors
+
+        if view == "card":
+            problems = check_card(first.json()["properties"])
+            for problem in problems[:5]:
+                print(f"❌ card: {problem}")
+            failures += len(problems)
+
+    print("\n📏 Views")
+    print(f"   {'view':<8} {'bytes':>10} {'gzip':>9} {'build ms':>9} {'parse ms':>9} {'p50 ms':>8}")
+    for view, row in rows.items():
+        build = f"{row['build_ms']:.1f}" if row["build_ms"] is not None else "cached"
+        print(f"   {view:<8} {row['bytes']:>10,} {row['gzip_bytes']:>9,} {build:>9} "
+              f"{row['parse_ms']:>9.3f} {row['p50_ms']:>8.1f}")
+
+    full, card = rows["full"], rows["card"]
+    print(f"\n📉 card vs full: {1 - card['bytes'] / full['bytes']:.0%} fewer bytes, "
+          f"{1 - card['gzip_bytes'] / full['gzip_bytes']:.0%} fewer gzip bytes, "
+          f"parse {full['parse_ms'] / card['parse_ms']:.1f}x faster")
+
+    if card["bytes"] >= full["bytes"]:
+        print("❌ card view is not smaller than the full view")
+        failures += 1
+
+    print("✅ property views OK" if not failures else f"❌ {failures} problem(s)")
+    return 0 if not failures else 1
@@ -0,0 +1,187 @@
+"""
+Uplisting rate limits: 429 + Retry-After handling and priority lanes.
+
+The Uplisting stand-in enforces --upstream-rate requests per second and
+answers the excess with 429 and Retry-After. Browsing traffic floods it
+(/api/pricing for --properties cold properties from several clients) while
+booking-critical reads (/api/availability/...&forBooking=true) arrive at a
+steady pace. Reports latency and outcomes per class, the stand-in's 429 count
+and the server's scheduler metrics from /api/diagnostics/uplisting: booking
+reads should all succeed and stay fast while browsing is paced or shed.
+
+--direct drives lib/upstream-scheduler.js through scripts/rate-limit-check.mjs
+against the stand-in, without the Next server.
+"""
+
+import json
+import subprocess
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from .. import config, fixtures
+from ..load import percentile, session
+from ..standins import UplistingStandIn, configure, fetch_stats
+
+DESCRIPTION = "Flood Uplisting past its rate limit and check that booking reads keep priority"
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+SCRIPT = REPO_ROOT / "scripts" / "rate-limit-check.mjs"
+
+
+def add_arguments(parser):
+    parser.add_argument("--upstream-rate", type=float, default=4, help="stand-in requests per second")
+    parser.add_argument("--retry-after", type=int, default=1, help="stand-in Retry-After in seconds")
+    parser.add_argument("--clients", type=int, default=4, help="concurrent /api/pricing clients")
+    parser.add_argument("--properties", type=int, default=20, help="cold properties per /api/pricing call")
+    parser.add_argument("--rounds", type=int, default=3, help="/api/pricing calls per client")
+    parser.add_argument("--bookings", type=int, default=15, help="booking-critical reads")
+    parser.add_argument("--spacing-ms", type=int, default=300, help="gap between booking-critical reads")
+    parser.add_argument("--direct", action="store_true", help="drive the scheduler without the server")
+    # Above the stand-in's limit by default, so the 429 path is exercised
+    parser.add_argument("--rate", type=float, default=6, help="with --direct: scheduler tokens per second")
+    parser.add_argument("--burst", type=int, default=10, help="with --direct: scheduler bucket size")
+    parser.add_argument("--external-standin", action="store_true",
+                        help="use a stand-in started with `python -m tests.harness standins`")
+
+
+def summarize(name, latencies_ms, outcomes):
+    ordered = sorted(latencies_ms)
+    counts = {outcome: outcomes.count(outcome) for outcome in sorted(set(outcomes))}
+    print(f"  {name:<10} {len(ordered):4d} requests  p50 {percentile(ordered, 50):7.0f}ms  "
+          f"p95 {percentile(ordered, 95):7.0f}ms  {counts}")
+    return ordered
+
+
+def throttled_upstream():
+    return fetch_stats("uplisting")["calls"].get("throttled", 0)
+
+
+def run_direct(args, problems):
+    result = subprocess.run(
+        ["node", str(SCRIPT), "--url", config.standin_url("uplisting"), "--rate", str(args.rate),
+         "--burst", str(args.burst), "--browsing", str(args.clients * args.properties),
+         "--critical", str(args.bookings), "--spacing-ms", str(args.spacing_ms)],
+        cwd=REPO_ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        problems.append("scripts/rate-limit-check.mjs failed")
+        return None
+    data = json.loads(result.stdout)
+    lanes = {}
+    for lane, outcome in data["lanes"].items():
+        outcomes = [key for key, count in outcome["outcomes"].items() for _ in range(count)]
+        lanes[lane] = (summarize(lane, outcome["latenciesMs"], outcomes), outcomes)
+    return lanes, data["scheduler"]
+
+
+def run_server(args, problems):
+    run_id = int(time.time()) % 1000
+    start = date.today() + timedelta(days=run_id % 200)
+    lanes = {"browsing": ([], []), "critical": ([], [])}
+    lock = threading.Lock()
+
+    def record(lane, started, outcome):
+        with lock:
+            lanes[lane][0].append((time.perf_counter() - started) * 1000)
+            lanes[lane][1].append(outcome)
+
+    def browse(client):
+        for round_number in range(args.rounds):
+            first = fixtures.FUZZ_PROPERTY_BASE + (run_id * 100 + client * args.rounds + round_number) * args.properties
+            started = time.perf_counter()
+            response = session().post(f"{config.API_BASE}/pricing", timeout=120, json={
+                "propertyIds": [str(first + i) for i in range(args.properties)],
+                "from": start.isoformat(),
+                "to": (start + timedelta(days=30)).isoformat(),
+            })
+            if response.status_code != 200:
+                record("browsing", started, str(response.status_code))
+                continue
+            for result in response.json()["results"]:
+                record("browsing", started, "fallback" if result["pricing"].get("useFallback") else "200")
+
+    def book(i):
+        check_in = start + timedelta(days=40 + i)
+        started = time.perf_counter()
+        response = session().get(
+            f"{config.API_BASE}/availability/{fixtures.PROPERTY_IDS[i % len(fixtures.PROPERTY_IDS)]}"
+            f"?from={check_in.isoformat()}&to={(check_in + timedelta(days=3 + run_id % 20)).isoformat()}"
+            f"&forBooking=true", timeout=120)
+        record("critical", started, str(response.status_code))
+
+    threads = [threading.Thread(target=browse, args=(client,)) for client in range(args.clients)]
+    for thread in threads:
+        thread.start()
+    for i in range(args.bookings):
+        time.sleep(args.spacing_ms / 1000)
+        thread = threading.Thread(target=book, args=(i,))
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+
+    summarized = {lane: (summarize(lane, latencies, outcomes), outcomes)
+                  for lane, (latencies, outcomes) in lanes.items()}
+    response = session().get(f"{config.API_BASE}/diagnostics/uplisting", timeout=10)
+    if response.status_code != 200:
+        print(f"⚠️  /api/diagnostics/uplisting answered {response.status_code} (set ENABLE_DIAGNOSTICS=true)")
+        return summarized, None
+    return summarized, response.json()["scheduler"]
+
+
+def run(args):
+    standin = None
+    faults = {"rate_limit_per_sec": args.upstream_rate, "retry_after_s": args.retry_after}
+    if args.external_standin:
+        configure("uplisting", **faults)
+    else:
+        standin = UplistingStandIn(**faults).start()
+
+    problems = []
+    browsing = args.clients * args.properties * (1 if args.direct else args.rounds)
+    print(f"🚦 Stand-in limit {args.upstream_rate:g} req/s (Retry-After {args.retry_after}s); "
+          f"{browsing} browsing reads, {args.bookings} booking reads "
+          f"every {args.spacing_ms}ms{' (direct)' if args.direct else ''}")
+    try:
+        before = throttled_upstream()
+        outcome = run_direct(args, problems) if args.direct else run_server(args, problems)
+        throttled = throttled_upstream() - before
+    finally:
+        if standin:
+            standin.stop()
+        else:
+            configure("uplisting", rate_limit_per_sec=0)
+
+    if outcome is None:
+        for problem in problems:
+            print(f"❌ {problem}")
+        return 1
+    lanes, scheduler = outcome
+
+    print(f"🔁 Stand-in answered {throttled} request(s) with 429")
+    if scheduler:
+        depths = {lane: stats["maxDepth"] for lane, stats in scheduler["lanes"].items()}
+        shed = {lane: stats["expired"] for lane, stats in scheduler["lanes"].items()}
+        print(f"📈 Scheduler: {scheduler['ratePerSecond']:g} req/s burst {scheduler['burst']}, "
+              f"throttled {scheduler['throttled']}, retried {scheduler['retries']}, "
+              f"max queue depth {depths}, shed {shed}")
+        # The server's scheduler also counts earlier runs; the direct one is fresh
+        if (scheduler["throttled"] != throttled) if args.direct else (throttled and not scheduler["throttled"]):
+            problems.append(f"the stand-in sent {throttled} 429(s), the scheduler saw {scheduler['throttled']}")
+
+    critical_latencies, critical_outcomes = lanes["critical"]
+    browsing_latencies, _ = lanes["browsing"]
+    failed = [outcome for outcome in critical_outcomes if outcome != "200"]
+    if failed:
+        problems.append(f"{len(failed)} booking-critical read(s) failed: {sorted(set(failed))}")
+    if critical_latencies and browsing_latencies and percentile(critical_latencies, 50) > percentile(browsing_latencies, 50):
+        problems.append("booking-critical reads waited longer than browsing reads")
+
+    for problem in problems:
+        print(f"❌ {problem}")
+    print("✅ Booking reads kept priority under the upstream rate limit" if not problems
+          else f"❌ {len(problems)} problem(s)")
+    return 0 if not problems else 1
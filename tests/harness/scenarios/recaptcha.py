@@ -0,0 +1,96 @@
+"""
+reCAPTCHA verification and forms flow under load, fully offline.
+
+Verifies unique tokens, replays a share of them and optionally submits the
+contact form after each successful verification (the browser forms flow).
+Reports client latency, verifier calls and the server's own metrics.
+"""
+
+import uuid
+
+from .. import config
+from ..load import print_summary, run_load, session
+from ..standins import RecaptchaStandIn, fetch_stats
+
+DESCRIPTION = "Load-test /api/verify-recaptcha (and the contact form) against the local verifier"
+
+
+def add_arguments(parser):
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--replay-every", type=int, default=5,
+                        help="replay every Nth token (0 disables replays)")
+    parser.add_argument("--verifier-latency-ms", type=int, default=80)
+    parser.add_argument("--forms", action="store_true",
+                        help="submit the contact form after each successful verification")
+    parser.add_argument("--external-standin", action="store_true",
+                        help="use a stand-in already running on the configured port")
+
+
+def verify(token, action="contact_form"):
+    return session().post(f"{config.API_BASE}/verify-recaptcha",
+                          json={"token": token, "action": action}, timeout=30)
+
+
+def submit_contact(i):
+    # Distinct client address per virtual user so the form rate limit applies per user
+    headers = {"X-Forwarded-For": f"10.0.{i // 250}.{i % 250}"}
+    return session().post(f"{config.API_BASE}/forms/contact", headers=headers, timeout=30, json={
+        "inquiryType": "general",
+        "name": f"Load Test {i}",
+        "email": f"load.test.{i}@example.com",
+        "phone": "",
+        "subject": "Harness submission",
+        "message": "Submitted by the reCAPTCHA load scenario.",
+    })
+
+
+def run(args):
+    standin = None
+    if not args.external_standin:
+        standin = RecaptchaStandIn(latency_ms=args.verifier_latency_ms).start()
+        print(f"🧪 reCAPTCHA stand-in on {standin.url} ({args.verifier_latency_ms}ms latency)")
+
+    tokens = [f"valid:contact_form:{uuid.uuid4().hex}" for _ in range(args.requests)]
+    replays = []
+
+    def task(i):
+        token = tokens[i]
+        if args.replay_every and i % args.replay_every == args.replay_every - 1 and i > 0:
+            token = tokens[i - 1]
+            replays.append(token)
+        response = verify(token)
+        accepted = response.status_code == 200 and response.json().get("success")
+        if accepted and args.forms:
+            form = submit_contact(i)
+            return "submitted" if form.status_code == 200 else f"form {form.status_code}"
+        return "accepted" if accepted else f"rejected {response.status_code}"
+
+    try:
+        print(f"🚀 {args.requests} verifications, concurrency {args.concurrency}")
+        result = run_load(task, args.requests, args.concurrency)
+        print_summary("Verification latency (client)", result)
+
+        outcomes = [o if isinstance(o, str) else "error" for o in result.outcomes]
+        counts = {o: outcomes.count(o) for o in sorted(set(outcomes))}
+        print(f"   outcomes: {counts}")
+
+        stats = standin.stats() if standin else fetch_stats("recaptcha")
+        upstream = stats["calls"].get("POST /recaptcha/api/siteverify", 0)
+        print(f"🔁 Replays sent: {len(replays)}  verifier calls: {upstream}  "
+              f"duplicates reaching verifier: {stats['calls'].get('duplicates', 0)}")
+
+        metrics = session().get(f"{config.API_BASE}/verify-recaptcha", timeout=10)
+        if metrics.status_code == 200:
+            m = metrics.json()
+            print(f"📈 Server: upstreamCalls={m['upstreamCalls']} replaysRejected={m['replaysRejected']} "
+                  f"timeouts={m['timeouts']} reusedConnections={m['reusedConnections']} "
+                  f"p95={m['latencyMs']['p95']}ms")
+
+        ok = stats["calls"].get("duplicates", 0) == 0 and upstream <= args.requests - len(replays)
+        print("✅ Replays rejected without reaching the verifier" if ok
+              else "❌ Replayed tokens reached the verifier")
+        return 0 if ok else 1
+    finally:
+        if standin:
+            standin.stop()
@@ -0,0 +1,218 @@
+"""
+Batch reconciliation of bookings across MongoDB, Stripe and Uplisting.
+
+Runs the reconciliation job (tests/harness/reconcile.py) and writes its
+mismatch report as JSON lines (--report). By default it first seeds
+--bookings synthetic website bookings into a scratch database
+(<HARNESS_MONGO_DB>_reconcile) and the in-process Stripe and Uplisting
+stand-ins, with --mismatch-rate of them broken in known ways, a few Uplisting
+channel bookings and a few bookings a webhook is still working on. The
+report must then name exactly the planted mismatches. With --repair, the
+fixable ones are repaired and a second run must find nothing left to repair.
+
+--no-seed reconciles the bookings already in --db against whatever Stripe
+and Uplisting the environment points at (see the job's docstring);
+add --repair to apply the repairs.
+"""
+
+import json
+import random
+import uuid
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+
+from .. import config, fixtures
+from ..reconcile import MISMATCHES, reconcile
+from ..standins import StripeStandIn, UplistingStandIn
+
+DESCRIPTION = "Reconcile bookings across MongoDB, Stripe and Uplisting and report mismatches"
+
+# Planted state per kind: (stripe status, amount off, at Uplisting, MongoDB link, MongoDB payment, booking status)
+PLANTED = {
+    "paid_not_booked": ("succeeded", 0, False, False, "succeeded", "processing_booking"),
+    "booking_not_linked": ("succeeded", 0, True, False, "succeeded", "processing_booking"),
+    "uplisting_booking_missing": ("succeeded", 0, False, True, "succeeded", "confirmed"),
+    "booked_not_paid": ("requires_payment_method", 0, True, True, "pending", "confirmed"),
+    "unpaid_marked_paid": ("canceled", 0, False, False, "succeeded", "cancelled"),
+    "intent_missing": (None, 0, False, False, "pending", "pending_payment"),
+    "amount_mismatch": ("succeeded", 500, True, True, "succeeded", "confirmed"),
+}
+HEALTHY = [
+    # (weight, stripe status, at Uplisting, MongoDB payment, booking status)
+    (70, "succeeded", True, "succeeded", "confirmed"),
+    (20, "requires_payment_method", False, "pending", "pending_payment"),
+    (10, "requires_payment_method", False, "failed", "cancelled"),
+]
+
+
+def add_arguments(parser):
+    parser.add_argument("--bookings", type=int, default=20000, help="synthetic bookings to seed")
+    parser.add_argument("--mismatch-rate", type=float, default=0.02)
+    parser.add_argument("--channel-bookings", type=int, default=25, help="Uplisting-only bookings to seed")
+    parser.add_argument("--concurrency", type=int, default=32, help="Stripe and Uplisting requests in flight")
+    parser.add_argument("--batch-size", type=int, default=1000, help="cursor batch and repair bulk-write size")
+    parser.add_argument("--grace-minutes", type=float, default=15, help="skip bookings touched this recently")
+    parser.add_argument("--report", help="write the mismatch report here (JSON lines)")
+    parser.add_argument("--repair", action="store_true", help="apply the MongoDB repairs")
+    parser.add_argument("--no-seed", action="store_true", help="reconcile --db as it is")
+    parser.add_argument("--db", help="database (default: the harness database, or its _reconcile scratch copy)")
+    parser.add_argument("--max-seconds", type=float, default=300, help="fail a seeded run that takes longer")
+    parser.add_argument("--seed", type=int, default=46)
+
+
+def seed(collection, stripe, uplisting, args):
+    """Fill MongoDB and the stand-ins; {(payment intent, kind)} planted and the recent intents"""
+    rng = random.Random(args.seed)
+    old = datetime.now(timezone.utc) - timedelta(days=2)
+    first_day = date.today() + timedelta(days=30)
+    planted, recent, documents = set(), set(), []
+    weights = [weight for weight, *_ in HEALTHY]
+
+    def add_uplisting(property_id, check_in, check_out, email):
+        with uplisting.lock:
+            uplisting._next_booking_id += 1
+            booking = {"id": str(uplisting._next_booking_id), "property_id": property_id,
+                       "check_in": check_in, "check_out": check_out, "guest_email": email}
+            uplisting.bookings.setdefault(property_id, []).append(booking)
+        return booking["id"]
+
+    for index in range(args.bookings):
+        property_id = fixtures.PROPERTY_IDS[index % len(fixtures.PROPERTY_IDS)]
+        check_in = first_day + timedelta(days=rng.randint(0, 540))
+        check_in, check_out = check_in.isoformat(), (check_in + timedelta(days=rng.randint(2, 7))).isoformat()
+        email = f"guest-{index}@harness.test"
+        intent_id = f"pi_recon{index:08d}"
+        grand_total = round(rng.uniform(300, 4000), 2)
+        updated_at = old
+
+        kind = rng.choice(list(PLANTED)) if rng.random() < args.mismatch_rate else None
+        if kind:
+            status, amount_off, at_uplisting, linked, payment_status, booking_status = PLANTED[kind]
+            planted.add((intent_id, kind))
+        elif rng.random() < 0.002:
+            # A webhook mid-way through booking: paid, not at Uplisting yet, just claimed
+            status, amount_off, at_uplisting, linked, payment_status, booking_status = (
+                "succeeded", 0, False, False, "succeeded", "processing_booking")
+            updated_at = datetime.now(timezone.utc)
+            recent.add(intent_id)
+        else:
+            _, status, at_uplisting, payment_status, booking_status = rng.choices(HEALTHY, weights)[0]
+            amount_off, linked = 0, at_uplisting
+
+        uplisting_id = add_uplisting(property_id, check_in, check_out, email) if at_uplisting else None
+        if kind == "uplisting_booking_missing":
+            uplisting_id = str(10 ** 8 + index)
+        if status:
+            with stripe.lock:
+                stripe.intents[intent_id] = {"id": intent_id, "object": "payment_intent", "status": status,
+                                             "amount": round(grand_total * 100) + amount_off, "currency": "chf"}
+        documents.append({
+            "bookingId": str(uuid.UUID(int=rng.getrandbits(128))), "stripePaymentIntentId": intent_id,
+            "propertyId": property_id, "checkIn": check_in, "checkOut": check_out, "guestEmail": email,
+            "grandTotal": grand_total, "paymentStatus": payment_status, "bookingStatus": booking_status,
+            **({"uplistingBookingId": uplisting_id} if linked else {}),
+            "createdAt": updated_at, "updatedAt": updated_at,
+        })
+        if len(documents) >= 5000:
+            collection.insert_many(documents, ordered=False)
+            documents = []
+    if documents:
+        collection.insert_many(documents, ordered=False)
+
+    for index in range(args.channel_bookings):
+        check_in = first_day + timedelta(days=rng.randint(0, 540))
+        add_uplisting(rng.choice(fixtures.PROPERTY_IDS), check_in.isoformat(),
+                      (check_in + timedelta(days=3)).isoformat(), f"channel-{index}@harness.test")
+    return planted, recent
+
+
+def run_job(collection, args, repair, append=False):
+    found = set()
+    handle = open(args.report, "a" if append else "w") if args.report else None
+
+    def on_mismatch(record):
+        if record["kind"] in MISMATCHES:
+            found.add((record["stripePaymentIntentId"], record["kind"]))
+        if handle:
+            handle.write(json.dumps(record, default=str) + "\n")
+
+    try:
+        totals = reconcile(collection, concurrency=args.concurrency, batch_size=args.batch_size,
+                           grace=timedelta(minutes=args.grace_minutes), repair=repair, on_mismatch=on_mismatch)
+    finally:
+        if handle:
+            handle.close()
+
+    seconds = totals["elapsed_s"]
+    print(f"🔎 {totals['bookings']} bookings in {seconds:.1f}s ({totals['bookings'] / max(seconds, 1e-9):,.0f}/s); "
+          f"{totals['requests']['stripe']} Stripe and {totals['requests']['uplisting']} Uplisting requests, "
+          f"{totals['skipped_recent']} skipped as in progress")
+    for kind, (detail, fixable) in MISMATCHES.items():
+        count = totals["mismatches"][kind]
+        if count:
+            print(f"   {kind:<26} {count:6d}  {detail}{'' if fixable else ' (report only)'}")
+    print(f"   {'unreferenced_uplisting':<26} {totals['unreferenced']:6d}  Uplisting bookings no website booking"
+          " refers to (channel bookings, or a lost MongoDB record)")
+    print(f"🛠️  repairs: {totals['repairs_planned']} planned, {totals['repairs_applied']} applied")
+    return totals, found
+
+
+def run(args):
+    try:
+        import pymongo
+    except ImportError:
+        print("❌ the reconciliation job needs pymongo (pip install pymongo)")
+        return 1
+
+    client = pymongo.MongoClient(config.MONGO_URL, serverSelectionTimeoutMS=5000)
+    db_name = args.db or (config.MONGO_DB_NAME if args.no_seed else f"{config.MONGO_DB_NAME}_reconcile")
+    collection = client[db_name]["bookings"]
+
+    if args.no_seed:
+        totals, _ = run_job(collection, args, repair=args.repair)
+        return 0 if not sum(totals["mismatches"].values()) else 1
+
+    if not db_name.endswith("_reconcile"):
+        print(f"❌ refusing to seed {db_name}: seeding drops its bookings, use a *_reconcile database")
+        return 1
+    standins = [UplistingStandIn().start(), StripeStandIn().start()]
+    problems = []
+    try:
+        collection.drop()
+        planted, recent = seed(collection, standins[1], standins[0], args)
+        print(f"🌱 seeded {args.bookings} bookings into {db_name}: {len(planted)} planted mismatch(es) "
+              f"({', '.join(f'{n} {k}' for k, n in sorted(Counter(k for _, k in planted).items()))}), "
+              f"{len(recent)} in progress, {args.channel_bookings} channel bookings")
+
+        totals, found = run_job(collection, args, repair=args.repair)
+        missed, spurious = planted - found, found - planted
+        if missed:
+            problems.append(f"{len(missed)} planted mismatch(es) not reported, e.g. {sorted(missed)[:3]}")
+        if spurious:
+            problems.append(f"{len(spurious)} mismatch(es) reported that weren't planted, e.g. {sorted(spurious)[:3]}")
+        if {intent for intent, _ in found} & recent:
+            problems.append("bookings a webhook is still working on were reported")
+        if totals["unreferenced"] != args.channel_bookings:
+            problems.append(f"{totals['unreferenced']} unreferenced Uplisting bookings, "
+                            f"expected the {args.channel_bookings} channel bookings")
+        if totals["elapsed_s"] > args.max_seconds:
+            problems.append(f"took {totals['elapsed_s']:.0f}s, over --max-seconds {args.max_seconds:g}")
+
+        if args.repair:
+            print("🔁 again after the repairs")
+            again, _ = run_job(collection, args, repair=True, append=True)
+            if again["repairs_planned"]:
+                problems.append(f"{again['repairs_planned']} repair(s) still planned after repairing")
+            if again["mismatches"]["booking_not_linked"]:
+                problems.append("linked Uplisting bookings are still reported as unlinked")
+    finally:
+        for standin in standins:
+            standin.stop()
+
+    if args.report:
+        print(f"📝 report: {args.report}")
+    for problem in problems:
+        print(f"❌ {problem}")
+    print("✅ The reconciliation found exactly the planted mismatches" if not problems
+          else f"❌ {len(problems)} problem(s)")
+    return 0 if not problems else 1
@@ -0,0 +1,174 @@
+"""
+Sanity image migration against the local Sanity stand-in.
+
+Builds a manifest of images served by the stand-in (a share of them are
+byte-identical duplicates under different ids) and runs
+scripts/migrate-all-images-to-sanity.js against it:
+  1. the first run is killed after --kill-after uploads
+  2. a second run resumes from the checkpointed manifest
+Then verifies that every image was migrated with the right content hash,
+that each distinct image was uploaded exactly once and that nothing was
+uploaded twice. Reports throughput, and with --compare-serial also the
+speedup over a single worker.
+"""
+
+import hashlib
+import json
+import os
+import re
+import signal
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from .. import config
+from ..standins import SanityStandIn, fetch_stats, reset
+
+DESCRIPTION = "Measure and verify the concurrent, resumable Sanity image migration"
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+SCRIPT = REPO_ROOT / "scripts" / "migrate-all-images-to-sanity.js"
+
+
+def add_arguments(parser):
+    parser.add_argument("--images", type=int, default=60)
+    parser.add_argument("--duplicate-every", type=int, default=5,
+                        help="every Nth image repeats the content of an earlier one")
+    parser.add_argument("--kb", type=int, default=256, help="image size in KB")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=int, default=40, help="stand-in latency per request")
+    parser.add_argument("--kill-after", type=int, default=15,
+                        help="kill the first run after this many uploads (0 disables)")
+    parser.add_argument("--compare-serial", action="store_true",
+                        help="also migrate with a single worker and report the speedup")
+    parser.add_argument("--external-standin", action="store_true",
+                        help="use a stand-in started with `python -m tests.harness standins`")
+
+
+def build_manifest(count, duplicate_every, kb):
+    images = []
+    for index in range(count):
+        content = f"content-{index - 1 if duplicate_every and index % duplicate_every == duplicate_every - 1 else index}"
+        images.append({
+            "id": f"harness-image-{index}",
+            "originalUrl": f"{config.standin_url('sanity')}/images/{content}/harness-image-{index}.jpg?kb={kb}",
+            "description": f"Harness image {index}",
+            "usage": [],
+            "content": content,
+        })
+    return {"images": images}
+
+
+def expected_sha1(content, kb):
+    return hashlib.sha1(SanityStandIn.image_bytes(content, kb)).hexdigest()
+
+
+def node_env():
+    return {
+        **os.environ,
+        "SANITY_API_HOST": config.standin_url("sanity"),
+        "SANITY_API_TOKEN": "harness-sanity-token",
+        "NEXT_PUBLIC_SANITY_PROJECT_ID": "harness",
+        "NEXT_PUBLIC_SANITY_DATASET": "production",
+    }
+
+
+def migrate(manifest_path, concurrency, kill_after=0):
+    """Run the migration script; returns (exit code, stats dict or None, seconds)"""
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        ["node", str(SCRIPT), "--manifest", str(manifest_path), "--concurrency", str(concurrency)],
+        cwd=REPO_ROOT, env=node_env(), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+
+    if kill_after:
+        while process.poll() is None:
+            if fetch_stats("sanity")["calls"].get("assets_created", 0) >= kill_after:
+                process.send_signal(signal.SIGKILL)
+                break
+            time.sleep(0.01)
+
+    output, _ = process.communicate()
+    elapsed = time.perf_counter() - started
+    match = re.search(r"^STATS (.*)$", output, re.MULTILINE)
+    return process.returncode, json.loads(match.group(1)) if match else None, elapsed, output
+
+
+def verify(manifest_path, kb):
+    problems = []
+    images = json.loads(Path(manifest_path).read_text())["images"]
+    for image in images:
+        if image.get("status") != "migrated" or not image.get("sanityAssetId"):
+            problems.append(f"{image['id']}: {image.get('status')} {image.get('error', '')}")
+            continue
+        sha1 = expected_sha1(image["content"], kb)
+        if image.get("sha1") != sha1 or sha1 not in image["sanityAssetId"]:
+            problems.append(f"{image['id']}: hash mismatch ({image.get('sha1')})")
+    return problems, len({image["content"] for image in images})
+
+
+def run(args):
+    standin = None
+    if not args.external_standin:
+        standin = SanityStandIn(image_kb=args.kb, latency_ms=args.latency_ms).start()
+
+    try:
+        reset("sanity")
+        with tempfile.TemporaryDirectory() as tmp:
+            manifest_path = Path(tmp) / "sanity-image-mapping.json"
+            manifest_path.write_text(json.dumps(build_manifest(args.images, args.duplicate_every, args.kb)))
+
+            if args.kill_after:
+                code, _, elapsed, _ = migrate(manifest_path, args.concurrency, args.kill_after)
+                done = sum(1 for image in json.loads(manifest_path.read_text())["images"]
+                           if image.get("status") == "migrated")
+                print(f"💥 first run killed after {elapsed:.2f}s (exit {code}), "
+                      f"{done}/{args.images} images checkpointed")
+
+            code, stats, elapsed, output = migrate(manifest_path, args.concurrency)
+            if stats is None:
+                print(output[-2000:])
+                print("❌ migration did not report statistics")
+                return 1
+            print(f"▶️  resumed run: exit {code} in {elapsed:.2f}s, uploaded={stats['uploaded']} "
+                  f"deduped={stats['deduped'] + stats['existing']} resumed={stats['resumed']} "
+                  f"failed={stats['failed']}")
+
+            problems, distinct = verify(manifest_path, args.kb)
+            calls = fetch_stats("sanity")["calls"]
+            created = calls.get("assets_created", 0)
+            duplicates = calls.get("duplicate_uploads", 0)
+            print(f"📦 {args.images} images, {distinct} distinct: assets_created={created} "
+                  f"duplicate_uploads={duplicates}")
+            if created != distinct:
+                problems.append(f"expected {distinct} assets, stand-in created {created}")
+            if duplicates:
+                problems.append(f"{duplicates} duplicate upload(s)")
+
+            if stats["durationMs"]:
+                seconds = stats["durationMs"] / 1000
+                print(f"⚡ concurrency {args.concurrency}: {stats['pending'] / seconds:.1f} images/s, "
+                      f"{stats['bytesDownloaded'] / 1024 / 1024 / seconds:.2f} MB/s downloaded")
+
+            if args.compare_serial:
+                reset("sanity")
+                serial_path = Path(tmp) / "serial.json"
+                serial_path.write_text(json.dumps(build_manifest(args.images, args.duplicate_every, args.kb)))
+                _, serial, _, _ = migrate(serial_path, 1)
+                reset("sanity")
+                fresh_path = Path(tmp) / "fresh.json"
+                fresh_path.write_text(json.dumps(build_manifest(args.images, args.duplicate_every, args.kb)))
+                _, parallel, _, _ = migrate(fresh_path, args.concurrency)
+                if serial and parallel:
+                    print(f"🏁 full migration: 1 worker {serial['durationMs']}ms, "
+                          f"{args.concurrency} workers {parallel['durationMs']}ms "
+                          f"({serial['durationMs'] / max(parallel['durationMs'], 1):.1f}x)")
+
+        for problem in problems[:10]:
+            print(f"❌ {problem}")
+        print("✅ Sanity migration OK" if not problems else f"❌ {len(problems)} problem(s)")
+        return 0 if not problems else 1
+    finally:
+        if standin:
+            standin.stop()
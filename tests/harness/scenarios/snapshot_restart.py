@@ -0,0 +1,172 @@
+"""
+Time to first good response after a restart during an Uplisting outage.
+
+Starts the server (config.SERVER_COMMAND, after `next build`) against a
+healthy Uplisting stand-in until the catalogue and every fixture calendar
+are warm and persisted as last-known-good snapshots, stops it, takes
+Uplisting down (--outage errors: every call answers 503; hang: every call
+outlasts the server's read timeout) and starts it again. Then polls
+/api/properties and a 6-week /api/availability range per fixture property
+and reports, per route, the time from process start to the first 200 with
+real data, and whether it was flagged stale.
+
+The restart is repeated with SNAPSHOT_STORE=off as the baseline (skip with
+--no-baseline): without snapshots nothing good should come back before
+--timeout. Finally Uplisting recovers and the scenario waits for fresh
+(unflagged) answers again.
+"""
+
+import tempfile
+import time
+from datetime import date, timedelta
+
+from .. import fixtures
+from ..load import session
+from ..server import NextServer
+from ..standins import UplistingStandIn, configure
+
+DESCRIPTION = "Restart the server during an Uplisting outage and time the first good responses"
+
+
+def add_arguments(parser):
+    parser.add_argument("--port", type=int, default=3100, help="port for the restarted servers")
+    parser.add_argument("--outage", choices=["errors", "hang"], default="errors")
+    parser.add_argument("--store", choices=["disk", "mongo"], default="disk", help="SNAPSHOT_STORE")
+    parser.add_argument("--timeout", type=float, default=30, help="seconds to wait for a good response")
+    parser.add_argument("--warm-timeout", type=float, default=120)
+    parser.add_argument("--no-baseline", action="store_true")
+
+
+def get(url, timeout=15):
+    try:
+        return session().get(url, timeout=timeout)
+    except Exception:
+        return None
+
+
+def snapshot_env(args, directory):
+    return {"SNAPSHOT_STORE": args.store, "SNAPSHOT_DIR": directory,
+            # Retry Uplisting often, so recovery shows up quickly
+            "CATALOGUE_STALE_RETRY_MS": "2000"}
+
+
+def warm_and_persist(server, args):
+    """Wait until the catalogue and every fixture calendar are saved as snapshots"""
+    deadline = time.monotonic() + args.warm_timeout
+    while time.monotonic() < deadline:
+        get(f"{server.api_base}/properties")
+        response = get(f"{server.api_base}/diagnostics/calendars")
+        if response is not None and response.status_code == 200:
+            status = response.json()
+            calendars = status["cache"]["calendars"]
+            warmed = all(calendars.get(pid, {}).get("fresh") for pid in fixtures.PROPERTY_IDS)
+            if warmed and status["snapshots"]["saves"] >= 1 + len(fixtures.PROPERTY_IDS):
+                return status["snapshots"]
+        time.sleep(0.5)
+    return None
+
+
+def good_properties(response):
+    if response is None or response.status_code != 200:
+        return None
+    body = response.json()
+    return body if body.get("properties") else None
+
+
+def good_availability(response):
+    if response is None or response.status_code != 200:
+        return None
+    body = response.json()
+    return None if body["pricing"].get("useFallback") or body["pricing"].get("noCalendarData") else body
+
+
+def first_good_responses(server, args):
+    """{route: (seconds from process start or None, stale flag)} for the first good answers"""
+    check_in = date.today() + timedelta(days=14)
+    routes = {"/properties": good_properties}
+    for property_id in fixtures.PROPERTY_IDS:
+        routes[f"/availability/{property_id}?from={check_in}&to={check_in + timedelta(days=42)}"] = good_availability
+    results = {}
+    server.wait_listening()
+    deadline = time.perf_counter() + args.timeout
+    while len(results) < len(routes) and time.perf_counter() < deadline:
+        for route, check in routes.items():
+            if route in results:
+                continue
+            body = check(get(f"{server.api_base}{route}", timeout=max(1, deadline - time.perf_counter())))
+            if body is not None:
+                results[route] = (time.perf_counter() - server.started_at, body.get("stale"))
+        time.sleep(0.05)
+    return {route: results.get(route, (None, None)) for route in routes}
+
+
+def restart(label, args, env):
+    with NextServer(args.port, env) as server:
+        listening = server.wait_listening()
+        results = first_good_responses(server, args)
+    print(f"🔁 {label}: listening after {listening:.2f}s")
+    for route, (seconds, stale) in results.items():
+        if seconds is None:
+            print(f"   {route:<62} no good response within {args.timeout:g}s")
+        else:
+            print(f"   {route:<62} {seconds:6.2f}s{'  stale since ' + stale['since'] if stale else ''}")
+    return results
+
+
+def run(args):
+    standin = UplistingStandIn().start()
+    outage = {"error_rate": 1.0, "error_status": 503} if args.outage == "errors" else {"latency_ms": 15000}
+    problems = []
+    with tempfile.TemporaryDirectory() as directory:
+        env = snapshot_env(args, directory)
+        try:
+            with NextServer(args.port, env) as server:
+                server.wait_listening()
+                snapshots = warm_and_persist(server, args)
+            if snapshots is None:
+                print("❌ calendars and catalogue were not persisted in time")
+                return 1
+            print(f"💾 {snapshots['saves']} snapshot(s) in {snapshots['location']} ({snapshots['store']})")
+
+            configure("uplisting", **outage)
+            print(f"🔥 Uplisting outage: {args.outage}")
+            with_snapshots = restart("Restart with snapshots", args, env)
+            baseline = None if args.no_baseline else restart(
+                "Restart without snapshots (baseline)", args, {**env, "SNAPSHOT_STORE": "off"})
+
+            configure("uplisting", error_rate=0, latency_ms=0)
+            with NextServer(args.port, env) as server:
+                server.wait_listening()
+                recovered = None
+                deadline = time.perf_counter() + args.timeout
+                while time.perf_counter() < deadline and recovered is None:
+                    body = good_properties(get(f"{server.api_base}/properties"))
+                    if body is not None and not body.get("stale"):
+                        recovered = time.perf_counter() - server.started_at
+                    time.sleep(0.1)
+            print(f"🩹 Uplisting back: fresh catalogue after "
+                  f"{'%.2fs' % recovered if recovered is not None else 'never'}")
+        finally:
+            configure("uplisting", error_rate=0, latency_ms=0)
+            standin.stop()
+
+    missing = [route for route, (seconds, _) in with_snapshots.items() if seconds is None]
+    if missing:
+        problems.append(f"no good response with snapshots for {', '.join(missing)}")
+    unflagged = [route for route, (seconds, stale) in with_snapshots.items() if seconds is not None and not stale]
+    if unflagged:
+        problems.append(f"outage responses not flagged stale: {', '.join(unflagged)}")
+    if baseline and all(seconds is not None for seconds, _ in baseline.values()):
+        problems.append("the baseline answered without snapshots: was Uplisting really down?")
+    if recovered is None:
+        problems.append("the catalogue stayed stale after Uplisting recovered")
+
+    times = [seconds for seconds, _ in with_snapshots.values() if seconds is not None]
+    if times:
+        print(f"📊 With snapshots every route answered within {max(times):.2f}s of the restart"
+              f"{'' if baseline is None else '; without, ' + str(sum(1 for s, _ in baseline.values() if s is None)) + ' route(s) never did'}")
+    for problem in problems:
+        print(f"❌ {problem}")
+    print("✅ Restarts during an outage serve last-known-good data, flagged as stale" if not problems
+          else f"❌ {len(problems)} problem(s)")
+    return 0 if not problems else 1
@@ -0,0 +1,287 @@
+"""
+Soak test: hours of mixed traffic, watching the server's memory and caches.
+
+Drives a steady mix of catalogue, property, availability, checkout, form
+and reCAPTCHA requests (--rps across --concurrency workers, each request
+from one of many client addresses) against the local stand-ins for
+--duration. Every --interval it samples /api/diagnostics/memory: process
+RSS and heap, and the size of every module-level cache (rate-limit tokens,
+Uplisting responses, calendars, catalogue views, Mongo and email clients,
+the Next fetch cache on disk...).
+
+After --warmup, each series is split into quarters and the minimum of
+each quarter taken, which ignores garbage-collection sawtooth. A series
+whose floor rises every quarter is flagged: memory once it grew more than
+--min-growth-mb, caches at any growth. Bounded caches fill up during
+warm-up and stay flat, so a flagged cache is one without a bound. --samples
+keeps every sample as JSON lines, for plotting.
+"""
+
+import json
+import random
+import re
+import statistics
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+
+from .. import config, fixtures
+from ..load import percentile, session
+from ..standins import RecaptchaStandIn, StripeStandIn, UplistingStandIn
+
+DESCRIPTION = "Drive mixed traffic for hours and flag steadily growing memory or caches"
+
+MEMORY_SERIES = ("memory.rss", "memory.heapTotal", "memory.heapUsed", "memory.external", "memory.arrayBuffers")
+
+
+def duration(value):
+    """Seconds for 90, 90s, 30m or 4h"""
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([smh]?)", value.strip())
+    if not match:
+        raise ValueError(f"not a duration: {value}")
+    return float(match.group(1)) * {"": 1, "s": 1, "m": 60, "h": 3600}[match.group(2)]
+
+
+def add_arguments(parser):
+    parser.add_argument("--duration", type=duration, default=duration("2h"), help="e.g. 90s, 30m, 4h")
+    parser.add_argument("--warmup", type=duration, default=duration("10m"),
+                        help="ignored by the growth checks (at most a quarter of --duration)")
+    parser.add_argument("--interval", type=duration, default=duration("30s"), help="time between samples")
+    parser.add_argument("--rps", type=float, default=20, help="requests per second, all workers together")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--clients", type=int, default=5000, help="distinct client addresses")
+    parser.add_argument("--min-growth-mb", type=float, default=16, help="memory growth worth flagging")
+    parser.add_argument("--samples", help="write every sample here (JSON lines)")
+    parser.add_argument("--seed", type=int, default=49)
+    parser.add_argument("--external-standin", action="store_true",
+                        help="use stand-ins started with `python -m tests.harness standins`")
+
+
+def client_headers(rng, args):
+    index = rng.randrange(args.clients)
+    return {"X-Forwarded-For": f"10.49.{index // 250}.{index % 250}"}
+
+
+def stay(rng):
+    check_in = date.today() + timedelta(days=rng.randint(14, 300))
+    return check_in, check_in + timedelta(days=rng.randint(2, 7))
+
+
+def traffic(args):
+    """(name, weight, request) for the mix; request(rng) returns the response"""
+    api = config.API_BASE
+
+    def properties(rng):
+        view = rng.choice(["", "?view=card", "?fields=id,name,images", "?fields=id,name,pricing"])
+        return session().get(f"{api}/properties{view}", headers=client_headers(rng, args), timeout=60)
+
+    def property_detail(rng):
+        return session().get(f"{api}/properties/{rng.choice(fixtures.PROPERTY_IDS)}",
+                             headers=client_headers(rng, args), timeout=60)
+
+    def availability(rng):
+        check_in, check_out = stay(rng)
+        return session().get(f"{api}/availability/{rng.choice(fixtures.PROPERTY_IDS)}"
+                             f"?from={check_in}&to={check_out + timedelta(days=rng.randint(0, 40))}",
+                             headers=client_headers(rng, args), timeout=60)
+
+    def stripe_config(rng):
+        return session().get(f"{api}/stripe/config", headers=client_headers(rng, args), timeout=30)
+
+    def payment_intent(rng):
+        check_in, check_out = stay(rng)
+        return session().post(f"{api}/stripe/create-payment-intent", headers=client_headers(rng, args), timeout=60,
+                              json={"propertyId": rng.choice(fixtures.PROPERTY_IDS), "checkIn": check_in.isoformat(),
+                                    "checkOut": check_out.isoformat(), "guestName": "Soak Guest",
+                                    "guestEmail": f"soak-{uuid.uuid4().hex[:12]}@harness.test", "adults": 2,
+                                    "accommodationTotal": 1})
+
+    def recaptcha(rng):
+        return session().post(f"{api}/verify-recaptcha", headers=client_headers(rng, args), timeout=30,
+                              json={"token": f"valid:contact_form:{uuid.uuid4().hex}", "action": "contact_form"})
+
+    def contact(rng):
+        return session().post(f"{api}/forms/contact", headers=client_headers(rng, args), timeout=30, json={
+            "inquiryType": "general", "name": "Soak Test", "email": "soak.test@example.com", "phone": "",
+            "subject": "Soak submission", "message": "Submitted by the soak scenario.",
+        })
+
+    def newsletter(rng):
+        return session().post(f"{api}/forms/newsletter", headers=client_headers(rng, args), timeout=30,
+                              json={"email": f"soak-{rng.randrange(500)}@harness.test"})
+
+    return [
+        ("properties", 25, properties),
+        ("property", 20, property_detail),
+        ("availability", 35, availability),
+        ("stripe-config", 5, stripe_config),
+        ("payment-intent", 5, payment_intent),
+        ("recaptcha", 5, recaptcha),
+        ("contact", 3, contact),
+        ("newsletter", 2, newsletter),
+    ]
+
+
+def flatten(data, prefix=""):
+    """{dotted key: number} for the numeric leaves (booleans aren't sizes)"""
+    flat = {}
+    for key, value in (data or {}).items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def trend(points):
+    """(quarter floors, growth per hour) of [(seconds, value)], or None if too few points"""
+    if len(points) < 8:
+        return None
+    size = len(points) // 4
+    quarters = [points[i * size:(i + 1) * size] for i in range(3)] + [points[3 * size:]]
+    floors = [min(value for _, value in quarter) for quarter in quarters]
+    times = [t for t, _ in points]
+    mean_t, mean_v = statistics.fmean(times), statistics.fmean(v for _, v in points)
+    spread = sum((t - mean_t) ** 2 for t in times)
+    slope = sum((t - mean_t) * (v - mean_v) for t, v in points) / spread if spread else 0.0
+    return floors, slope * 3600
+
+
+def growing(floors, threshold):
+    return all(b > a for a, b in zip(floors, floors[1:])) and floors[-1] - floors[0] > threshold
+
+
+def run(args):
+    warmup = min(args.warmup, args.duration / 4)
+    standins = [] if args.external_standin else [
+        UplistingStandIn().start(), StripeStandIn().start(), RecaptchaStandIn().start()]
+    mix = traffic(args)
+    stop = threading.Event()
+    lock = threading.Lock()
+    stats = defaultdict(lambda: {"latencies": [], "statuses": Counter(), "errors": 0})
+    samples, problems = [], []
+    handle = open(args.samples, "w") if args.samples else None
+
+    def worker(seed):
+        worker_rng = random.Random(seed)
+        period = args.concurrency / args.rps
+        next_at = time.monotonic() + worker_rng.random() * period
+        while not stop.is_set():
+            stop.wait(max(0.0, next_at - time.monotonic()))
+            next_at += period
+            name, _, request = worker_rng.choices(mix, weights=[weight for _, weight, _ in mix])[0]
+            started = time.perf_counter()
+            try:
+                status = request(worker_rng).status_code
+            except Exception:
+                status = None
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                entry = stats[name]
+                # A bounded reservoir: hours of latencies would be a leak of our own
+                if len(entry["latencies"]) < 20000:
+                    entry["latencies"].append(elapsed)
+                else:
+                    entry["latencies"][worker_rng.randrange(20000)] = elapsed
+                entry["statuses"][status] += 1
+                if status is None or status >= 500:
+                    entry["errors"] += 1
+
+    def sample(elapsed_s):
+        response = session().get(f"{config.API_BASE}/diagnostics/memory", timeout=30)
+        response.raise_for_status()
+        data = response.json()
+        record = {"t": round(elapsed_s, 1), "pid": data["pid"],
+                  **flatten({"memory": data["memory"], "heap": data["heap"], "caches": data["caches"]})}
+        samples.append(record)
+        if handle:
+            handle.write(json.dumps(record) + "\n")
+            handle.flush()
+        return record
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=worker, args=(args.seed * 1000 + i,), daemon=True)
+               for i in range(args.concurrency)]
+    print(f"🏃 {args.rps:g} req/s from {args.concurrency} workers for {args.duration / 3600:.2f}h, "
+          f"sampling every {args.interval:g}s (warm-up {warmup / 60:.0f} min)")
+    try:
+        first = sample(0)
+        for thread in threads:
+            thread.start()
+        next_sample = started + args.interval
+        while (now := time.monotonic()) < started + args.duration:
+            time.sleep(max(0.0, min(next_sample, started + args.duration) - now))
+            if time.monotonic() < next_sample:
+                continue
+            next_sample += args.interval
+            try:
+                record = sample(time.monotonic() - started)
+            except Exception as error:
+                problems.append(f"diagnostics sample failed at {time.monotonic() - started:.0f}s: {error}")
+                continue
+            if record["pid"] != first["pid"]:
+                problems.append(f"the server restarted (pid {first['pid']} -> {record['pid']})")
+                break
+            with lock:
+                done = sum(sum(entry["statuses"].values()) for entry in stats.values())
+                errors = sum(entry["errors"] for entry in stats.values())
+            print(f"   {record['t'] / 60:6.1f} min  rss {record['memory.rss'] / 2**20:7.1f} MiB  "
+                  f"heap {record['memory.heapUsed'] / 2**20:7.1f} MiB  {done} requests, {errors} errors")
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join(timeout=60)
+        if handle:
+            handle.close()
+        for standin in standins:
+            standin.stop()
+
+    print("\n📊 traffic")
+    for name, entry in sorted(stats.items()):
+        latencies = sorted(entry["latencies"])
+        statuses = ", ".join(f"{status or 'error'}×{count}" for status, count in entry["statuses"].most_common())
+        print(f"   {name:<15} p50={percentile(latencies, 50):7.1f}ms p99={percentile(latencies, 99):7.1f}ms  {statuses}")
+        total = sum(entry["statuses"].values())
+        if total and entry["errors"] / total > 0.01:
+            problems.append(f"{name}: {entry['errors']} of {total} requests failed")
+
+    steady = [record for record in samples if record["t"] >= warmup]
+    keys = sorted({key for record in samples for key in record} - {"t", "pid"})
+    print(f"\n📈 after warm-up ({len(steady)} samples): quarter floors, trend per hour")
+    for key in keys:
+        points = [(record["t"], record[key]) for record in steady if key in record]
+        result = trend(points)
+        last = samples[-1].get(key)
+        if result is None:
+            print(f"   {key:<34} {last}  (too few samples for a trend)")
+            continue
+        floors, per_hour = result
+        memory = key in MEMORY_SERIES
+        scale, unit = (2**20, "MiB") if memory or key.endswith(".bytes") else (1, "")
+        threshold = args.min_growth_mb * 2**20 if memory else 0
+        flagged = key.startswith(("memory.", "caches.", "heap.detached")) and growing(floors, threshold)
+        shown = " → ".join(f"{floor / scale:,.1f}" if scale > 1 else f"{floor:,.0f}" for floor in floors)
+        print(f"   {'⚠️ ' if flagged else '  '}{key:<32} {shown} {unit}  ({per_hour / scale:+,.1f}{unit}/h)")
+        if flagged:
+            problems.append(f"{key} grew every quarter: {shown} {unit}".rstrip())
+
+    if samples:
+        print("\n🗃️  cache sizes at the end, per subsystem")
+        subsystems = defaultdict(list)
+        for key, value in samples[-1].items():
+            if key.startswith("caches."):
+                _, subsystem, field = key.split(".", 2)
+                subsystems[subsystem].append(f"{field}={value:,}")
+        for subsystem, fields in sorted(subsystems.items()):
+            print(f"   {subsystem:<15} {', '.join(fields)}")
+    if args.samples:
+        print(f"📝 samples: {args.samples}")
+
+    for problem in problems:
+        print(f"❌ {problem}")
+    print("✅ Memory and caches level off under sustained traffic" if not problems
+          else f"❌ {len(problems)} problem(s)")
+    return 0 if not problems else 1
@@ -0,0 +1,110 @@
+"""
+Thundering herd on cold Uplisting reads.
+
+Each round releases --herd concurrent requests at once (behind a barrier)
+for a key nobody has fetched yet: a property detail page of a fresh fuzz
+property, and a calendar range that starts on a fresh date. The Uplisting
+stand-in answers slowly (--latency-ms), so without single-flight every
+request in the herd would reach it. Counts the upstream calls each herd
+caused and reads the server's coalescing metrics from
+/api/diagnostics/uplisting.
+"""
+
+import threading
+import time
+from datetime import date, timedelta
+
+from .. import config, fixtures
+from ..load import session
+from ..standins import UplistingStandIn, fetch_stats
+
+DESCRIPTION = "Count upstream Uplisting calls when many guests open the same cold page at once"
+
+UPSTREAM_KEYS = {"property": "GET /properties/{id}", "availability": "GET /calendar/{id}"}
+
+
+def add_arguments(parser):
+    parser.add_argument("--herd", type=int, default=50, help="concurrent requests per round")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--latency-ms", type=int, default=300, help="stand-in latency per request")
+    parser.add_argument("--external-standin", action="store_true",
+                        help="use a stand-in started with `python -m tests.harness standins`")
+
+
+def release_herd(size, path):
+    """Fire `size` GETs at once; returns (statuses, seconds until the last one finished)"""
+    barrier = threading.Barrier(size)
+    statuses = [None] * size
+
+    def guest(i):
+        barrier.wait()
+        try:
+            statuses[i] = session().get(f"{config.API_BASE}{path}", timeout=60).status_code
+        except Exception as error:
+            statuses[i] = type(error).__name__
+
+    threads = [threading.Thread(target=guest, args=(i,)) for i in range(size)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return statuses, time.perf_counter() - started
+
+
+def upstream_calls():
+    calls = fetch_stats("uplisting")["calls"]
+    return {kind: calls.get(key, 0) for kind, key in UPSTREAM_KEYS.items()}
+
+
+def run(args):
+    standin = None
+    if not args.external_standin:
+        standin = UplistingStandIn(latency_ms=args.latency_ms).start()
+
+    # Fresh keys per run, so neither Next's fetch cache nor the catalogue already has them
+    run_id = int(time.time()) % 100000
+    problems = []
+    totals = {kind: 0 for kind in UPSTREAM_KEYS}
+
+    try:
+        for round_number in range(args.rounds):
+            property_id = str(fixtures.FUZZ_PROPERTY_BASE + run_id * 100 + round_number)
+            start = date.today() + timedelta(days=run_id % 300 + round_number)
+            paths = {
+                "property": f"/properties/{property_id}",
+                "availability": f"/availability/{fixtures.PROPERTY_IDS[0]}?from={start.isoformat()}"
+                                f"&to={(start + timedelta(days=30)).isoformat()}",
+            }
+            for kind, path in paths.items():
+                before = upstream_calls()[kind]
+                statuses, seconds = release_herd(args.herd, path)
+                upstream = upstream_calls()[kind] - before
+                totals[kind] += upstream
+                failed = [status for status in statuses if status != 200]
+                print(f"🐘 round {round_number + 1} {kind:<12} {args.herd} requests -> {upstream} upstream "
+                      f"call(s) in {seconds * 1000:.0f}ms{f', {len(failed)} failed' if failed else ''}")
+                if failed:
+                    problems.append(f"round {round_number + 1} {kind}: {len(failed)} failed ({failed[:3]})")
+                if upstream > 1:
+                    problems.append(f"round {round_number + 1} {kind}: {upstream} upstream calls for one cold key")
+    finally:
+        if standin:
+            standin.stop()
+
+    requests_sent = args.herd * args.rounds
+    for kind, upstream in totals.items():
+        print(f"📊 {kind}: {requests_sent} requests, {upstream} upstream calls "
+              f"({requests_sent / max(upstream, 1):.0f} requests per call)")
+
+    metrics = session().get(f"{config.API_BASE}/diagnostics/uplisting", timeout=10)
+    if metrics.status_code == 200:
+        for kind, counters in metrics.json()["requests"].items():
+            print(f"📈 Server {kind}: calls={counters['calls']} upstream={counters['upstream']} "
+                  f"coalesced={counters['coalesced']} errors={counters['errors']}")
+
+    for problem in problems[:10]:
+        print(f"❌ {problem}")
+    print("✅ Each cold key reached Uplisting once per herd" if not problems
+          else f"❌ {len(problems)} problem(s)")
+    return 0 if not problems else 1
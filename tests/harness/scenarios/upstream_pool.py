@@ -0,0 +1,162 @@
+"""
+Upstream connection reuse against a stand-in with slow connection setup.
+
+The Uplisting stand-in sleeps --connect-delay-ms on every new connection (a
+stand-in for TCP + TLS setup to a remote API) and --latency-ms on every
+request. Three ways of making the same calendar calls are compared:
+  - direct, new connection: the harness calls the stand-in with a fresh
+    connection each time (what an unpooled client pays)
+  - direct, keep-alive: the harness reuses one connection per thread
+  - through the app: /api/availability with a calendar range nobody has
+    fetched yet, so every request reaches Uplisting through lib/upstream-http
+Reports latency per path, connections opened per upstream call and the
+server's pool metrics from /api/diagnostics/upstream. With --hang-ms the
+stand-in then stalls every request and the scenario checks that the app
+gives up after its read timeout instead of holding the request open.
+"""
+
+import time
+from datetime import date, timedelta
+
+import requests
+
+from .. import config, fixtures
+from ..load import print_summary, run_load, session
+from ..standins import UplistingStandIn, configure, fetch_stats
+
+DESCRIPTION = "Compare upstream latency with and without connection reuse against a slow-handshake stand-in"
+
+CALENDAR_KEY = "GET /calendar/{id}"
+UPLISTING_HEADERS = {"Authorization": f"Basic {config.server_env()['UPLISTING_API_KEY']}",
+                     "X-Uplisting-Client-Id": config.server_env()["UPLISTING_CLIENT_ID"]}
+
+
+def add_arguments(parser):
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--connect-delay-ms", type=int, default=80, help="stand-in delay per new connection")
+    parser.add_argument("--latency-ms", type=int, default=20, help="stand-in latency per request")
+    parser.add_argument("--hang-ms", type=int, default=0,
+                        help="then stall the stand-in this long per request and check the read timeout "
+                             "(start the server with a small UPSTREAM_READ_TIMEOUT_MS)")
+    parser.add_argument("--external-standin", action="store_true",
+                        help="use a stand-in started with `python -m tests.harness standins`")
+
+
+def calendar_range(n):
+    """A distinct calendar range per n, so neither the app nor its cache has seen it"""
+    start = date.today() + timedelta(days=n % 365)
+    return start.isoformat(), (start + timedelta(days=7 + (n // 365) % 90)).isoformat()
+
+
+def upstream_counts():
+    stats = fetch_stats("uplisting")
+    return stats["calls"].get(CALENDAR_KEY, 0), stats["connections"]
+
+
+def measure(label, task, args):
+    before_calls, before_connections = upstream_counts()
+    result = run_load(task, args.requests, args.concurrency)
+    after_calls, after_connections = upstream_counts()
+    calls = after_calls - before_calls
+    # Less the connection the second stats read opened
+    connections = after_connections - before_connections - 1
+    print_summary(label, result)
+    print(f"   upstream calls: {calls}  new connections: {connections} "
+          f"({connections / max(calls, 1):.2f} per call)")
+    return result, calls, connections
+
+
+def print_pool_metrics():
+    response = session().get(f"{config.API_BASE}/diagnostics/upstream", timeout=10)
+    if response.status_code != 200:
+        print(f"⚠️  /api/diagnostics/upstream answered {response.status_code} (set ENABLE_DIAGNOSTICS=true)")
+        return None
+    metrics = response.json()
+    pool = metrics["origins"].get(config.standin_url("uplisting"))
+    if pool:
+        print(f"📈 Server pool: {pool['requests']} requests, {pool['newConnections']} new / "
+              f"{pool['reusedConnections']} reused connections (reuse {pool['reuseRate'] or 0:.0%}), "
+              f"max queue {pool['maxQueueDepth']}, connect p50 {pool['connectMs']['p50'] or 0:.0f}ms, "
+              f"timeouts {pool['connectTimeouts']} connect / {pool['readTimeouts']} read")
+    return metrics
+
+
+def check_read_timeout(args, property_id, run_id, problems):
+    metrics = print_pool_metrics() or {}
+    read_timeout_ms = metrics.get("readTimeoutMs", 10000)
+    if args.hang_ms <= read_timeout_ms:
+        print(f"⚠️  --hang-ms {args.hang_ms} does not exceed the server read timeout ({read_timeout_ms}ms); skipped")
+        return
+
+    configure("uplisting", latency_ms=args.hang_ms)
+    try:
+        start, end = calendar_range(run_id * 4 + 3)
+        started = time.perf_counter()
+        response = session().get(f"{config.API_BASE}/availability/{property_id}?from={start}&to={end}",
+                                 timeout=args.hang_ms / 1000 + 30)
+        waited_ms = (time.perf_counter() - started) * 1000
+    finally:
+        configure("uplisting", latency_ms=args.latency_ms)
+
+    print(f"⏱️  Stalled upstream ({args.hang_ms}ms): app answered {response.status_code} after {waited_ms:.0f}ms "
+          f"(read timeout {read_timeout_ms}ms)")
+    if waited_ms > read_timeout_ms + 1000:
+        problems.append(f"app held a stalled upstream request for {waited_ms:.0f}ms")
+
+
+def run(args):
+    standin = None
+    if args.external_standin:
+        configure("uplisting", latency_ms=args.latency_ms, connect_delay_ms=args.connect_delay_ms)
+    else:
+        standin = UplistingStandIn(latency_ms=args.latency_ms, connect_delay_ms=args.connect_delay_ms).start()
+
+    property_id = fixtures.PROPERTY_IDS[0]
+    run_id = int(time.time()) % 1000
+    standin_url = config.standin_url("uplisting")
+    problems = []
+
+    def calendar_path(phase, i):
+        start, end = calendar_range((run_id * 4 + phase) * args.requests + i)
+        return f"/calendar/{property_id}?from={start}&to={end}"
+
+    def direct_new_connection(i):
+        with requests.Session() as fresh:
+            return fresh.get(f"{standin_url}{calendar_path(0, i)}", headers=UPLISTING_HEADERS, timeout=30).ok
+
+    def direct_keep_alive(i):
+        return session().get(f"{standin_url}{calendar_path(1, i)}", headers=UPLISTING_HEADERS, timeout=30).ok
+
+    def through_app(i):
+        start, end = calendar_range((run_id * 4 + 2) * args.requests + i)
+        response = session().get(f"{config.API_BASE}/availability/{property_id}?from={start}&to={end}", timeout=60)
+        return response.status_code == 200
+
+    print(f"🐢 Stand-in: {args.connect_delay_ms}ms per new connection, {args.latency_ms}ms per request; "
+          f"{args.requests} calendar requests at concurrency {args.concurrency}")
+    try:
+        fresh, _, _ = measure("Direct, new connection per call", direct_new_connection, args)
+        reused, _, _ = measure("Direct, keep-alive", direct_keep_alive, args)
+        app, calls, connections = measure("Through the app (lib/upstream-http)", through_app, args)
+        print_pool_metrics()
+
+        if app.errors:
+            problems.append(f"{app.errors} app request(s) failed")
+        if calls and connections > max(args.concurrency, calls * 0.25):
+            problems.append(f"app opened {connections} connections for {calls} upstream calls")
+        print(f"📊 p50: new connection {fresh.p(50):.0f}ms, keep-alive {reused.p(50):.0f}ms, "
+              f"through the app {app.p(50):.0f}ms (includes the app's own work)")
+
+        if args.hang_ms:
+            check_read_timeout(args, property_id, run_id, problems)
+    finally:
+        if standin:
+            standin.stop()
+        else:
+            configure("uplisting", latency_ms=0, connect_delay_ms=0)
+
+    for problem in problems:
+        print(f"❌ {problem}")
+    print("✅ Upstream connections are pooled and reused" if not problems else f"❌ {len(problems)} problem(s)")
+    return 0 if not problems else 1
@@ -0,0 +1,169 @@
+"""
+Concurrent and repeated Stripe webhook deliveries for the same payment.
+
+Creates --intents payment intents through /api/stripe/create-payment-intent
+(each a pending booking in MongoDB), then for every intent fires --duplicates
+signed payment_intent.succeeded deliveries at /api/stripe/webhook at once:
+half of them redeliveries of one event, half distinct events for the same
+payment intent (as Stripe sends when an intent is confirmed twice). A late
+sequential redelivery follows. Exactly one Uplisting booking must be created
+per intent, and nothing may reach the stand-in's double-booking check.
+"""
+
+import hashlib
+import hmac
+import json
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from .. import config, fixtures
+from ..load import percentile, session
+from ..standins import StripeStandIn, UplistingStandIn, fetch_stats
+
+DESCRIPTION = "Send duplicate Stripe webhooks concurrently and count the Uplisting bookings created"
+
+BOOKING_KEY = "POST /v2/bookings"
+
+
+def add_arguments(parser):
+    parser.add_argument("--intents", type=int, default=10, help="payment intents to settle")
+    parser.add_argument("--duplicates", type=int, default=8, help="concurrent deliveries per intent")
+    parser.add_argument("--seed", type=int, default=None, help="offset of the booked dates (default: random)")
+    parser.add_argument("--external-standin", action="store_true",
+                        help="use stand-ins started with `python -m tests.harness standins`")
+
+
+def stripe_signature(payload, secret=config.STRIPE_WEBHOOK_SECRET):
+    """Stripe-Signature header for a raw payload, as stripe.webhooks.constructEvent checks it"""
+    timestamp = int(time.time())
+    digest = hmac.new(secret.encode(), f"{timestamp}.".encode() + payload, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+def create_intent(index, first_check_in, run_id):
+    """Pending booking for fixture property index % n, on dates no other intent touches"""
+    property_id = fixtures.PROPERTY_IDS[index % len(fixtures.PROPERTY_IDS)]
+    check_in = first_check_in + timedelta(days=7 * (index // len(fixtures.PROPERTY_IDS)))
+    response = session().post(f"{config.API_BASE}/stripe/create-payment-intent", timeout=60, json={
+        "propertyId": property_id,
+        "checkIn": check_in.isoformat(),
+        "checkOut": (check_in + timedelta(days=4)).isoformat(),
+        "guestName": "Harness Replay Guest",
+        "guestEmail": f"replay-{run_id}-{index}@harness.test",
+        "adults": 2,
+        "accommodationTotal": 1,
+    }, headers={"X-Forwarded-For": f"10.44.{index // 250}.{index % 250}"})
+    response.raise_for_status()
+    data = response.json()
+    # The route answers in major units, Stripe events carry minor units
+    return {"id": data["paymentIntentId"], "amount": round(data["amount"] * 100), "propertyId": property_id}
+
+
+def succeeded_event(intent, event_id):
+    return json.dumps({
+        "id": event_id,
+        "object": "event",
+        "type": "payment_intent.succeeded",
+        "data": {"object": {"id": intent["id"], "object": "payment_intent", "amount": intent["amount"],
+                            "status": "succeeded"}},
+    }).encode()
+
+
+def deliver(payload):
+    """(status, message, milliseconds) for one webhook delivery"""
+    started = time.perf_counter()
+    response = session().post(f"{config.API_BASE}/stripe/webhook", data=payload, timeout=60, headers={
+        "Content-Type": "application/json", "Stripe-Signature": stripe_signature(payload)})
+    elapsed = (time.perf_counter() - started) * 1000
+    try:
+        body = response.json()
+    except ValueError:
+        body = {}
+    if response.status_code != 200:
+        message = body.get("error", "error")
+    elif body.get("uplistingBookingId"):
+        message = "booked"
+    elif body.get("requiresManualReview"):
+        message = "manual review"
+    else:
+        message = body.get("message", "ok")
+    return response.status_code, message, elapsed
+
+
+def deliver_at_once(intent, duplicates):
+    """Fire the deliveries for one intent from separate threads released by a barrier"""
+    shared = succeeded_event(intent, f"evt_{uuid.uuid4().hex[:24]}")
+    payloads = [shared if i % 2 == 0 else succeeded_event(intent, f"evt_{uuid.uuid4().hex[:24]}")
+                for i in range(duplicates)]
+    barrier = threading.Barrier(duplicates)
+
+    def send(payload):
+        barrier.wait()
+        return deliver(payload)
+
+    with ThreadPoolExecutor(max_workers=duplicates) as pool:
+        return list(pool.map(send, payloads)), shared
+
+
+def run(args):
+    standins = []
+    if not args.external_standin:
+        standins = [UplistingStandIn().start(), StripeStandIn().start()]
+
+    rng = random.Random(args.seed)
+    run_id = uuid.uuid4().hex[:8]
+    # Far enough out that a reused stand-in is unlikely to hold earlier bookings there
+    first_check_in = date.today() + timedelta(days=rng.randint(60, 600))
+    outcomes = Counter()
+    latencies = []
+    problems = []
+    try:
+        intents = [create_intent(i, first_check_in, run_id) for i in range(args.intents)]
+        print(f"💳 {len(intents)} payment intents from {first_check_in}")
+
+        before = fetch_stats("uplisting")["calls"]
+        for intent in intents:
+            results, shared = deliver_at_once(intent, args.duplicates)
+            for status, message, elapsed in results:
+                outcomes[f"{status} {message}"] += 1
+                latencies.append(elapsed)
+            booked = sum(1 for status, message, _ in results if message == "booked")
+            if booked != 1:
+                problems.append(f"{intent['id']}: {booked} of {args.duplicates} concurrent deliveries booked")
+
+            status, message, _ = deliver(shared)
+            outcomes[f"late {status} {message}"] += 1
+            if (status, message) != (200, "Already processed"):
+                problems.append(f"{intent['id']}: late redelivery answered {status} {message}")
+        after = fetch_stats("uplisting")["calls"]
+    finally:
+        for standin in standins:
+            standin.stop()
+
+    delta = {key: after.get(key, 0) - before.get(key, 0)
+             for key in (BOOKING_KEY, "bookings_created", "double_booking_rejected")}
+    latencies.sort()
+    print(f"📨 {len(latencies)} concurrent deliveries: p50 {percentile(latencies, 50):.0f}ms, "
+          f"p95 {percentile(latencies, 95):.0f}ms")
+    for outcome, count in sorted(outcomes.items()):
+        print(f"   {outcome:<32} {count:5d}")
+    print(f"🏠 Uplisting: {delta[BOOKING_KEY]} booking request(s), {delta['bookings_created']} created, "
+          f"{delta['double_booking_rejected']} rejected as double bookings")
+
+    if delta["bookings_created"] != len(intents):
+        problems.append(f"{delta['bookings_created']} Uplisting bookings for {len(intents)} payments")
+    if delta[BOOKING_KEY] != len(intents):
+        problems.append(f"{delta[BOOKING_KEY]} booking requests reached Uplisting for {len(intents)} payments")
+    if delta["double_booking_rejected"]:
+        problems.append(f"{delta['double_booking_rejected']} duplicate booking(s) reached Uplisting")
+
+    for problem in problems:
+        print(f"❌ {problem}")
+    print("✅ Every payment created exactly one Uplisting booking" if not problems
+          else f"❌ {len(problems)} problem(s)")
+    return 0 if not problems else 1
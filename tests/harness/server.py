@@ -0,0 +1,74 @@
+"""Start and stop the Next.js server for scenarios that need restarts."""
+
+import os
+import socket
+import subprocess
+import time
+from pathlib import Path
+
+from . import config
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+class NextServer:
+    """
+    The server under test as a child process, on its own port.
+
+    Runs config.SERVER_COMMAND with config.server_env() plus `env`, so it
+    talks to the stand-ins like a server started by hand. Output goes to
+    `log_path` for post-mortems. `node_args` go before the script, for flags
+    Node doesn't accept in NODE_OPTIONS (--cpu-prof, --heap-prof).
+    """
+
+    def __init__(self, port, env=None, log_path=None, node_args=()):
+        self.port = port
+        self.command = list(config.SERVER_COMMAND)
+        if node_args:
+            if Path(self.command[0]).name != "node":
+                raise ValueError(f"node_args need a server command that runs node, not {self.command[0]}")
+            self.command[1:1] = node_args
+        self.env = {**os.environ, **config.server_env(), **(env or {}), "PORT": str(port), "HOSTNAME": "127.0.0.1"}
+        self.log_path = log_path or Path(f"/tmp/harness-server-{port}.log")
+        self.process = None
+        self.started_at = None
+
+    @property
+    def api_base(self):
+        return f"http://127.0.0.1:{self.port}/api"
+
+    def start(self):
+        log = open(self.log_path, "ab")
+        self.started_at = time.perf_counter()
+        self.process = subprocess.Popen(self.command, cwd=REPO_ROOT, env=self.env,
+                                        stdout=log, stderr=subprocess.STDOUT)
+        log.close()
+        return self
+
+    def wait_listening(self, timeout_s=60):
+        """Seconds from start() until the port accepts connections"""
+        deadline = time.monotonic() + timeout_s
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"server exited with {self.process.returncode}, see {self.log_path}")
+            try:
+                socket.create_connection(("127.0.0.1", self.port), timeout=0.2).close()
+                return time.perf_counter() - self.started_at
+            except OSError:
+                time.sleep(0.02)
+        raise TimeoutError(f"server not listening on {self.port} after {timeout_s}s, see {self.log_path}")
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
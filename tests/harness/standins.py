@@ -0,0 +1,576 @@
+"""
+Local stand-ins for external services.
+
+Each stand-in is a small threaded HTTP server that mimics the parts of an
+upstream API the app uses, counts every call and connection and supports
+fault injection (added latency, error rate, connection setup delay, rate
+limiting with 429 and Retry-After).
+Stand-ins can be reconfigured at runtime through `POST /__harness/config` and
+inspected through `GET /__harness/stats`, so a scenario can drive a stand-in
+running in another process.
+"""
+
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+from . import config, fixtures
+
+
+class Response:
+    def __init__(self, status=200, body=None, headers=None, raw=None):
+        self.status = status
+        self.headers = dict(headers or {})
+        if raw is not None:
+            self.payload = raw
+        else:
+            self.payload = json.dumps(body if body is not None else {}).encode("utf-8")
+            self.headers.setdefault("Content-Type", "application/json")
+
+
+class StandIn:
+    """Base class: routing, call counting, fault injection, lifecycle"""
+
+    name = None
+
+    def __init__(self, port=None, latency_ms=0, error_rate=0.0, error_status=503, connect_delay_ms=0,
+                 rate_limit_per_sec=0, retry_after_s=1):
+        self.port = port if port is not None else config.PORTS[self.name]
+        self.faults = {
+            "latency_ms": latency_ms,
+            "error_rate": error_rate,
+            "error_status": error_status,
+            # Stands in for TCP + TLS setup: paid once per new connection
+            "connect_delay_ms": connect_delay_ms,
+            # Token bucket of one second's worth of requests; 0 disables it
+            "rate_limit_per_sec": rate_limit_per_sec,
+            "retry_after_s": retry_after_s,
+        }
+        self.calls = Counter()
+        self.connections = 0
+        self._bucket = None
+        self.lock = threading.Lock()
+        self._server = None
+        self._thread = None
+        self._routes = [
+            (method, re.compile(f"^{pattern}$"), handler)
+            for method, pattern, handler in self.routes()
+        ]
+
+    # -- to be provided by subclasses -------------------------------------
+
+    def routes(self):
+        """List of (method, path regex, handler(request, match) -> Response)"""
+        return []
+
+    def reset(self):
+        """Clear per-run state (subclasses extend)"""
+        with self.lock:
+            self.calls.clear()
+            self.connections = 0
+
+    # -- lifecycle ----------------------------------------------------------
+
+    @property
+    def url(self):
+        return f"http://{config.STANDIN_HOST}:{self.port}"
+
+    def start(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                with standin.lock:
+                    standin.connections += 1
+                delay = standin.faults.get("connect_delay_ms") or 0
+                if delay:
+                    time.sleep(delay / 1000)
+
+            def _dispatch(self, method):
+                if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+                    body = self._read_chunked()
+                else:
+                    length = int(self.headers.get("Content-Length") or 0)
+                    body = self.rfile.read(length) if length else b""
+                response = standin.dispatch(method, self.path, self.headers, body)
+                self.send_response(response.status)
+                for key, value in response.headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(response.payload)))
+                self.end_headers()
+                self.wfile.write(response.payload)
+
+            def _read_chunked(self):
+                # Streaming clients (e.g. uploads from a file stream) send chunked bodies
+                chunks = []
+                while True:
+                    size = int(self.rfile.readline().split(b";")[0].strip(), 16)
+                    if size == 0:
+                        while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                            pass
+                        return b"".join(chunks)
+                    chunks.append(self.rfile.read(size))
+                    self.rfile.readline()
+
+            def do_GET(self):
+                self._dispatch("GET")
+
+            def do_POST(self):
+                self._dispatch("POST")
+
+            def do_PUT(self):
+                self._dispatch("PUT")
+
+            def do_PATCH(self):
+                self._dispatch("PATCH")
+
+            def do_DELETE(self):
+                self._dispatch("DELETE")
+
+        self._server = ThreadingHTTPServer((config.STANDIN_HOST, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # -- request handling ---------------------------------------------------
+
+    def dispatch(self, method, raw_path, headers, body):
+        parts = urlsplit(raw_path)
+        path = parts.path
+        request = {
+            "method": method,
+            "path": path,
+            "query": {k: v[-1] for k, v in parse_qs(parts.query).items()},
+            "headers": headers,
+            "body": body,
+        }
+
+        if path == "/__harness/stats":
+            return Response(body=self.stats())
+        if path == "/__harness/config" and method == "POST":
+            self.faults.update(json.loads(body or b"{}"))
+            return Response(body={"faults": self.faults})
+        if path == "/__harness/reset" and method == "POST":
+            self.reset()
+            return Response(body={"reset": True})
+
+        for route_method, pattern, handler in self._routes:
+            match = pattern.match(path)
+            if route_method == method and match:
+                self.count(f"{method} {re.sub(r'[(].*?[)]', '{id}', pattern.pattern[1:-1])}")
+                injected = self.inject_faults()
+                if injected:
+                    return injected
+                return handler(request, match)
+
+        self.count("unmatched")
+        return Response(404, {"error": f"No stand-in route for {method} {path}"})
+
+    def inject_faults(self):
+        if self.rate_limited():
+            self.count("throttled")
+            retry_after = self.faults.get("retry_after_s")
+            headers = {"Retry-After": str(retry_after)} if retry_after is not None else {}
+            return Response(429, {"errors": [{"detail": "Rate limit exceeded"}]}, headers=headers)
+        latency = self.faults.get("latency_ms") or 0
+        if latency:
+            time.sleep(latency / 1000)
+        if random.random() < (self.faults.get("error_rate") or 0):
+            self.count("injected_errors")
+            return Response(self.faults.get("error_status", 503), {"error": "injected fault"})
+        return None
+
+    def rate_limited(self):
+        rate = self.faults.get("rate_limit_per_sec") or 0
+        if not rate:
+            return False
+        now = time.monotonic()
+        with self.lock:
+            if self._bucket is None or self._bucket[2] != rate:
+                self._bucket = [rate, now, rate]
+            tokens, last, _ = self._bucket
+            tokens = min(rate, tokens + (now - last) * rate)
+            if tokens < 1:
+                self._bucket[:2] = [tokens, now]
+                return True
+            self._bucket[:2] = [tokens - 1, now]
+            return False
+
+    def count(self, key, amount=1):
+        with self.lock:
+            self.calls[key] += amount
+
+    def stats(self):
+        with self.lock:
+            return {"name": self.name, "calls": dict(self.calls), "connections": self.connections,
+                    "faults": dict(self.faults)}
+
+
+def json_body(request):
+    return json.loads(request["body"] or b"{}")
+
+
+def form_body(request):
+    return {k: v[-1] for k, v in parse_qs(request["body"].decode("utf-8")).items()}
+
+
+class RecaptchaStandIn(StandIn):
+    """
+    Google reCAPTCHA siteverify.
+
+    Tokens are `<verdict>:<action>:<nonce>` with verdict one of `valid`
+    (score 0.9), `low` (score 0.1) or `invalid`. Like Google, a token can only
+    be verified once; a second verification returns `timeout-or-duplicate`.
+    """
+
+    name = "recaptcha"
+
+    def __init__(self, *args, secret=config.RECAPTCHA_SECRET, **kwargs):
+        self.secret = secret
+        self.seen = set()
+        super().__init__(*args, **kwargs)
+
+    def routes(self):
+        return [("POST", "/recaptcha/api/siteverify", self.siteverify)]
+
+    def reset(self):
+        super().reset()
+        with self.lock:
+            self.seen.clear()
+
+    def siteverify(self, request, match):
+        form = form_body(request)
+        if form.get("secret") != self.secret:
+            return Response(body={"success": False, "error-codes": ["invalid-input-secret"]})
+
+        token = form.get("response", "")
+        with self.lock:
+            duplicate = token in self.seen
+            self.seen.add(token)
+        if duplicate:
+            self.count("duplicates")
+            return Response(body={"success": False, "error-codes": ["timeout-or-duplicate"]})
+
+        verdict, _, rest = token.partition(":")
+        action = rest.partition(":")[0]
+        if verdict not in ("valid", "low"):
+            return Response(body={"success": False, "error-codes": ["invalid-input-response"]})
+
+        return Response(body={
+            "success": True,
+            "score": 0.9 if verdict == "valid" else 0.1,
+            "action": action,
+            "challenge_ts": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "hostname": "localhost",
+        })
+
+
+class UplistingStandIn(StandIn):
+    """
+    Uplisting Connect API: properties, calendars and bookings.
+
+    Serves the deterministic fixtures from fixtures.py. Bookings created
+    through POST /v2/bookings are kept in memory and block their nights in
+    later calendar responses.
+    """
+
+    name = "uplisting"
+
+    def __init__(self, *args, **kwargs):
+        self.bookings = {}
+        self._next_booking_id = 900000
+        super().__init__(*args, **kwargs)
+
+    def routes(self):
+        return [
+            ("GET", "/users/me", self.me),
+            ("GET", "/properties", self.list_properties),
+            ("GET", r"/properties/(\w+)", self.get_property),
+            ("GET", r"/calendar/(\w+)", self.calendar),
+            ("GET", r"/bookings/(\w+)", self.list_bookings),
+            ("POST", "/v2/bookings", self.create_booking),
+        ]
+
+    def reset(self):
+        super().reset()
+        with self.lock:
+            self.bookings.clear()
+
+    def dispatch(self, method, raw_path, headers, body):
+        if not raw_path.startswith("/__harness") and not headers.get("Authorization"):
+            self.count("unauthorized")
+            return Response(401, {"error": "Missing credentials"})
+        return super().dispatch(method, raw_path, headers, body)
+
+    def me(self, request, match):
+        return Response(body={"data": {"id": "1", "type": "users", "attributes": {"email": "harness@example.com"}}})
+
+    def list_properties(self, request, match):
+        data, included = [], []
+        for property_id in fixtures.PROPERTY_IDS:
+            resource, extra = fixtures.build_property(property_id)
+            data.append(resource)
+            included.extend(extra)
+        return Response(body={"data": data, "included": included})
+
+    def get_property(self, request, match):
+        property_id = match.group(1)
+        if not fixtures.is_known_property(property_id):
+            return Response(404, {"errors": [{"detail": "Property not found"}]})
+        resource, included = fixtures.build_property(property_id)
+        return Response(body={"data": resource, "included": included})
+
+    def booked_nights(self, property_id):
+        nights = set()
+        with self.lock:
+            for booking in self.bookings.get(property_id, []):
+                start = fixtures.parse_date(booking["check_in"])
+                end = fixtures.parse_date(booking["check_out"])
+                # Uplisting rates are keyed by the morning after each night
+                nights.update(d for d in fixtures.date_range(start, end) if d != start)
+        return nights
+
+    def calendar(self, request, match):
+        property_id = match.group(1)
+        if not fixtures.is_known_property(property_id):
+            return Response(404, {"errors": [{"detail": "Property not found"}]})
+        try:
+            start = fixtures.parse_date(request["query"]["from"])
+            end = fixtures.parse_date(request["query"]["to"])
+        except (KeyError, ValueError):
+            return Response(422, {"errors": [{"detail": "from and to are required"}]})
+        booked = self.booked_nights(property_id)
+        days = [fixtures.calendar_day(property_id, d, d in booked) for d in fixtures.date_range(start, end)]
+        return Response(body={"calendar": {"property_id": property_id, "days": days}})
+
+    def list_bookings(self, request, match):
+        property_id = match.group(1)
+        # Like Uplisting, from/to select bookings by check-in date
+        first = request["query"].get("from", "0000-01-01")
+        last = request["query"].get("to", "9999-12-31")
+        with self.lock:
+            bookings = [b for b in self.bookings.get(property_id, []) if first <= b["check_in"] <= last]
+        return Response(body={"data": [
+            {"id": b["id"], "type": "bookings", "attributes": b} for b in bookings
+        ]})
+
+    def create_booking(self, request, match):
+        payload = json_body(request).get("data", {})
+        attrs = payload.get("attributes", {})
+        property_id = str(payload.get("relationships", {}).get("property", {}).get("data", {}).get("id", ""))
+        if not fixtures.is_known_property(property_id):
+            return Response(422, {"errors": [{"detail": "Unknown property"}]})
+
+        start = fixtures.parse_date(attrs["check_in"])
+        end = fixtures.parse_date(attrs["check_out"])
+        requested = {d for d in fixtures.date_range(start, end) if d != start}
+        if requested & self.booked_nights(property_id):
+            self.count("double_booking_rejected")
+            return Response(422, {"errors": [{"detail": "Dates are not available"}]})
+
+        with self.lock:
+            self._next_booking_id += 1
+            booking = {"id": str(self._next_booking_id), "property_id": property_id, **attrs}
+            self.bookings.setdefault(property_id, []).append(booking)
+        self.count("bookings_created")
+        return Response(201, {"data": {"id": booking["id"], "type": "bookings", "attributes": booking}})
+
+
+class StripeStandIn(StandIn):
+    """
+    Stripe PaymentIntents API.
+
+    Creates payment intents from form-encoded requests (nested params such as
+    metadata[key] are unflattened) and honours Idempotency-Key like Stripe: a
+    repeated key returns the original intent.
+    """
+
+    name = "stripe"
+
+    def __init__(self, *args, **kwargs):
+        self.intents = {}
+        self.idempotency = {}
+        self._next_id = 0
+        super().__init__(*args, **kwargs)
+
+    def routes(self):
+        return [
+            ("POST", "/v1/payment_intents", self.create_payment_intent),
+            ("GET", r"/v1/payment_intents/(\w+)", self.get_payment_intent),
+        ]
+
+    def reset(self):
+        super().reset()
+        with self.lock:
+            self.intents.clear()
+            self.idempotency.clear()
+
+    def dispatch(self, method, raw_path, headers, body):
+        if not raw_path.startswith("/__harness") and not headers.get("Authorization"):
+            return Response(401, {"error": {"type": "invalid_request_error", "message": "No API key provided"}})
+        return super().dispatch(method, raw_path, headers, body)
+
+    @staticmethod
+    def unflatten(form):
+        params = {}
+        for key, value in form.items():
+            match = re.match(r"^(\w+)\[(\w+)\]$", key)
+            if match:
+                params.setdefault(match.group(1), {})[match.group(2)] = value
+            else:
+                params[key] = value
+        return params
+
+    def create_payment_intent(self, request, match):
+        key = request["headers"].get("Idempotency-Key")
+        with self.lock:
+            if key and key in self.idempotency:
+                intent = self.intents[self.idempotency[key]]
+                replay = True
+            else:
+                params = self.unflatten(form_body(request))
+                self._next_id += 1
+                intent_id = f"pi_harness{self._next_id:08d}"
+                intent = {
+                    "id": intent_id,
+                    "object": "payment_intent",
+                    "amount": int(params["amount"]),
+                    "currency": params.get("currency", "chf"),
+                    "client_secret": f"{intent_id}_secret_harness",
+                    "status": "requires_payment_method",
+                    "metadata": params.get("metadata", {}),
+                    "description": params.get("description"),
+                    "created": int(time.time()),
+                }
+                self.intents[intent_id] = intent
+                if key:
+                    self.idempotency[key] = intent_id
+                replay = False
+        self.count("idempotent_replays" if replay else "payment_intents_created")
+        return Response(body=intent)
+
+    def get_payment_intent(self, request, match):
+        with self.lock:
+            intent = self.intents.get(match.group(1))
+        if not intent:
+            return Response(404, {"error": {"type": "invalid_request_error", "code": "resource_missing"}})
+        return Response(body=intent)
+
+
+class SanityStandIn(StandIn):
+    """
+    Sanity asset and query API plus an image origin to migrate from.
+
+    GET /images/<content>/<name>.jpg serves deterministic bytes per content
+    key, so two names with the same key are duplicate images. Uploaded assets
+    are stored by SHA-1 like Sanity does; uploading content that already
+    exists is counted as a duplicate upload.
+    """
+
+    name = "sanity"
+
+    def __init__(self, *args, image_kb=256, **kwargs):
+        self.image_kb = image_kb
+        self.assets = {}
+        super().__init__(*args, **kwargs)
+
+    def routes(self):
+        return [
+            ("GET", r"/images/([\w-]+)/([\w-]+)\.jpg", self.image),
+            ("POST", r"/(v[\d-]+)/assets/images/(\w+)", self.upload),
+            ("GET", r"/(v[\d-]+)/data/query/(\w+)", self.query),
+        ]
+
+    def reset(self):
+        super().reset()
+        with self.lock:
+            self.assets.clear()
+
+    @staticmethod
+    def image_bytes(content_key, kb):
+        return random.Random(content_key).randbytes(kb * 1024)
+
+    def image(self, request, match):
+        kb = int(request["query"].get("kb", self.image_kb))
+        payload = self.image_bytes(match.group(1), kb)
+        self.count("image_bytes_served", len(payload))
+        return Response(raw=payload, headers={"Content-Type": "image/jpeg"})
+
+    def upload(self, request, match):
+        if not request["headers"].get("Authorization"):
+            return Response(401, {"error": "Unauthorized"})
+        sha1 = hashlib.sha1(request["body"]).hexdigest()
+        dataset = match.group(2)
+        with self.lock:
+            duplicate = sha1 in self.assets
+            if not duplicate:
+                self.assets[sha1] = {
+                    "_id": f"image-{sha1}-1920x1280-jpg",
+                    "_type": "sanity.imageAsset",
+                    "sha1hash": sha1,
+                    "size": len(request["body"]),
+                    "originalFilename": request["query"].get("filename"),
+                    "url": f"https://cdn.sanity.io/images/harness/{dataset}/{sha1}-1920x1280.jpg",
+                }
+            document = self.assets[sha1]
+        self.count("duplicate_uploads" if duplicate else "assets_created")
+        self.count("bytes_uploaded", len(request["body"]))
+        return Response(body={"document": document})
+
+    def query(self, request, match):
+        # Only the sha1hash lookup the migration engine issues is supported
+        sha1 = json.loads(request["query"].get("$hash", "null"))
+        with self.lock:
+            asset = self.assets.get(sha1)
+        result = {"_id": asset["_id"], "url": asset["url"]} if asset else None
+        return Response(body={"ms": 1, "query": request["query"].get("query"), "result": result})
+
+
+STANDINS = {
+    RecaptchaStandIn.name: RecaptchaStandIn,
+    UplistingStandIn.name: UplistingStandIn,
+    StripeStandIn.name: StripeStandIn,
+    SanityStandIn.name: SanityStandIn,
+}
+
+
+def fetch_stats(name):
+    """Read call counters from a stand-in, possibly running in another process"""
+    return requests.get(f"{config.standin_url(name)}/__harness/stats", timeout=5).json()
+
+
+def configure(name, **faults):
+    """Change fault injection on a running stand-in"""
+    return requests.post(f"{config.standin_url(name)}/__harness/config", json=faults, timeout=5).json()
+
+
+def reset(name):
+    return requests.post(f"{config.standin_url(name)}/__harness/reset", timeout=5).json()